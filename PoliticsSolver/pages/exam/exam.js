@@ -14,7 +14,7 @@ Page({
     wrongCount: 0,       // 错误题目数量
     score: 0,            // 考试得分
     accuracy: '0.0',     // 正确率
-    answers: {},         // 用户答案记录 {题目ID: {selectedOption, isCorrect}}
+    answers: {},         // 用户答案记录 {题目ID: {userAnswer, isCorrect}}
     startTime: 0,        // 开始时间戳
     endTime: 0,          // 结束时间戳
     examRecordId: null,  // 考试记录ID
@@ -89,11 +89,23 @@ Page({
   
   // 题目选择事件
   onTopicSelect: function(e) {
-    const { topicId, selectedOption, isCorrect } = e.detail
+    const { index, selectedOptions, isCorrect } = e.detail
+    // 选择选项时的事件只带题目序号，没有 topicId
+    const question = this.data.questions[index]
+    const topicId = e.detail.topicId || (question && question.id)
+    if (!topicId) return
     
-    // 更新答题记录
+    // 选中的选项字母按顺序拼接，例如多选题 "AC"
+    const options = selectedOptions || {}
+    const userAnswer = Object.keys(options).filter(k => options[k]).sort().join('')
+    
+    // 更新答题记录，多选题取消了全部选项时视为未作答
     const answers = { ...this.data.answers }
-    answers[topicId] = { selectedOption, isCorrect }
+    if (userAnswer) {
+      answers[topicId] = { userAnswer, isCorrect }
+    } else {
+      delete answers[topicId]
+    }
     
     // 统计已答题数和正确/错误数
     const answeredCount = Object.keys(answers).length
@@ -194,7 +206,7 @@ Page({
       if (answer) {
         details.push({
           topicId: question.id,
-          userAnswer: answer.selectedOption,
+          userAnswer: answer.userAnswer,
           isCorrect: answer.isCorrect
         })
       }
@@ -238,8 +250,9 @@ Page({
         wx.hideLoading()
         
         if (res.data.code === 0) {
-          // 计算正确率
-          const accuracy = (this.data.correctCount / this.data.totalQuestions * 100).toFixed(1)
+          // 得分以服务端判分结果为准（错题和做题进度已由服务端在同一次提交中记录）
+          const result = res.data.data
+          const accuracy = (result.correctCount / result.totalQuestions * 100).toFixed(1)
           
           // 保存考试记录ID
           this.setData({
@@ -248,9 +261,11 @@ Page({
             endTime: Date.now(),
             usedTime: usedTime,
             usedTimeText: usedTimeText,
-            score: score,
+            score: result.score,
+            correctCount: result.correctCount,
+            wrongCount: result.wrongCount,
             accuracy: accuracy,
-            examRecordId: res.data.data.recordId
+            examRecordId: result.recordId
           })
         } else {
           wx.showToast({
@@ -205,17 +205,16 @@ Page({
     
     const monthsParam = monthsArray.join(',');
     
-    // 同时请求总题数和已完成题数
-    Promise.all([
-      // 获取每月总题数
-      request.get('/api/topics/count-by-month', {
-        months: monthsParam
-      }, false),
-      // 获取用户每月完成题数（需要登录）
-      request.get('/api/user/month-progress', {
-        months: monthsParam
-      }, true).catch(() => ({ data: [] })) // 如果未登录，返回空数据
-    ]).then(([totalRes, progressRes]) => {
+    // 已登录时通过月份面板接口一次获取总题数和已完成题数，未登录时只获取总题数
+    const loadMonthly = this.data.hasLogin
+      ? request.get('/api/user/month-dashboard', {
+          months: monthsParam
+        }, true).then(res => [res, res])
+      : request.get('/api/topics/count-by-month', {
+          months: monthsParam
+        }, false).then(res => [res, { data: [] }]);
+
+    loadMonthly.then(([totalRes, progressRes]) => {
       const monthlyData = [];
       
       // 遍历月份，构建数据
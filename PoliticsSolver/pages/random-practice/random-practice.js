@@ -122,7 +122,7 @@ Page({
     this.recordProgress(topicId, month)
   },
 
-  // 记录答题进度
+  // 记录答题进度（先缓存在本地，练习结束或离开页面时批量提交）
   recordProgress: function(topicId, month) {
     const userInfo = app.globalData.userInfo
     if (!userInfo) {
@@ -130,11 +130,27 @@ Page({
       return;
     }
 
-    const request = require('../../utils/request.js');
-    
-    request.post('/api/progress/finish-topic', {
+    if (!this._pendingProgress) {
+      this._pendingProgress = []
+    }
+    this._pendingProgress.push({
       topicId: topicId,
       month: month
+    })
+  },
+
+  // 批量提交答题进度
+  flushProgress: function() {
+    const items = this._pendingProgress
+    if (!items || items.length === 0) {
+      return;
+    }
+    this._pendingProgress = []
+
+    const request = require('../../utils/request.js');
+
+    request.post('/api/progress/finish-topics', {
+      items: items
     }, true).then(res => {
       console.log('进度记录成功:', res);
     }).catch(err => {
@@ -142,6 +158,14 @@ Page({
     });
   },
 
+  onHide: function() {
+    this.flushProgress()
+  },
+
+  onUnload: function() {
+    this.flushProgress()
+  },
+
   // 下一题
   onNextTopic: function() {
     const nextIndex = this.data.currentIndex + 1
@@ -158,6 +182,8 @@ Page({
 
   // 显示结果
   showResults: function() {
+    this.flushProgress()
+
     const userAnswers = this.data.userAnswers
     let correctCount = 0
     let wrongCount = 0
@@ -1,3 +1,6 @@
+// 缓存的答题进度达到该数量时立即提交（后端单次最多 200 条）
+const PROGRESS_BATCH_SIZE = 20
+
 Page({
   data: {
     type: '',     // 分类类型：month(月份) 或 region(地区)
@@ -5,6 +8,7 @@ Page({
     topicList: [], // 题目列表
     pageNum: 1,   // 当前页码
     pageSize: 10, // 每页数量
+    nextCursor: '', // 下一页游标
     hasMore: true, // 是否有更多数据
     showAllAnswers: false, // 是否显示所有答案
     userAnswers: {}, // 用户的答题记录 {题目索引: 选项}
@@ -69,9 +73,9 @@ Page({
       title: '加载中...'
     })
     
-    // 后端API请求参数
+    // 后端API请求参数（游标分页，首页传空游标）
     const params = {
-      page: 1,
+      cursor: '',
       size: this.data.pageSize
     }
     
@@ -98,7 +102,8 @@ Page({
       that.setData({
         topicList: topics,
         pageNum: 1,
-        hasMore: topics.length >= that.data.pageSize
+        nextCursor: res.data.nextCursor || '',
+        hasMore: !!res.data.hasMore
       })
     }).catch(err => {
       console.error('获取题目失败', err)
@@ -123,9 +128,9 @@ Page({
       pageNum: this.data.pageNum + 1
     })
     
-    // 后端API请求参数
+    // 后端API请求参数（从上一页的游标继续，已答题目被排除后也不会跳过题目）
     const params = {
-      page: this.data.pageNum,
+      cursor: this.data.nextCursor,
       size: this.data.pageSize
     }
     
@@ -151,7 +156,8 @@ Page({
       
       that.setData({
         topicList: [...that.data.topicList, ...newTopics],
-        hasMore: newTopics.length >= that.data.pageSize
+        nextCursor: res.data.nextCursor || '',
+        hasMore: !!res.data.hasMore
       })
     }).catch(err => {
       console.error('加载更多题目失败', err)
@@ -167,23 +173,8 @@ Page({
   // 题目选择事件
   onTopicSelect: function(e) {
     const { selectedOptions, index } = e.detail
-    // console.log('事件来源', e.detail.source)
-    // 防止重复处理同一题目
-    const topicId = this.data.topicList[index]?.id
-    if (!topicId) return
-    
-    // 使用题目ID作为键来防止重复处理
-    if (!this._processingTopics) {
-      this._processingTopics = {}
-    }
-    
-    if (this._processingTopics[topicId]) {
-      console.log('题目正在处理中，忽略重复事件:', topicId)
-      return
-    }
-    
-    this._processingTopics[topicId] = true
-    console.log('开始处理题目选择:', topicId)
+    const topic = this.data.topicList[index]
+    if (!topic || !topic.id) return
     
     // 记录用户选择
     let userAnswers = { ...this.data.userAnswers }
@@ -192,12 +183,9 @@ Page({
     this.setData({
       userAnswers
     })
-
-    // 获取题目信息
-    const topic = this.data.topicList[index]
     
     // 如果是单选题，立即显示答案和解析
-    if (topic && topic.type === 1) {
+    if (topic.type === 1) {
       // 更新题目列表，标记该题已回答并显示答案
       const topicList = [...this.data.topicList]
       topicList[index].isAnswered = true
@@ -210,48 +198,75 @@ Page({
     
     // 注意：添加错题的逻辑已经在 topic-card 组件中处理，这里不需要重复调用
     
-    // 更新题目进度到后端
+    // 记录答题进度（先缓存在本地，攒够一批或离开页面时批量提交）
+    this.recordProgress(topic)
+  },
+  
+  // 缓存答题进度，同一道题只记录一次
+  recordProgress: function(topic) {
     const app = getApp();
-    
-    // 检查是否已登录
-    if (app.globalData.hasLogin && app.globalData.userInfo) {
-      const requestData = {
-        topicId: topic.id,
-        month: this.data.type === 'month' ? parseInt(this.data.value) : null
-      };
-      
-      console.log('发送完成题目请求：', requestData);
-      
-      const request = require('../../utils/request.js')
-      const that = this
-      request.post('/api/progress/finish-topic', requestData, true).then(res => {
-        console.log('题目进度更新成功', res)
-        // 更新个人中心的统计数据
-        if (app.updateStatistics) {
-          console.log('调用全局updateStatistics方法更新统计数据');
-          app.updateStatistics();
-        }
-      }).catch(err => {
-        console.error('题目进度更新失败', err)
-        console.error('请求数据:', requestData);
-        wx.showToast({
-          title: '进度更新失败',
-          icon: 'none'
-        })
-      }).finally(() => {
-        // 重置处理标志
-        if (that._processingTopics && topicId) {
-          delete that._processingTopics[topicId]
-          console.log('完成处理题目:', topicId)
-        }
-      })
-    } else {
+    if (!app.globalData.hasLogin || !app.globalData.userInfo) {
       console.warn('无法更新题目进度：用户未登录');
-      // 即使未登录也要重置标志
-      if (this._processingTopics && topicId) {
-        delete this._processingTopics[topicId]
-      }
+      return;
     }
+    
+    const month = this.data.type === 'month' ? parseInt(this.data.value) : topic.month
+    if (!month) {
+      return;
+    }
+    
+    if (!this._recordedTopics) {
+      this._recordedTopics = {}
+      this._pendingProgress = []
+    }
+    if (this._recordedTopics[topic.id]) {
+      return;
+    }
+    this._recordedTopics[topic.id] = true
+    this._pendingProgress.push({
+      topicId: topic.id,
+      month: month
+    })
+    
+    if (this._pendingProgress.length >= PROGRESS_BATCH_SIZE) {
+      this.flushProgress()
+    }
+  },
+  
+  // 批量提交答题进度
+  flushProgress: function() {
+    const items = this._pendingProgress
+    if (!items || items.length === 0) {
+      return;
+    }
+    this._pendingProgress = []
+    
+    const app = getApp();
+    const request = require('../../utils/request.js')
+    const that = this
+    request.post('/api/progress/finish-topics', {
+      items: items
+    }, true).then(res => {
+      console.log('题目进度更新成功', res)
+      // 更新个人中心的统计数据
+      if (app.updateStatistics) {
+        app.updateStatistics();
+      }
+    }).catch(err => {
+      console.error('题目进度更新失败', err)
+      // 提交失败的题目允许再次记录
+      items.forEach(item => {
+        delete that._recordedTopics[item.topicId]
+      })
+    })
+  },
+  
+  onHide: function() {
+    this.flushProgress()
+  },
+  
+  onUnload: function() {
+    this.flushProgress()
   },
   
   // 提交所有答案（考试模式新增）
@@ -1,38 +1,76 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from dotenv import load_dotenv
 import datetime
 import os
-import logging
 import json
-import random
-import requests
-import hashlib
 import jwt
-from middleware.auth import token_required, optional_token
+from sqlalchemy import insert, select
+from middleware.auth import create_token, init_auth, token_cache_stats, token_required
+from middleware.compression import ResponseCompressor
+from middleware.conditional import conditional_get
+from middleware.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, RequestMetrics
+from mysql.pool import build_database_url, build_engine_options, pool_metrics
+from services.answered_set import AnsweredSetCache
+from services.cache import CachedValue, VersionTracker
+from services.exam_grading import calculate_score, grade_exam, normalize_answer
+from services.json_fragments import FragmentJSONProvider
+from services.metrics import COUNTER, GAUGE
+from services.mistake_stats import increment_mistake_stats
+from services.pagination import (
+    clamp_page_size, decode_cursor, encode_cursor, fetch_keyset_page, parse_cursor_id, parse_cursor_time
+)
+from services.topic_catalog import TopicCatalog, TopicRecord
+from services.user_stats import (
+    adjust_counters, apply_mistake_changes, compute_user_stats, empty_stat, insert_user_stats,
+    read_user_stat, reset_counters, save_user_stat
+)
+from services.topic_export import EXPORT_FIELDS, gzip_chunks, iter_json, iter_ndjson
+from services.topic_import import content_hash, upsert_topics
+from services.topic_sampler import TopicSampler, build_month_predicate
+from services.wechat import WeChatClient, WeChatError, WeChatUnavailable
 
 # 加载环境变量
 load_dotenv()
 
+# 加载 JWT 签名密钥并创建已验证token缓存（AUTH_TOKEN_CACHE_SIZE / AUTH_TOKEN_CACHE_TTL）
+init_auth()
+
+# 微信接口客户端（连接池、超时、重试和并发上限见 services/wechat.py）
+wechat_client = WeChatClient.from_env()
+
 # 初始化 Flask 应用
 app = Flask(__name__)
+# jsonify 直接拼接题目目录中预序列化的题目片段，输出与默认 provider 一致
+app.json = FragmentJSONProvider(app)
+
+# 响应压缩：按 Accept-Encoding 协商 brotli / gzip，题库类接口的压缩结果按 ETag 缓存
+compressor = None
+if os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true':
+    compressor = ResponseCompressor.from_env(app)
 
 # 配置日志系统
 from config.logging import setup_logging
 setup_logging(app)
+# 登录日志使用子 logger，可以通过 LOG_SAMPLING=app.login=0.1 单独采样
+login_logger = app.logger.getChild('login')
 
-# 配置数据库连接
-app.config['SQLALCHEMY_DATABASE_URI'] = 'mysql+pymysql://{}:{}@{}/{}'.format(
-    os.environ.get('MYSQL_USER', 'root'),
-    os.environ.get('MYSQL_PASSWORD', ''),
-    os.environ.get('MYSQL_HOST', 'localhost'), # docker - mysql
-    os.environ.get('MYSQL_DATABASE', 'sz_exam')
-)
+# 配置数据库连接（可通过 DATABASE_URL 覆盖，例如测试时使用 SQLite）
+# 连接池大小、回收、预检和语句超时由 mysql/pool.py 按环境变量统一配置
+app.config['SQLALCHEMY_DATABASE_URI'] = build_database_url()
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 # 初始化数据库
 db = SQLAlchemy(app)
 
+# 请求指标：按路由统计耗时、SQL 语句数和时间、连接池等待，/metrics 合并各 worker 后输出 Prometheus 文本格式
+request_metrics = None
+if os.environ.get('METRICS_ENABLED', 'true').lower() == 'true':
+    request_metrics = RequestMetrics.from_env(app)
+    with app.app_context():
+        request_metrics.instrument_engine(db.engine)
+
 # 定义数据模型
 class User(db.Model):
     id = db.Column(db.BigInteger, primary_key=True)
@@ -43,8 +81,17 @@ class User(db.Model):
     last_login = db.Column(db.DateTime, default=datetime.datetime.now)
 
 class Topic(db.Model):
+    __table_args__ = (
+        # 规范化题干哈希 + 月份唯一，导入时据此去重
+        db.UniqueConstraint('content_hash', 'month', name='uk_content_month'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
+    content_hash = db.Column(
+        db.String(64),
+        default=lambda context: content_hash(context.get_current_parameters()['content'])
+    )
     type_id = db.Column(db.Integer, nullable=False)  # 1-单选，2-多选，3-判断
     options = db.Column(db.Text)  # JSON格式存储选项
     answer = db.Column(db.String(16), nullable=False)
@@ -55,6 +102,10 @@ class Topic(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.datetime.now)
 
 class UserMistake(db.Model):
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'topic_id', name='uk_user_topic'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.BigInteger, db.ForeignKey('user.id'), nullable=False)
     topic_id = db.Column(db.Integer, db.ForeignKey('topic.id'), nullable=False)
@@ -96,6 +147,10 @@ class ExamDetail(db.Model):
     topic = db.relationship('Topic', backref=db.backref('exam_details', lazy=True))
 
 class UserTopicProgress(db.Model):
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'topic_id', 'month', name='uk_user_topic_month'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.BigInteger, db.ForeignKey('user.id'), nullable=False)
     topic_id = db.Column(db.Integer, db.ForeignKey('topic.id'), nullable=False)
@@ -105,6 +160,282 @@ class UserTopicProgress(db.Model):
     user = db.relationship('User', backref=db.backref('topic_progress', lazy=True))
     topic = db.relationship('Topic', backref=db.backref('user_progress', lazy=True))
 
+class UserMistakeStat(db.Model):
+    """用户每道题的答错次数，考试提交和添加错题时增量更新"""
+    __table_args__ = (
+        db.Index('idx_user_wrong', 'user_id', 'wrong_count', 'topic_id'),
+    )
+    
+    user_id = db.Column(db.BigInteger, db.ForeignKey('user.id'), primary_key=True)
+    topic_id = db.Column(db.Integer, db.ForeignKey('topic.id'), primary_key=True)
+    wrong_count = db.Column(db.Integer, nullable=False, default=0)
+    last_wrong_at = db.Column(db.DateTime)
+
+class UserStat(db.Model):
+    """用户统计汇总，错题、收藏、完成进度接口在同一事务中更新，统计接口按主键读取"""
+    user_id = db.Column(db.BigInteger, db.ForeignKey('user.id'), primary_key=True)
+    mistake_count = db.Column(db.Integer, nullable=False, default=0)
+    favorite_count = db.Column(db.Integer, nullable=False, default=0)
+    done_count = db.Column(db.Integer, nullable=False, default=0)
+    # 错题按题型、按月份的分布，JSON 文本，例如 {"1":3,"2":1}
+    mistakes_by_type = db.Column(db.String(512), nullable=False, default='{}')
+    mistakes_by_month = db.Column(db.String(512), nullable=False, default='{}')
+    # 用户注册时间，计算使用天数时不再查询 user 表
+    registered_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.datetime.now, onupdate=datetime.datetime.now)
+
+class TopicBankVersion(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.datetime.now)
+
+
+# 进程内题目缓存的有效期（秒），题库版本号变化时会提前刷新
+TOPIC_CACHE_TTL = int(os.environ.get('TOPIC_CACHE_TTL', 300))
+
+# 题目目录查询的列，顺序与 TopicRecord 构造参数一致
+TOPIC_COLUMNS = (
+    Topic.id, Topic.content, Topic.type_id, Topic.options, Topic.answer, Topic.analysis,
+    Topic.category_id, Topic.region, Topic.month, Topic.created_at
+)
+
+def load_topic_bank_version():
+    """
+    读取题库版本号，版本表中没有记录时返回 0
+
+    版本检查由 get_topic_records 等在请求中途触发，在请求会话的连接上执行，不从连接池另取连接
+    （gthread 模式下连接池大小等于线程数，另取连接在所有线程都持有连接时要等待 DB_POOL_TIMEOUT）。
+    查询放在 SAVEPOINT 中，失败时（例如未建版本表）只回滚保存点，请求中尚未提交的写入和行锁不受影响；
+    异常继续抛出，由 VersionTracker 保留上次读取的版本号
+    """
+    try:
+        with db.session.begin_nested():
+            return db.session.execute(
+                select(TopicBankVersion.version).where(TopicBankVersion.id == 1)
+            ).scalar() or 0
+    except Exception as e:
+        app.logger.warning(f"Load topic bank version error: {str(e)}")
+        raise
+
+# 题库版本号：批量导入和PDF导入后递增，各 worker 据此刷新进程内的题目缓存
+topic_bank_version = VersionTracker(
+    load_topic_bank_version,
+    check_interval=int(os.environ.get('TOPIC_VERSION_CHECK_INTERVAL', 5))
+)
+
+# 题目目录：按ID查找预解析的题目记录
+topic_catalog = TopicCatalog(
+    lambda: db.session.query(*TOPIC_COLUMNS).all(),
+    ttl=TOPIC_CACHE_TTL,
+    version=topic_bank_version.current
+)
+
+# 题目随机抽样器：缓存题目ID，避免 ORDER BY RAND() 全表排序
+topic_sampler = TopicSampler(
+    lambda: ((record.id, record.month, record.type_id) for record in topic_catalog.records()),
+    refresh_interval=TOPIC_CACHE_TTL,
+    version=topic_bank_version.current
+)
+
+# 各月份题目总数缓存：一次 GROUP BY month 查询
+topic_month_totals = CachedValue(
+    lambda: dict(
+        db.session.query(Topic.month, db.func.count(Topic.id)).group_by(Topic.month).all()
+    ),
+    ttl=TOPIC_CACHE_TTL,
+    version=topic_bank_version.current
+)
+
+# 题库类接口的条件请求：ETag 由题库版本号和查询参数生成，未变化时返回 304
+CATALOG_CACHE_MAX_AGE = int(os.environ.get('CATALOG_CACHE_MAX_AGE', 60))
+catalog_conditional_get = conditional_get(topic_bank_version.current, max_age=CATALOG_CACHE_MAX_AGE)
+
+# 用户已答题目位图：题目列表 excludeAnswered 在内存中过滤，设置为 false 时回退到 SQL 子查询
+ANSWERED_SET_ENABLED = os.environ.get('ANSWERED_SET_ENABLED', 'true').lower() == 'true'
+answered_sets = AnsweredSetCache(
+    lambda user_id: [
+        row[0] for row in db.session.query(UserTopicProgress.topic_id).filter_by(user_id=user_id).distinct()
+    ],
+    max_users=int(os.environ.get('ANSWERED_SET_MAX_USERS', 1024)),
+    ttl=int(os.environ.get('ANSWERED_SET_TTL', 60))
+)
+
+def bump_topic_bank_version():
+    """递增题库版本号，使所有 worker 的进程内题目缓存失效"""
+    updated = db.session.query(TopicBankVersion).filter_by(id=1).update({
+        TopicBankVersion.version: TopicBankVersion.version + 1,
+        TopicBankVersion.updated_at: datetime.datetime.now()
+    }, synchronize_session=False)
+    if not updated:
+        db.session.add(TopicBankVersion(id=1, version=1))
+    db.session.commit()
+    # 当前 worker 立即重新读取版本号
+    topic_bank_version.invalidate()
+
+def get_topic_records(topic_ids):
+    """
+    按ID获取题目记录并保持传入顺序
+    目录缓存未命中的题目（例如其他进程刚导入、版本号尚未刷新）从数据库补充
+    """
+    records = topic_catalog.get_many(topic_ids)
+    missing_ids = [topic_id for topic_id in topic_ids if topic_id not in records]
+    if missing_ids:
+        rows = db.session.query(*TOPIC_COLUMNS).filter(Topic.id.in_(missing_ids)).all()
+        for row in rows:
+            record = TopicRecord(*row)
+            records[record.id] = record
+    # 已被删除的题目直接跳过
+    return [records[topic_id] for topic_id in topic_ids if topic_id in records]
+
+def lock_user_stat(user_id):
+    """
+    锁定并读取用户统计行，错题写操作在修改错题之前调用，保证同一用户的错题分布按顺序更新
+    统计行不存在时返回 None，写操作跳过统计更新，首次读取统计时再由明细表构建（见 get_user_stat）
+    """
+    return read_user_stat(db.session, UserStat.__table__, user_id, for_update=True)
+
+def get_user_stat(user_id):
+    """
+    按主键读取用户统计，不存在时由明细表计算并保存
+    用户不存在时返回全部为零的统计（不保存）
+    
+    先 INSERT IGNORE 全部为零的统计行并锁定，再在锁内由明细表计算：
+    已提交的写操作的明细都能被计算到，之后的写操作能找到统计行（或等待行锁释放后再累加），
+    不会出现写操作因统计行不存在而跳过、随后写入的统计行又没有包含这次写入的情况
+    """
+    stat = read_user_stat(db.session, UserStat.__table__, user_id)
+    if stat is not None:
+        return stat
+    
+    try:
+        # 结束读取统计行的事务，计算使用的一致性读在锁定统计行之后开始
+        db.session.commit()
+        insert_user_stats(db.session, UserStat.__table__, [empty_stat(user_id)])
+        lock_user_stat(user_id)
+        stat = compute_user_stats(db.session, [user_id]).get(user_id)
+        if stat is None:
+            db.session.rollback()
+            return empty_stat(user_id)
+        insert_user_stats(db.session, UserStat.__table__, [stat], replace=True)
+        db.session.commit()
+        return stat
+    except Exception as e:
+        db.session.rollback()
+        app.logger.warning(f"Save user stat error: {str(e)}")
+    return compute_user_stats(db.session, [user_id]).get(user_id) or empty_stat(user_id)
+
+def build_user_topic_items(rows, with_stats=False):
+    """
+    构建错题、收藏列表的响应数据
+    rows 为包含 topic_id、created_at 列的查询结果；
+    with_stats 为 True 时 rows 还包含 wrong_count、last_wrong_at 列，输出答错次数和最近答错时间
+    """
+    records = {record.id: record for record in get_topic_records([row.topic_id for row in rows])}
+    
+    result = []
+    for row in rows:
+        record = records.get(row.topic_id)
+        if record is None:
+            continue
+        extra = {'createdAt': row.created_at.strftime('%Y-%m-%d %H:%M:%S')}
+        if with_stats:
+            extra['wrongCount'] = row.wrong_count
+            extra['lastWrongAt'] = row.last_wrong_at and row.last_wrong_at.strftime('%Y-%m-%d %H:%M:%S')
+        # 使用 topic.id 作为主键，保持与其他接口一致
+        result.append(record.fragment(
+            ('id', 'content', 'type', 'options', 'answer', 'analysis', 'month', 'region'), extra
+        ))
+    return result
+
+def query_unanswered_topics(user_id, type_id=None, month=None, region=None, offset=0, limit=10,
+                            before_id=None, with_total=False):
+    """
+    按ID倒序扫描题目目录，跳过用户已答的题目
+
+    Args:
+        user_id: 用户ID
+        type_id: 题型筛选
+        month: 月份筛选
+        region: 地区筛选
+        offset: 跳过的题目数（页码分页）
+        limit: 返回的最大题目数
+        before_id: 只返回ID小于该值的题目（游标分页）
+        with_total: 是否统计未答题目总数
+
+    Returns:
+        tuple: (题目记录列表, 未答题目总数)，不统计总数时总数为 None
+    """
+    answered = answered_sets.get(user_id)
+
+    def matches(record):
+        return (
+            (not type_id or record.type_id == type_id)
+            and (not month or record.month == month)
+            and (not region or record.region == region)
+        )
+
+    records = []
+    for record in topic_catalog.iter_desc(before_id):
+        if record.id in answered or not matches(record):
+            continue
+        if offset:
+            offset -= 1
+            continue
+        records.append(record)
+        if len(records) >= limit:
+            break
+
+    total = None
+    if with_total:
+        # 总数 = 符合筛选条件的题目数 - 其中已答的题目数，只需遍历已答题目
+        answered_records = topic_catalog.get_many(list(answered))
+        total = topic_catalog.count(type_id, month, region) - sum(
+            1 for record in answered_records.values() if matches(record)
+        )
+    return records, total
+
+def apply_time_cursor(query, model, cursor):
+    """
+    按 (created_at, id) 倒序排列，并定位到游标之后的记录
+    对应 (user_id, created_at, id) 联合索引
+    """
+    if cursor:
+        created_at, last_id = decode_cursor(cursor, 2)
+        created_at = parse_cursor_time(created_at)
+        last_id = parse_cursor_id(last_id)
+        query = query.filter(db.or_(
+            model.created_at < created_at,
+            db.and_(model.created_at == created_at, model.id < last_id)
+        ))
+    return query.order_by(model.created_at.desc(), model.id.desc())
+
+def apply_frequency_cursor(query, cursor):
+    """
+    按 (wrong_count, topic_id) 倒序排列，并定位到游标之后的记录
+    对应 user_mistake_stat 的 (user_id, wrong_count, topic_id) 联合索引
+    """
+    if cursor:
+        wrong_count, last_topic_id = decode_cursor(cursor, 2)
+        wrong_count = parse_cursor_id(wrong_count)
+        last_topic_id = parse_cursor_id(last_topic_id)
+        query = query.filter(db.or_(
+            UserMistakeStat.wrong_count < wrong_count,
+            db.and_(UserMistakeStat.wrong_count == wrong_count, UserMistakeStat.topic_id < last_topic_id)
+        ))
+    return query.order_by(UserMistakeStat.wrong_count.desc(), UserMistakeStat.topic_id.desc())
+
+def cursor_page_data(result, size, has_more, next_cursor, total=None):
+    """构建游标分页的响应数据，total 仅在请求 withTotal 时返回"""
+    data = {
+        'list': result,
+        'size': size,
+        'hasMore': has_more,
+        'nextCursor': next_cursor if has_more else None
+    }
+    if total is not None:
+        data['total'] = total
+    return data
+
 
 # 全局错误处理器
 @app.errorhandler(Exception)
@@ -139,9 +470,10 @@ def health_check():
 def login():
     try:
         data = request.json
-        app.logger.info(f"Login request data: {data}")
         code = data.get('code')
         user_info = data.get('userInfo', {})
+        # 登录凭证 code 不写入日志；高频日志使用 %s 参数，被 LOG_SAMPLING 过滤时不格式化
+        login_logger.info('Login request: has_code=%s, nickname=%s', bool(code), user_info.get('nickName'))
         
         # 检查是否为调试模式
         debug_mode = os.environ.get('DEBUG_MODE', '').lower() == 'true'
@@ -153,11 +485,8 @@ def login():
             app.logger.info("Using debug mode with fixed openid")
         else:
             # 生产模式或非调试模式，调用微信接口
-            # 从环境变量获取微信小程序的 AppID 和 AppSecret
-            appid = os.environ.get('WECHAT_APPID')
-            secret = os.environ.get('WECHAT_SECRET')
-            
-            if not appid or not secret:
+            # 微信小程序的 AppID 和 AppSecret 在启动时从环境变量读取
+            if not wechat_client.configured:
                 app.logger.error("Missing WECHAT_APPID or WECHAT_SECRET in environment variables")
                 return jsonify({
                     'code': 1,
@@ -173,22 +502,23 @@ def login():
                 }), 400
             
             # 调用微信接口获取 openid
-            wechat_url = f"https://api.weixin.qq.com/sns/jscode2session?appid={appid}&secret={secret}&js_code={code}&grant_type=authorization_code"
-            response = requests.get(wechat_url)
-            wechat_data = response.json()
-            
-            app.logger.info(f"WeChat API response: {wechat_data}")
-            
-            if 'errcode' in wechat_data:
-                app.logger.error(f"WeChat API error: {wechat_data}")
+            try:
+                wechat_data = wechat_client.code2session(code)
+            except WeChatError as e:
+                app.logger.error(f"WeChat API error: {e}")
                 return jsonify({
                     'code': 1,
                     'message': '微信登录失败',
-                    'error': wechat_data.get('errmsg')
+                    'error': e.errmsg
                 }), 400
+            except WeChatUnavailable as e:
+                app.logger.error(f"WeChat API unavailable: {e}")
+                return jsonify({
+                    'code': 1,
+                    'message': '微信服务繁忙，请稍后重试'
+                }), 503
             
             openid = wechat_data.get('openid')
-            session_key = wechat_data.get('session_key')
             if not openid:
                 app.logger.error("Failed to get openid from WeChat")
                 return jsonify({
@@ -213,6 +543,9 @@ def login():
             if user_info.get('avatarUrl'):
                 user.avatar_url = user_info.get('avatarUrl')
         
+        # 只记录 openid，session_key 不写入日志
+        login_logger.info('Login success: user_id=%s, openid=%s', user.id, openid)
+        
         # 生成自定义登录态 token
         token_data = {
             'user_id': user.id,
@@ -220,9 +553,8 @@ def login():
             'exp': datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=7)  # 7天过期
         }
         
-        # 使用 SECRET_KEY 作为 JWT 密钥
-        secret_key = os.environ.get('SECRET_KEY', 'fallback_secret_key_for_development')
-        token = jwt.encode(token_data, secret_key, algorithm='HS256')
+        # 使用启动时加载的 SECRET_KEY 作为 JWT 密钥
+        token = create_token(token_data)
         
         db.session.commit()
         
@@ -247,6 +579,12 @@ def login():
 
 # 获取题目列表
 @app.route('/api/topics', methods=['GET'])
+@conditional_get(
+    topic_bank_version.current,
+    max_age=CATALOG_CACHE_MAX_AGE,
+    # 排除已答题目的结果随用户进度变化，不参与条件请求
+    bypass=lambda: bool(request.args.get('excludeAnswered', False, type=bool) and request.args.get('userId', type=int))
+)
 def get_topics():
     page = request.args.get('page', 1, type=int)
     size = request.args.get('size', 10, type=int)
@@ -255,6 +593,49 @@ def get_topics():
     region = request.args.get('region')
     user_id = request.args.get('userId', type=int)
     exclude_answered = request.args.get('excludeAnswered', False, type=bool)
+    # 传入 cursor 参数（首页为空字符串）时使用游标分页
+    cursor = request.args.get('cursor')
+    with_total = request.args.get('withTotal', 0, type=int)
+    
+    fields = ('id', 'content', 'type', 'options', 'answer', 'analysis')
+    
+    # 排除已答题目时使用用户已答位图扫描题目目录，不执行 NOT IN 子查询
+    if exclude_answered and user_id and ANSWERED_SET_ENABLED:
+        if cursor is not None:
+            size = clamp_page_size(size)
+            before_id = None
+            if cursor:
+                (last_id,) = decode_cursor(cursor, 1)
+                before_id = parse_cursor_id(last_id)
+            # 多取一条用于判断是否还有下一页
+            records, total = query_unanswered_topics(
+                user_id, type_id, month, region, limit=size + 1,
+                before_id=before_id, with_total=bool(with_total)
+            )
+            has_more = len(records) > size
+            records = records[:size]
+            return jsonify({
+                'code': 0,
+                'message': '获取成功',
+                'data': cursor_page_data(
+                    [record.fragment(fields) for record in records], size, has_more,
+                    records and encode_cursor([records[-1].id]), total
+                )
+            })
+        
+        records, total = query_unanswered_topics(
+            user_id, type_id, month, region, offset=max(page - 1, 0) * size, limit=size, with_total=True
+        )
+        return jsonify({
+            'code': 0,
+            'message': '获取成功',
+            'data': {
+                'total': total,
+                'list': [record.fragment(fields) for record in records],
+                'page': page,
+                'size': size
+            }
+        })
     
     query = db.session.query(Topic)
     
@@ -265,28 +646,46 @@ def get_topics():
     if region:
         query = query.filter_by(region=region)
     
-    # 如果需要排除用户已答题目
+    # 如果需要排除用户已答题目（ANSWERED_SET_ENABLED=false 时的 SQL 实现）
     if exclude_answered and user_id:
         # 使用 select() 构造来避免 SQLAlchemy 警告
-        from sqlalchemy import select
         answered_subquery = select(UserTopicProgress.topic_id).where(
             UserTopicProgress.user_id == user_id
         ).scalar_subquery()
         query = query.filter(~Topic.id.in_(answered_subquery))
     
+    if cursor is not None:
+        # 游标分页：按 id 倒序，WHERE id < 上一页最后一条的 id
+        size = clamp_page_size(size)
+        total = None
+        if with_total:
+            # 不排除已答题目时，总数直接由题目目录统计
+            total = query.count() if exclude_answered and user_id else topic_catalog.count(type_id, month, region)
+        
+        id_query = query.with_entities(Topic.id)
+        if cursor:
+            (last_id,) = decode_cursor(cursor, 1)
+            id_query = id_query.filter(Topic.id < parse_cursor_id(last_id))
+        rows, has_more = fetch_keyset_page(id_query.order_by(Topic.id.desc()), size)
+        
+        result = []
+        for record in get_topic_records([row.id for row in rows]):
+            result.append(record.fragment(fields))
+        
+        return jsonify({
+            'code': 0,
+            'message': '获取成功',
+            'data': cursor_page_data(result, size, has_more, rows and encode_cursor([rows[-1].id]), total)
+        })
+    
     total = query.count()
-    topics = query.order_by(Topic.id.desc()).paginate(page=page, per_page=size, error_out=False)
+    # 只查询题目ID，题目内容从目录缓存获取
+    topics = query.with_entities(Topic.id).order_by(Topic.id.desc()).paginate(page=page, per_page=size, error_out=False, count=False)
+    records = get_topic_records([row.id for row in topics.items])
     
     result = []
-    for topic in topics.items:
-        result.append({
-            'id': topic.id,
-            'content': topic.content,
-            'type': topic.type_id,
-            'options': json.loads(topic.options),
-            'answer': topic.answer,
-            'analysis': topic.analysis
-        })
+    for record in records:
+        result.append(record.fragment(fields))
     
     return jsonify({
         'code': 0,
@@ -303,19 +702,15 @@ def get_topics():
 @app.route('/api/exam/random', methods=['GET'])
 def get_random_exam():
     count = request.args.get('count', 20, type=int)
+    type_id = request.args.get('type', type=int)
     
     # 随机获取题目
-    topics = db.session.query(Topic).order_by(db.func.random()).limit(count).all()
+    topic_ids = topic_sampler.sample(count, type_id=type_id)
+    records = get_topic_records(topic_ids)
     
     result = []
-    for topic in topics:
-        result.append({
-            'id': topic.id,
-            'content': topic.content,
-            'type': topic.type_id,
-            'options': json.loads(topic.options),
-            'answer': topic.answer
-        })
+    for record in records:
+        result.append(record.fragment(('id', 'content', 'type', 'options', 'answer')))
     
     return jsonify({
         'code': 0,
@@ -333,43 +728,23 @@ def get_random_topics():
     start_month = request.args.get('startMonth', type=int)
     end_month = request.args.get('endMonth', type=int)
     count = request.args.get('count', 20, type=int)
-    user_id = request.args.get('userId', type=int)
-    
-    # 构建查询
-    query = db.session.query(Topic)
+    type_id = request.args.get('type', type=int)
     
-    # 优先使用 months 参数
+    # 优先使用 months 参数，否则使用月份范围（支持跨年，例如11月到2月）
     if months_param:
         # 解析月份列表
         months = [int(m) for m in months_param.split(',') if m.isdigit()]
-        if months:
-            query = query.filter(Topic.month.in_(months))
-    # 否则使用月份范围
-    elif start_month and end_month:
-        if start_month <= end_month:
-            query = query.filter(Topic.month >= start_month, Topic.month <= end_month)
-        else:
-            # 处理跨年情况，例如11月到2月
-            query = query.filter(db.or_(Topic.month >= start_month, Topic.month <= end_month))
-    elif start_month:
-        query = query.filter(Topic.month >= start_month)
-    elif end_month:
-        query = query.filter(Topic.month <= end_month)
+        month_predicate = build_month_predicate(months=months)
+    else:
+        month_predicate = build_month_predicate(start_month=start_month, end_month=end_month)
     
     # 随机获取指定数量的题目
-    topics = query.order_by(db.func.random()).limit(count).all()
+    topic_ids = topic_sampler.sample(count, month_predicate=month_predicate, type_id=type_id)
+    records = get_topic_records(topic_ids)
     
     result = []
-    for topic in topics:
-        result.append({
-            'id': topic.id,
-            'content': topic.content,
-            'type': topic.type_id,
-            'options': json.loads(topic.options) if topic.options else [],
-            'answer': topic.answer,
-            'analysis': topic.analysis,
-            'month': topic.month
-        })
+    for record in records:
+        result.append(record.fragment(('id', 'content', 'type', 'options', 'answer', 'analysis', 'month')))
     
     return jsonify({
         'code': 0,
@@ -377,21 +752,63 @@ def get_random_topics():
         'data': result
     })
 
+# 提交考试的最大题目数
+MAX_EXAM_QUESTIONS = 200
+
+def insert_ignore(table, rows):
+    """构建多行 INSERT IGNORE 语句，唯一键冲突的行被忽略"""
+    return insert(table).values(rows) \
+        .prefix_with('IGNORE', dialect='mysql') \
+        .prefix_with('OR IGNORE', dialect='sqlite')
+
 # 提交考试结果
 @app.route('/api/exam/submit', methods=['POST'])
 @token_required
 def submit_exam():
-    data = request.json
+    """
+    提交考试结果并在服务端判分
+    请求体: {"totalQuestions": 20, "usedTime": 1500, "details": [{"topicId": 1, "userAnswer": "A"}, ...]}
+    
+    按题目目录缓存的标准答案判分，客户端提交的 score、correctCount、wrongCount、isCorrect 不再使用。
+    同一个事务中写入考试记录、一条多行 INSERT 写入答题详情、答错的题目 INSERT IGNORE 加入错题本、
+    答错次数累加到错题统计表、全部作答题目 INSERT IGNORE 记录完成进度并更新用户统计汇总，
+    小程序无需再逐题调用错题和进度接口
+    """
+    data = request.json or {}
     # 从token中获取user_id（已经是整数类型）
     user_id = request.user_id
-    score = data.get('score')
-    total_questions = data.get('totalQuestions')
-    correct_count = data.get('correctCount')
-    wrong_count = data.get('wrongCount')
-    used_time = data.get('usedTime')
-    details = data.get('details', [])  # 答题详情列表
+    details = data.get('details') or []
     
+    if not isinstance(details, list):
+        return jsonify({'code': 1, 'message': '参数类型错误'})
+    if len(details) > MAX_EXAM_QUESTIONS:
+        return jsonify({'code': 1, 'message': f'单次最多提交{MAX_EXAM_QUESTIONS}道题'})
     try:
+        total_questions = int(data.get('totalQuestions') or 0)
+        used_time = int(data.get('usedTime') or 0)
+    except (ValueError, TypeError):
+        return jsonify({'code': 1, 'message': '参数类型错误'})
+    # 未作答的题目不提交详情；答案为空的详情说明客户端有误，拒绝整次提交而不是判为答错并写入错题本
+    if any(isinstance(detail, dict) and not normalize_answer(detail.get('userAnswer')) for detail in details):
+        return jsonify({'code': 1, 'message': '答题详情缺少 userAnswer'})
+    
+    try:
+        # 标准答案来自题目目录缓存，未命中的题目从数据库补充
+        topic_ids = []
+        for detail in details:
+            try:
+                topic_ids.append(int(detail.get('topicId')))
+            except (AttributeError, ValueError, TypeError):
+                continue
+        records = {record.id: record for record in get_topic_records(list(dict.fromkeys(topic_ids)))}
+        graded, ignored = grade_exam(details, records)
+        
+        correct_count = sum(1 for result in graded if result['isCorrect'])
+        wrong_count = len(graded) - correct_count
+        # 未作答的题目计入总数但不提交详情
+        total_questions = max(total_questions, len(graded))
+        score = calculate_score(correct_count, total_questions)
+        
         # 创建考试记录
         record = ExamRecord(
             user_id=user_id,
@@ -403,24 +820,72 @@ def submit_exam():
         )
         db.session.add(record)
         db.session.flush()  # 获取 record.id
+        # 提交后访问 record.id 会重新查询考试记录
+        record_id = record.id
         
-        # 保存每道题的答题详情
-        for detail in details:
-            exam_detail = ExamDetail(
-                exam_record_id=record.id,
-                topic_id=detail.get('topicId'),
-                user_answer=detail.get('userAnswer'),
-                is_correct=detail.get('isCorrect')
-            )
-            db.session.add(exam_detail)
+        mistakes_added = 0
+        if graded:
+            now = datetime.datetime.now()
+            # 先锁定用户统计行，再写入错题和进度
+            stat = lock_user_stat(user_id)
+            db.session.execute(insert(ExamDetail.__table__).values([{
+                'exam_record_id': record_id,
+                'topic_id': result['topicId'],
+                'user_answer': result['userAnswer'],
+                'is_correct': result['isCorrect'],
+                'created_at': now
+            } for result in graded]))
+            
+            wrong_rows = [
+                {'user_id': user_id, 'topic_id': result['topicId'], 'created_at': now}
+                for result in graded if not result['isCorrect']
+            ]
+            new_mistake_ids = []
+            if wrong_rows:
+                wrong_ids = [row['topic_id'] for row in wrong_rows]
+                if stat is not None:
+                    # 更新错题分布需要知道哪些题目是新加入错题本的
+                    existing_ids = {row[0] for row in db.session.query(UserMistake.topic_id).filter(
+                        UserMistake.user_id == user_id, UserMistake.topic_id.in_(wrong_ids)
+                    )}
+                    new_mistake_ids = [topic_id for topic_id in wrong_ids if topic_id not in existing_ids]
+                mistakes_added = db.session.execute(insert_ignore(UserMistake.__table__, wrong_rows)).rowcount
+                increment_mistake_stats(
+                    db.session, UserMistakeStat.__table__, user_id, [row['topic_id'] for row in wrong_rows], now
+                )
+            
+            # 没有月份的题目无法记录按月进度
+            progress_rows = [
+                {'user_id': user_id, 'topic_id': result['topicId'], 'month': result['month'], 'completed_at': now}
+                for result in graded if result['month'] is not None
+            ]
+            done_added = 0
+            if progress_rows:
+                done_added = db.session.execute(insert_ignore(UserTopicProgress.__table__, progress_rows)).rowcount
+            
+            if stat is not None:
+                apply_mistake_changes(stat, added=[records[topic_id] for topic_id in new_mistake_ids])
+                stat['done_count'] += done_added
+                save_user_stat(db.session, UserStat.__table__, stat)
         
         db.session.commit()
+        answered_sets.add(user_id, [result['topicId'] for result in graded if result['month'] is not None])
         
         return jsonify({
             'code': 0,
             'message': '提交成功',
             'data': {
-                'recordId': record.id
+                'recordId': record_id,
+                'score': score,
+                'totalQuestions': total_questions,
+                'correctCount': correct_count,
+                'wrongCount': wrong_count,
+                'mistakesAdded': mistakes_added,
+                'ignored': ignored,
+                'results': [
+                    {'topicId': result['topicId'], 'isCorrect': result['isCorrect'], 'answer': result['answer']}
+                    for result in graded
+                ]
             }
         })
     except Exception as e:
@@ -436,25 +901,34 @@ def submit_exam():
 @app.route('/api/exam/detail/<int:record_id>', methods=['GET'])
 def get_exam_detail(record_id):
     try:
-        # 获取考试记录
-        record = db.session.get(ExamRecord, record_id)
+        # 获取考试记录（只查询需要的列）
+        record = db.session.query(
+            ExamRecord.id, ExamRecord.score, ExamRecord.total_questions, ExamRecord.correct_count,
+            ExamRecord.wrong_count, ExamRecord.used_time, ExamRecord.created_at
+        ).filter(ExamRecord.id == record_id).first()
         if not record:
             return jsonify({
                 'code': 1,
                 'message': '考试记录不存在'
             }), 404
         
-        # 获取答题详情
-        details = db.session.query(ExamDetail).filter_by(exam_record_id=record_id).all()
+        # 获取答题详情，题目内容从目录缓存批量获取
+        details = db.session.query(
+            ExamDetail.topic_id, ExamDetail.user_answer, ExamDetail.is_correct
+        ).filter(ExamDetail.exam_record_id == record_id).order_by(ExamDetail.id).all()
+        
+        topic_records = {topic.id: topic for topic in get_topic_records([detail.topic_id for detail in details])}
         
         detail_list = []
         for detail in details:
-            topic = detail.topic
+            topic = topic_records.get(detail.topic_id)
+            if topic is None:
+                continue
             detail_list.append({
                 'topicId': topic.id,
                 'content': topic.content,
                 'type': topic.type_id,
-                'options': json.loads(topic.options) if topic.options else [],
+                'options': topic.options,
                 'correctAnswer': topic.answer,
                 'userAnswer': detail.user_answer,
                 'isCorrect': detail.is_correct,
@@ -498,18 +972,30 @@ def add_mistake():
     except (ValueError, TypeError):
         return jsonify({'code': 1, 'message': '参数类型错误'})
     
+    # 先锁定用户统计行，再检查和修改错题
+    stat = lock_user_stat(user_id)
+    
     # 检查是否已存在
     exists = db.session.query(UserMistake).filter_by(user_id=user_id, topic_id=topic_id).first()
-    if exists:
-        return jsonify({
-            'code': 0,
-            'message': '该题目已在错题本中'
-        })
     
     # 添加错题记录
     try:
+        # 每次答错都累加错误次数，错题本中已有该题时同样计数
+        increment_mistake_stats(
+            db.session, UserMistakeStat.__table__, user_id, [topic_id], datetime.datetime.now()
+        )
+        if exists:
+            db.session.commit()
+            return jsonify({
+                'code': 0,
+                'message': '该题目已在错题本中'
+            })
+        
         mistake = UserMistake(user_id=user_id, topic_id=topic_id)
         db.session.add(mistake)
+        if stat is not None:
+            apply_mistake_changes(stat, added=get_topic_records([topic_id]))
+            save_user_stat(db.session, UserStat.__table__, stat)
         db.session.commit()
         return jsonify({
             'code': 0,
@@ -539,9 +1025,30 @@ def get_mistakes():
     month = request.args.get('month', type=int)
     type_id = request.args.get('type', type=int)
     sort_by = request.args.get('sortBy', 'time')  # time-时间, frequency-错误次数
+    # 传入 cursor 参数（首页为空字符串）时使用游标分页
+    cursor = request.args.get('cursor')
+    with_total = request.args.get('withTotal', 0, type=int)
+    
+    by_frequency = sort_by == 'frequency'
+    
+    if by_frequency:
+        # 按错误次数排序：从错题统计表按 (user_id, wrong_count, topic_id) 索引扫描，只保留仍在错题本中的题目
+        query = db.session.query(
+            UserMistakeStat.topic_id, UserMistakeStat.wrong_count, UserMistakeStat.last_wrong_at, UserMistake.created_at
+        ).join(UserMistake, db.and_(
+            UserMistake.user_id == UserMistakeStat.user_id, UserMistake.topic_id == UserMistakeStat.topic_id
+        )).filter(UserMistakeStat.user_id == user_id)
+        topic_column = UserMistakeStat.topic_id
+    else:
+        # 只查询错题记录需要的列，题目内容从目录缓存批量获取
+        query = db.session.query(
+            UserMistake.id, UserMistake.topic_id, UserMistake.created_at
+        ).filter(UserMistake.user_id == user_id)
+        topic_column = UserMistake.topic_id
     
-    # 构建查询，联表查询Topic
-    query = db.session.query(UserMistake).filter_by(user_id=user_id).join(Topic)
+    # 按月份或题型筛选时才联表查询Topic
+    if month or type_id:
+        query = query.join(Topic, Topic.id == topic_column)
     
     # 月份筛选
     if month:
@@ -551,39 +1058,43 @@ def get_mistakes():
     if type_id:
         query = query.filter(Topic.type_id == type_id)
     
+    if cursor is not None:
+        # 游标分页：按 (wrong_count, topic_id) 或 (created_at, id) 倒序
+        size = clamp_page_size(size)
+        total = query.count() if with_total else None
+        if by_frequency:
+            rows, has_more = fetch_keyset_page(apply_frequency_cursor(query, cursor), size)
+            next_cursor = rows and encode_cursor([rows[-1].wrong_count, rows[-1].topic_id])
+        else:
+            rows, has_more = fetch_keyset_page(apply_time_cursor(query, UserMistake, cursor), size)
+            next_cursor = rows and encode_cursor([rows[-1].created_at, rows[-1].id])
+        return jsonify({
+            'code': 0,
+            'message': '获取成功',
+            'data': cursor_page_data(
+                build_user_topic_items(rows, with_stats=by_frequency), size, has_more, next_cursor, total
+            )
+        })
+    
     total = query.count()
     
     # 排序
-    if sort_by == 'frequency':
-        # 按错误次数排序（暂时按创建时间，后续可扩展）
-        query = query.order_by(UserMistake.created_at.desc())
+    if by_frequency:
+        # 按错误次数排序，次数相同时按题目ID倒序
+        query = query.order_by(UserMistakeStat.wrong_count.desc(), UserMistakeStat.topic_id.desc())
     else:
         # 默认按时间排序
-        query = query.order_by(UserMistake.created_at.desc())
-    
-    mistakes = query.paginate(page=page, per_page=size, error_out=False)
+        query = query.order_by(UserMistake.created_at.desc(), UserMistake.id.desc())
     
-    result = []
-    for mistake in mistakes.items:
-        topic = mistake.topic
-        result.append({
-            'id': topic.id,  # 使用 topic.id 作为主键，保持与其他接口一致
-            'content': topic.content,
-            'type': topic.type_id,
-            'options': json.loads(topic.options),
-            'answer': topic.answer,
-            'analysis': topic.analysis,
-            'month': topic.month,
-            'region': topic.region,
-            'createdAt': mistake.created_at.strftime('%Y-%m-%d %H:%M:%S')
-        })
+    # total 已单独统计，分页时不再重复执行 COUNT
+    mistakes = query.paginate(page=page, per_page=size, error_out=False, count=False)
     
     return jsonify({
         'code': 0,
         'message': '获取成功',
         'data': {
             'total': total,
-            'list': result,
+            'list': build_user_topic_items(mistakes.items, with_stats=by_frequency),
             'page': page,
             'size': size
         }
@@ -596,33 +1107,11 @@ def get_mistake_statistics():
     # 从token中获取user_id
     user_id = request.user_id
     
-    # 总错题数
-    total_count = db.session.query(UserMistake).filter_by(user_id=user_id).count()
-    
-    # 按题型统计
-    by_type = {}
-    type_stats = db.session.query(
-        Topic.type_id,
-        db.func.count(UserMistake.id)
-    ).join(UserMistake).filter(
-        UserMistake.user_id == user_id
-    ).group_by(Topic.type_id).all()
-    
-    for type_id, count in type_stats:
-        by_type[str(type_id)] = count
-    
-    # 按月份统计
-    by_month = {}
-    month_stats = db.session.query(
-        Topic.month,
-        db.func.count(UserMistake.id)
-    ).join(UserMistake).filter(
-        UserMistake.user_id == user_id
-    ).group_by(Topic.month).all()
-    
-    for month, count in month_stats:
-        if month:  # 排除month为None的情况
-            by_month[str(month)] = count
+    # 错题总数和分布来自用户统计汇总，一次主键查询
+    stat = get_user_stat(user_id)
+    total_count = stat['mistake_count']
+    by_type = stat['mistakes_by_type']
+    by_month = stat['mistakes_by_month']
     
     return jsonify({
         'code': 0,
@@ -649,7 +1138,11 @@ def delete_mistake():
     except (ValueError, TypeError):
         return jsonify({'code': 1, 'message': '参数类型错误'})
     
-    db.session.query(UserMistake).filter_by(user_id=user_id, topic_id=topic_id).delete()
+    stat = lock_user_stat(user_id)
+    deleted = db.session.query(UserMistake).filter_by(user_id=user_id, topic_id=topic_id).delete()
+    if stat is not None and deleted:
+        apply_mistake_changes(stat, removed=get_topic_records([topic_id]))
+        save_user_stat(db.session, UserStat.__table__, stat)
     db.session.commit()
     
     return jsonify({
@@ -664,7 +1157,11 @@ def clear_mistakes():
     # 从token中获取user_id（已经是整数类型）
     user_id = request.user_id
     
+    stat = lock_user_stat(user_id)
     db.session.query(UserMistake).filter_by(user_id=user_id).delete()
+    if stat is not None:
+        stat.update(mistake_count=0, mistakes_by_type={}, mistakes_by_month={})
+        save_user_stat(db.session, UserStat.__table__, stat)
     db.session.commit()
     
     return jsonify({
@@ -698,6 +1195,7 @@ def add_favorite():
     # 添加收藏记录
     favorite = UserFavorite(user_id=user_id, topic_id=topic_id)
     db.session.add(favorite)
+    adjust_counters(db.session, UserStat.__table__, user_id, favorite_count=1)
     db.session.commit()
     
     return jsonify({
@@ -713,33 +1211,39 @@ def get_favorites():
     user_id = request.user_id
     page = request.args.get('page', 1, type=int)
     size = request.args.get('size', 10, type=int)
+    # 传入 cursor 参数（首页为空字符串）时使用游标分页
+    cursor = request.args.get('cursor')
+    with_total = request.args.get('withTotal', 0, type=int)
+    
+    # 只查询收藏记录需要的列，题目内容从目录缓存批量获取
+    query = db.session.query(
+        UserFavorite.id, UserFavorite.topic_id, UserFavorite.created_at
+    ).filter(UserFavorite.user_id == user_id)
+    
+    if cursor is not None:
+        # 游标分页：按 (created_at, id) 倒序
+        size = clamp_page_size(size)
+        total = query.count() if with_total else None
+        rows, has_more = fetch_keyset_page(apply_time_cursor(query, UserFavorite, cursor), size)
+        next_cursor = rows and encode_cursor([rows[-1].created_at, rows[-1].id])
+        return jsonify({
+            'code': 0,
+            'message': '获取成功',
+            'data': cursor_page_data(build_user_topic_items(rows), size, has_more, next_cursor, total)
+        })
     
-    query = UserFavorite.query.filter_by(user_id=user_id)
     total = query.count()
     
-    favorites = query.order_by(UserFavorite.created_at.desc()).paginate(page=page, per_page=size, error_out=False)
-    
-    result = []
-    for favorite in favorites.items:
-        topic = favorite.topic
-        result.append({
-            'id': topic.id,  # 使用 topic.id 作为主键，保持与其他接口一致
-            'content': topic.content,
-            'type': topic.type_id,
-            'options': json.loads(topic.options),
-            'answer': topic.answer,
-            'analysis': topic.analysis,
-            'month': topic.month,
-            'region': topic.region,
-            'createdAt': favorite.created_at.strftime('%Y-%m-%d %H:%M:%S')
-        })
+    favorites = query.order_by(
+        UserFavorite.created_at.desc(), UserFavorite.id.desc()
+    ).paginate(page=page, per_page=size, error_out=False, count=False)
     
     return jsonify({
         'code': 0,
         'message': '获取成功',
         'data': {
             'total': total,
-            'list': result,
+            'list': build_user_topic_items(favorites.items),
             'page': page,
             'size': size
         }
@@ -760,7 +1264,8 @@ def delete_favorite():
     except (ValueError, TypeError):
         return jsonify({'code': 1, 'message': '参数类型错误'})
     
-    UserFavorite.query.filter_by(user_id=user_id, topic_id=topic_id).delete()
+    deleted = UserFavorite.query.filter_by(user_id=user_id, topic_id=topic_id).delete()
+    adjust_counters(db.session, UserStat.__table__, user_id, favorite_count=-deleted)
     db.session.commit()
     
     return jsonify({
@@ -776,6 +1281,7 @@ def clear_favorites():
     user_id = request.user_id
     
     UserFavorite.query.filter_by(user_id=user_id).delete()
+    reset_counters(db.session, UserStat.__table__, user_id, 'favorite_count')
     db.session.commit()
     
     return jsonify({
@@ -797,34 +1303,15 @@ def get_user_statistics():
             'message': '无权访问其他用户的数据'
         }), 403
     
-    # 获取错题数量
-    mistake_count = UserMistake.query.filter_by(user_id=user_id).count()
-    
-    # 获取收藏数量
-    favorite_count = UserFavorite.query.filter_by(user_id=user_id).count()
-    
-    # # 获取考试记录
-    # exam_records = ExamRecord.query.filter_by(user_id=user_id).order_by(ExamRecord.created_at.desc()).limit(5).all()
-    
-    # records = []
-    # for record in exam_records:
-    #     records.append({
-    #         'id': record.id,
-    #         'score': record.score,
-    #         'totalQuestions': record.total_questions,
-    #         'correctCount': record.correct_count,
-    #         'wrongCount': record.wrong_count,
-    #         'usedTime': record.used_time,
-    #         'createdAt': record.created_at.strftime('%Y-%m-%d %H:%M:%S')
-    #     })
-    
-    # 计算做题总数（包括考试中的题目）
-    done_count = db.session.query(db.func.count(UserTopicProgress.topic_id)).filter_by(user_id=user_id).scalar() or 0
+    # 错题、收藏、完成题目数来自用户统计汇总，一次主键查询
+    stat = get_user_stat(user_id)
+    mistake_count = stat['mistake_count']
+    favorite_count = stat['favorite_count']
+    done_count = stat['done_count']
     
     # 计算用户使用天数
-    user = db.session.get(User, user_id)
-    if user:
-        days_count = (datetime.datetime.now() - user.created_at).days + 1
+    if stat['registered_at']:
+        days_count = (datetime.datetime.now() - stat['registered_at']).days + 1
     else:
         days_count = 1
     
@@ -839,24 +1326,41 @@ def get_user_statistics():
         }
     })
 
+def parse_months_param():
+    """解析 months 查询参数，未提供时返回全部12个月"""
+    months_param = request.args.get('months', '')
+    if months_param:
+        return [int(m) for m in months_param.split(',') if m.isdigit()]
+    # 如果未提供月份，则获取所有月份的数据
+    return list(range(1, 13))
+
+def query_month_completed_counts(user_id, months):
+    """一次 GROUP BY month 查询统计用户各月完成的题目数"""
+    if not months:
+        return {}
+    rows = db.session.query(
+        UserTopicProgress.month,
+        db.func.count(UserTopicProgress.id)
+    ).filter(
+        UserTopicProgress.user_id == user_id,
+        UserTopicProgress.month.in_(months)
+    ).group_by(UserTopicProgress.month).all()
+    return dict(rows)
+
 # 获取每月题目数量
 @app.route('/api/topics/count-by-month', methods=['GET'])
+@catalog_conditional_get
 def get_topics_count_by_month():
-    # 获取请求的月份列表
-    months_param = request.args.get('months', '')
-    if months_param:
-        months = [int(m) for m in months_param.split(',') if m.isdigit()]
-    else:
-        # 如果未提供月份，则获取所有月份的数据
-        months = list(range(1, 13))
+    months = parse_months_param()
+    
+    # 各月题目总数来自共享缓存，批量导入题目后失效
+    totals = topic_month_totals.get()
     
     result = []
     for month in months:
-        # 获取该月的题目数量
-        count = Topic.query.filter_by(month=month).count()
         result.append({
             'month': month,
-            'count': count
+            'count': totals.get(month, 0)
         })
     
     return jsonify({
@@ -871,25 +1375,15 @@ def get_topics_count_by_month():
 def get_month_progress():
     # 从token中获取user_id
     user_id = request.user_id
-    # 获取请求的月份列表
-    months_param = request.args.get('months', '')
-    if months_param:
-        months = [int(m) for m in months_param.split(',') if m.isdigit()]
-    else:
-        # 如果未提供月份，则获取所有月份的数据
-        months = list(range(1, 13))
+    months = parse_months_param()
+    
+    completed_counts = query_month_completed_counts(user_id, months)
     
     result = []
     for month in months:
-        # 通过查询 UserTopicProgress 表统计用户该月完成的题目数
-        completed_count = db.session.query(UserTopicProgress).filter(
-            UserTopicProgress.user_id == user_id,
-            UserTopicProgress.month == month
-        ).count()
-        
         result.append({
             'month': month,
-            'completedCount': completed_count
+            'completedCount': completed_counts.get(month, 0)
         })
 
     return jsonify({
@@ -898,6 +1392,30 @@ def get_month_progress():
         'data': result
     })
 
+# 首页月份面板：合并每月题目数量和做题进度
+@app.route('/api/user/month-dashboard', methods=['GET'])
+@token_required
+def get_month_dashboard():
+    user_id = request.user_id
+    months = parse_months_param()
+    
+    totals = topic_month_totals.get()
+    completed_counts = query_month_completed_counts(user_id, months)
+    
+    result = []
+    for month in months:
+        result.append({
+            'month': month,
+            'count': totals.get(month, 0),
+            'completedCount': completed_counts.get(month, 0)
+        })
+    
+    return jsonify({
+        'code': 0,
+        'message': '获取成功',
+        'data': result
+    })
+
 # 用户完成题目接口
 @app.route('/api/progress/finish-topic', methods=['POST'])
 @token_required
@@ -938,7 +1456,9 @@ def finish_topic():
     try:
         progress = UserTopicProgress(user_id=user_id, topic_id=topic_id, month=month)
         db.session.add(progress)
+        adjust_counters(db.session, UserStat.__table__, user_id, done_count=1)
         db.session.commit()
+        answered_sets.add(user_id, [topic_id])
         return jsonify({'code': 0, 'message': '记录完成'})
     except Exception as e:
         db.session.rollback()
@@ -950,6 +1470,89 @@ def finish_topic():
         app.logger.error(f'记录题目进度失败: {str(e)}')
         return jsonify({'code': 1, 'message': '记录失败'}), 500
 
+# 批量记录完成题目的最大条数
+MAX_PROGRESS_BATCH = 200
+
+# 用户批量完成题目接口
+@app.route('/api/progress/finish-topics', methods=['POST'])
+@token_required
+def finish_topics():
+    """
+    批量记录题目完成进度
+    请求体: {"items": [{"topicId": 1, "month": 3}, ...]}
+    所有有效记录通过一条多行 INSERT IGNORE 写入，已存在的记录由 uk_user_topic_month 唯一键忽略
+    """
+    data = request.json or {}
+    user_id = request.user_id
+    items = data.get('items')
+
+    if not isinstance(items, list) or not items:
+        return jsonify({'code': 1, 'message': '参数缺失'})
+    if len(items) > MAX_PROGRESS_BATCH:
+        return jsonify({'code': 1, 'message': f'单次最多提交{MAX_PROGRESS_BATCH}条记录'})
+
+    # 参数类型检查和转换
+    results = []
+    parsed = []
+    for item in items:
+        try:
+            topic_id = int(item.get('topicId'))
+            month = int(item.get('month'))
+        except (AttributeError, ValueError, TypeError):
+            results.append({'topicId': None, 'month': None, 'status': 'invalid'})
+            continue
+        result = {'topicId': topic_id, 'month': month, 'status': 'ok'}
+        results.append(result)
+        parsed.append(result)
+
+    # 通过缓存校验题目是否存在，未命中的题目（可能是其他进程刚导入的）再查询一次数据库
+    topic_ids = {result['topicId'] for result in parsed}
+    valid_ids = topic_sampler.known_ids(topic_ids)
+    missing_ids = topic_ids - valid_ids
+    if missing_ids:
+        rows = db.session.query(Topic.id).filter(Topic.id.in_(missing_ids)).all()
+        valid_ids.update(row[0] for row in rows)
+
+    rows = []
+    seen = set()
+    now = datetime.datetime.now()
+    for result in parsed:
+        key = (result['topicId'], result['month'])
+        if result['topicId'] not in valid_ids:
+            result['status'] = 'not_found'
+        elif key in seen:
+            result['status'] = 'duplicate'
+        else:
+            seen.add(key)
+            rows.append({
+                'user_id': user_id,
+                'topic_id': result['topicId'],
+                'month': result['month'],
+                'completed_at': now
+            })
+
+    inserted = 0
+    if rows:
+        try:
+            inserted = db.session.execute(insert_ignore(UserTopicProgress.__table__, rows)).rowcount
+            adjust_counters(db.session, UserStat.__table__, user_id, done_count=inserted)
+            db.session.commit()
+            answered_sets.add(user_id, [row['topic_id'] for row in rows])
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f'批量记录题目进度失败: {str(e)}')
+            return jsonify({'code': 1, 'message': '记录失败'}), 500
+
+    return jsonify({
+        'code': 0,
+        'message': '记录完成',
+        'data': {
+            'accepted': len(rows),
+            'inserted': inserted,
+            'results': results
+        }
+    })
+
 # 管理接口：批量导入题目
 @app.route('/api/admin/topics/import', methods=['POST'])
 def batch_import_topics():
@@ -975,57 +1578,43 @@ def batch_import_topics():
                 'message': '题目数据格式错误'
             }), 400
         
-        inserted_count = 0
         skipped_count = 0
         error_list = []
         
+        rows = []
+        row_numbers = []
         for i, topic_data in enumerate(topics):
-            try:
-                # 验证数据
-                required_fields = ['content', 'type_id', 'options', 'answer']
-                for field in required_fields:
-                    if field not in topic_data:
-                        error_list.append(f"题目{i+1}缺少字段: {field}")
-                        skipped_count += 1
-                        continue
-                
-                # 检查是否重复
-                exists = Topic.query.filter_by(
-                    content=topic_data['content'],
-                    month=topic_data.get('month')
-                ).first()
-                
-                if exists:
-                    skipped_count += 1
-                    continue
-                
-                # 创建题目
-                topic = Topic(
-                    content=topic_data['content'],
-                    type_id=topic_data['type_id'],
-                    options=json.dumps(topic_data['options'], ensure_ascii=False),
-                    answer=topic_data['answer'],
-                    analysis=topic_data.get('analysis'),
-                    category_id=topic_data.get('category_id'),
-                    region=topic_data.get('region'),
-                    month=topic_data.get('month')
-                )
-                
-                db.session.add(topic)
-                inserted_count += 1
-                
-                # 每100条提交一次
-                if inserted_count % 100 == 0:
-                    db.session.commit()
-                    app.logger.info(f"已导入 {inserted_count} 条题目")
-                
-            except Exception as e:
-                error_list.append(f"题目{i+1}导入失败: {str(e)}")
+            # 验证数据
+            required_fields = ['content', 'type_id', 'options', 'answer']
+            missing_fields = [field for field in required_fields if not isinstance(topic_data, dict) or field not in topic_data]
+            if missing_fields:
+                error_list.append(f"题目{i+1}缺少字段: {', '.join(missing_fields)}")
                 skipped_count += 1
                 continue
+            
+            rows.append({
+                'content': topic_data['content'],
+                'type_id': topic_data['type_id'],
+                'options': json.dumps(topic_data['options'], ensure_ascii=False),
+                'answer': topic_data['answer'],
+                'analysis': topic_data.get('analysis'),
+                'category_id': topic_data.get('category_id'),
+                'region': topic_data.get('region'),
+                'month': topic_data.get('month')
+            })
+            row_numbers.append(i + 1)
+        
+        # 按内容哈希去重，每 500 条一次查询和一条多行 INSERT
+        result = upsert_topics(db.session, rows)
+        for index, error in result['failed']:
+            error_list.append(f"题目{row_numbers[index]}导入失败: {error}")
+        inserted_count = result['inserted']
+        skipped_count += result['duplicates'] + len(result['failed'])
         
-        # 最后提交剩余的
         db.session.commit()
+        if inserted_count:
+            app.logger.info(f"已导入 {inserted_count} 条题目")
+            bump_topic_bank_version()
         
         return jsonify({
             'code': 0,
@@ -1046,11 +1635,22 @@ def batch_import_topics():
             'error': str(e)
         }), 500
 
+# 备份导出时每批从服务端游标读取的题目数
+BACKUP_FETCH_SIZE = 500
+
 # 管理接口：备份题目数据
 @app.route('/api/admin/topics/backup', methods=['GET'])
 def backup_topics():
     """
-    导出所有题目数据为JSON格式
+    流式导出题目数据
+    
+    查询参数:
+        format: json（默认，与原接口结构相同）或 ndjson（每行一道题目）
+        gzip: 为 1 时输出 gzip 压缩文件
+        sinceId: 只导出ID大于该值的题目，用于断点续传
+        sinceCreatedAt: 只导出创建时间不早于该时间的题目，例如 2024-05-01 00:00:00
+    
+    题目按ID升序通过服务端游标分批读取并逐块输出，内存占用与题目总数无关
     """
     try:
         # 验证管理员权限
@@ -1061,37 +1661,57 @@ def backup_topics():
                 'message': '无权限访问'
             }), 403
         
-        # 查询所有题目
-        topics = Topic.query.all()
+        export_format = request.args.get('format', 'json')
+        if export_format not in ('json', 'ndjson'):
+            return jsonify({'code': 400, 'message': 'format 仅支持 json 或 ndjson'}), 400
+        use_gzip = request.args.get('gzip', 0, type=int) == 1
+        since_id = request.args.get('sinceId', type=int)
+        since_created_at = request.args.get('sinceCreatedAt')
         
-        backup_data = []
-        for topic in topics:
-            backup_data.append({
-                'id': topic.id,
-                'content': topic.content,
-                'type_id': topic.type_id,
-                'options': json.loads(topic.options) if topic.options else [],
-                'answer': topic.answer,
-                'analysis': topic.analysis,
-                'category_id': topic.category_id,
-                'region': topic.region,
-                'month': topic.month,
-                'created_at': topic.created_at.strftime('%Y-%m-%d %H:%M:%S') if topic.created_at else None
-            })
+        stmt = select(*[getattr(Topic, field) for field in EXPORT_FIELDS]).order_by(Topic.id)
+        if since_id is not None:
+            stmt = stmt.where(Topic.id > since_id)
+        if since_created_at:
+            try:
+                stmt = stmt.where(Topic.created_at >= datetime.datetime.fromisoformat(since_created_at))
+            except ValueError:
+                return jsonify({'code': 400, 'message': 'sinceCreatedAt 格式错误'}), 400
         
         # 生成备份文件名
         timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f'topics_backup_{timestamp}.json'
+        filename = f'topics_backup_{timestamp}.{export_format}'
         
-        return jsonify({
-            'code': 0,
-            'message': '备份成功',
-            'data': {
-                'filename': filename,
-                'total': len(backup_data),
-                'topics': backup_data
-            }
-        })
+        # 响应体在视图返回后生成，需要提前取得引擎，并使用独立连接
+        engine = db.engine
+        
+        def generate_rows():
+            try:
+                with engine.connect() as conn:
+                    result = conn.execution_options(
+                        stream_results=True, yield_per=BACKUP_FETCH_SIZE
+                    ).execute(stmt)
+                    for row in result:
+                        yield row
+            except Exception as e:
+                # 响应头已经发出，只能记录日志并中断输出
+                app.logger.error(f"Backup stream error: {str(e)}")
+                raise
+        
+        if export_format == 'ndjson':
+            chunks = iter_ndjson(generate_rows(), chunk_size=BACKUP_FETCH_SIZE)
+            mimetype = 'application/x-ndjson'
+        else:
+            chunks = iter_json(generate_rows(), filename, chunk_size=BACKUP_FETCH_SIZE)
+            mimetype = 'application/json'
+        
+        if use_gzip:
+            chunks = gzip_chunks(chunks)
+            filename += '.gz'
+            mimetype = 'application/gzip'
+        
+        response = Response(chunks, mimetype=mimetype)
+        response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+        return response
         
     except Exception as e:
         app.logger.error(f"Backup error: {str(e)}")
@@ -1169,6 +1789,158 @@ def get_topics_statistics():
             'error': str(e)
         }), 500
 
+# 管理接口：获取数据库连接池指标
+@app.route('/api/admin/db/pool', methods=['GET'])
+def get_db_pool_metrics():
+    """
+    获取当前 worker 的数据库连接池状态
+    包括已取出连接数、取连接等待时间和建立连接耗时
+    """
+    admin_key = request.headers.get('X-Admin-Key')
+    if admin_key != os.environ.get('ADMIN_KEY', 'default_admin_key'):
+        return jsonify({
+            'code': 403,
+            'message': '无权限访问'
+        }), 403
+    
+    return jsonify({
+        'code': 0,
+        'message': '获取成功',
+        'data': dict(pool_metrics(db.engine), pid=os.getpid())
+    })
+
+# 管理接口：获取token缓存指标
+@app.route('/api/admin/auth/cache', methods=['GET'])
+def get_auth_cache_metrics():
+    """
+    获取当前 worker 的已验证token缓存指标
+    包括缓存条目数、命中次数和未命中次数
+    """
+    admin_key = request.headers.get('X-Admin-Key')
+    if admin_key != os.environ.get('ADMIN_KEY', 'default_admin_key'):
+        return jsonify({
+            'code': 403,
+            'message': '无权限访问'
+        }), 403
+    
+    stats = token_cache_stats()
+    return jsonify({
+        'code': 0,
+        'message': '获取成功',
+        'data': dict(stats or {}, enabled=stats is not None, pid=os.getpid())
+    })
+
+# 管理接口：响应压缩指标
+@app.route('/api/admin/compression', methods=['GET'])
+def get_compression_metrics():
+    """
+    获取当前 worker 的响应压缩指标
+    包括压缩/跳过的响应数和预压缩缓存命中情况
+    """
+    admin_key = request.headers.get('X-Admin-Key')
+    if admin_key != os.environ.get('ADMIN_KEY', 'default_admin_key'):
+        return jsonify({
+            'code': 403,
+            'message': '无权限访问'
+        }), 403
+    
+    return jsonify({
+        'code': 0,
+        'message': '获取成功',
+        'data': dict(compressor.stats() if compressor else {}, enabled=compressor is not None, pid=os.getpid())
+    })
+
+def collect_process_metrics():
+    """
+    进程级指标：连接池、token缓存、微信接口、响应压缩的累计统计
+    与 /api/admin/* 指标接口的数据相同，由 /metrics 合并各 worker 后输出
+    """
+    samples = []
+    # 后台线程写快照时没有应用上下文
+    with app.app_context():
+        pool = pool_metrics(db.engine)
+    if 'size' in pool:
+        samples.extend([
+            ('db_pool_size', GAUGE, '连接池常驻连接数', {}, pool['size']),
+            ('db_pool_checked_out', GAUGE, '已取出的连接数', {}, pool['checkedOut']),
+            ('db_pool_overflow', GAUGE, '超出常驻连接数的连接数', {}, pool['overflow'])
+        ])
+    if 'checkouts' in pool:
+        samples.extend([
+            ('db_pool_checkouts_total', COUNTER, '从连接池取连接的次数', {}, pool['checkouts']),
+            ('db_pool_timeouts_total', COUNTER, '等待空闲连接超时的次数', {}, pool['timeouts']),
+            ('db_pool_connects_total', COUNTER, '新建数据库连接的次数', {}, pool['connects']),
+            ('db_pool_connect_seconds_total', COUNTER, '新建数据库连接的耗时（秒）', {}, pool['connectMsTotal'] / 1000)
+        ])
+
+    token_stats = token_cache_stats()
+    if token_stats is not None:
+        samples.extend([
+            ('auth_token_cache_entries', GAUGE, 'token缓存条目数', {}, token_stats['size']),
+            ('auth_token_cache_hits_total', COUNTER, 'token缓存命中次数', {}, token_stats['hits']),
+            ('auth_token_cache_misses_total', COUNTER, 'token缓存未命中次数', {}, token_stats['misses']),
+            ('auth_token_cache_evictions_total', COUNTER, 'token缓存淘汰次数', {}, token_stats['evictions'])
+        ])
+
+    wechat_stats = wechat_client.stats()
+    samples.extend([
+        ('wechat_requests_total', COUNTER, '微信登录接口请求次数', {}, wechat_stats['requests']),
+        ('wechat_retries_total', COUNTER, '微信登录接口重试次数', {}, wechat_stats['retries']),
+        ('wechat_failures_total', COUNTER, '微信登录接口失败次数', {}, wechat_stats['failures']),
+        ('wechat_rejected_total', COUNTER, '并发已满被拒绝的微信登录次数', {}, wechat_stats['rejected'])
+    ])
+
+    queued_logging = app.extensions.get('queued_logging')
+    if queued_logging is not None:
+        logging_stats = queued_logging.stats()
+        samples.extend([
+            ('log_queue_length', GAUGE, '日志队列中等待写出的记录数', {}, logging_stats['queued']),
+            ('log_records_dropped_total', COUNTER, '日志队列已满丢弃的记录数', {}, logging_stats['dropped']),
+            ('log_records_sampled_out_total', COUNTER, '被采样过滤的日志记录数', {}, logging_stats['sampledOut'])
+        ])
+
+    if compressor is not None:
+        compression_stats = compressor.stats()
+        cache_stats = compression_stats['cache']
+        samples.extend([
+            ('compression_responses_total', COUNTER, '响应压缩处理次数', {'result': 'compressed'},
+             compression_stats['compressed']),
+            ('compression_responses_total', COUNTER, '响应压缩处理次数', {'result': 'skipped'},
+             compression_stats['skipped']),
+            ('compression_cache_hits_total', COUNTER, '预压缩缓存命中次数', {}, cache_stats['hits']),
+            ('compression_cache_misses_total', COUNTER, '预压缩缓存未命中次数', {}, cache_stats['misses']),
+            ('compression_cache_bytes', GAUGE, '预压缩缓存占用字节数', {}, cache_stats['bytes'])
+        ])
+    return samples
+
+if request_metrics is not None:
+    request_metrics.registry.add_collector(collect_process_metrics)
+
+# Prometheus 指标接口
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    合并所有 worker 的请求指标和进程级指标，输出 Prometheus 文本格式
+    管理密钥可以通过 X-Admin-Key 请求头或 Authorization: Bearer {ADMIN_KEY} 传入（Prometheus 的 authorization 配置）
+    """
+    admin_key = request.headers.get('X-Admin-Key')
+    authorization = request.headers.get('Authorization', '')
+    if authorization.startswith('Bearer '):
+        admin_key = admin_key or authorization[7:]
+    if admin_key != os.environ.get('ADMIN_KEY', 'default_admin_key'):
+        return jsonify({
+            'code': 403,
+            'message': '无权限访问'
+        }), 403
+    
+    if request_metrics is None:
+        return jsonify({
+            'code': 404,
+            'message': '未启用请求指标'
+        }), 404
+    
+    return Response(request_metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
@@ -1,50 +1,356 @@
 """
 日志系统配置模块
 配置应用日志记录，包括文件日志和控制台日志
+
+请求线程只把日志记录放入有界队列（QueueHandler），由后台线程（QueueListener）格式化、脱敏并写入文件和控制台，
+磁盘 I/O 不再占用请求处理时间：
+- 队列已满时丢弃 WARNING 及以下级别的日志并计数，ERROR 及以上最多等待 1 秒；LOG_QUEUE_OVERFLOW=block 时所有级别都等待
+- 输出 JSON 行（LOG_FORMAT=text 时为原来的文本格式），session_key、token 等字段的值替换为 ***
+- LOG_SAMPLING 按 logger 名称设置 INFO 及以下级别日志的采样比例，例如 app.login=0.1
+
+环境变量：
+    LOG_LEVEL            日志级别（默认 INFO）
+    LOG_FILE             日志文件路径（默认 logs/app.log）
+    LOG_MAX_BYTES        单个日志文件最大字节数（默认 10240000）
+    LOG_BACKUP_COUNT     日志文件备份数量（默认 10）
+    LOG_FORMAT           json / text（默认 json）
+    LOG_QUEUE_SIZE       日志队列长度（默认 10000）
+    LOG_QUEUE_OVERFLOW   drop / block（默认 drop）
+    LOG_SAMPLING         逗号分隔的 logger=比例，按最长前缀匹配（默认不采样）
+    LOG_REDACT_KEYS      需要脱敏的字段名关键字，逗号分隔（默认 session_key,secret,password,token,authorization）
 """
 
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import os
+import queue
+import random
+import re
+import threading
+import time
+
+from flask.logging import default_handler
+
+DEFAULT_REDACT_KEYS = ('session_key', 'secret', 'password', 'token', 'authorization')
+
+# 队列已满时 ERROR 及以上级别（以及 block 策略下所有级别）的最长等待时间（秒）
+BLOCK_TIMEOUT = 1.0
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
+
+# LogRecord 的标准属性，其余属性视为 extra 字段输出
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class Redactor(object):
+    """按字段名关键字脱敏：key='value'、"key": "value"、key=value、Bearer token 和 JWT"""
+
+    def __init__(self, keys=DEFAULT_REDACT_KEYS):
+        self._keys = tuple(key.lower() for key in keys)
+        names = '|'.join(re.escape(key) for key in keys)
+        # 带引号的值：字典、JSON 和 key="value"
+        # 字段名只从单词开头匹配，避免在每个位置回溯
+        self._quoted = re.compile(
+            r'''(["']?)((?<![\w-])[\w-]*?(?:%s)[\w-]*)\1(\s*[:=]\s*)(["'])(?:\\.|(?!\4).)*\4''' % names, re.IGNORECASE
+        )
+        # 不带引号的值：URL 查询参数、key=value
+        self._bare = re.compile(r'''((?<![\w-])[\w-]*?(?:%s)[\w-]*)=(?!["'])[^\s&,;)}\]]+''' % names, re.IGNORECASE)
+        self._bearer = re.compile(r'(Bearer\s+)[\w.~+/=-]+')
+        self._jwt = re.compile(r'\beyJ[\w-]+\.[\w-]+\.[\w-]+')
+
+    def redact(self, text):
+        """替换文本中敏感字段的值"""
+        # 大多数日志不包含敏感字段名，先用一次关键字查找跳过
+        if self.is_sensitive(text):
+            text = self._quoted.sub(self._mask_quoted, text)
+            text = self._bare.sub(r'\1=***', text)
+        if 'Bearer' in text:
+            text = self._bearer.sub(r'\1***', text)
+        if 'eyJ' in text:
+            text = self._jwt.sub('***', text)
+        return text
+
+    @staticmethod
+    def _mask_quoted(match):
+        quote, name, separator, value_quote = match.group(1, 2, 3, 4)
+        return f'{quote}{name}{quote}{separator}{value_quote}***{value_quote}'
+
+    def is_sensitive(self, name):
+        """文本中是否包含需要脱敏的字段名（也用于判断 extra 字段）"""
+        lower = name.lower()
+        return any(key in lower for key in self._keys)
+
+
+class RedactingFormatter(logging.Formatter):
+    """文本格式，输出前脱敏"""
+
+    def __init__(self, fmt=TEXT_FORMAT, redactor=None):
+        super().__init__(fmt)
+        self.redactor = redactor or Redactor()
+
+    def format(self, record):
+        return self.redactor.redact(super().format(record))
+
+
+class JsonFormatter(logging.Formatter):
+    """JSON 行格式：时间、级别、logger、消息、进程号、代码位置、异常和 extra 字段，输出前脱敏"""
+
+    def __init__(self, redactor=None):
+        super().__init__()
+        self.redactor = redactor or Redactor()
+        # 文件和控制台共用一个实例，同一条记录只格式化一次（只在后台线程调用）
+        self._last_record = None
+        self._last_text = None
+
+    def format(self, record):
+        if record is self._last_record:
+            return self._last_text
+        redact = self.redactor.redact
+        created = time.localtime(record.created)
+        data = {
+            'ts': '%s.%03d%s' % (
+                time.strftime('%Y-%m-%dT%H:%M:%S', created), record.msecs, time.strftime('%z', created)
+            ),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': redact(record.getMessage()),
+            'pid': record.process,
+            'src': f'{record.filename}:{record.lineno}'
+        }
+        if record.exc_info:
+            data['exc'] = redact(self.formatException(record.exc_info))
+        elif record.exc_text:
+            data['exc'] = redact(record.exc_text)
+        for name, value in vars(record).items():
+            if name in _RECORD_ATTRS or name in data:
+                continue
+            data[name] = '***' if self.redactor.is_sensitive(name) else value
+        text = json.dumps(data, ensure_ascii=False, default=str)
+        self._last_record, self._last_text = record, text
+        return text
+
+
+class SamplingFilter(logging.Filter):
+    """
+    按 logger 名称前缀采样 INFO 及以下级别的日志，WARNING 及以上全部保留
+
+    Args:
+        rates: logger 名称到保留比例（0-1）的映射，按最长前缀匹配，例如 {'app.login': 0.1}
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = dict(rates)
+        self._resolved = {}
+        self.sampled_out = 0
+
+    def _rate(self, name):
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            best = -1
+            for prefix, value in self.rates.items():
+                if (name == prefix or name.startswith(prefix + '.')) and len(prefix) > best:
+                    rate, best = value, len(prefix)
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        if rate >= 1 or random.random() < rate:
+            return True
+        self.sampled_out += 1
+        return False
+
 
+class BoundedQueueHandler(QueueHandler):
+    """
+    写入有界队列的 QueueHandler
+
+    队列已满时按 overflow 策略处理：drop 丢弃 WARNING 及以下级别、ERROR 及以上最多等待 BLOCK_TIMEOUT 秒；
+    block 所有级别都最多等待 BLOCK_TIMEOUT 秒。等待后仍然已满的日志丢弃并计数
+    """
+
+    def __init__(self, log_queue, overflow='drop'):
+        if overflow not in ('drop', 'block'):
+            raise ValueError(f'不支持的 LOG_QUEUE_OVERFLOW: {overflow}')
+        super().__init__(log_queue)
+        self.overflow = overflow
+        self.dropped = 0
+
+    def prepare(self, record):
+        # 只在请求线程合并消息参数（参数可能在之后被修改），异常堆栈留给后台线程格式化
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            if self.overflow == 'drop' and record.levelno < logging.ERROR:
+                self.dropped += 1
+                return
+        try:
+            self.queue.put(record, timeout=BLOCK_TIMEOUT)
+        except queue.Full:
+            self.dropped += 1
+
+
+class DropReportingListener(QueueListener):
+    """写出日志前检查丢弃计数，有新的丢弃时先输出一条 WARNING"""
 
-def setup_logging(app):
+    def __init__(self, log_queue, queue_handler, *handlers):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.queue_handler = queue_handler
+        self._reported = 0
+
+    def handle(self, record):
+        dropped = self.queue_handler.dropped
+        if dropped > self._reported:
+            notice = logging.LogRecord(
+                record.name, logging.WARNING, __file__, 0,
+                f'日志队列已满，已丢弃 {dropped - self._reported} 条日志（累计 {dropped} 条）', None, None
+            )
+            self._reported = dropped
+            super().handle(notice)
+        super().handle(record)
+
+
+def parse_sampling(value):
+    """解析 LOG_SAMPLING，例如 'app.login=0.1,app.topics=0.5'"""
+    rates = {}
+    for item in (value or '').split(','):
+        name, sep, rate = item.strip().partition('=')
+        if sep and name:
+            rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+class QueuedLogging(object):
+    """
+    日志队列管道：请求线程的 BoundedQueueHandler + 后台线程的 DropReportingListener
+    """
+
+    def __init__(self, handlers, queue_size=10000, overflow='drop', sampling=None):
+        """
+        Args:
+            handlers: 后台线程写出的处理器（文件、控制台）
+            queue_size: 队列长度
+            overflow: drop / block
+            sampling: logger 名称前缀到保留比例的映射
+        """
+        self.handlers = handlers
+        self.queue_size = queue_size
+        self.handler = BoundedQueueHandler(queue.Queue(queue_size), overflow)
+        self.sampling = SamplingFilter(sampling) if sampling else None
+        if self.sampling is not None:
+            self.handler.addFilter(self.sampling)
+        self.listener = None
+        self._lock = threading.Lock()
+        # fork 出的子进程没有后台线程，重新创建队列并启动
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._restart_in_child)
+
+    def start(self):
+        with self._lock:
+            if self.listener is None:
+                self.listener = DropReportingListener(self.handler.queue, self.handler, *self.handlers)
+                self.listener.start()
+
+    def stop(self):
+        """写出队列中剩余的日志并停止后台线程"""
+        with self._lock:
+            listener, self.listener = self.listener, None
+        if listener is not None:
+            listener.stop()
+            for handler in self.handlers:
+                try:
+                    handler.flush()
+                except (OSError, ValueError):
+                    # 进程退出时控制台输出可能已经关闭
+                    pass
+
+    def _restart_in_child(self):
+        self._lock = threading.Lock()
+        if self.listener is not None:
+            self.listener = None
+            self.handler.queue = queue.Queue(self.queue_size)
+            self.start()
+
+    def stats(self):
+        """返回队列长度、丢弃和采样过滤的日志数"""
+        return {
+            'queued': self.handler.queue.qsize(),
+            'queueSize': self.queue_size,
+            'dropped': self.handler.dropped,
+            'sampledOut': self.sampling.sampled_out if self.sampling is not None else 0
+        }
+
+
+def setup_logging(app, env=None):
     """
     配置应用日志系统
-    
+
     Args:
         app: Flask应用实例
+        env: 环境变量字典，默认 os.environ
+
+    Returns:
+        Flask应用实例；日志管道保存在 app.extensions['queued_logging']
     """
-    # 创建logs目录
-    if not os.path.exists('logs'):
-        os.mkdir('logs')
-    
+    env = os.environ if env is None else env
+    level = getattr(logging, env.get('LOG_LEVEL', 'INFO').upper(), logging.INFO)
+    log_file = env.get('LOG_FILE', 'logs/app.log')
+    redactor = Redactor([
+        key.strip() for key in env.get('LOG_REDACT_KEYS', ','.join(DEFAULT_REDACT_KEYS)).split(',') if key.strip()
+    ])
+    if env.get('LOG_FORMAT', 'json').lower() == 'text':
+        file_formatter = RedactingFormatter(TEXT_FORMAT, redactor)
+        console_formatter = RedactingFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s', redactor)
+    else:
+        file_formatter = console_formatter = JsonFormatter(redactor)
+
+    # 创建日志目录
+    log_dir = os.path.dirname(log_file)
+    if log_dir and not os.path.exists(log_dir):
+        os.makedirs(log_dir, exist_ok=True)
+
     # 配置文件日志处理器
     file_handler = RotatingFileHandler(
-        'logs/app.log',
-        maxBytes=10240000,  # 10MB
-        backupCount=10
+        log_file,
+        maxBytes=int(env.get('LOG_MAX_BYTES', 10240000)),
+        backupCount=int(env.get('LOG_BACKUP_COUNT', 10))
     )
-    
-    # 设置日志格式
-    file_handler.setFormatter(logging.Formatter(
-        '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-    ))
-    
-    # 设置日志级别
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
-    
+    file_handler.setFormatter(file_formatter)
+    file_handler.setLevel(level)
+
     # 配置控制台日志处理器
     console_handler = logging.StreamHandler()
-    console_handler.setFormatter(logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    ))
-    console_handler.setLevel(logging.INFO)
-    app.logger.addHandler(console_handler)
-    
+    console_handler.setFormatter(console_formatter)
+    console_handler.setLevel(level)
+
+    # 请求线程只写入队列，文件和控制台由后台线程写出
+    pipeline = QueuedLogging(
+        [file_handler, console_handler],
+        queue_size=int(env.get('LOG_QUEUE_SIZE', 10000)),
+        overflow=env.get('LOG_QUEUE_OVERFLOW', 'drop').lower(),
+        sampling=parse_sampling(env.get('LOG_SAMPLING'))
+    )
+    pipeline.start()
+    atexit.register(pipeline.stop)
+    # 首次访问 app.logger 时 Flask 会添加同步写 stderr 的 default_handler，控制台日志已由后台线程输出
+    app.logger.removeHandler(default_handler)
+    app.logger.addHandler(pipeline.handler)
+    app.extensions['queued_logging'] = pipeline
+
     # 设置应用日志级别
-    app.logger.setLevel(logging.INFO)
+    app.logger.setLevel(level)
     app.logger.info('Application logging initialized')
-    
+
     return app
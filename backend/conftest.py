@@ -0,0 +1,97 @@
+"""
+测试公共配置
+各测试模块共用的环境变量、建表/删表 fixture、登录令牌和 SQL 语句计数工具。
+
+测试模块在导入时加载 app，本文件先于测试模块加载，在这里切换到内存 SQLite；
+因此测试需要通过 python -m pytest 运行，而不是直接执行测试文件。
+"""
+
+import datetime
+import os
+import sys
+from contextlib import contextmanager
+
+import jwt
+import pytest
+from sqlalchemy import event
+
+# 添加backend目录和scripts目录到路径，并在测试模块导入 app 之前切换到测试数据库
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'scripts'))
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['TOPIC_VERSION_CHECK_INTERVAL'] = '3600'
+
+# scripts/ 下是命令行工具（test_import.py 的 test_* 函数需要命令行参数），不作为 pytest 测试收集
+collect_ignore_glob = ['scripts/*']
+
+
+def make_token(user_id, openid=None):
+    """生成有效期一天的登录令牌，签名密钥与 app 一致"""
+    return jwt.encode({
+        'user_id': user_id,
+        'openid': openid or f'openid_{user_id}',
+        'exp': datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=1)
+    }, os.environ.get('SECRET_KEY', 'fallback_secret_key_for_development'), algorithm='HS256')
+
+
+@pytest.fixture(scope='session')
+def auth_headers():
+    """
+    返回构造 Authorization 请求头的函数
+
+    用法: client.get(url, headers=auth_headers(USER_ID))
+    """
+    def build(user_id, openid=None):
+        return {'Authorization': f'Bearer {make_token(user_id, openid)}'}
+    return build
+
+
+@pytest.fixture(scope='module')
+def database():
+    """
+    在应用上下文中为当前测试模块建表，模块结束后删表
+
+    测试模块的 client fixture 依赖本 fixture 写入各自的数据；
+    进程内的题目缓存和题库版本号在建表后和删表后都会失效，不同模块的数据互不影响
+    """
+    from app import app, db, topic_bank_version, topic_catalog
+
+    with app.app_context():
+        db.create_all()
+        topic_bank_version.invalidate()
+        topic_catalog.invalidate()
+
+        yield db
+
+        db.session.remove()
+        db.drop_all()
+    topic_bank_version.invalidate()
+    topic_catalog.invalidate()
+
+
+@pytest.fixture(scope='session')
+def count_queries():
+    """
+    返回统计代码块内执行的 SQL 语句的上下文管理器
+
+    用法:
+        with count_queries() as statements:
+            client.get(url)
+        assert len(statements) == 1
+    """
+    from app import db
+
+    @contextmanager
+    def counter():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return counter
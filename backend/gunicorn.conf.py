@@ -0,0 +1,97 @@
+"""
+Gunicorn 配置
+start.sh 通过 `gunicorn -c gunicorn.conf.py app:app` 启动，在项目目录下直接运行 `gunicorn app:app` 也会自动加载本文件
+
+请求处理时间主要花在等待 MySQL 和微信接口上，默认使用 gthread worker，
+每个 worker 用多个线程同时处理请求；也可以切换为 gevent（协程）或原来的 sync worker。
+gevent 模式下 gunicorn 在加载应用前对标准库打补丁，PyMySQL 和 requests 都是纯 Python 实现，
+数据库查询和微信接口调用会自动让出执行权；不要改用 mysqlclient 等 C 扩展驱动，它们会阻塞整个 worker。
+
+数据库连接池和微信接口并发上限按每个 worker 的并发数设置默认值（已设置的环境变量不会被覆盖）：
+    sync      并发 1                        DB_POOL_SIZE=1   DB_MAX_OVERFLOW=1
+    gthread   并发 = GUNICORN_THREADS       DB_POOL_SIZE=线程数  DB_MAX_OVERFLOW=2，每个线程都能立即取到连接，
+              请求会话之外另取的连接（例如流式备份）使用临时连接
+    gevent    并发 = GUNICORN_WORKER_CONNECTIONS
+              DB_POOL_SIZE=min(并发, 10)  DB_MAX_OVERFLOW=max(min(并发, 20)-DB_POOL_SIZE, 1)，其余协程排队等待连接
+MySQL 的 max_connections 需大于 worker 数 × (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+
+环境变量：
+    GUNICORN_BIND                 监听地址（默认 0.0.0.0:5000）
+    GUNICORN_WORKER_CLASS         sync / gthread / gevent（默认 gthread）
+    GUNICORN_WORKERS              worker 进程数（默认 4）
+    GUNICORN_THREADS              gthread 模式下每个 worker 的线程数（默认 8）
+    GUNICORN_WORKER_CONNECTIONS   gevent 模式下每个 worker 的最大并发连接数（默认 100）
+    GUNICORN_TIMEOUT              worker 无响应超时，秒（默认 120）
+    METRICS_MULTIPROC_DIR         各 worker 写入请求指标快照的共享目录（默认 logs/metrics），/metrics 合并后输出
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+# 先加载 .env，使其中的设置优先于下面按并发数计算的默认值
+load_dotenv()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', 'logs/access.log')
+errorlog = os.environ.get('GUNICORN_ERROR_LOG', 'logs/error.log')
+
+if worker_class not in ('sync', 'gthread', 'gevent'):
+    raise ValueError(f'不支持的 GUNICORN_WORKER_CLASS: {worker_class}')
+
+
+def worker_concurrency():
+    """每个 worker 同时处理的最大请求数"""
+    if worker_class == 'gthread':
+        return threads
+    if worker_class == 'gevent':
+        return worker_connections
+    return 1
+
+
+def _pool_defaults(concurrency):
+    # 至少保留 1 个临时连接：流式备份等在请求会话之外另取连接，连接池满时不必等待 DB_POOL_TIMEOUT
+    if worker_class == 'gevent':
+        pool_size = min(concurrency, 10)
+        return pool_size, max(min(concurrency, 20) - pool_size, 1)
+    if worker_class == 'gthread':
+        return concurrency, 2
+    return 1, 1
+
+
+# worker 进程从主进程继承环境变量，应用在 worker 中加载时读取这些值
+_concurrency = worker_concurrency()
+_pool_size, _max_overflow = _pool_defaults(_concurrency)
+os.environ.setdefault('DB_POOL_SIZE', str(_pool_size))
+os.environ.setdefault('DB_MAX_OVERFLOW', str(_max_overflow))
+os.environ.setdefault('WECHAT_MAX_CONCURRENCY', str(min(_concurrency, 32)))
+os.environ.setdefault('WECHAT_POOL_SIZE', str(min(_concurrency, 32)))
+os.environ.setdefault('METRICS_MULTIPROC_DIR', os.path.join('logs', 'metrics'))
+
+
+def on_starting(server):
+    # 清除上次运行留下的指标快照，计数从零开始
+    from services.metrics import clear_directory
+    clear_directory(os.environ['METRICS_MULTIPROC_DIR'])
+
+
+def child_exit(server, worker):
+    # 已退出 worker 的计数保留，连接池等仪表盘不再计入
+    from services.metrics import mark_process_dead
+    mark_process_dead(os.environ['METRICS_MULTIPROC_DIR'], worker.pid)
+
+
+def when_ready(server):
+    server.log.info(
+        f"worker_class={worker_class} workers={workers} concurrency_per_worker={_concurrency} "
+        f"DB_POOL_SIZE={os.environ['DB_POOL_SIZE']} DB_MAX_OVERFLOW={os.environ['DB_MAX_OVERFLOW']} "
+        f"WECHAT_MAX_CONCURRENCY={os.environ['WECHAT_MAX_CONCURRENCY']}"
+    )
@@ -1,12 +1,217 @@
 """
 JWT认证中间件
 提供token验证装饰器，用于保护需要认证的API接口
+
+签名密钥在启动时加载一次（init_auth），验证通过的token按摘要缓存，
+同一个token再次请求时不再重复 HMAC 验签。缓存条目的过期时间不晚于 token 的 exp
+
+环境变量：
+    SECRET_KEY              JWT 签名密钥
+    AUTH_TOKEN_CACHE_SIZE   最多缓存的token数（默认 10000，0 表示不缓存）
+    AUTH_TOKEN_CACHE_TTL    单个token的最长缓存时间，秒（默认 300）
 """
 
+import base64
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
 from functools import wraps
+
 from flask import request, jsonify
 import jwt
-import os
+
+DEFAULT_SECRET_KEY = 'fallback_secret_key_for_development'
+JWT_ALGORITHM = 'HS256'
+
+
+class TokenCache(object):
+    """
+    已验证token缓存
+
+    以token的 SHA-256 摘要为键保存解码后的数据，不保存token原文；
+    使用 LRU 限制条目数，条目在 min(exp, 写入时间 + ttl) 时过期
+    """
+
+    def __init__(self, max_size=10000, ttl=300):
+        """
+        Args:
+            max_size: 最多缓存的token数，0 表示不缓存
+            ttl: 单个token的最长缓存时间（秒）
+        """
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def digest(token):
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def get(self, digest):
+        """
+        获取缓存的token数据
+
+        Args:
+            digest: token摘要
+
+        Returns:
+            dict: token数据，未命中或已过期时返回 None
+        """
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                if time.time() < entry[0]:
+                    self._entries.move_to_end(digest)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[digest]
+            self.misses += 1
+            return None
+
+    def put(self, digest, payload):
+        """
+        缓存验证通过的token数据
+
+        Args:
+            digest: token摘要
+            payload: 解码后的token数据
+        """
+        if self._max_size <= 0:
+            return
+        expires_at = time.time() + self._ttl
+        exp = payload.get('exp')
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, exp)
+
+        with self._lock:
+            self._entries[digest] = (expires_at, payload)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """返回缓存指标字典"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxSize': self._max_size,
+                'ttl': self._ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hitRate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class TokenVerifier(object):
+    """JWT 签发与验证，签名密钥在创建时转换为 PyJWK，验证时不再重复处理密钥"""
+
+    def __init__(self, secret_key, cache=None):
+        """
+        Args:
+            secret_key: JWT 签名密钥
+            cache: TokenCache，为空时不缓存
+        """
+        self._secret_key = secret_key
+        secret = base64.urlsafe_b64encode(secret_key.encode('utf-8')).rstrip(b'=').decode('ascii')
+        self._jwk = jwt.PyJWK({'kty': 'oct', 'k': secret}, algorithm=JWT_ALGORITHM)
+        self.cache = cache
+
+    def encode(self, payload):
+        """签发token"""
+        return jwt.encode(payload, self._secret_key, algorithm=JWT_ALGORITHM)
+
+    def decode(self, token):
+        """
+        验证并解码token，验证通过的结果写入缓存
+
+        Args:
+            token: 不含 "Bearer " 前缀的token
+
+        Returns:
+            dict: token数据
+
+        Raises:
+            jwt.ExpiredSignatureError: token已过期
+            jwt.InvalidTokenError: token无效
+        """
+        if self.cache is None:
+            return jwt.decode(token, self._jwk, algorithms=[JWT_ALGORITHM])
+
+        digest = self.cache.digest(token)
+        payload = self.cache.get(digest)
+        if payload is None:
+            payload = jwt.decode(token, self._jwk, algorithms=[JWT_ALGORITHM])
+            self.cache.put(digest, payload)
+        return payload
+
+
+_verifier = None
+_verifier_lock = threading.Lock()
+
+
+def init_auth(secret_key=None, cache_size=None, cache_ttl=None):
+    """
+    加载签名密钥并创建token缓存，应用启动时（加载 .env 之后）调用一次
+
+    Args:
+        secret_key: JWT 签名密钥，默认读取 SECRET_KEY
+        cache_size: 最多缓存的token数，默认读取 AUTH_TOKEN_CACHE_SIZE
+        cache_ttl: 单个token的最长缓存时间（秒），默认读取 AUTH_TOKEN_CACHE_TTL
+
+    Returns:
+        TokenVerifier: 当前使用的验证器
+    """
+    global _verifier
+    if secret_key is None:
+        secret_key = os.environ.get('SECRET_KEY', DEFAULT_SECRET_KEY)
+    if cache_size is None:
+        cache_size = int(os.environ.get('AUTH_TOKEN_CACHE_SIZE', 10000))
+    if cache_ttl is None:
+        cache_ttl = int(os.environ.get('AUTH_TOKEN_CACHE_TTL', 300))
+
+    cache = TokenCache(cache_size, cache_ttl) if cache_size > 0 else None
+    with _verifier_lock:
+        _verifier = TokenVerifier(secret_key, cache)
+    return _verifier
+
+
+def get_verifier():
+    """获取当前的验证器，未调用 init_auth 时按环境变量创建"""
+    verifier = _verifier
+    if verifier is None:
+        verifier = init_auth()
+    return verifier
+
+
+def create_token(payload):
+    """
+    使用启动时加载的密钥签发token
+
+    Args:
+        payload: token数据
+
+    Returns:
+        str: token
+    """
+    return get_verifier().encode(payload)
+
+
+def token_cache_stats():
+    """返回token缓存指标，未启用缓存时返回 None"""
+    cache = get_verifier().cache
+    return cache.stats() if cache is not None else None
 
 
 def token_required(f):
@@ -31,8 +236,7 @@ def token_required(f):
                 token = token[7:]
             
             # 验证token
-            secret_key = os.environ.get('SECRET_KEY', 'fallback_secret_key_for_development')
-            data = jwt.decode(token, secret_key, algorithms=['HS256'])
+            data = get_verifier().decode(token)
             
             # 将用户信息添加到请求上下文
             request.user_id = data['user_id']
@@ -76,8 +280,7 @@ def optional_token(f):
                     token = token[7:]
                 
                 # 验证token
-                secret_key = os.environ.get('SECRET_KEY', 'fallback_secret_key_for_development')
-                data = jwt.decode(token, secret_key, algorithms=['HS256'])
+                data = get_verifier().decode(token)
                 
                 # 将用户信息添加到请求上下文
                 request.user_id = data['user_id']
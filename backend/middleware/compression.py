@@ -0,0 +1,280 @@
+"""
+响应压缩中间件
+按 Accept-Encoding 协商 brotli / gzip 压缩 JSON 等文本响应：
+
+- 小于 min_size 的响应不压缩（压缩收益不足以抵消 CPU 开销和协议头）
+- 流式响应（例如题目备份）逐块压缩，每块结束时刷新压缩器，不会先把整个响应体读入内存
+- 带强 ETag 的响应（题库类接口）内容完全由 ETag 决定，压缩结果按 (ETag, 编码) 缓存，
+  ETag 中包含题库版本号，导入题目后旧条目自然不再命中，由 LRU 淘汰
+- 压缩后的响应 ETag 追加编码后缀（例如 "v3-abc-gzip"），不同编码的表示使用不同的强 ETag
+
+brotli 为可选依赖，未安装时只使用 gzip
+
+环境变量：
+    COMPRESSION_ENABLED         是否启用响应压缩（默认 true）
+    COMPRESSION_MIN_SIZE        压缩的最小响应体字节数（默认 1024）
+    COMPRESSION_GZIP_LEVEL      gzip 压缩级别 1-9（默认 6）
+    COMPRESSION_BROTLI_QUALITY  brotli 压缩质量 0-11（默认 5）
+    COMPRESSION_CACHE_SIZE      最多缓存的预压缩响应数（默认 256，0 表示不缓存）
+"""
+
+import gzip
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 参与压缩的响应类型
+COMPRESSIBLE_MIMETYPES = frozenset((
+    'application/json', 'application/x-ndjson', 'application/javascript',
+    'text/html', 'text/plain', 'text/css', 'text/csv', 'text/xml'
+))
+
+
+def available_encodings():
+    """按优先级返回服务端支持的编码"""
+    if brotli is not None:
+        return ('br', 'gzip')
+    return ('gzip',)
+
+
+def etag_variants(etag):
+    """
+    返回 ETag 及其压缩表示对应的 ETag，用于条件请求比较
+
+    Args:
+        etag: 未压缩表示的 ETag（不含引号）
+
+    Returns:
+        list: ETag 值列表
+    """
+    return [etag] + [f'{etag}-{encoding}' for encoding in available_encodings()]
+
+
+def compress(data, encoding, gzip_level=6, brotli_quality=5):
+    """
+    一次性压缩完整的响应体
+
+    Args:
+        data: 字节串
+        encoding: br 或 gzip
+        gzip_level: gzip 压缩级别
+        brotli_quality: brotli 压缩质量
+
+    Returns:
+        bytes: 压缩后的数据
+    """
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_quality)
+    # mtime 固定为 0，相同内容的压缩结果逐字节一致
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+def compress_chunks(chunks, encoding, gzip_level=6, brotli_quality=5):
+    """
+    流式压缩数据块，每个输入块结束时刷新，客户端可以边下载边解压
+
+    关闭返回的生成器时同时关闭上游数据块生成器（释放数据库连接等资源）
+
+    Args:
+        chunks: 字节串的可迭代对象
+        encoding: br 或 gzip
+        gzip_level: gzip 压缩级别
+        brotli_quality: brotli 压缩质量
+
+    Returns:
+        generator: 压缩后的数据块
+    """
+    try:
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=brotli_quality)
+            for chunk in chunks:
+                data = compressor.process(chunk) + compressor.flush()
+                if data:
+                    yield data
+            yield compressor.finish()
+        else:
+            compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            for chunk in chunks:
+                data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+                if data:
+                    yield data
+            yield compressor.flush()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+class CompressedCache(object):
+    """
+    预压缩响应缓存
+
+    以 (强 ETag, 编码) 为键保存压缩后的响应体，使用 LRU 限制条目数
+    """
+
+    def __init__(self, max_size=256):
+        """
+        Args:
+            max_size: 最多缓存的条目数，0 表示不缓存
+        """
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """获取缓存的压缩数据，不存在时返回 None"""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def set(self, key, data):
+        """保存压缩数据，超出容量时淘汰最久未使用的条目"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        """返回缓存统计信息"""
+        with self._lock:
+            size = len(self._entries)
+            total_bytes = sum(len(data) for data in self._entries.values())
+            hits, misses = self.hits, self.misses
+        requests = hits + misses
+        return {
+            'size': size,
+            'maxSize': self.max_size,
+            'bytes': total_bytes,
+            'hits': hits,
+            'misses': misses,
+            'hitRate': round(hits / requests, 4) if requests else 0.0
+        }
+
+
+class ResponseCompressor(object):
+    """
+    Flask 响应压缩扩展，通过 after_request 处理响应
+    """
+
+    def __init__(self, app=None, min_size=1024, gzip_level=6, brotli_quality=5, cache_size=256):
+        """
+        Args:
+            app: 可选，Flask 应用
+            min_size: 压缩的最小响应体字节数
+            gzip_level: gzip 压缩级别
+            brotli_quality: brotli 压缩质量
+            cache_size: 最多缓存的预压缩响应数
+        """
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache = CompressedCache(cache_size)
+        # gthread 模式下多个线程同时处理响应，计数需要加锁
+        self._stats_lock = threading.Lock()
+        self.compressed = 0
+        self.skipped = 0
+        if app is not None:
+            self.init_app(app)
+
+    @classmethod
+    def from_env(cls, app=None):
+        """根据环境变量创建压缩扩展"""
+        return cls(
+            app,
+            min_size=int(os.environ.get('COMPRESSION_MIN_SIZE', 1024)),
+            gzip_level=int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6)),
+            brotli_quality=int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 5)),
+            cache_size=int(os.environ.get('COMPRESSION_CACHE_SIZE', 256))
+        )
+
+    def init_app(self, app):
+        """注册 after_request 钩子"""
+        app.after_request(self.process_response)
+
+    def negotiate(self):
+        """按 Accept-Encoding 选择编码，客户端不接受压缩时返回 None"""
+        return request.accept_encodings.best_match(available_encodings())
+
+    def process_response(self, response):
+        """
+        压缩响应，不满足条件时原样返回
+
+        Args:
+            response: Flask 响应对象
+
+        Returns:
+            Response: 处理后的响应
+        """
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+        # 响应内容随 Accept-Encoding 变化，缓存代理需要区分
+        response.vary.add('Accept-Encoding')
+
+        if (response.status_code < 200 or response.status_code in (204, 206, 304)
+                or 'Content-Encoding' in response.headers
+                or response.cache_control.no_transform
+                or request.method == 'HEAD'):
+            return response
+
+        encoding = self.negotiate()
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = compress_chunks(
+                response.response, encoding, self.gzip_level, self.brotli_quality
+            )
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                self._count('skipped')
+                return response
+            etag, weak = response.get_etag()
+            key = (etag, encoding) if etag and not weak else None
+            compressed = self.cache.get(key) if key is not None else None
+            if compressed is None:
+                compressed = compress(data, encoding, self.gzip_level, self.brotli_quality)
+                if key is not None:
+                    self.cache.set(key, compressed)
+            response.set_data(compressed)
+            if etag:
+                response.set_etag(f'{etag}-{encoding}', weak=weak)
+
+        response.headers['Content-Encoding'] = encoding
+        self._count('compressed')
+        return response
+
+    def _count(self, name):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self):
+        """返回压缩统计信息"""
+        with self._stats_lock:
+            compressed, skipped = self.compressed, self.skipped
+        return {
+            'encodings': list(available_encodings()),
+            'minSize': self.min_size,
+            'compressed': compressed,
+            'skipped': skipped,
+            'cache': self.cache.stats()
+        }
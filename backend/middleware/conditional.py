@@ -0,0 +1,78 @@
+"""
+条件请求中间件
+题库类接口的响应只取决于题库版本号和查询参数，由二者生成强 ETag：
+客户端携带 If-None-Match 且 ETag 未变化时直接返回 304，不执行视图函数，也不查询数据库
+（版本号本身由 VersionTracker 在进程内缓存，最多每个检查间隔读取一次）
+
+环境变量：
+    CATALOG_CACHE_MAX_AGE   题库类接口 Cache-Control 的 max-age，秒（默认 60）
+"""
+
+import hashlib
+from functools import wraps
+
+from flask import current_app, make_response, request
+
+from middleware.compression import etag_variants
+
+
+def build_etag(version, path, args):
+    """
+    由题库版本号、请求路径和查询参数生成 ETag
+
+    Args:
+        version: 题库版本号
+        path: 请求路径
+        args: 查询参数（MultiDict），参数顺序不影响结果
+
+    Returns:
+        str: ETag 值（不含引号）
+    """
+    query = '&'.join(f'{key}={value}' for key, value in sorted(args.items(multi=True)))
+    digest = hashlib.sha1(f'{path}?{query}'.encode('utf-8')).hexdigest()[:16]
+    return f'v{version}-{digest}'
+
+
+def conditional_get(version, max_age=60, bypass=None):
+    """
+    为题库类 GET 接口添加 ETag / Cache-Control，并处理 If-None-Match
+
+    Args:
+        version: 返回当前题库版本号的函数，返回 None 时不生成 ETag
+        max_age: Cache-Control 的 max-age（秒）
+        bypass: 可选，无参函数，返回 True 时本次请求不参与缓存（例如按用户过滤的结果）
+
+    Returns:
+        function: 视图装饰器
+    """
+    cache_control = f'public, max-age={max_age}, must-revalidate'
+
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if bypass is not None and bypass():
+                return f(*args, **kwargs)
+
+            current = version()
+            if current is None:
+                return f(*args, **kwargs)
+
+            etag = build_etag(current, request.path, request.args)
+            # 客户端缓存的可能是压缩后的表示，其 ETag 带有编码后缀
+            matched = next(
+                (value for value in etag_variants(etag) if request.if_none_match.contains_weak(value)), None
+            )
+            if matched is not None:
+                response = current_app.response_class(status=304)
+                etag = matched
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = cache_control
+            return response
+
+        return decorated
+
+    return decorator
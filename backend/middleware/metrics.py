@@ -0,0 +1,175 @@
+"""
+请求指标中间件
+通过 Flask 请求钩子和 SQLAlchemy 引擎事件按路由统计：
+    http_requests_total                  请求数（按方法、路由、状态码）
+    http_request_duration_seconds        请求耗时直方图
+    db_statements_per_request            每个请求执行的 SQL 语句数直方图
+    db_statement_seconds_total           SQL 执行时间
+    db_rows_total                        查询返回的行数（驱动报告 rowcount 时统计，SQLite 不报告）
+    db_pool_wait_seconds_total           从连接池取连接的等待时间
+
+路由标签使用 URL 规则（例如 /api/topics），未匹配任何路由的请求记为 unmatched，标签数量不随请求路径增长。
+指标的多进程合并和文本输出见 services/metrics.py
+
+环境变量：
+    METRICS_ENABLED            是否启用请求指标（默认 true）
+    METRICS_MULTIPROC_DIR      多进程共享目录，gunicorn.conf.py 默认设置为 logs/metrics，未设置时只输出当前进程
+    METRICS_FLUSH_INTERVAL     worker 写入指标快照的间隔，秒（默认 5），后台线程按该间隔写入，请求结束时超过间隔也会写入
+"""
+
+import os
+import time
+
+from flask import g, has_app_context, request
+from sqlalchemy import event
+
+from services.metrics import COUNTER, HISTOGRAM, MetricsRegistry
+
+# 请求耗时直方图的桶上界（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# 每个请求 SQL 语句数直方图的桶上界，用于发现 N+1 查询
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class RequestStats(object):
+    """单个请求的 SQL 统计，保存在 flask.g 中"""
+
+    __slots__ = ('start', 'statements', 'sql_seconds', 'rows', 'pool_wait', 'status')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.statements = 0
+        self.sql_seconds = 0.0
+        self.rows = 0
+        self.pool_wait = 0.0
+        self.status = 500
+
+
+def _current_stats():
+    # 应用启动、脚本等不在请求中的 SQL 不统计
+    return g.get('_request_stats') if has_app_context() else None
+
+
+class RequestMetrics(object):
+    """
+    Flask 请求指标扩展
+    before_request 开始计时，after_request 记录状态码，teardown_request 汇总
+    （此时响应压缩等 after_request 处理已经完成，耗时包含在内）
+    """
+
+    def __init__(self, app=None, registry=None):
+        """
+        Args:
+            app: 可选，Flask 应用
+            registry: MetricsRegistry，为空时创建只输出当前进程的注册表
+        """
+        self.registry = registry or MetricsRegistry()
+        self.registry.describe('http_requests_total', COUNTER, '请求数')
+        self.registry.describe(
+            'http_request_duration_seconds', HISTOGRAM, '请求耗时（秒）', LATENCY_BUCKETS
+        )
+        self.registry.describe(
+            'db_statements_per_request', HISTOGRAM, '每个请求执行的 SQL 语句数', STATEMENT_BUCKETS
+        )
+        self.registry.describe('db_statement_seconds_total', COUNTER, 'SQL 执行时间（秒）')
+        self.registry.describe('db_rows_total', COUNTER, '查询返回的行数')
+        self.registry.describe('db_pool_wait_seconds_total', COUNTER, '从连接池取连接的等待时间（秒）')
+        if app is not None:
+            self.init_app(app)
+
+    @classmethod
+    def from_env(cls, app=None, env=None):
+        """根据环境变量创建"""
+        env = os.environ if env is None else env
+        registry = MetricsRegistry(
+            directory=env.get('METRICS_MULTIPROC_DIR') or None,
+            flush_interval=float(env.get('METRICS_FLUSH_INTERVAL', 5))
+        )
+        registry.start_background_flush()
+        return cls(app, registry=registry)
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def instrument_engine(self, engine):
+        """
+        监听引擎的语句执行事件；连接池为 InstrumentedQueuePool 时同时统计取连接的等待时间
+
+        Args:
+            engine: SQLAlchemy 引擎
+        """
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        event.listen(engine, 'handle_error', self._handle_error)
+        pool_metrics = getattr(engine.pool, 'metrics', None)
+        if pool_metrics is not None:
+            pool_metrics.wait_listeners.append(self._record_pool_wait)
+
+    def render(self):
+        """合并各 worker 的指标，返回 Prometheus 文本"""
+        return self.registry.render()
+
+    @staticmethod
+    def _before_request():
+        g._request_stats = RequestStats()
+
+    @staticmethod
+    def _after_request(response):
+        stats = g.get('_request_stats')
+        if stats is not None:
+            stats.status = response.status_code
+        return response
+
+    def _teardown_request(self, exc=None):
+        stats = g.pop('_request_stats', None)
+        if stats is None:
+            return
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        labels = {'method': request.method, 'route': route}
+        registry = self.registry
+        registry.inc('http_requests_total', dict(labels, status=stats.status))
+        registry.observe('http_request_duration_seconds', labels, time.perf_counter() - stats.start)
+        registry.observe('db_statements_per_request', labels, stats.statements)
+        if stats.statements:
+            registry.inc('db_statement_seconds_total', labels, stats.sql_seconds)
+            registry.inc('db_rows_total', labels, stats.rows)
+        if stats.pool_wait:
+            registry.inc('db_pool_wait_seconds_total', labels, stats.pool_wait)
+        registry.flush()
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _current_stats() is not None:
+            context._metrics_start = time.perf_counter()
+
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = _current_stats()
+        start = getattr(context, '_metrics_start', None)
+        if stats is None or start is None:
+            return
+        stats.statements += 1
+        stats.sql_seconds += time.perf_counter() - start
+        # 只统计返回结果集的语句；PyMySQL 缓冲结果后 rowcount 为行数，SQLite 为 -1
+        if cursor.description is not None and cursor.rowcount > 0:
+            stats.rows += cursor.rowcount
+
+    @staticmethod
+    def _handle_error(exception_context):
+        # 执行失败的语句不会触发 after_cursor_execute，同样计入语句数和耗时
+        stats = _current_stats()
+        start = getattr(exception_context.execution_context, '_metrics_start', None)
+        if stats is None or start is None:
+            return
+        stats.statements += 1
+        stats.sql_seconds += time.perf_counter() - start
+
+    @staticmethod
+    def _record_pool_wait(seconds):
+        stats = _current_stats()
+        if stats is not None:
+            stats.pool_wait += seconds
@@ -3,27 +3,32 @@ import click
 from flask import current_app, g
 from flask.cli import with_appcontext
 
+from .pool import build_database_url, get_engine
+
 def get_db():
     """
     获取与MySQL数据库的连接
     g是一个特殊的对象，独立于每一个请求。它会在处理请求中把多个连接、多个函数所用到的数据存储其中，
-    反复使用，不需要每次调用该函数都要重新创建新的链接
+    反复使用，不需要每次调用该函数都要重新创建新的链接。
+    连接从 mysql.pool 的共享连接池取出，close_db 时归还连接池而不是断开
     """
     if 'db' not in g:
-        g.db = pymysql.connect(
-            host=current_app.config['MYSQL_HOST'],        # 使用正确的键名 MYSQL_HOST
-            user=current_app.config['MYSQL_USER'],        # 使用正确的键名 MYSQL_USER
-            password=current_app.config['MYSQL_PASSWORD'], # 使用正确的键名 MYSQL_PASSWORD
-            database=current_app.config['MYSQL_DB'],      # 使用正确的键名 MYSQL_DB
-            charset='utf8mb4',                           # 字符集
-            cursorclass=pymysql.cursors.DictCursor       # 使用字典游标
+        engine = get_engine(
+            build_database_url(
+                host=current_app.config['MYSQL_HOST'],
+                user=current_app.config['MYSQL_USER'],
+                password=current_app.config['MYSQL_PASSWORD'],
+                database=current_app.config['MYSQL_DB']
+            ),
+            connect_args={'cursorclass': pymysql.cursors.DictCursor}  # 使用字典游标
         )
+        g.db = engine.raw_connection()
 
     return g.db
 
 def close_db(e=None):
     """
-    通过检查g.db来确定连接是否已经建立。如果连接已建立，那么就关闭连接。
+    通过检查g.db来确定连接是否已经建立。如果连接已建立，那么就把连接归还连接池。
     """
     db = g.pop('db', None)
 
@@ -18,6 +18,7 @@ CREATE TABLE IF NOT EXISTS user (
 CREATE TABLE IF NOT EXISTS topic (
   id INT NOT NULL AUTO_INCREMENT,
   content TEXT NOT NULL,
+  content_hash CHAR(64) DEFAULT NULL COMMENT '规范化题干的SHA-256，用于导入去重',
   type_id INT NOT NULL COMMENT '1-单选，2-多选，3-判断',
   options TEXT COMMENT 'JSON格式存储选项',
   answer VARCHAR(16) NOT NULL,
@@ -27,11 +28,24 @@ CREATE TABLE IF NOT EXISTS topic (
   month INT,
   created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
   PRIMARY KEY (id),
+  -- InnoDB 二级索引隐含主键，以下索引等价于 (type_id, id) 等，可直接支持按 id 倒序的游标分页
   INDEX idx_type (type_id),
   INDEX idx_region (region),
-  INDEX idx_month (month)
+  INDEX idx_month (month),
+  -- 导入时按 (题干哈希, 月份) 去重，代替对 TEXT 列的全表扫描
+  UNIQUE KEY uk_content_month (content_hash, month)
 );
 
+-- 题库版本表：导入题目后递增，应用据此刷新进程内的题目缓存
+CREATE TABLE IF NOT EXISTS topic_bank_version (
+  id INT NOT NULL,
+  version BIGINT NOT NULL DEFAULT 0,
+  updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (id)
+);
+
+INSERT IGNORE INTO topic_bank_version (id, version) VALUES (1, 0);
+
 -- 用户错题表
 CREATE TABLE IF NOT EXISTS user_mistake (
   id INT NOT NULL AUTO_INCREMENT,
@@ -43,7 +57,34 @@ CREATE TABLE IF NOT EXISTS user_mistake (
   FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE,
   FOREIGN KEY (topic_id) REFERENCES topic(id) ON DELETE CASCADE,
   INDEX idx_user_id (user_id),
-  INDEX idx_topic_id (topic_id)
+  INDEX idx_topic_id (topic_id),
+  INDEX idx_user_created (user_id, created_at, id)
+);
+
+-- 用户错题统计表（答错次数，错题本按错误次数排序使用）
+CREATE TABLE IF NOT EXISTS user_mistake_stat (
+  user_id BIGINT NOT NULL,
+  topic_id INT NOT NULL,
+  wrong_count INT NOT NULL DEFAULT 0,
+  last_wrong_at DATETIME DEFAULT NULL,
+  PRIMARY KEY (user_id, topic_id),
+  FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE,
+  FOREIGN KEY (topic_id) REFERENCES topic(id) ON DELETE CASCADE,
+  INDEX idx_user_wrong (user_id, wrong_count, topic_id)
+);
+
+-- 用户统计汇总表：错题、收藏、完成题目数和错题分布
+CREATE TABLE IF NOT EXISTS user_stat (
+  user_id BIGINT NOT NULL,
+  mistake_count INT NOT NULL DEFAULT 0,
+  favorite_count INT NOT NULL DEFAULT 0,
+  done_count INT NOT NULL DEFAULT 0,
+  mistakes_by_type VARCHAR(512) NOT NULL DEFAULT '{}',
+  mistakes_by_month VARCHAR(512) NOT NULL DEFAULT '{}',
+  registered_at DATETIME DEFAULT NULL,
+  updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (user_id),
+  FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE
 );
 
 -- 用户收藏表
@@ -57,7 +98,8 @@ CREATE TABLE IF NOT EXISTS user_favorite (
   FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE,
   FOREIGN KEY (topic_id) REFERENCES topic(id) ON DELETE CASCADE,
   INDEX idx_user_id (user_id),
-  INDEX idx_topic_id (topic_id)
+  INDEX idx_topic_id (topic_id),
+  INDEX idx_user_created (user_id, created_at, id)
 );
 
 -- 考试记录表
@@ -104,7 +146,8 @@ CREATE TABLE IF NOT EXISTS user_topic_progress (
   FOREIGN KEY (topic_id) REFERENCES topic(id) ON DELETE CASCADE,
   INDEX idx_user_id (user_id),
   INDEX idx_topic_id (topic_id),
-  INDEX idx_month (month)
+  INDEX idx_month (month),
+  INDEX idx_user_month (user_id, month)
 );
 
 -- 支付记录表
@@ -0,0 +1,247 @@
+"""
+数据库连接池模块
+后端接口、mysql.get_db()、PDF导入和备份脚本统一从这里创建带连接池的 SQLAlchemy 引擎，
+连接池大小、溢出、回收、预检和语句超时均通过环境变量配置，并统计连接池指标
+
+环境变量：
+    DATABASE_URL              完整的数据库URL，设置后忽略 MYSQL_*（测试时可使用 sqlite:///path.db）
+    MYSQL_HOST / MYSQL_PORT / MYSQL_USER / MYSQL_PASSWORD / MYSQL_DATABASE
+    DB_POOL_SIZE              连接池常驻连接数（默认 5）
+    DB_MAX_OVERFLOW           允许超出常驻连接数的临时连接数（默认 10）
+    DB_POOL_TIMEOUT           等待空闲连接的最长时间，秒（默认 30）
+    DB_POOL_RECYCLE           连接最长使用时间，秒，需小于 MySQL wait_timeout（默认 1800）
+    DB_POOL_PRE_PING          取出连接时先检测连接是否可用（默认 true）
+    DB_CONNECT_TIMEOUT        建立连接超时，秒（默认 10）
+    DB_READ_TIMEOUT           读取结果超时，秒（默认 30）
+    DB_WRITE_TIMEOUT          写入请求超时，秒（默认 30）
+    DB_STATEMENT_TIMEOUT_MS   单条 SELECT 语句最长执行时间，毫秒，对应 MySQL max_execution_time（默认 0 不限制）
+"""
+
+import os
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, StaticPool
+
+
+def _env_int(env, name, default):
+    return int(env.get(name, default))
+
+
+def _env_bool(env, name, default):
+    return env.get(name, default).lower() == 'true'
+
+
+def build_database_url(env=None, host=None, port=None, user=None, password=None, database=None):
+    """
+    构建数据库URL
+
+    Args:
+        env: 环境变量字典，默认 os.environ
+        host/port/user/password/database: 可选，覆盖对应的 MYSQL_* 环境变量
+
+    Returns:
+        str: 数据库URL，优先使用 DATABASE_URL
+    """
+    env = os.environ if env is None else env
+    if env.get('DATABASE_URL') and not any((host, port, user, password, database)):
+        return env['DATABASE_URL']
+
+    url = URL.create(
+        'mysql+pymysql',
+        username=user or env.get('MYSQL_USER', 'root'),
+        password=password if password is not None else env.get('MYSQL_PASSWORD', ''),
+        host=host or env.get('MYSQL_HOST', 'localhost'),
+        port=int(port or env.get('MYSQL_PORT', 3306)),
+        database=database or env.get('MYSQL_DATABASE', 'sz_exam')
+    )
+    return url.render_as_string(hide_password=False)
+
+
+def build_engine_options(url, env=None):
+    """
+    根据环境变量构建 create_engine 参数
+
+    Args:
+        url: 数据库URL
+        env: 环境变量字典，默认 os.environ
+
+    Returns:
+        dict: create_engine 的关键字参数（不含URL），也可作为 SQLALCHEMY_ENGINE_OPTIONS
+    """
+    env = os.environ if env is None else env
+    url = make_url(url)
+
+    if url.get_backend_name() == 'sqlite':
+        # 内存数据库只能使用单个共享连接
+        if url.database in (None, '', ':memory:'):
+            return {'poolclass': StaticPool, 'connect_args': {'check_same_thread': False}}
+        return {
+            'poolclass': InstrumentedQueuePool,
+            'pool_size': _env_int(env, 'DB_POOL_SIZE', 5),
+            'max_overflow': _env_int(env, 'DB_MAX_OVERFLOW', 10),
+            'pool_timeout': _env_int(env, 'DB_POOL_TIMEOUT', 30),
+            'connect_args': {'check_same_thread': False}
+        }
+
+    connect_args = {
+        'charset': 'utf8mb4',
+        'connect_timeout': _env_int(env, 'DB_CONNECT_TIMEOUT', 10),
+        'read_timeout': _env_int(env, 'DB_READ_TIMEOUT', 30),
+        'write_timeout': _env_int(env, 'DB_WRITE_TIMEOUT', 30)
+    }
+    statement_timeout = _env_int(env, 'DB_STATEMENT_TIMEOUT_MS', 0)
+    if statement_timeout:
+        connect_args['init_command'] = f'SET SESSION max_execution_time = {statement_timeout}'
+
+    return {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': _env_int(env, 'DB_POOL_SIZE', 5),
+        'max_overflow': _env_int(env, 'DB_MAX_OVERFLOW', 10),
+        'pool_timeout': _env_int(env, 'DB_POOL_TIMEOUT', 30),
+        'pool_recycle': _env_int(env, 'DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': _env_bool(env, 'DB_POOL_PRE_PING', 'true'),
+        'connect_args': connect_args
+    }
+
+
+class PoolMetrics(object):
+    """连接池指标：取连接次数与等待时间、新建连接次数与耗时、等待超时次数"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+        self.connects = 0
+        self.connect_seconds = 0.0
+        self.max_connect_seconds = 0.0
+        # 取连接后调用的回调 listener(seconds)，请求指标据此统计每个请求的等待时间
+        self.wait_listeners = []
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+        for listener in self.wait_listeners:
+            listener(seconds)
+
+    def record_connect(self, seconds):
+        with self._lock:
+            self.connects += 1
+            self.connect_seconds += seconds
+            self.max_connect_seconds = max(self.max_connect_seconds, seconds)
+
+    def snapshot(self):
+        """返回指标字典，时间单位为毫秒"""
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'waitMsTotal': round(self.wait_seconds * 1000, 3),
+                'waitMsMax': round(self.max_wait_seconds * 1000, 3),
+                'connects': self.connects,
+                'connectMsTotal': round(self.connect_seconds * 1000, 3),
+                'connectMsMax': round(self.max_connect_seconds * 1000, 3)
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    记录指标的 QueuePool
+
+    等待时间为从连接池取出连接的耗时，连接池未满需要新建连接时包含建立连接的耗时
+    """
+
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+    def _create_connection(self):
+        start = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            self.metrics.record_connect(time.perf_counter() - start)
+
+
+def pool_metrics(engine):
+    """
+    获取引擎的连接池指标
+
+    Args:
+        engine: SQLAlchemy 引擎
+
+    Returns:
+        dict: 连接池状态和累计指标
+    """
+    pool = engine.pool
+    result = {'poolClass': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        result.update({
+            'size': pool.size(),
+            'checkedOut': pool.checkedout(),
+            'checkedIn': pool.checkedin(),
+            'overflow': pool.overflow()
+        })
+    metrics = getattr(pool, 'metrics', None)
+    if metrics is not None:
+        result.update(metrics.snapshot())
+    return result
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(url=None, connect_args=None):
+    """
+    获取共享的数据库引擎，相同参数在进程内只创建一次
+
+    Args:
+        url: 数据库URL，默认由环境变量构建
+        connect_args: 可选，额外的驱动连接参数（例如 pymysql 的 cursorclass）
+
+    Returns:
+        Engine: SQLAlchemy 引擎
+    """
+    url = url or build_database_url()
+    key = (url, tuple(sorted((connect_args or {}).items())))
+    engine = _engines.get(key)
+    if engine is not None:
+        return engine
+
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            options = build_engine_options(url)
+            if connect_args:
+                options['connect_args'] = dict(options.get('connect_args', {}), **connect_args)
+            engine = _engines[key] = create_engine(url, **options)
+        return engine
+
+
+def dispose_engines():
+    """关闭所有共享引擎的连接（脚本退出或 fork 子进程前调用）"""
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
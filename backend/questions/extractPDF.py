@@ -1,11 +1,27 @@
 import fitz  # PyMuPDF
 import re
-from mysql import connector
 import os
+import sys
 import json
+import hashlib
+import itertools
 import logging
+import multiprocessing
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+# 添加backend目录到路径，使用后端统一的数据库连接池（mysql/pool.py）和题目导入逻辑（services/topic_import.py）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mysql.pool import get_engine
+from services.topic_import import UPSERT_CHUNK_SIZE, upsert_topics
+from questions.topic_parser import parse_questions
 
 # 加载环境变量
 load_dotenv()
@@ -22,7 +38,7 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # --- !!! USER CONFIGURATION REQUIRED !!! ---
-# 1. 数据库连接设置（从环境变量读取）
+# 1. 数据库连接设置（从环境变量读取，连接池参数见 mysql/pool.py）
 DB_CONFIG = {
     'host': os.environ.get('MYSQL_HOST', 'localhost'),
     'user': os.environ.get('MYSQL_USER', 'root'),
@@ -53,6 +69,13 @@ PDF_FILES = [
 ]
 # --- !!! 用户配置结束 !!! ---
 
+# 题库版本号：导入新题目后递增，后端据此刷新进程内的题目缓存
+# 版本号记录（id = 1）不存在时写入，避免 UPDATE 影响 0 行而后端一直看不到新题目
+BUMP_VERSION_SQL = (
+    "INSERT INTO topic_bank_version (id, version) VALUES (1, 1) "
+    "ON DUPLICATE KEY UPDATE version = version + 1, updated_at = CURRENT_TIMESTAMP"
+)
+
 def validate_topic_data(topic_data):
     """
     验证题目数据的完整性和有效性
@@ -142,34 +165,37 @@ def clean_topic_data(topic_data):
     return cleaned
 
 
-def extract_data_from_pdf(pdf_path):
+# Pattern to identify page footers/headers to ignore (adjust if needed)
+# 题号、选项、答案等的识别见 questions/topic_parser.py
+IGNORE_PATTERN = re.compile(r"师达教育|师有道|华南教师考编|咨询:|微信同号|回复时政|获取最新|周更新一次", re.IGNORECASE)
+
+# 并行解析：每个子进程任务处理的页数
+PAGES_PER_TASK = 8
+# 解析结果写入数据库前的缓冲队列长度（题目数），队列满时解析等待写入
+INSERT_QUEUE_SIZE = 1000
+# 已导入PDF的内容哈希清单，内容未变化的PDF在下次导入时跳过
+MANIFEST_PATH = os.path.join(SCRIPT_DIR, 'import_manifest.json')
+
+
+def extract_page_blocks(pdf_path, start_page, end_page):
     """
-    Extracts questions, options, and month context from a single PDF.
+    提取指定页范围内的文本块（在子进程中执行）
+    
+    只做与上下文无关的过滤（页眉页脚、页码），月份和题目的识别依赖前文，
+    由主进程按页顺序解析，因此跨页的题目可以正确拼接
+    
+    Args:
+        pdf_path: PDF文件路径
+        start_page: 起始页（包含）
+        end_page: 结束页（不包含）
+        
+    Returns:
+        list: 按页、按从上到下顺序排列的文本块
     """
-    extracted_data = []
-    current_month = None
-    question_buffer = {} # Temporarily store parts of a question
-
+    block_texts = []
+    doc = fitz.open(pdf_path)
     try:
-        doc = fitz.open(pdf_path)
-        logger.info(f"Processing PDF: {pdf_path} ({doc.page_count} pages)")
-
-        # Regex patterns
-        # Pattern to find month headers (e.g., "2025年3月时事政治题库")
-        month_pattern = re.compile(r"\d{4}年(\d{1,2})月时事政治题库")
-        # Pattern to find start of a question (e.g., "1.", "52.")
-        question_start_pattern = re.compile(r"^\s*(\d+)\.\s*(.*)", re.MULTILINE)
-        # Pattern to find options (e.g., "A.", "B.") - allows multi-line options somewhat
-        option_pattern = re.compile(r"^\s*([ABCD])\.\s*(.*)", re.MULTILINE)
-        # Pattern to identify page footers/headers to ignore (adjust if needed)
-        ignore_pattern = re.compile(r"师达教育|师有道|华南教师考编|咨询:|微信同号|回复时政|获取最新|周更新一次", re.IGNORECASE)
-        # Pattern to right answer
-        answer_pattern = re.compile(r"【正确答案】([A-D]+)")
-        # Pattern to specifically detect end of options/start of next question more reliably
-        next_question_or_end_pattern = re.compile(r"^\s*\d+\.\s*") # Looks for the next question number
-
-        full_text = ""
-        for page_num in range(doc.page_count):
+        for page_num in range(start_page, end_page):
             page = doc.load_page(page_num)
             # Extract text blocks to better handle structure
             blocks = page.get_text("blocks")
@@ -177,225 +203,265 @@ def extract_data_from_pdf(pdf_path):
 
             for block in blocks:
                 block_text = block[4].strip() # The text content of the block
-                # print(block_text)
                 # Skip ignored blocks (headers/footers)
-                if ignore_pattern.search(block_text) or block_text.isdigit(): # Skip page numbers too
-                     continue
-                # Check for month update first
-                # print(block_text)
-                month_match = month_pattern.search(block_text)
-                if month_match:
-                    current_month = month_match.group(1)
-                    logger.info(f"  Found month section: {current_month}")
-                    # If we find a new month, clear any incomplete question buffer
-                    question_buffer = {}
-                    continue # Move to next block after finding month
-
-                # If no month context yet, skip blocks until we find one
-                if not current_month:
+                if IGNORE_PATTERN.search(block_text) or block_text.isdigit(): # Skip page numbers too
                     continue
+                block_texts.append(block_text)
+    finally:
+        doc.close()
+    return block_texts
 
-                # Process lines within the block
-                lines = block_text.split('\n')
-                for line in lines:
-                    line = line.strip()
-                    if not line:
-                        continue
-
-                    q_match = question_start_pattern.match(line)
-                    opt_match = option_pattern.match(line)
-                    answer_match = answer_pattern.search(line)
-
-                    if q_match:
-                        # print(q_match)
-                        # Found a new question, process the previous one if exists
-                        if question_buffer and 'num' in question_buffer and len(question_buffer.get('options', {})) == 4:
-                            # 获取题干内容
-                            question_content = question_buffer.get('text', '').strip()
-                            # 判断是否为多选题
-                            type_id = 2 if '多选' in question_content else 1
-                            
-                            # 构建选项数组
-                            options = [
-                                {"key": "A", "content": question_buffer.get('options', {}).get('A', '').strip()},
-                                {"key": "B", "content": question_buffer.get('options', {}).get('B', '').strip()},
-                                {"key": "C", "content": question_buffer.get('options', {}).get('C', '').strip()},
-                                {"key": "D", "content": question_buffer.get('options', {}).get('D', '').strip()}
-                            ]
-                            
-                            topic_data = {
-                                'month': current_month,
-                                'type_id': type_id,
-                                'content': question_content,
-                                'options': options,
-                                'answer': question_buffer.get('answer', 'X')
-                            }
-                            
-                            # 验证和清洗数据
-                            is_valid, error_msg = validate_topic_data(topic_data)
-                            if is_valid:
-                                cleaned_data = clean_topic_data(topic_data)
-                                extracted_data.append(cleaned_data)
-                            else:
-                                logger.warning(f"跳过无效题目 (题号: {question_buffer.get('num')}): {error_msg}")
-
-                        # Start a new question buffer
-                        question_buffer = {
-                            'num': q_match.group(1),
-                            'text': q_match.group(2),
-                            'options': {}
-                        }
-                    elif answer_match and 'num' in question_buffer:
-                        # print(answer_match)
-                        # 匹配到答案
-                        question_buffer['answer'] = answer_match.group(1)
-                    elif opt_match and 'num' in question_buffer:
-                        # Found an option for the current question
-                        option_letter = opt_match.group(1)
-                        option_text = opt_match.group(2)
-                        question_buffer.setdefault('options', {})[option_letter] = option_text
-                        # Clear text buffer for option accumulation if needed in future
-                        # question_buffer['current_option_text'] = ''
-                    elif 'num' in question_buffer:
-                         # This line doesn't start a new question or an option
-                         # Append to question text if no options found yet
-                         if not question_buffer.get('options'):
-                              question_buffer['text'] = question_buffer.get('text','') + ' ' + line
-                         # Append to the last found option if options are being collected
-                         elif question_buffer.get('options'):
-                             last_option = sorted(question_buffer['options'].keys())[-1] if question_buffer['options'] else None
-                             if last_option:
-                                 # Only append if it doesn't look like the start of the next question
-                                 if not next_question_or_end_pattern.match(line):
-                                    question_buffer['options'][last_option] += ' ' + line
-
-
-        # Add the very last question buffered after the loop finishes
-        if question_buffer and 'num' in question_buffer and len(question_buffer.get('options', {})) == 4:
-            question_content = question_buffer.get('text', '').strip()
-            type_id = 2 if '多选' in question_content else 1
-            # 构建选项数组
-            options = [
-                {"key": "A", "content": question_buffer.get('options', {}).get('A', '').strip()},
-                {"key": "B", "content": question_buffer.get('options', {}).get('B', '').strip()},
-                {"key": "C", "content": question_buffer.get('options', {}).get('C', '').strip()},
-                {"key": "D", "content": question_buffer.get('options', {}).get('D', '').strip()}
-            ]
-            topic_data = {
-                'month': current_month,
-                'type_id': type_id,
-                'content': question_content,
-                'options': options,
-                'answer': question_buffer.get('answer', 'X')
-            }
-            
-            # 验证和清洗数据
-            is_valid, error_msg = validate_topic_data(topic_data)
-            if is_valid:
-                cleaned_data = clean_topic_data(topic_data)
-                extracted_data.append(cleaned_data)
-            else:
-                logger.warning(f"跳过无效题目 (题号: {question_buffer.get('num')}): {error_msg}")
 
-        doc.close()
-        logger.info(f"  Finished processing {pdf_path}. Found {len(extracted_data)} valid questions.")
+def build_topic(question):
+    """
+    将解析器生成的题目组装为题目数据，选项不足4个或校验失败时返回 None
+    
+    Args:
+        question: topic_parser.parse_questions 生成的题目字典
+    """
+    question_options = question['options']
+    if len(question_options) != 4:
+        return None
+
+    # 获取题干内容
+    question_content = question['text'].strip()
+    # 判断是否为多选题
+    type_id = 2 if '多选' in question_content else 1
+    
+    # 构建选项数组
+    options = [
+        {"key": "A", "content": question_options.get('A', '').strip()},
+        {"key": "B", "content": question_options.get('B', '').strip()},
+        {"key": "C", "content": question_options.get('C', '').strip()},
+        {"key": "D", "content": question_options.get('D', '').strip()}
+    ]
+    
+    topic_data = {
+        'month': question['month'],
+        'type_id': type_id,
+        'content': question_content,
+        'options': options,
+        'answer': question['answer'] or 'X'
+    }
+    
+    # 验证和清洗数据
+    is_valid, error_msg = validate_topic_data(topic_data)
+    if not is_valid:
+        logger.warning(f"跳过无效题目 (题号: {question['num']}): {error_msg}")
+        return None
+    return clean_topic_data(topic_data)
+
+
+def parse_blocks(block_texts):
+    """
+    按顺序解析文本块，逐个生成题目数据
+    
+    解析状态（当前月份、未完成的题目）在整个PDF内延续，
+    调用方按页顺序传入所有文本块即可正确处理跨页的题目
+    
+    Args:
+        block_texts: 文本块的可迭代对象
+        
+    Returns:
+        generator: 清洗后的题目数据
+    """
+    for question in parse_questions(block_texts):
+        topic = build_topic(question)
+        if topic:
+            yield topic
+
+
+def iter_pdf_blocks(pdf_path, executor=None, window=2, pages_per_task=PAGES_PER_TASK):
+    """
+    按页顺序生成PDF的文本块
+    
+    传入进程池时按页范围并行提取，同时最多保留 window 个任务，
+    结果按页顺序取出，主进程内存占用与PDF页数无关
+    
+    Args:
+        pdf_path: PDF文件路径
+        executor: 可选，ProcessPoolExecutor
+        window: 同时提交的最大任务数，一般为进程数的 2 倍
+        pages_per_task: 每个任务的页数
+        
+    Returns:
+        generator: 文本块
+    """
+    doc = fitz.open(pdf_path)
+    page_count = doc.page_count
+    doc.close()
+    logger.info(f"Processing PDF: {pdf_path} ({page_count} pages)")
+
+    if executor is None:
+        # 单进程时一次处理全部页面，避免重复打开文档
+        yield from extract_page_blocks(pdf_path, 0, page_count)
+        return
+
+    ranges = [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+
+    pending = deque()
+    ranges = iter(ranges)
+    for start, end in itertools.islice(ranges, window):
+        pending.append(executor.submit(extract_page_blocks, pdf_path, start, end))
+    while pending:
+        block_texts = pending.popleft().result()
+        for start, end in itertools.islice(ranges, 1):
+            pending.append(executor.submit(extract_page_blocks, pdf_path, start, end))
+        yield from block_texts
+
+
+def iter_pdf_topics(pdf_path, executor=None, window=2):
+    """
+    解析单个PDF，逐个生成题目数据
+    
+    Args:
+        pdf_path: PDF文件路径
+        executor: 可选，用于并行提取页面文本的 ProcessPoolExecutor
+        window: 同时提交的最大任务数
+        
+    Returns:
+        generator: 清洗后的题目数据
+    """
+    count = 0
+    for topic in parse_blocks(iter_pdf_blocks(pdf_path, executor, window)):
+        count += 1
+        yield topic
+    logger.info(f"  Finished processing {pdf_path}. Found {count} valid questions.")
+
 
+def extract_data_from_pdf(pdf_path, workers=1):
+    """
+    Extracts questions, options, and month context from a single PDF.
+    
+    Args:
+        pdf_path: PDF文件路径
+        workers: 并行提取页面文本的进程数，1 为在当前进程中处理
+        
+    Returns:
+        list: 题目数据列表
+    """
+    try:
+        if workers > 1:
+            with create_executor(workers) as executor:
+                return list(iter_pdf_topics(pdf_path, executor, workers * 2))
+        return list(iter_pdf_topics(pdf_path))
     except Exception as e:
         logger.error(f"Error processing PDF {pdf_path}: {e}")
+        return []
+
+
+def create_executor(workers):
+    """
+    创建页面文本提取进程池
+    使用 spawn 启动子进程，避免在写入线程运行时 fork 继承日志、数据库连接等锁状态
+    """
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+def file_sha256(path):
+    """分块计算文件的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-    return extracted_data
+
+def load_manifest(path=MANIFEST_PATH):
+    """读取导入清单，文件不存在或损坏时返回空清单"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    """写入导入清单（先写临时文件再替换，避免中断时清单损坏）"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
 
 
-def insert_data_to_mysql(data_list, batch_size=100):
+def insert_data_to_mysql(data_list, batch_size=UPSERT_CHUNK_SIZE):
     """
     Inserts the extracted data into the MySQL database.
     
+    题目按规范化题干的哈希与月份去重（唯一索引 uk_content_month），
+    每 batch_size 条执行一次哈希查询和一条多行 INSERT ... ON DUPLICATE KEY UPDATE 并提交
+    
     Args:
-        data_list: 题目数据列表
-        batch_size: 批量插入的大小
+        data_list: 题目数据列表，也可以是逐个生成题目的可迭代对象（例如导入队列）
+        batch_size: 每条 INSERT 语句写入的题目数
         
     Returns:
         dict: 插入结果统计
     """
-    if not data_list:
+    if isinstance(data_list, list) and not data_list:
         logger.warning("No data to insert.")
         return {'inserted': 0, 'skipped': 0, 'duplicates': 0}
 
     conn = None
-    cursor = None
     inserted_count = 0
     skipped_count = 0
     duplicate_count = 0
-
-    # 检查重复的SQL
-    check_duplicate_sql = f"""
-        SELECT COUNT(*) FROM {TABLE_NAME}
-        WHERE content = %s AND month = %s
-    """
-    
-    # 插入SQL
-    insert_sql = f"""
-        INSERT INTO {TABLE_NAME} 
-        (month, type_id, content, options, answer, analysis, category_id, region)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-    """
+    processed_count = 0
+    batch = []
+
+    def flush():
+        nonlocal inserted_count, skipped_count, duplicate_count
+        result = upsert_topics(conn, batch, table_name=TABLE_NAME, chunk_size=batch_size)
+        for index, err in result['failed']:
+            logger.error(f"  Error inserting record (Month: {batch[index]['month']}): {err}")
+        inserted_count += result['inserted']
+        duplicate_count += result['duplicates']
+        skipped_count += len(result['failed'])
+        conn.commit()
+        logger.info(f"  Committed {processed_count} records...")
+        batch.clear()
 
     logger.info(f"\nConnecting to database '{DB_CONFIG['database']}' on '{DB_CONFIG['host']}'...")
     try:
-        conn = connector.connect(**DB_CONFIG)
-        cursor = conn.cursor()
+        conn = get_engine().connect()
         logger.info("Database connection successful.")
-        logger.info(f"Attempting to insert {len(data_list)} records into table '{TABLE_NAME}'...")
+        logger.info(f"Attempting to insert records into table '{TABLE_NAME}'...")
 
-        for i, item in enumerate(data_list):
+        for item in data_list:
+            processed_count += 1
             # 获取字段值
             month = item.get('month', None)
-            type_int = item.get('type_id', None)
-            content = item.get('content', '')
-            options = json.dumps(item.get('options', []), ensure_ascii=False)
-            answer = item.get('answer', 'X')
             
             # 数据库插入
             if month is not None:
-                # 检查是否重复
-                try:
-                    cursor.execute(check_duplicate_sql, (content, month))
-                    count = cursor.fetchone()[0]
-                    if count > 0:
-                        logger.debug(f"  Skipping duplicate record (Month: {month})")
-                        duplicate_count += 1
-                        continue
-                except connector.Error as err:
-                    logger.warning(f"  Error checking duplicate: {err}")
-                
-                data_tuple = (
-                    month,          # 对应第一个 %s：月份
-                    type_int,       # 对应第二个 %s：题目类型
-                    content,        # 对应第三个 %s：题目内容
-                    options,        # 对应第四个 %s：选项JSON
-                    answer,         # 对应第五个 %s：实际答案
-                    None,           # 对应第六个 %s：解析
-                    None,           # 对应第七个 %s：分类ID
-                    None            # 对应第八个 %s：地区
-                )
-                try:
-                    cursor.execute(insert_sql, data_tuple)
-                    inserted_count += 1
-                    
-                    # 批量提交
-                    if (i + 1) % batch_size == 0:
-                        conn.commit()
-                        logger.info(f"  Committed {i + 1} records...")
-                        
-                except connector.Error as err:
-                    logger.error(f"  Error inserting record (Month: {month}): {err}")
-                    skipped_count += 1
+                batch.append({
+                    'month': month,                                               # 月份
+                    'type_id': item.get('type_id', None),                         # 题目类型
+                    'content': item.get('content', ''),                           # 题目内容
+                    'options': json.dumps(item.get('options', []), ensure_ascii=False),  # 选项JSON
+                    'answer': item.get('answer', 'X'),                            # 实际答案
+                    'analysis': None,                                             # 解析
+                    'category_id': None,                                          # 分类ID
+                    'region': None                                                # 地区
+                })
+                if len(batch) >= batch_size:
+                    flush()
             else:
                 logger.warning(f"  Skipping record due to missing month: {item}")
                 skipped_count += 1
 
-        # 最后提交剩余的记录
-        conn.commit()
+        # 最后写入剩余的记录
+        if batch:
+            flush()
+
+        # 递增题库版本号，通知后端各 worker 刷新题目缓存
+        if inserted_count:
+            try:
+                conn.execute(text(BUMP_VERSION_SQL))
+                conn.commit()
+            except SQLAlchemyError as err:
+                conn.rollback()
+                logger.warning(f"  Error bumping topic bank version: {err}")
         logger.info(f"\nInsertion complete.")
         logger.info(f"  Successfully inserted: {inserted_count} records.")
         logger.info(f"  Duplicates skipped: {duplicate_count} records.")
@@ -407,23 +473,124 @@ def insert_data_to_mysql(data_list, batch_size=100):
             'skipped': skipped_count
         }
 
-    except connector.Error as err:
+    except SQLAlchemyError as err:
         logger.error(f"Database Error: {err}")
-        if conn:
+        if conn is not None:
             conn.rollback()
         return {
             'inserted': inserted_count,
             'duplicates': duplicate_count,
-            'skipped': skipped_count
+            'skipped': skipped_count,
+            'error': str(err)
         }
 
     finally:
-        if cursor:
-            cursor.close()
-        if conn and conn.is_connected():
+        if conn is not None:
+            # 归还连接池
             conn.close()
             logger.info("Database connection closed.")
 
+def iter_queue(topic_queue):
+    """从导入队列逐个取出题目，遇到 None 结束"""
+    while True:
+        topic = topic_queue.get()
+        if topic is None:
+            return
+        yield topic
+
+
+def run_import(pdf_files, workers=None, force=False, manifest_path=MANIFEST_PATH):
+    """
+    并行解析PDF并流式写入数据库
+    
+    页面文本提取分发到进程池，主进程按页顺序解析题目并放入有界队列，
+    写入线程从队列取出题目批量插入，解析与写入同时进行。
+    内容哈希与清单中记录一致的PDF直接跳过
+    
+    Args:
+        pdf_files: PDF文件路径列表
+        workers: 进程数，默认为CPU核数
+        force: 为 True 时忽略清单，重新导入所有PDF
+        manifest_path: 导入清单路径
+        
+    Returns:
+        dict: 插入结果统计，另含 files（解析的文件数）和 unchanged（跳过的文件数）
+    """
+    manifest = {} if force else load_manifest(manifest_path)
+    pending_files = []
+    unchanged = 0
+    for pdf_file in pdf_files:
+        if not os.path.exists(pdf_file):
+            logger.warning(f"PDF file not found - {pdf_file}")
+            continue
+        digest = file_sha256(pdf_file)
+        entry = manifest.get(os.path.basename(pdf_file))
+        if entry and entry.get('sha256') == digest:
+            logger.info(f"Skipping unchanged PDF: {pdf_file}")
+            unchanged += 1
+            continue
+        pending_files.append((pdf_file, digest))
+
+    if not pending_files:
+        logger.warning("\nNo new or changed PDF files to import.")
+        return {'inserted': 0, 'duplicates': 0, 'skipped': 0, 'files': 0, 'unchanged': unchanged}
+
+    workers = workers or os.cpu_count() or 1
+    topic_queue = queue.Queue(maxsize=INSERT_QUEUE_SIZE)
+    outcome = {}
+
+    def insert_worker():
+        topics = iter_queue(topic_queue)
+        try:
+            outcome['result'] = insert_data_to_mysql(topics)
+        except Exception as e:
+            outcome['error'] = e
+        finally:
+            # 写入提前结束时继续取出剩余题目，避免解析端在队列已满时阻塞
+            for _ in topics:
+                pass
+
+    # 先启动进程池再启动写入线程
+    executor = create_executor(workers) if workers > 1 else None
+    inserter = threading.Thread(target=insert_worker, name='topic-inserter')
+    extracted = {}
+    try:
+        inserter.start()
+        for pdf_file, digest in pending_files:
+            count = 0
+            try:
+                for topic in iter_pdf_topics(pdf_file, executor, workers * 2):
+                    topic_queue.put(topic)
+                    count += 1
+            except Exception as e:
+                logger.error(f"Error processing PDF {pdf_file}: {e}")
+                continue
+            extracted[pdf_file] = (digest, count)
+    finally:
+        topic_queue.put(None)
+        inserter.join()
+        if executor is not None:
+            executor.shutdown()
+
+    if 'error' in outcome:
+        raise outcome['error']
+    result = outcome['result']
+    logger.info(f"\nTotal extracted questions: {sum(count for _, count in extracted.values())}")
+
+    # 写入过程没有数据库错误时，记录已导入文件的哈希（skipped 为校验或单条插入失败的题目）
+    if result.get('error') is None:
+        manifest = load_manifest(manifest_path)
+        for pdf_file, (digest, count) in extracted.items():
+            manifest[os.path.basename(pdf_file)] = {
+                'sha256': digest,
+                'questions': count,
+                'imported_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+        save_manifest(manifest, manifest_path)
+
+    return dict(result, files=len(extracted), unchanged=unchanged)
+
+
 def backup_database(backup_dir='backups'):
     """
     备份数据库中的题目数据到JSON文件
@@ -440,17 +607,11 @@ def backup_database(backup_dir='backups'):
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     backup_file = os.path.join(backup_dir, f'topics_backup_{timestamp}.json')
     
-    conn = None
-    cursor = None
-    
     try:
         logger.info(f"Starting database backup...")
-        conn = connector.connect(**DB_CONFIG)
-        cursor = conn.cursor(dictionary=True)
-        
-        # 查询所有题目
-        cursor.execute(f"SELECT * FROM {TABLE_NAME}")
-        topics = cursor.fetchall()
+        with get_engine().connect() as conn:
+            # 查询所有题目
+            topics = [dict(row) for row in conn.execute(text(f"SELECT * FROM {TABLE_NAME}")).mappings()]
         
         # 转换日期时间为字符串
         for topic in topics:
@@ -469,12 +630,6 @@ def backup_database(backup_dir='backups'):
     except Exception as e:
         logger.error(f"Backup error: {e}")
         return None
-        
-    finally:
-        if cursor:
-            cursor.close()
-        if conn and conn.is_connected():
-            conn.close()
 
 
 # --- Main Execution ---
@@ -485,60 +640,26 @@ if __name__ == "__main__":
     parser.add_argument('--backup', action='store_true', help='备份数据库')
     parser.add_argument('--extract', action='store_true', help='提取PDF并导入数据库')
     parser.add_argument('--pdf', type=str, help='指定单个PDF文件路径')
+    parser.add_argument('--workers', type=int, default=None, help='并行解析的进程数（默认: CPU核数）')
+    parser.add_argument('--force', action='store_true', help='忽略导入清单，重新导入内容未变化的PDF')
     
     args = parser.parse_args()
     
     if args.backup:
         # 执行备份
         backup_database()
-    elif args.extract or args.pdf:
-        # 执行提取和导入
-        all_extracted_data = []
-        
+    else:
+        # 执行提取和导入（默认处理配置的所有PDF文件）
         if args.pdf:
-            # 处理单个PDF文件
-            if os.path.exists(args.pdf):
-                logger.info(f"Processing single PDF: {args.pdf}")
-                extracted = extract_data_from_pdf(args.pdf)
-                all_extracted_data.extend(extracted)
-            else:
-                logger.error(f"PDF file not found: {args.pdf}")
-        else:
-            # 处理配置的所有PDF文件
-            for pdf_file in PDF_FILES:
-                if os.path.exists(pdf_file):
-                    extracted = extract_data_from_pdf(pdf_file)
-                    all_extracted_data.extend(extracted)
-                else:
-                    logger.warning(f"PDF file not found - {pdf_file}")
-        
-        if all_extracted_data:
-            logger.info(f"\nTotal extracted questions: {len(all_extracted_data)}")
-            result = insert_data_to_mysql(all_extracted_data)
-            logger.info(f"\nFinal statistics:")
-            logger.info(f"  Inserted: {result['inserted']}")
-            logger.info(f"  Duplicates: {result['duplicates']}")
-            logger.info(f"  Skipped: {result['skipped']}")
+            logger.info(f"Processing single PDF: {args.pdf}")
+            pdf_files = [args.pdf]
         else:
-            logger.warning("\nNo data was extracted from the PDF files.")
-    else:
-        # 默认行为：提取并导入
-        logger.info("Starting PDF extraction and import process...")
-        all_extracted_data = []
+            logger.info("Starting PDF extraction and import process...")
+            pdf_files = PDF_FILES
         
-        for pdf_file in PDF_FILES:
-            if os.path.exists(pdf_file):
-                extracted = extract_data_from_pdf(pdf_file)
-                all_extracted_data.extend(extracted)
-            else:
-                logger.warning(f"PDF file not found - {pdf_file}")
-        
-        if all_extracted_data:
-            logger.info(f"\nTotal extracted questions: {len(all_extracted_data)}")
-            result = insert_data_to_mysql(all_extracted_data)
-            logger.info(f"\nFinal statistics:")
-            logger.info(f"  Inserted: {result['inserted']}")
-            logger.info(f"  Duplicates: {result['duplicates']}")
-            logger.info(f"  Skipped: {result['skipped']}")
-        else:
-            logger.warning("\nNo data was extracted from the PDF files.")
\ No newline at end of file
+        result = run_import(pdf_files, workers=args.workers, force=args.force)
+        logger.info(f"\nFinal statistics:")
+        logger.info(f"  Files parsed: {result['files']} (unchanged skipped: {result['unchanged']})")
+        logger.info(f"  Inserted: {result['inserted']}")
+        logger.info(f"  Duplicates: {result['duplicates']}")
+        logger.info(f"  Skipped: {result['skipped']}")
@@ -0,0 +1,112 @@
+"""
+PDF题目文本解析器
+单次遍历按页顺序排列的文本块，由状态机逐行识别月份标题、题号、正确答案、选项和续行并组装题目，
+每道题目在下一道题开始（或输入结束）时立即生成。
+
+每行按首字符分派，只对可能命中的模式执行一次正则匹配，识别优先级与原解析逻辑一致：
+题号 > 正确答案（行内任意位置）> 选项 > 续行
+"""
+
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Pattern to find month headers (e.g., "2025年3月时事政治题库")
+MONTH_PATTERN = re.compile(r"\d{4}年(\d{1,2})月时事政治题库")
+# 题号，例如 "52. 题干"
+QUESTION_PATTERN = re.compile(r"(\d+)\.\s*(.*)")
+# 选项，例如 "A. 选项"
+OPTION_PATTERN = re.compile(r"([ABCD])\.\s*(.*)")
+# 正确答案，可以出现在行内任意位置
+ANSWER_MARK = '【正确答案】'
+ANSWER_PATTERN = re.compile(r"【正确答案】([A-D]+)")
+
+
+def parse_questions(block_texts):
+    """
+    解析文本块，逐个生成题目
+
+    出现月份标题前的内容被忽略；新的月份标题会丢弃未完成的题目。
+    题干之后的续行追加到题干，出现选项后的续行追加到字母最大的选项。
+    行首为数字时才尝试匹配题号，行内包含【正确答案】时才查找答案，行首为 A-D 时才尝试匹配选项
+
+    Args:
+        block_texts: 按顺序排列的文本块（已去除页眉页脚）
+
+    Returns:
+        generator: 题目字典 {'num', 'text', 'options', 'answer', 'month'}，
+            options 为选项字母到内容的映射，answer 缺失时为 None
+    """
+    month_search = MONTH_PATTERN.search
+    question_match = QUESTION_PATTERN.match
+    option_match = OPTION_PATTERN.match
+    answer_search = ANSWER_PATTERN.search
+
+    current_month = None
+    question = None
+    options = None
+    last_key = None
+
+    for block_text in block_texts:
+        # 月份标题独占整个文本块
+        month_match = month_search(block_text)
+        if month_match:
+            current_month = month_match.group(1)
+            logger.info(f"  Found month section: {current_month}")
+            # If we find a new month, clear any incomplete question buffer
+            question = None
+            continue
+
+        # If no month context yet, skip blocks until we find one
+        if current_month is None:
+            continue
+
+        for line in block_text.split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            first = line[0]
+
+            if first.isdigit():
+                match = question_match(line)
+                if match:
+                    if question is not None:
+                        yield question
+                    options = {}
+                    question = {
+                        'num': match.group(1),
+                        'text': match.group(2),
+                        'options': options,
+                        'answer': None,
+                        'month': current_month
+                    }
+                    last_key = None
+                    continue
+
+            if question is None:
+                continue
+
+            if ANSWER_MARK in line:
+                match = answer_search(line)
+                if match:
+                    question['answer'] = match.group(1)
+                    continue
+
+            if first in 'ABCD':
+                match = option_match(line)
+                if match:
+                    key = match.group(1)
+                    options[key] = match.group(2)
+                    if last_key is None or key > last_key:
+                        last_key = key
+                    continue
+
+            if last_key is None:
+                question['text'] += ' ' + line
+            else:
+                options[last_key] += ' ' + line
+
+    # Add the very last question buffered after the loop finishes
+    if question is not None:
+        yield question
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+题目内容哈希回填脚本
+
+为已有数据库添加 topic.content_hash 列，回填规范化题干的哈希，并创建唯一索引 uk_content_month。
+已存在的重复题目（题干和月份相同）只有ID最小的一条写入哈希，其余保持 NULL 并输出ID，
+这些题目可能已被错题、收藏等记录引用，需要人工确认后再处理。脚本可以重复执行。
+
+用法:
+    python backfill_content_hash.py                   # 添加列、回填哈希、创建唯一索引
+    python backfill_content_hash.py --batch-size 500  # 指定每批处理的题目数
+    python backfill_content_hash.py --skip-index      # 只回填，不创建唯一索引
+"""
+
+import os
+import sys
+import argparse
+
+# 添加父目录到路径以便导入后端模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+from sqlalchemy import bindparam, inspect, text
+
+from mysql.pool import get_engine
+from services.topic_import import content_hash
+
+# 加载环境变量
+load_dotenv()
+
+
+def ensure_column(engine):
+    """content_hash 列不存在时添加"""
+    columns = [column['name'] for column in inspect(engine).get_columns('topic')]
+    if 'content_hash' in columns:
+        return False
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE topic ADD COLUMN content_hash CHAR(64) NULL"))
+    return True
+
+
+def ensure_index(engine):
+    """唯一索引 uk_content_month 不存在时创建"""
+    indexes = [index['name'] for index in inspect(engine).get_indexes('topic')]
+    if 'uk_content_month' in indexes:
+        return False
+    with engine.begin() as conn:
+        conn.execute(text("CREATE UNIQUE INDEX uk_content_month ON topic (content_hash, month)"))
+    return True
+
+
+def backfill(engine, batch_size=1000):
+    """
+    按ID顺序分批回填 content_hash
+
+    Args:
+        engine: 数据库引擎
+        batch_size: 每批处理的题目数
+
+    Returns:
+        tuple: (回填的题目数, [(重复题目ID, 保留的题目ID)])
+    """
+    select_batch = text(
+        "SELECT id, content, month FROM topic WHERE content_hash IS NULL AND id > :last_id ORDER BY id LIMIT :limit"
+    )
+    select_existing = text(
+        "SELECT id, content_hash, month FROM topic WHERE content_hash IN :hashes"
+    ).bindparams(bindparam('hashes', expanding=True))
+    update_hash = text("UPDATE topic SET content_hash = :hash WHERE id = :id")
+
+    updated = 0
+    duplicates = []
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(select_batch, {'last_id': last_id, 'limit': batch_size}).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            hashed = [(row.id, content_hash(row.content), row.month) for row in rows]
+            existing = {
+                (row.content_hash, row.month): row.id
+                for row in conn.execute(select_existing, {'hashes': list({h for _, h, _ in hashed})})
+            }
+
+            params = []
+            for topic_id, topic_hash, month in hashed:
+                key = (topic_hash, month)
+                if key in existing:
+                    duplicates.append((topic_id, existing[key]))
+                    continue
+                existing[key] = topic_id
+                params.append({'id': topic_id, 'hash': topic_hash})
+
+            if params:
+                conn.execute(update_hash, params)
+                updated += len(params)
+        print(f"  已处理到ID {last_id}，累计回填 {updated} 条")
+
+    return updated, duplicates
+
+
+def main():
+    parser = argparse.ArgumentParser(description='题目内容哈希回填工具')
+    parser.add_argument('--batch-size', type=int, default=1000, help='每批处理的题目数 (默认: 1000)')
+    parser.add_argument('--skip-index', action='store_true', help='只回填，不创建唯一索引')
+
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("题目内容哈希回填工具")
+    print("=" * 60)
+
+    engine = get_engine()
+    if ensure_column(engine):
+        print("✓ 已添加 content_hash 列")
+
+    updated, duplicates = backfill(engine, args.batch_size)
+    print(f"✓ 回填完成，共 {updated} 条")
+
+    if duplicates:
+        print(f"! 发现 {len(duplicates)} 条重复题目，content_hash 保持为空:")
+        for topic_id, kept_id in duplicates[:50]:
+            print(f"  题目 {topic_id} 与题目 {kept_id} 重复")
+        if len(duplicates) > 50:
+            print(f"  ... 其余 {len(duplicates) - 50} 条省略")
+
+    if not args.skip_index and ensure_index(engine):
+        print("✓ 已创建唯一索引 uk_content_month (content_hash, month)")
+
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+错题统计回填脚本
+
+为已有数据库创建 user_mistake_stat 表，并由 exam_detail 中的答错记录计算每个用户每道题的答错次数和最近答错时间。
+按用户ID分批处理，每批一次聚合查询和一条多行 upsert；错题本中有、但没有考试答错记录的题目记为 1 次。
+已存在的统计记录取较大值，脚本可以在新版本上线后重复执行，不会覆盖上线后的增量更新。
+
+用法:
+    python backfill_mistake_stats.py                   # 建表并回填
+    python backfill_mistake_stats.py --batch-size 200  # 指定每批处理的用户数
+"""
+
+import os
+import sys
+import argparse
+
+# 添加父目录到路径以便导入后端模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+from sqlalchemy import bindparam, inspect, text
+
+from mysql.pool import get_engine
+from services.mistake_stats import merge_mistake_stats, mistake_stat_table
+
+# 加载环境变量
+load_dotenv()
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS user_mistake_stat (
+  user_id BIGINT NOT NULL,
+  topic_id INT NOT NULL,
+  wrong_count INT NOT NULL DEFAULT 0,
+  last_wrong_at DATETIME DEFAULT NULL,
+  PRIMARY KEY (user_id, topic_id),
+  FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE,
+  FOREIGN KEY (topic_id) REFERENCES topic(id) ON DELETE CASCADE,
+  INDEX idx_user_wrong (user_id, wrong_count, topic_id)
+)
+"""
+
+# 每条 upsert 语句写入的最大行数
+UPSERT_CHUNK_SIZE = 500
+
+
+def ensure_table(engine):
+    """user_mistake_stat 表不存在时创建"""
+    if inspect(engine).has_table('user_mistake_stat'):
+        return False
+    with engine.begin() as conn:
+        conn.execute(text(CREATE_TABLE_SQL))
+    return True
+
+
+def collect_stats(conn, user_ids):
+    """
+    统计一批用户的答错次数
+
+    Args:
+        conn: 数据库连接
+        user_ids: 用户ID列表
+
+    Returns:
+        dict: (user_id, topic_id) -> [答错次数, 最近答错时间]
+    """
+    exam_rows = conn.execute(text(
+        "SELECT r.user_id, d.topic_id, COUNT(*) AS wrong_count, MAX(d.created_at) AS last_wrong_at "
+        "FROM exam_detail d JOIN exam_record r ON r.id = d.exam_record_id "
+        "WHERE r.user_id IN :user_ids AND d.is_correct = 0 "
+        "GROUP BY r.user_id, d.topic_id"
+    ).bindparams(bindparam('user_ids', expanding=True)), {'user_ids': user_ids})
+    stats = {(row.user_id, row.topic_id): [row.wrong_count, row.last_wrong_at] for row in exam_rows}
+
+    # 只在练习模式答错的错题没有答题详情，至少答错过一次
+    mistake_rows = conn.execute(text(
+        "SELECT user_id, topic_id, created_at FROM user_mistake WHERE user_id IN :user_ids"
+    ).bindparams(bindparam('user_ids', expanding=True)), {'user_ids': user_ids})
+    for row in mistake_rows:
+        stats.setdefault((row.user_id, row.topic_id), [1, row.created_at])
+    return stats
+
+
+def backfill(engine, batch_size=500):
+    """
+    按用户ID顺序分批回填错题统计
+
+    Args:
+        engine: 数据库引擎
+        batch_size: 每批处理的用户数
+
+    Returns:
+        tuple: (处理的用户数, 写入的统计记录数)
+    """
+    select_users = text("SELECT id FROM user WHERE id > :last_id ORDER BY id LIMIT :limit")
+    target = mistake_stat_table()
+
+    users = 0
+    written = 0
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            user_ids = [row.id for row in conn.execute(select_users, {'last_id': last_id, 'limit': batch_size})]
+            if not user_ids:
+                break
+            last_id = user_ids[-1]
+
+            rows = [
+                {'user_id': user_id, 'topic_id': topic_id, 'wrong_count': wrong_count, 'last_wrong_at': last_wrong_at}
+                for (user_id, topic_id), (wrong_count, last_wrong_at) in collect_stats(conn, user_ids).items()
+            ]
+            for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+                merge_mistake_stats(conn, target, rows[start:start + UPSERT_CHUNK_SIZE])
+            users += len(user_ids)
+            written += len(rows)
+        print(f"  已处理到用户ID {last_id}，累计 {users} 个用户、{written} 条统计")
+
+    return users, written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='错题统计回填工具')
+    parser.add_argument('--batch-size', type=int, default=500, help='每批处理的用户数 (默认: 500)')
+
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("错题统计回填工具")
+    print("=" * 60)
+
+    engine = get_engine()
+    if ensure_table(engine):
+        print("✓ 已创建 user_mistake_stat 表")
+
+    users, written = backfill(engine, args.batch_size)
+    print(f"✓ 回填完成，共 {users} 个用户、{written} 条统计")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
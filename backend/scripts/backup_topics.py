@@ -18,12 +18,15 @@ from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from dotenv import load_dotenv
-from mysql import connector
+from sqlalchemy import text
+
+# 使用后端统一的数据库连接池（mysql/pool.py），连接参数同样来自环境变量
+from mysql.pool import get_engine
 
 # 加载环境变量
 load_dotenv()
 
-# 数据库配置
+# 数据库配置（仅用于输出提示和生成SQL备份中的 USE 语句）
 DB_CONFIG = {
     'host': os.environ.get('MYSQL_HOST', 'localhost'),
     'user': os.environ.get('MYSQL_USER', 'root'),
@@ -48,18 +51,12 @@ def backup_to_json(output_dir='backups'):
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     backup_file = os.path.join(output_dir, f'topics_backup_{timestamp}.json')
     
-    conn = None
-    cursor = None
-    
     try:
         print(f"连接数据库: {DB_CONFIG['database']}@{DB_CONFIG['host']}...")
-        conn = connector.connect(**DB_CONFIG)
-        cursor = conn.cursor(dictionary=True)
-        
-        # 查询所有题目
-        print("正在查询题目数据...")
-        cursor.execute("SELECT * FROM topic ORDER BY id")
-        topics = cursor.fetchall()
+        with get_engine().connect() as conn:
+            # 查询所有题目
+            print("正在查询题目数据...")
+            topics = [dict(row) for row in conn.execute(text("SELECT * FROM topic ORDER BY id")).mappings()]
         
         # 转换日期时间为字符串
         for topic in topics:
@@ -90,12 +87,6 @@ def backup_to_json(output_dir='backups'):
     except Exception as e:
         print(f"✗ 备份失败: {e}")
         return None
-        
-    finally:
-        if cursor:
-            cursor.close()
-        if conn and conn.is_connected():
-            conn.close()
 
 
 def backup_to_sql(output_dir='backups'):
@@ -114,18 +105,12 @@ def backup_to_sql(output_dir='backups'):
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     backup_file = os.path.join(output_dir, f'topics_backup_{timestamp}.sql')
     
-    conn = None
-    cursor = None
-    
     try:
         print(f"连接数据库: {DB_CONFIG['database']}@{DB_CONFIG['host']}...")
-        conn = connector.connect(**DB_CONFIG)
-        cursor = conn.cursor(dictionary=True)
-        
-        # 查询所有题目
-        print("正在查询题目数据...")
-        cursor.execute("SELECT * FROM topic ORDER BY id")
-        topics = cursor.fetchall()
+        with get_engine().connect() as conn:
+            # 查询所有题目
+            print("正在查询题目数据...")
+            topics = [dict(row) for row in conn.execute(text("SELECT * FROM topic ORDER BY id")).mappings()]
         
         # 生成SQL语句
         print(f"正在生成SQL语句...")
@@ -172,12 +157,6 @@ def backup_to_sql(output_dir='backups'):
     except Exception as e:
         print(f"✗ 备份失败: {e}")
         return None
-        
-    finally:
-        if cursor:
-            cursor.close()
-        if conn and conn.is_connected():
-            conn.close()
 
 
 def main():
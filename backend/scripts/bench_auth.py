@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+认证装饰器基准测试
+
+在同一个请求上下文中重复调用被 token_required 装饰的空视图，对比每次调用的耗时：
+    原实现      每次读取 SECRET_KEY 环境变量并完整执行 jwt.decode
+    预处理密钥  启动时加载密钥（PyJWK），不使用token缓存
+    token缓存   启动时加载密钥，命中缓存时不再验签
+
+用法:
+    python bench_auth.py                  # 默认调用 20000 次
+    python bench_auth.py -n 100000        # 指定调用次数
+"""
+
+import os
+import sys
+import time
+import argparse
+import datetime
+from functools import wraps
+
+# 添加父目录到路径以便导入后端模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jwt
+from flask import Flask, request, jsonify
+
+from middleware.auth import DEFAULT_SECRET_KEY, init_auth, token_required
+
+
+def legacy_token_required(f):
+    """原 token_required 的实现"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        token = request.headers.get('Authorization')
+        if not token:
+            return jsonify({'code': 401, 'message': '缺少认证token'}), 401
+        try:
+            if token.startswith('Bearer '):
+                token = token[7:]
+            secret_key = os.environ.get('SECRET_KEY', 'fallback_secret_key_for_development')
+            data = jwt.decode(token, secret_key, algorithms=['HS256'])
+            request.user_id = data['user_id']
+            request.openid = data.get('openid')
+        except jwt.ExpiredSignatureError:
+            return jsonify({'code': 401, 'message': 'Token已过期'}), 401
+        except jwt.InvalidTokenError:
+            return jsonify({'code': 401, 'message': '无效的token'}), 401
+        except Exception as e:
+            return jsonify({'code': 401, 'message': f'Token验证失败: {str(e)}'}), 401
+        return f(*args, **kwargs)
+    return decorated
+
+
+def view():
+    return request.user_id
+
+
+def run(decorated, count):
+    """返回每次调用的平均耗时（微秒）"""
+    # 预热
+    for _ in range(100):
+        assert decorated() == 1
+    start = time.perf_counter()
+    for _ in range(count):
+        decorated()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='认证装饰器基准测试')
+    parser.add_argument('-n', '--count', type=int, default=20000, help='调用次数 (默认: 20000)')
+
+    args = parser.parse_args()
+
+    secret_key = os.environ.get('SECRET_KEY', DEFAULT_SECRET_KEY)
+    token = jwt.encode({
+        'user_id': 1,
+        'openid': 'bench_openid',
+        'exp': datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=7)
+    }, secret_key, algorithm='HS256')
+
+    app = Flask(__name__)
+    results = []
+    with app.test_request_context('/', headers={'Authorization': f'Bearer {token}'}):
+        results.append(('原实现', run(legacy_token_required(view), args.count)))
+
+        init_auth(secret_key=secret_key, cache_size=0)
+        results.append(('预处理密钥', run(token_required(view), args.count)))
+
+        verifier = init_auth(secret_key=secret_key, cache_size=10000)
+        results.append(('token缓存', run(token_required(view), args.count)))
+        stats = verifier.cache.stats()
+
+    baseline = results[0][1]
+    print(f"{'实现':<12} {'微秒/次':>10} {'次/秒':>12} {'加速比':>8}")
+    for name, micros in results:
+        print(f"{name:<12} {micros:>10.2f} {1e6 / micros:>12,.0f} {baseline / micros:>7.2f}x")
+    print(f"缓存命中 {stats['hits']} 次，未命中 {stats['misses']} 次")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
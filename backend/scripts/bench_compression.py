@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+响应压缩基准测试
+
+生成一页题目列表响应（与 /api/topics 相同的 JSON 格式），对比 gzip / brotli 的压缩率和每次压缩耗时，
+以及命中预压缩缓存时的耗时
+
+用法:
+    python bench_compression.py                 # 每页 20 道题
+    python bench_compression.py --size 50 -n 500
+"""
+
+import os
+import sys
+import time
+import argparse
+
+# 添加父目录到路径以便导入后端模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_json_response import COMPACT, FIELDS, envelope, make_rows
+from flask import Flask
+
+from middleware.compression import CompressedCache, available_encodings, compress
+from services.json_fragments import FragmentJSONProvider
+from services.topic_catalog import TopicRecord
+
+
+def time_call(func, count):
+    """返回每次调用的平均耗时（微秒）和最后一次的结果"""
+    result = func()
+    start = time.perf_counter()
+    for _ in range(count):
+        result = func()
+    return (time.perf_counter() - start) / count * 1e6, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='响应压缩基准测试')
+    parser.add_argument('--size', type=int, default=20, help='每页题目数 (默认: 20)')
+    parser.add_argument('-n', '--count', type=int, default=1000, help='重复次数 (默认: 1000)')
+    parser.add_argument('--gzip-level', type=int, default=6, help='gzip 压缩级别 (默认: 6)')
+    parser.add_argument('--brotli-quality', type=int, default=5, help='brotli 压缩质量 (默认: 5)')
+
+    args = parser.parse_args()
+
+    records = [TopicRecord(*row) for row in make_rows(args.size)]
+    provider = FragmentJSONProvider(Flask(__name__))
+    body = provider.dumps(envelope([record.fragment(FIELDS) for record in records]), **COMPACT).encode('utf-8')
+
+    print(f"每页 {args.size} 道题，原始响应 {len(body)} 字节，重复 {args.count} 次")
+    print(f"{'编码':<16} {'字节':>8} {'压缩率':>8} {'微秒/次':>10}")
+    for encoding in available_encodings():
+        micros, data = time_call(
+            lambda: compress(body, encoding, args.gzip_level, args.brotli_quality), args.count
+        )
+        print(f"{encoding:<16} {len(data):>8} {len(data) / len(body):>7.1%} {micros:>10.1f}")
+
+        cache = CompressedCache()
+        cache.set(('etag', encoding), data)
+        micros, _ = time_call(lambda: cache.get(('etag', encoding)), args.count)
+        print(f"{encoding + ' (缓存命中)':<16} {len(data):>8} {len(data) / len(body):>7.1%} {micros:>10.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
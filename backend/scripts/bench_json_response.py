@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+列表接口 JSON 序列化基准测试
+
+对比一页题目（默认 20 道）生成响应体的耗时，并校验三种方式的输出逐字节一致：
+    逐题解码      每道题 json.loads(options) 后构建字典，再由默认 provider 整体编码（题目目录缓存之前的做法）
+    目录缓存      使用题目目录中预先解析的字典，由默认 provider 整体编码
+    片段拼接      使用题目目录中预序列化的题目片段，由 FragmentJSONProvider 直接拼接
+
+用法:
+    python bench_json_response.py                 # 每页 20 道题
+    python bench_json_response.py --size 50 -n 5000
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+# 添加父目录到路径以便导入后端模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from services.json_fragments import FragmentJSONProvider
+from services.topic_catalog import TopicRecord
+
+FIELDS = ('id', 'content', 'type', 'options', 'answer', 'analysis', 'month')
+CHARS = '中华人民共和国全国人民代表大会常务委员会关于国务院政府工作报告的决定会议审议通过了'
+COMPACT = {'separators': (',', ':')}
+
+
+def text(length):
+    return ''.join(random.choice(CHARS) for _ in range(length))
+
+
+def make_rows(count):
+    """生成与真实题库长度相近的题目行"""
+    rows = []
+    for topic_id in range(1, count + 1):
+        options = [{'key': key, 'content': text(12)} for key in 'ABCD']
+        rows.append((
+            topic_id, text(80), 1, json.dumps(options, ensure_ascii=False), 'A', text(150),
+            None, '广东', topic_id % 12 + 1, None
+        ))
+    return rows
+
+
+def envelope(items):
+    return {'code': 0, 'message': '获取成功', 'data': {'total': 1000, 'list': items, 'page': 1, 'size': len(items)}}
+
+
+def time_call(func, count):
+    """返回每次调用的平均耗时（微秒）和最后一次的结果"""
+    result = func()
+    start = time.perf_counter()
+    for _ in range(count):
+        result = func()
+    return (time.perf_counter() - start) / count * 1e6, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='列表接口 JSON 序列化基准测试')
+    parser.add_argument('--size', type=int, default=20, help='每页题目数 (默认: 20)')
+    parser.add_argument('-n', '--count', type=int, default=2000, help='重复次数 (默认: 2000)')
+
+    args = parser.parse_args()
+
+    random.seed(0)
+    rows = make_rows(args.size)
+    records = [TopicRecord(*row) for row in rows]
+
+    app = Flask(__name__)
+    default = DefaultJSONProvider(app)
+    fragment = FragmentJSONProvider(app)
+
+    def decode_each():
+        items = []
+        for row in rows:
+            items.append({
+                'id': row[0], 'content': row[1], 'type': row[2], 'options': json.loads(row[3]),
+                'answer': row[4], 'analysis': row[5], 'month': row[8]
+            })
+        return default.dumps(envelope(items), **COMPACT)
+
+    def catalog_dicts():
+        return default.dumps(envelope([record.pick(FIELDS) for record in records]), **COMPACT)
+
+    def fragments():
+        return fragment.dumps(envelope([record.fragment(FIELDS) for record in records]), **COMPACT)
+
+    results = [
+        ('逐题解码', time_call(decode_each, args.count)),
+        ('目录缓存', time_call(catalog_dicts, args.count)),
+        ('片段拼接', time_call(fragments, args.count))
+    ]
+
+    outputs = {output for _, (_, output) in results}
+    if len(outputs) != 1:
+        print("! 三种方式的输出不一致")
+        return 1
+
+    baseline = results[0][1][0]
+    print(f"每页 {args.size} 道题，响应体 {len(outputs.pop())} 字节，重复 {args.count} 次")
+    print(f"{'方式':<10} {'微秒/页':>10} {'页/秒':>10} {'加速比':>8}")
+    for name, (micros, _) in results:
+        print(f"{name:<10} {micros:>10.1f} {1e6 / micros:>10,.0f} {baseline / micros:>7.2f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+日志写入基准测试
+
+在请求线程中重复记录登录日志，对比每次调用在调用方线程上的耗时：
+    原实现      RotatingFileHandler + StreamHandler + Flask default_handler，同步格式化并写入
+    队列        QueuedLogging，请求线程只放入队列，后台线程格式化为 JSON、脱敏并写入
+    队列+采样   在队列基础上按 10% 采样（LOG_SAMPLING=bench.login=0.1）
+
+控制台输出重定向到临时文件，“写出完成”为停止后台线程、写完队列中全部日志的累计耗时。
+
+用法:
+    python bench_logging.py                  # 默认记录 20000 条
+    python bench_logging.py -n 100000        # 指定日志条数
+"""
+
+import os
+import sys
+import time
+import argparse
+import logging
+import tempfile
+from logging.handlers import RotatingFileHandler
+
+# 添加父目录到路径以便导入后端模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.logging import JsonFormatter, QueuedLogging, parse_sampling
+
+LOGIN_DATA = {'code': '0a3Xk2ll2aQJ9d4oQ1ll2Kx8Zl1Xk2lQ', 'userInfo': {'nickName': '测试用户', 'avatarUrl': 'https://example.com/a.png'}}
+
+
+def legacy_handlers(directory, console):
+    """原 setup_logging 的处理器（Flask 首次访问 app.logger 时还会添加 default_handler）"""
+    file_handler = RotatingFileHandler(os.path.join(directory, 'legacy.log'), maxBytes=10240000, backupCount=10)
+    file_handler.setFormatter(logging.Formatter(
+        '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
+    ))
+    console_handler = logging.StreamHandler(console)
+    console_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    default_handler = logging.StreamHandler(console)
+    default_handler.setFormatter(logging.Formatter('[%(asctime)s] %(levelname)s in %(module)s: %(message)s'))
+    return [file_handler, console_handler, default_handler]
+
+
+def queued_pipeline(directory, console, name, sampling=None):
+    file_handler = RotatingFileHandler(os.path.join(directory, f'{name}.log'), maxBytes=10240000, backupCount=10)
+    file_handler.setFormatter(JsonFormatter())
+    console_handler = logging.StreamHandler(console)
+    console_handler.setFormatter(JsonFormatter())
+    pipeline = QueuedLogging([file_handler, console_handler], queue_size=100000, sampling=sampling)
+    pipeline.start()
+    return pipeline
+
+
+def run(logger, count):
+    """返回调用方每次调用的平均耗时和 p99（微秒）"""
+    timings = []
+    for i in range(count):
+        start = time.perf_counter()
+        logger.info('Login request data: %s', LOGIN_DATA)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return sum(timings) / count * 1e6, timings[int(count * 0.99)] * 1e6
+
+
+def make_logger(name, handlers):
+    logger = logging.getLogger(name)
+    logger.handlers = list(handlers)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description='日志写入基准测试')
+    parser.add_argument('-n', '--count', type=int, default=20000, help='日志条数 (默认: 20000)')
+
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory, open(os.path.join(directory, 'console.log'), 'w') as console:
+        start = time.perf_counter()
+        logger = make_logger('bench.legacy', legacy_handlers(directory, console))
+        mean, p99 = run(logger, args.count)
+        results.append(('原实现', mean, p99, time.perf_counter() - start, 0))
+
+        for name, sampling in (('队列', None), ('队列+采样', parse_sampling('bench.login=0.1'))):
+            start = time.perf_counter()
+            pipeline = queued_pipeline(directory, console, f'bench_{len(results)}', sampling)
+            logger = make_logger('bench.login', [pipeline.handler])
+            mean, p99 = run(logger, args.count)
+            pipeline.stop()
+            stats = pipeline.stats()
+            results.append((name, mean, p99, time.perf_counter() - start, stats['dropped']))
+
+    baseline = results[0][1]
+    print(f"{'实现':<10} {'均值(微秒)':>10} {'p99(微秒)':>10} {'加速比':>8} {'写出完成(秒)':>12} {'丢弃':>6}")
+    for name, mean, p99, total, dropped in results:
+        print(f"{name:<10} {mean:>10.2f} {p99:>10.2f} {baseline / mean:>7.2f}x {total:>12.3f} {dropped:>6}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+登录接口压测工具
+
+并发调用 POST /api/login，统计吞吐量、状态码分布和延迟分位数。
+配合 fake_wechat_server.py 可以离线压测：
+
+    python scripts/fake_wechat_server.py --latency-ms 80 &
+    WECHAT_APPID=bench WECHAT_SECRET=bench WECHAT_API_BASE=http://127.0.0.1:9100 \\
+        gunicorn --bind 127.0.0.1:5000 --workers 4 app:app &
+    python scripts/bench_login.py --url http://127.0.0.1:5000 --concurrency 32 --requests 2000
+
+用法:
+    python bench_login.py --concurrency 16 --requests 1000   # 16 个并发、共 1000 次登录
+    python bench_login.py --users 100                         # 只使用 100 个不同的 code（已有用户登录）
+    python bench_login.py --slow-rate 0.05                    # 5% 的 code 以 slow 开头，模拟微信接口卡顿
+"""
+
+import sys
+import time
+import random
+import argparse
+import threading
+from collections import Counter
+
+import requests
+
+
+def percentile(sorted_values, ratio):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(ratio * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='登录接口压测工具')
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='后端地址 (默认: http://127.0.0.1:5000)')
+    parser.add_argument('--concurrency', type=int, default=16, help='并发数 (默认: 16)')
+    parser.add_argument('--requests', type=int, default=1000, help='总请求数 (默认: 1000)')
+    parser.add_argument('--users', type=int, default=0, help='不同 code 的数量，0 表示每次使用新 code (默认: 0)')
+    parser.add_argument('--slow-rate', type=float, default=0.0, help='以 slow 开头的 code 比例 (默认: 0)')
+    parser.add_argument('--timeout', type=float, default=30, help='单个请求超时，秒 (默认: 30)')
+
+    args = parser.parse_args()
+
+    login_url = args.url.rstrip('/') + '/api/login'
+    run_id = f'{int(time.time())}_{random.randrange(1 << 20)}'
+    counter = iter(range(args.requests))
+    counter_lock = threading.Lock()
+    results = []
+    results_lock = threading.Lock()
+
+    def next_index():
+        with counter_lock:
+            return next(counter, None)
+
+    def worker():
+        session = requests.Session()
+        local = []
+        while True:
+            index = next_index()
+            if index is None:
+                break
+            user = index % args.users if args.users else index
+            code = f'bench_{run_id}_{user}'
+            if args.slow_rate and random.random() < args.slow_rate:
+                code = 'slow_' + code
+            start = time.perf_counter()
+            try:
+                response = session.post(login_url, json={'code': code, 'userInfo': {}}, timeout=args.timeout)
+                status = response.status_code
+            except requests.RequestException as e:
+                status = e.__class__.__name__
+            local.append((status, time.perf_counter() - start))
+        with results_lock:
+            results.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency * 1000 for _, latency in results)
+    statuses = Counter(status for status, _ in results)
+    print(f"请求数: {len(results)}  并发: {args.concurrency}  耗时: {elapsed:.2f}s  吞吐: {len(results) / elapsed:.1f} 次/秒")
+    print("状态码: " + ', '.join(f'{status}={count}' for status, count in sorted(statuses.items(), key=str)))
+    print(
+        f"延迟(ms): p50={percentile(latencies, 0.5):.1f}  p95={percentile(latencies, 0.95):.1f}  "
+        f"p99={percentile(latencies, 0.99):.1f}  max={latencies[-1] if latencies else 0:.1f}"
+    )
+    return 0 if statuses.get(200, 0) == len(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+PDF题目解析器基准测试
+
+对比 questions/topic_parser.py 的单次匹配状态机与原逐行三次正则匹配的解析逻辑，
+输出两者的 行/秒、题目/秒 和加速比，并校验两者解析出的题目完全一致。
+文本块只提取一次，计时只包含解析阶段（不含PDF文本提取和数据校验）。
+
+用法:
+    python bench_pdf_parser.py                  # 使用 questions/ 下自带的PDF
+    python bench_pdf_parser.py --repeat 20      # 指定重复次数
+    python bench_pdf_parser.py --pdf a.pdf      # 指定PDF文件
+"""
+
+import os
+import re
+import sys
+import glob
+import time
+import logging
+import argparse
+
+# 添加父目录到路径以便导入后端模块
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from questions.topic_parser import MONTH_PATTERN, parse_questions
+
+# 原解析逻辑使用的正则
+QUESTION_START_PATTERN = re.compile(r"^\s*(\d+)\.\s*(.*)", re.MULTILINE)
+OPTION_PATTERN = re.compile(r"^\s*([ABCD])\.\s*(.*)", re.MULTILINE)
+ANSWER_PATTERN = re.compile(r"【正确答案】([A-D]+)")
+NEXT_QUESTION_OR_END_PATTERN = re.compile(r"^\s*\d+\.\s*")
+
+
+def _legacy_question(question_buffer, current_month):
+    if 'num' not in question_buffer:
+        return None
+    return {
+        'num': question_buffer['num'],
+        'text': question_buffer.get('text', ''),
+        'options': question_buffer.get('options', {}),
+        'answer': question_buffer.get('answer'),
+        'month': current_month
+    }
+
+
+def legacy_parse(block_texts):
+    """原 extractPDF.parse_blocks 的解析逻辑：每行执行三次正则匹配，续行时对选项排序"""
+    current_month = None
+    question_buffer = {}
+
+    for block_text in block_texts:
+        month_match = MONTH_PATTERN.search(block_text)
+        if month_match:
+            current_month = month_match.group(1)
+            question_buffer = {}
+            continue
+
+        if not current_month:
+            continue
+
+        for line in block_text.split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+
+            q_match = QUESTION_START_PATTERN.match(line)
+            opt_match = OPTION_PATTERN.match(line)
+            answer_match = ANSWER_PATTERN.search(line)
+
+            if q_match:
+                question = _legacy_question(question_buffer, current_month)
+                if question:
+                    yield question
+                question_buffer = {
+                    'num': q_match.group(1),
+                    'text': q_match.group(2),
+                    'options': {}
+                }
+            elif answer_match and 'num' in question_buffer:
+                question_buffer['answer'] = answer_match.group(1)
+            elif opt_match and 'num' in question_buffer:
+                question_buffer.setdefault('options', {})[opt_match.group(1)] = opt_match.group(2)
+            elif 'num' in question_buffer:
+                if not question_buffer.get('options'):
+                    question_buffer['text'] = question_buffer.get('text', '') + ' ' + line
+                else:
+                    last_option = sorted(question_buffer['options'].keys())[-1]
+                    if not NEXT_QUESTION_OR_END_PATTERN.match(line):
+                        question_buffer['options'][last_option] += ' ' + line
+
+    question = _legacy_question(question_buffer, current_month)
+    if question:
+        yield question
+
+
+def count_lines(block_texts):
+    return sum(1 for block_text in block_texts for line in block_text.split('\n') if line.strip())
+
+
+def time_parser(parse, block_texts, repeat):
+    """返回 (最短耗时秒, 解析结果)"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = list(parse(block_texts))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PDF题目解析器基准测试')
+    parser.add_argument('--pdf', action='append', help='PDF文件路径，可重复指定 (默认: questions/*.pdf)')
+    parser.add_argument('--repeat', type=int, default=10, help='每个解析器的重复次数，取最短耗时 (默认: 10)')
+
+    args = parser.parse_args()
+
+    # 解析过程中的月份日志不计入测试
+    logging.disable(logging.INFO)
+    from questions.extractPDF import extract_page_blocks
+    import fitz
+
+    pdf_files = args.pdf or sorted(glob.glob(os.path.join(BACKEND_DIR, 'questions', '*.pdf')))
+    if not pdf_files:
+        print("未找到PDF文件")
+        return 1
+
+    print(f"{'PDF':<40} {'行数':>8} {'题目':>6} {'原解析 行/秒':>14} {'新解析 行/秒':>14} {'题目/秒(新)':>12} {'加速比':>7}")
+    total_lines = total_questions = 0
+    total_legacy = total_new = 0.0
+    mismatched = False
+
+    for pdf_path in pdf_files:
+        with fitz.open(pdf_path) as doc:
+            page_count = doc.page_count
+        block_texts = extract_page_blocks(pdf_path, 0, page_count)
+        lines = count_lines(block_texts)
+
+        legacy_seconds, legacy_result = time_parser(legacy_parse, block_texts, args.repeat)
+        new_seconds, new_result = time_parser(parse_questions, block_texts, args.repeat)
+        if legacy_result != new_result:
+            mismatched = True
+            print(f"! {os.path.basename(pdf_path)}: 新旧解析结果不一致")
+
+        questions = len(new_result)
+        total_lines += lines
+        total_questions += questions
+        total_legacy += legacy_seconds
+        total_new += new_seconds
+        print(
+            f"{os.path.basename(pdf_path)[:40]:<40} {lines:>8} {questions:>6} "
+            f"{lines / legacy_seconds:>14,.0f} {lines / new_seconds:>14,.0f} "
+            f"{questions / new_seconds:>12,.0f} {legacy_seconds / new_seconds:>6.2f}x"
+        )
+
+    print(
+        f"{'合计':<40} {total_lines:>8} {total_questions:>6} "
+        f"{total_lines / total_legacy:>14,.0f} {total_lines / total_new:>14,.0f} "
+        f"{total_questions / total_new:>12,.0f} {total_legacy / total_new:>6.2f}x"
+    )
+    return 1 if mismatched else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Gunicorn 服务模式基准测试
+
+依次以 sync / gthread / gevent worker 启动后端（gunicorn.conf.py），对以下接口做固定时长的闭环压测，
+输出每种模式下的 RPS、p50/p99 延迟和错误数：
+    random   GET  /api/topics/random?count=20
+    login    POST /api/login（微信接口使用进程内的 fake_wechat_server，默认 80ms 延迟）
+    submit   POST /api/exam/submit（20 道题的答题详情）
+
+后端使用当前环境的数据库配置（DATABASE_URL 或 MYSQL_*），数据库中需要已有题目。
+压测客户端与后端运行在同一台机器上，CPU 核数较少时客户端本身也会成为瓶颈，结果用于同一环境下的横向对比。
+
+用法:
+    python bench_serving.py                                   # 三种模式、三个接口，每项 15 秒
+    python bench_serving.py --modes sync,gthread --duration 30
+    python bench_serving.py --endpoints login --concurrency 64 --wechat-latency-ms 200
+"""
+
+import os
+import sys
+import time
+import random
+import signal
+import argparse
+import threading
+import subprocess
+import tempfile
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_wechat_server import create_server
+
+ENDPOINTS = ('random', 'login', 'submit')
+
+
+def percentile(sorted_values, ratio):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(ratio * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def start_backend(mode, args, wechat_base, log_dir):
+    env = dict(os.environ)
+    env.update({
+        'GUNICORN_WORKER_CLASS': mode,
+        'GUNICORN_WORKERS': str(args.workers),
+        'GUNICORN_BIND': f'127.0.0.1:{args.port}',
+        'GUNICORN_ACCESS_LOG': os.path.join(log_dir, f'{mode}_access.log'),
+        'GUNICORN_ERROR_LOG': os.path.join(log_dir, f'{mode}_error.log'),
+        'WECHAT_API_BASE': wechat_base,
+        'WECHAT_APPID': 'bench',
+        'WECHAT_SECRET': 'bench',
+        'DEBUG_MODE': 'false'
+    })
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    health_url = f'http://127.0.0.1:{args.port}/health'
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'{mode} 模式启动失败，见 {env["GUNICORN_ERROR_LOG"]}')
+        try:
+            if requests.get(health_url, timeout=1).status_code == 200:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    stop_backend(process)
+    raise RuntimeError(f'{mode} 模式启动超时')
+
+
+def stop_backend(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def prepare(base_url):
+    """登录获取token，并取一组题目用于提交考试"""
+    response = requests.post(f'{base_url}/api/login', json={'code': 'bench_submit_user', 'userInfo': {}}, timeout=30)
+    response.raise_for_status()
+    token = response.json()['data']['token']
+
+    topics = requests.get(f'{base_url}/api/topics/random?count=20', timeout=30).json()['data']
+    if not topics:
+        raise RuntimeError('数据库中没有题目，无法测试 /api/exam/submit')
+    details = [
+        {'topicId': topic['id'], 'userAnswer': 'A', 'isCorrect': topic.get('answer') == 'A'}
+        for topic in topics
+    ]
+    correct = sum(1 for detail in details if detail['isCorrect'])
+    exam = {
+        'score': correct * 5,
+        'totalQuestions': len(details),
+        'correctCount': correct,
+        'wrongCount': len(details) - correct,
+        'usedTime': 300,
+        'details': details
+    }
+    return token, exam
+
+
+def make_request(endpoint, base_url, token, exam, run_id):
+    if endpoint == 'random':
+        return lambda session, i: session.get(f'{base_url}/api/topics/random?count=20', timeout=30)
+    if endpoint == 'login':
+        # 200 个不同的 code 轮流登录，除第一次外都是已有用户
+        return lambda session, i: session.post(
+            f'{base_url}/api/login', json={'code': f'bench_{run_id}_{i % 200}', 'userInfo': {}}, timeout=30
+        )
+    headers = {'Authorization': f'Bearer {token}'}
+    return lambda session, i: session.post(f'{base_url}/api/exam/submit', json=exam, headers=headers, timeout=30)
+
+
+def run_load(send, concurrency, duration):
+    """
+    闭环压测：concurrency 个客户端线程在 duration 秒内连续发送请求
+
+    Returns:
+        dict: rps、p50、p99（毫秒）、requests、errors
+    """
+    stop_at = time.monotonic() + duration
+    results = []
+    lock = threading.Lock()
+    counter = iter(range(1 << 62))
+
+    def worker():
+        session = requests.Session()
+        local = []
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            try:
+                ok = send(session, next(counter)).status_code == 200
+            except requests.RequestException:
+                ok = False
+            local.append((ok, time.perf_counter() - start))
+        with lock:
+            results.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency * 1000 for _, latency in results)
+    return {
+        'requests': len(results),
+        'errors': sum(1 for ok, _ in results if not ok),
+        'rps': len(results) / elapsed,
+        'p50': percentile(latencies, 0.5),
+        'p99': percentile(latencies, 0.99)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gunicorn 服务模式基准测试')
+    parser.add_argument('--modes', default='sync,gthread,gevent', help='worker 类型，逗号分隔 (默认: sync,gthread,gevent)')
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS), help='压测的接口，逗号分隔 (默认: random,login,submit)')
+    parser.add_argument('--workers', type=int, default=4, help='worker 进程数 (默认: 4)')
+    parser.add_argument('--concurrency', type=int, default=32, help='客户端并发数 (默认: 32)')
+    parser.add_argument('--duration', type=float, default=15, help='每个接口的压测时长，秒 (默认: 15)')
+    parser.add_argument('--warmup', type=float, default=2, help='每个接口正式计时前的预热时长，秒 (默认: 2)')
+    parser.add_argument('--port', type=int, default=5100, help='后端监听端口 (默认: 5100)')
+    parser.add_argument('--wechat-latency-ms', type=float, default=80, help='模拟微信接口延迟，毫秒 (默认: 80)')
+
+    args = parser.parse_args()
+    modes = [mode.strip() for mode in args.modes.split(',') if mode.strip()]
+    endpoints = [endpoint.strip() for endpoint in args.endpoints.split(',') if endpoint.strip()]
+    for endpoint in endpoints:
+        if endpoint not in ENDPOINTS:
+            parser.error(f'未知的接口: {endpoint}')
+
+    wechat = create_server(port=0, latency_ms=args.wechat_latency_ms, jitter_ms=args.wechat_latency_ms / 4)
+    threading.Thread(target=wechat.serve_forever, daemon=True).start()
+    wechat_base = f'http://127.0.0.1:{wechat.server_address[1]}'
+    base_url = f'http://127.0.0.1:{args.port}'
+    log_dir = tempfile.mkdtemp(prefix='bench_serving_')
+    run_id = f'{int(time.time())}_{random.randrange(1 << 20)}'
+
+    rows = []
+    for mode in modes:
+        print(f"启动 {mode} 模式 ({args.workers} workers)...")
+        process = start_backend(mode, args, wechat_base, log_dir)
+        try:
+            token, exam = prepare(base_url)
+            for endpoint in endpoints:
+                send = make_request(endpoint, base_url, token, exam, run_id)
+                if args.warmup:
+                    run_load(send, args.concurrency, args.warmup)
+                result = run_load(send, args.concurrency, args.duration)
+                rows.append((mode, endpoint, result))
+                print(f"  {endpoint:<8} {result['rps']:>8.1f} rps  p99 {result['p99']:>8.1f} ms  错误 {result['errors']}")
+        finally:
+            stop_backend(process)
+
+    wechat.shutdown()
+    print()
+    print(f"并发 {args.concurrency}，每项 {args.duration:g} 秒，worker 日志: {log_dir}")
+    print(f"{'模式':<10} {'接口':<8} {'请求数':>8} {'RPS':>9} {'p50(ms)':>9} {'p99(ms)':>9} {'错误':>6}")
+    for mode, endpoint, result in rows:
+        print(
+            f"{mode:<10} {endpoint:<8} {result['requests']:>8} {result['rps']:>9.1f} "
+            f"{result['p50']:>9.1f} {result['p99']:>9.1f} {result['errors']:>6}"
+        )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
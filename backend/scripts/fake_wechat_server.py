@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+本地模拟的微信 jscode2session 接口
+
+用于离线压测登录接口：后端设置 WECHAT_API_BASE=http://127.0.0.1:9100 后，
+登录请求改为调用本服务。相同的 code 总是返回相同的 openid，
+可以模拟接口延迟、系统繁忙（errcode -1）和 HTTP 5xx
+
+特殊的 code：
+    invalid 开头   返回 errcode 40029（code 无效）
+    busy 开头      返回 errcode -1（系统繁忙）
+    slow 开头      在 --latency-ms 的基础上额外等待 --slow-ms
+    html 开头      返回 HTML 页面（模拟代理返回的错误页）
+
+用法:
+    python fake_wechat_server.py                                  # 监听 127.0.0.1:9100
+    python fake_wechat_server.py --latency-ms 80 --jitter-ms 40   # 模拟 80±40ms 的接口延迟
+    python fake_wechat_server.py --error-rate 0.05                # 5% 的请求返回系统繁忙
+"""
+
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeWeChatHandler(BaseHTTPRequestHandler):
+    """处理 /sns/jscode2session 请求，配置保存在 server 对象上"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != '/sns/jscode2session':
+            self._send_json(404, {'errcode': 404, 'errmsg': 'not found'})
+            return
+
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+
+        params = parse_qs(url.query)
+        code = params.get('js_code', [''])[0]
+
+        delay = server.latency + random.uniform(-server.jitter, server.jitter)
+        if code.startswith('slow'):
+            delay += server.slow
+        if delay > 0:
+            time.sleep(delay)
+
+        if server.server_error_rate and random.random() < server.server_error_rate:
+            self._send_json(502, {'errcode': -1, 'errmsg': 'bad gateway'})
+        elif not params.get('appid') or not params.get('secret'):
+            self._send_json(200, {'errcode': 41002, 'errmsg': 'appid missing'})
+        elif code.startswith('html'):
+            body = b'<html><body><h1>Bad Gateway</h1></body></html>'
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif not code or code.startswith('invalid'):
+            self._send_json(200, {'errcode': 40029, 'errmsg': 'invalid code'})
+        elif code.startswith('busy') or (server.error_rate and random.random() < server.error_rate):
+            self._send_json(200, {'errcode': -1, 'errmsg': 'system error'})
+        else:
+            digest = hashlib.sha256(code.encode('utf-8')).hexdigest()
+            self._send_json(200, {'openid': f'fake_{digest[:24]}', 'session_key': digest[24:48]})
+
+
+def create_server(host='127.0.0.1', port=9100, latency_ms=0, jitter_ms=0, slow_ms=3000,
+                  error_rate=0.0, server_error_rate=0.0, verbose=False):
+    """
+    创建模拟服务（未启动）
+
+    Args:
+        host: 监听地址
+        port: 监听端口，0 表示随机端口
+        latency_ms: 每个请求的基础延迟（毫秒）
+        jitter_ms: 延迟的随机波动范围（毫秒）
+        slow_ms: slow 开头的 code 额外等待的时间（毫秒）
+        error_rate: 返回系统繁忙（errcode -1）的比例
+        server_error_rate: 返回 HTTP 502 的比例
+        verbose: 是否输出访问日志
+
+    Returns:
+        ThreadingHTTPServer: 调用 serve_forever() 启动
+    """
+    server = ThreadingHTTPServer((host, port), FakeWeChatHandler)
+    server.daemon_threads = True
+    server.latency = latency_ms / 1000.0
+    server.jitter = jitter_ms / 1000.0
+    server.slow = slow_ms / 1000.0
+    server.error_rate = error_rate
+    server.server_error_rate = server_error_rate
+    server.verbose = verbose
+    server.lock = threading.Lock()
+    server.request_count = 0
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地模拟的微信 jscode2session 接口')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址 (默认: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=9100, help='监听端口 (默认: 9100)')
+    parser.add_argument('--latency-ms', type=float, default=50, help='接口基础延迟，毫秒 (默认: 50)')
+    parser.add_argument('--jitter-ms', type=float, default=20, help='延迟随机波动，毫秒 (默认: 20)')
+    parser.add_argument('--slow-ms', type=float, default=3000, help='slow 开头的 code 额外延迟，毫秒 (默认: 3000)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回系统繁忙的比例 (默认: 0)')
+    parser.add_argument('--server-error-rate', type=float, default=0.0, help='返回 HTTP 502 的比例 (默认: 0)')
+    parser.add_argument('--verbose', action='store_true', help='输出访问日志')
+
+    args = parser.parse_args()
+
+    server = create_server(
+        args.host, args.port, args.latency_ms, args.jitter_ms, args.slow_ms,
+        args.error_rate, args.server_error_rate, args.verbose
+    )
+    print(f"模拟微信接口已启动: http://{args.host}:{server.server_address[1]}/sns/jscode2session")
+    print(f"后端设置 WECHAT_API_BASE=http://{args.host}:{server.server_address[1]} 即可使用")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"共处理 {server.request_count} 个请求")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
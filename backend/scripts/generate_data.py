@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+大规模测试数据生成脚本
+
+按 mysql/init.sql 的表结构为每张表写入指定规模的模拟数据，用于在百万行级别下观察查询计划和接口性能：
+    user / topic / topic_bank_version
+    user_topic_progress / user_mistake / user_mistake_stat / user_favorite    每个用户固定条数
+    exam_record / exam_detail / payment                                         每个用户固定条数
+    user_stat                                                                   由明细计算（services/user_stats.py）
+
+数据按 --seed 确定，相同参数生成相同的数据。用户 ID 为 1..users，openid 与 scripts/fake_wechat_server.py
+对 code "loadtest_{ID-1}" 返回的 openid 一致，生成的库可以直接用于 scripts/load_test.py --reuse-data。
+
+写入方式：行数据在内存中按批组装为元组，通过驱动的 executemany 写入（PyMySQL 将其改写为不超过 1MB 的多行 INSERT），
+MySQL 写入期间关闭本会话的外键和唯一键检查，写完后 ANALYZE TABLE 刷新索引统计。
+默认规模约 500 万行，MySQL 上通常需要几分钟。
+
+用法:
+    python generate_data.py                                    # 默认规模，写入 DATABASE_URL / MYSQL_* 指定的库
+    python generate_data.py --truncate                         # 清空已有数据后写入
+    python generate_data.py --users 100000 --progress-per-user 200    # 约 2000 万行完成进度
+    python generate_data.py --users 1000 --topics 2000         # 小规模试跑
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import datetime
+
+# 添加父目录到路径以便导入后端模块
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from dotenv import load_dotenv
+from sqlalchemy import inspect, text
+
+from mysql.pool import get_engine
+from services.exam_grading import calculate_score
+from services.topic_import import content_hash
+from services.user_stats import compute_user_stats, insert_user_stats, user_stat_table
+
+# 加载环境变量
+load_dotenv()
+
+INIT_SQL = os.path.join(BACKEND_DIR, 'mysql', 'init.sql')
+
+DEFAULT_SCALE = {
+    'users': 20000,
+    'topics': 10000,
+    'progress_per_user': 100,
+    'mistakes_per_user': 30,
+    'favorites_per_user': 10,
+    'exams_per_user': 5,
+    'questions_per_exam': 20,
+    'payments_per_user': 1
+}
+SCALE_HELP = {
+    'users': '用户数',
+    'topics': '题目数',
+    'progress_per_user': '每个用户完成的题目数',
+    'mistakes_per_user': '每个用户的错题数（取自完成的题目）',
+    'favorites_per_user': '每个用户的收藏数',
+    'exams_per_user': '每个用户的考试次数',
+    'questions_per_exam': '每次考试的题目数',
+    'payments_per_user': '每个用户的支付记录数'
+}
+
+# 各表写入的列，顺序即为写入顺序（被引用的表在前）
+COLUMNS = {
+    'user': ('id', 'openid', 'nickname', 'avatar_url', 'created_at', 'last_login'),
+    'topic': (
+        'id', 'content', 'content_hash', 'type_id', 'options', 'answer', 'analysis', 'region', 'month', 'created_at'
+    ),
+    'topic_bank_version': ('id', 'version', 'updated_at'),
+    'user_topic_progress': ('user_id', 'topic_id', 'month', 'completed_at'),
+    'user_mistake': ('user_id', 'topic_id', 'created_at'),
+    'user_mistake_stat': ('user_id', 'topic_id', 'wrong_count', 'last_wrong_at'),
+    'user_favorite': ('user_id', 'topic_id', 'created_at'),
+    'exam_record': (
+        'id', 'user_id', 'score', 'total_questions', 'correct_count', 'wrong_count', 'used_time', 'created_at'
+    ),
+    'exam_detail': ('exam_record_id', 'topic_id', 'user_answer', 'is_correct', 'created_at'),
+    'payment': ('id', 'user_id', 'order_no', 'amount', 'status', 'transaction_id', 'created_at', 'paid_at'),
+    'user_stat': ()
+}
+# 数据分布在最近一年内
+TIME_SPAN_SECONDS = 365 * 86400
+# 答对的概率
+CORRECT_RATE = 0.7
+
+
+def login_code(index):
+    """生成数据中第 index 个用户（ID 为 index + 1）的登录 code"""
+    return f'loadtest_{index}'
+
+
+def openid_for(index):
+    """与 fake_wechat_server 相同的 code 到 openid 映射，生成的用户可以直接登录"""
+    return 'fake_' + hashlib.sha256(login_code(index).encode('utf-8')).hexdigest()[:24]
+
+
+def topic_month(topic_id):
+    """题目按 ID 轮流分到 12 个月"""
+    return (topic_id - 1) % 12 + 1
+
+
+def make_topic(topic_id, rng):
+    """
+    生成一道题目：60% 单选、20% 多选、20% 判断
+
+    Returns:
+        dict: topic 表的一行（不含 content_hash 和 created_at）
+    """
+    type_id = rng.choice((1, 1, 1, 2, 3))
+    if type_id == 3:
+        options = [{'key': 'A', 'content': '正确'}, {'key': 'B', 'content': '错误'}]
+        answer = rng.choice('AB')
+    else:
+        options = [{'key': key, 'content': f'选项{key}：模拟选项内容{topic_id}'} for key in 'ABCD']
+        answer = rng.choice('ABCD') if type_id == 1 else ''.join(sorted(rng.sample('ABCD', 2)))
+    return {
+        'id': topic_id,
+        'content': f'模拟题目{topic_id}：下列关于时事政治的表述，正确的是（  ）',
+        'type_id': type_id,
+        'options': json.dumps(options, ensure_ascii=False),
+        'answer': answer,
+        'analysis': f'模拟题目{topic_id}的解析',
+        'region': '全国',
+        'month': topic_month(topic_id)
+    }
+
+
+def wrong_answer(answer):
+    return 'B' if answer.startswith('A') else 'A'
+
+
+def apply_schema(engine):
+    """MySQL 上执行 mysql/init.sql 中的建表语句（CREATE TABLE IF NOT EXISTS，已有的表不变）"""
+    with open(INIT_SQL, encoding='utf-8') as f:
+        lines = [line for line in f if not line.lstrip().startswith('--')]
+    statements = [statement.strip() for statement in ''.join(lines).split(';')]
+    with engine.begin() as conn:
+        for statement in statements:
+            # 库名由连接URL决定，跳过建库和切换库的语句
+            if not statement or statement.upper().startswith(('CREATE DATABASE', 'USE ')):
+                continue
+            conn.execute(text(statement))
+
+
+class BulkLoader(object):
+    """
+    按表缓存待写入的行，任一张表达到批大小时按 COLUMNS 的顺序写出所有表，保证被引用的行先写入
+    """
+
+    def __init__(self, conn, tables, batch_size, log=None):
+        self.conn = conn
+        self.tables = [name for name in COLUMNS if name in tables and COLUMNS[name]]
+        self.batch_size = batch_size
+        self.log = log
+        dialect = conn.dialect
+        quote = dialect.identifier_preparer.quote
+        placeholder = '?' if dialect.paramstyle == 'qmark' else '%s'
+        self.statements = {}
+        for name in self.tables:
+            columns = COLUMNS[name]
+            self.statements[name] = (
+                f"INSERT INTO {quote(name)} ({', '.join(quote(column) for column in columns)}) "
+                f"VALUES ({', '.join([placeholder] * len(columns))})"
+            )
+        self.buffers = {name: [] for name in self.tables}
+        self.counts = dict.fromkeys(self.tables, 0)
+        self.started = time.monotonic()
+
+    def add(self, name, row):
+        buffer = self.buffers.get(name)
+        # 当前库中不存在的表（例如 SQLite 上没有 payment 表）不写入
+        if buffer is None:
+            return
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        for name in self.tables:
+            rows = self.buffers[name]
+            if not rows:
+                continue
+            self.conn.exec_driver_sql(self.statements[name], rows)
+            self.counts[name] += len(rows)
+            self.buffers[name] = []
+        self.conn.commit()
+
+    def report(self):
+        if self.log:
+            total = sum(self.counts.values())
+            elapsed = time.monotonic() - self.started
+            self.log(f"  已写入 {total} 行（{elapsed:.0f} 秒，{total / max(elapsed, 1e-9):.0f} 行/秒）")
+
+
+def existing_tables(engine):
+    return set(inspect(engine).get_table_names())
+
+
+def prepare_tables(engine, truncate=False):
+    """
+    检查待写入的表为空，truncate 为 True 时先清空
+
+    Returns:
+        set: 库中存在的表名
+    """
+    tables = existing_tables(engine) & set(COLUMNS)
+    missing = {'user', 'topic'} - tables
+    if missing:
+        raise RuntimeError(f"缺少数据表: {', '.join(sorted(missing))}")
+    quote = engine.dialect.identifier_preparer.quote
+    with engine.begin() as conn:
+        if engine.dialect.name == 'mysql':
+            conn.execute(text('SET SESSION foreign_key_checks = 0'))
+        # 被引用的表在后
+        for name in reversed(list(COLUMNS)):
+            if name not in tables:
+                continue
+            if truncate or name == 'topic_bank_version':
+                if engine.dialect.name == 'mysql' and name != 'topic_bank_version':
+                    conn.execute(text(f'TRUNCATE TABLE {quote(name)}'))
+                else:
+                    conn.execute(text(f'DELETE FROM {quote(name)}'))
+            elif conn.execute(text(f'SELECT 1 FROM {quote(name)} LIMIT 1')).first() is not None:
+                raise RuntimeError(f'{name} 表中已有数据，使用 --truncate 清空后写入')
+        if engine.dialect.name == 'mysql':
+            conn.execute(text('SET SESSION foreign_key_checks = 1'))
+    return tables
+
+
+def generate(engine, seed=1, batch_size=2000, truncate=False, log=print, **scale):
+    """
+    生成并写入数据
+
+    Args:
+        engine: 数据库引擎，MySQL 上缺少的表按 mysql/init.sql 创建，其他数据库需要已经建表
+        seed: 随机种子
+        batch_size: 每次写入的行数
+        truncate: 清空已有数据，否则要求各表为空
+        log: 进度输出函数，为 None 时不输出
+        **scale: 覆盖 DEFAULT_SCALE 中的规模参数
+
+    Returns:
+        dict: 各表写入的行数
+    """
+    unknown = set(scale) - set(DEFAULT_SCALE)
+    if unknown:
+        raise ValueError(f"未知的规模参数: {', '.join(sorted(unknown))}")
+    scale = dict(DEFAULT_SCALE, **scale)
+    users, topics = scale['users'], scale['topics']
+    is_mysql = engine.dialect.name == 'mysql'
+
+    if is_mysql:
+        apply_schema(engine)
+    tables = prepare_tables(engine, truncate)
+
+    rng = random.Random(seed)
+    now = datetime.datetime.now().replace(microsecond=0)
+
+    def timestamp():
+        return now - datetime.timedelta(seconds=rng.randrange(TIME_SPAN_SECONDS))
+
+    with engine.connect() as conn:
+        if is_mysql:
+            # 写入期间不逐行检查外键和唯一键，数据由本脚本保证一致
+            conn.execute(text('SET SESSION foreign_key_checks = 0, unique_checks = 0'))
+            conn.commit()
+        loader = BulkLoader(conn, tables, batch_size, log)
+
+        answers = {}
+        for topic_id in range(1, topics + 1):
+            row = make_topic(topic_id, rng)
+            answers[topic_id] = row['answer']
+            row['content_hash'] = content_hash(row['content'])
+            row['created_at'] = timestamp()
+            loader.add('topic', tuple(row[column] for column in COLUMNS['topic']))
+        loader.add('topic_bank_version', (1, 1, now))
+
+        for user_id in range(1, users + 1):
+            created_at = timestamp()
+            loader.add('user', (
+                user_id, openid_for(user_id - 1), f'用户{user_id}', '', created_at, max(created_at, timestamp())
+            ))
+        loader.flush()
+        loader.report()
+
+        topic_ids = range(1, topics + 1)
+        progress_count = min(scale['progress_per_user'], topics)
+        mistake_count = min(scale['mistakes_per_user'], topics)
+        favorite_count = min(scale['favorites_per_user'], max(topics - mistake_count, 0))
+        questions = min(scale['questions_per_exam'], topics)
+        exam_id = 0
+        payment_id = 0
+        for user_id in range(1, users + 1):
+            # 错题和收藏取自已完成的题目，收藏与错题不重叠
+            picked = rng.sample(topic_ids, min(topics, max(progress_count, mistake_count + favorite_count)))
+            for topic_id in picked[:progress_count]:
+                loader.add('user_topic_progress', (user_id, topic_id, topic_month(topic_id), timestamp()))
+            for topic_id in picked[:mistake_count]:
+                wrong_at = timestamp()
+                loader.add('user_mistake', (user_id, topic_id, wrong_at))
+                loader.add('user_mistake_stat', (user_id, topic_id, rng.randint(1, 5), wrong_at))
+            for topic_id in picked[mistake_count:mistake_count + favorite_count]:
+                loader.add('user_favorite', (user_id, topic_id, timestamp()))
+
+            for _ in range(scale['exams_per_user']):
+                exam_id += 1
+                taken_at = timestamp()
+                correct = 0
+                for topic_id in rng.sample(topic_ids, questions):
+                    is_correct = rng.random() < CORRECT_RATE
+                    correct += is_correct
+                    answer = answers[topic_id] if is_correct else wrong_answer(answers[topic_id])
+                    loader.add('exam_detail', (exam_id, topic_id, answer, is_correct, taken_at))
+                loader.add('exam_record', (
+                    exam_id, user_id, calculate_score(correct, questions), questions,
+                    correct, questions - correct, rng.randint(300, 3600), taken_at
+                ))
+
+            for _ in range(scale['payments_per_user']):
+                payment_id += 1
+                created_at = timestamp()
+                # 0-待支付, 1-已支付, 2-已退款
+                status = rng.choice((0, 1, 1, 1, 1, 1, 1, 1, 2, 2))
+                loader.add('payment', (
+                    payment_id, user_id, f'GEN{payment_id:012d}', rng.choice((990, 1990, 2990)), status,
+                    f'TX{payment_id:016d}' if status else None, created_at,
+                    created_at + datetime.timedelta(seconds=rng.randint(5, 300)) if status else None
+                ))
+            if log and user_id % 1000 == 0:
+                loader.flush()
+                log(f"  已生成 {user_id}/{users} 个用户的明细")
+                loader.report()
+        loader.flush()
+        counts = dict(loader.counts)
+
+        # 统计汇总由明细计算，与应用的读取路径一致
+        if 'user_stat' in tables:
+            target = user_stat_table()
+            for start in range(1, users + 1, 500):
+                stats = compute_user_stats(conn, list(range(start, min(start + 500, users + 1))))
+                insert_user_stats(conn, target, list(stats.values()))
+                conn.commit()
+            counts['user_stat'] = users
+
+        if is_mysql:
+            conn.execute(text('SET SESSION foreign_key_checks = 1, unique_checks = 1'))
+            quote = engine.dialect.identifier_preparer.quote
+            conn.execute(text(f"ANALYZE TABLE {', '.join(quote(name) for name in COLUMNS if name in tables)}"))
+            conn.commit()
+        loader.report()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='大规模测试数据生成')
+    parser.add_argument('--database-url', help='数据库URL (默认: DATABASE_URL 或 MYSQL_* 环境变量)')
+    parser.add_argument('--truncate', action='store_true', help='清空已有数据后写入')
+    parser.add_argument('--seed', type=int, default=1, help='随机种子 (默认: 1)')
+    parser.add_argument('--batch-size', type=int, default=2000, help='每次写入的行数 (默认: 2000)')
+    for name, default in DEFAULT_SCALE.items():
+        option = '--' + name.replace('_', '-')
+        parser.add_argument(option, type=int, default=default, dest=name, help=f'{SCALE_HELP[name]} (默认: {default})')
+
+    args = parser.parse_args()
+    scale = {name: getattr(args, name) for name in DEFAULT_SCALE}
+    engine = get_engine(args.database_url)
+    print(f"写入 {engine.url.render_as_string(hide_password=True)}")
+    print('  ' + ', '.join(f'{name}={value}' for name, value in scale.items()))
+
+    started = time.monotonic()
+    try:
+        counts = generate(
+            engine, seed=args.seed, batch_size=args.batch_size, truncate=args.truncate, **scale
+        )
+    except RuntimeError as e:
+        print(f"错误: {e}")
+        return 1
+
+    print(f"\n完成，耗时 {time.monotonic() - started:.1f} 秒")
+    for name, count in counts.items():
+        print(f"  {name:<22} {count:>12}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+题库版本表初始化脚本
+
+为已有数据库创建 topic_bank_version 表并写入版本号记录（id = 1）。表或记录不存在时应用只依赖
+TOPIC_CACHE_TTL 刷新进程内的题目缓存，导入题目后各 worker 最长要等一个缓存有效期才能看到新题目。
+脚本可以重复执行，已有的版本号不变；--bump 额外递增版本号，使运行中的 worker 立即刷新缓存。
+
+用法:
+    python init_topic_bank_version.py          # 建表并写入初始版本号
+    python init_topic_bank_version.py --bump   # 同时递增版本号
+"""
+
+import os
+import sys
+import argparse
+
+# 添加父目录到路径以便导入后端模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+from sqlalchemy import inspect, text
+
+from mysql.pool import get_engine
+
+# 加载环境变量
+load_dotenv()
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS topic_bank_version (
+  id INT NOT NULL,
+  version BIGINT NOT NULL DEFAULT 0,
+  updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (id)
+)
+"""
+
+
+def ensure_table(engine):
+    """topic_bank_version 表不存在时创建"""
+    if inspect(engine).has_table('topic_bank_version'):
+        return False
+    with engine.begin() as conn:
+        conn.execute(text(CREATE_TABLE_SQL))
+    return True
+
+
+def ensure_version(engine, bump=False):
+    """
+    写入版本号记录
+
+    Args:
+        engine: 数据库引擎
+        bump: 是否递增版本号
+
+    Returns:
+        int: 当前版本号
+    """
+    with engine.begin() as conn:
+        conn.execute(text("INSERT IGNORE INTO topic_bank_version (id, version) VALUES (1, 0)"))
+        if bump:
+            conn.execute(text(
+                "UPDATE topic_bank_version SET version = version + 1, updated_at = NOW() WHERE id = 1"
+            ))
+        return conn.execute(text("SELECT version FROM topic_bank_version WHERE id = 1")).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='题库版本表初始化工具')
+    parser.add_argument('--bump', action='store_true', help='递增版本号，使运行中的 worker 立即刷新题目缓存')
+
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("题库版本表初始化工具")
+    print("=" * 60)
+
+    engine = get_engine()
+    if ensure_table(engine):
+        print("✓ 已创建 topic_bank_version 表")
+
+    version = ensure_version(engine, args.bump)
+    print(f"✓ 当前题库版本号: {version}")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+小程序用户旅程压测
+
+准备一个本地数据库（默认临时 SQLite 文件），由 generate_data.py 写入指定数量的题目和用户（每个用户带有错题、收藏、完成进度和考试记录），
+以 gunicorn 启动后端，微信登录接口使用进程内的 fake_wechat_server。
+每个虚拟用户按 PoliticsSolver 小程序页面的调用顺序循环执行以下旅程：
+    home      首页        GET  /api/user/month-dashboard、GET /api/user/statistics
+    practice  随机练习    GET  /api/topics/random，答错的题 POST /api/mistake/add，POST /api/progress/finish-topics
+    exam      模拟考试    GET  /api/exam/random，POST /api/exam/submit，GET /api/exam/detail/<id>
+    mistakes  错题本      GET  /api/mistake/statistics，GET /api/mistake/list 前两页
+    login     重新登录    POST /api/login（换一个用户）
+
+旅程、答题结果和用户选择由 --seed 决定，同样的参数在不同提交上发送相同顺序的请求。
+每个接口的 SQL 语句数和执行时间取自压测前后两次 /metrics 的差值。
+报告为 JSON（键排序，数值取整），可以直接 diff，或用 --compare 与另一份报告对比。
+
+SQLite 不支持并发写入，写接口在并发较高时可能出现 database is locked 错误，
+对比结果以 MySQL 为准：--database-url 指定一个空的 MySQL 库（表由 db.create_all() 创建）。
+
+用法:
+    python load_test.py                                          # 临时 SQLite，16 个并发用户
+    python load_test.py --output report.json                     # 写入报告
+    python load_test.py --compare baseline.json                  # 与之前的报告对比
+    python load_test.py --database-url mysql+pymysql://root:pw@127.0.0.1/sz_exam_load --concurrency 64
+    python load_test.py --mix home=1,exam=1 --duration 60        # 只执行首页和考试旅程，持续 60 秒
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import datetime
+import platform
+import tempfile
+import threading
+import subprocess
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from bench_serving import percentile, start_backend, stop_backend
+from fake_wechat_server import create_server
+from generate_data import generate, login_code
+
+JOURNEYS = ('home', 'practice', 'exam', 'mistakes', 'login')
+DEFAULT_MIX = 'home=3,practice=3,exam=1,mistakes=2,login=1'
+ALL_MONTHS = ','.join(str(month) for month in range(1, 13))
+# 答对的概率
+CORRECT_RATE = 0.7
+
+
+def parse_mix(text):
+    """
+    解析旅程权重，例如 "home=3,exam=1"
+
+    Returns:
+        list: [(旅程, 权重)]
+    """
+    mix = []
+    for item in text.split(','):
+        if not item.strip():
+            continue
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in JOURNEYS:
+            raise ValueError(f'未知的旅程: {name}')
+        weight = float(weight) if weight.strip() else 1.0
+        if weight > 0:
+            mix.append((name, weight))
+    if not mix:
+        raise ValueError('至少需要一个权重大于 0 的旅程')
+    return mix
+
+
+def seed_database(database_url, users, topics, history, seed, reuse_data=False):
+    """
+    建表并由 generate_data.py 写入压测数据，数据库中已有用户时要求 reuse_data
+
+    Args:
+        database_url: 数据库URL
+        users: 用户数，ID 为 1..users，openid 对应 login_code(ID - 1)
+        topics: 题目数
+        history: 每个用户已完成的题目数，其中 30% 在错题本中，另有 10% 已收藏
+        seed: 随机种子
+        reuse_data: 复用已有数据，不再写入
+
+    Returns:
+        dict: 数据库类型和各表行数
+    """
+    # 在导入 app 之前切换数据库，压测进程本身不写指标文件
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['METRICS_ENABLED'] = 'false'
+    from app import app, db, Topic, User, UserMistake, UserFavorite, UserTopicProgress
+
+    with app.app_context():
+        db.create_all()
+        existing = db.session.query(User).count()
+        db.session.remove()
+        if existing and not reuse_data:
+            raise RuntimeError(f'数据库中已有 {existing} 个用户，使用 --reuse-data 复用已有数据或指定一个空数据库')
+        if not existing:
+            generate(
+                db.engine, seed=seed, log=None, users=users, topics=topics,
+                progress_per_user=history, mistakes_per_user=history * 3 // 10, favorites_per_user=history // 10,
+                exams_per_user=2, payments_per_user=0
+            )
+
+        counts = {
+            'users': db.session.query(User).count(),
+            'topics': db.session.query(Topic).count(),
+            'mistakes': db.session.query(UserMistake).count(),
+            'favorites': db.session.query(UserFavorite).count(),
+            'progress': db.session.query(UserTopicProgress).count()
+        }
+        backend = db.engine.dialect.name
+        db.session.remove()
+        db.engine.dispose()
+    return dict(counts, backend=backend, seeded=not existing)
+
+
+class VirtualUser(object):
+    """
+    一个虚拟用户：持有自己的 HTTP 会话和随机数序列，按权重循环执行旅程
+
+    每个请求记录为 (接口, 耗时秒数, 是否成功)，接口用路由模板表示，与 /metrics 的 route 标签一致
+    """
+
+    def __init__(self, base_url, index, users, mix, seed):
+        self.base_url = base_url
+        self.users = users
+        self.rng = random.Random(seed * 1000003 + index)
+        self.user_index = index % users
+        self.names = [name for name, _ in mix]
+        self.weights = [weight for _, weight in mix]
+        self.session = requests.Session()
+        self.headers = {}
+        self.samples = []
+        self.journeys = dict.fromkeys(JOURNEYS, 0)
+        self.record = True
+
+    def call(self, method, route, path=None, **kwargs):
+        """发送请求并记录耗时，成功（HTTP 200 且 code 为 0）时返回 data"""
+        start = time.perf_counter()
+        try:
+            response = self.session.request(
+                method, self.base_url + (path or route), headers=self.headers, timeout=30, **kwargs
+            )
+            elapsed = time.perf_counter() - start
+            body = response.json() if response.status_code == 200 else None
+        except (requests.RequestException, ValueError):
+            elapsed = time.perf_counter() - start
+            body = None
+        ok = isinstance(body, dict) and body.get('code') == 0
+        if self.record:
+            self.samples.append((f'{method} {route}', elapsed, ok))
+        return body.get('data') if ok else None
+
+    def login(self):
+        data = self.call('POST', '/api/login', json={
+            'code': login_code(self.user_index),
+            'userInfo': {'nickName': f'压测用户{self.user_index + 1}'}
+        })
+        if data:
+            self.headers = {'Authorization': f"Bearer {data['token']}"}
+        return data is not None
+
+    def answer(self, topic):
+        """按 CORRECT_RATE 给出正确或错误的答案"""
+        correct = topic.get('answer') or 'A'
+        if self.rng.random() < CORRECT_RATE:
+            return correct, True
+        return ('B' if correct.startswith('A') else 'A'), False
+
+    def journey_home(self):
+        self.call('GET', '/api/user/month-dashboard', f'/api/user/month-dashboard?months={ALL_MONTHS}')
+        self.call('GET', '/api/user/statistics')
+
+    def journey_practice(self):
+        months = ','.join(str(month) for month in sorted(self.rng.sample(range(1, 13), 3)))
+        topics = self.call('GET', '/api/topics/random', f'/api/topics/random?months={months}&count=10') or []
+        for topic in topics:
+            _, correct = self.answer(topic)
+            if not correct:
+                self.call('POST', '/api/mistake/add', json={'topicId': topic['id']})
+        items = [{'topicId': topic['id'], 'month': topic['month']} for topic in topics if topic.get('month')]
+        if items:
+            self.call('POST', '/api/progress/finish-topics', json={'items': items})
+
+    def journey_exam(self):
+        topics = self.call('GET', '/api/exam/random', '/api/exam/random?count=20') or []
+        if not topics:
+            return
+        details = [{'topicId': topic['id'], 'userAnswer': self.answer(topic)[0]} for topic in topics]
+        result = self.call('POST', '/api/exam/submit', json={
+            'totalQuestions': len(details),
+            'usedTime': self.rng.randint(300, 1800),
+            'details': details
+        })
+        if result:
+            record_id = result['recordId']
+            self.call('GET', '/api/exam/detail/<int:record_id>', f'/api/exam/detail/{record_id}')
+
+    def journey_mistakes(self):
+        self.call('GET', '/api/mistake/statistics')
+        self.call('GET', '/api/mistake/list', '/api/mistake/list?page=1&size=10')
+        self.call('GET', '/api/mistake/list', '/api/mistake/list?page=2&size=10')
+
+    def journey_login(self):
+        self.user_index = self.rng.randrange(self.users)
+        self.login()
+
+    def run(self, iterations=None, stop_at=None):
+        """执行旅程直到达到次数或截止时间"""
+        done = 0
+        while (iterations is None or done < iterations) and (stop_at is None or time.monotonic() < stop_at):
+            name = self.rng.choices(self.names, self.weights)[0]
+            getattr(self, f'journey_{name}')()
+            if self.record:
+                self.journeys[name] += 1
+            done += 1
+
+
+def run_phase(vus, iterations=None, duration=None):
+    """所有虚拟用户并发执行一个阶段，返回耗时秒数"""
+    stop_at = time.monotonic() + duration if duration else None
+    threads = [threading.Thread(target=vu.run, args=(iterations, stop_at)) for vu in vus]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+
+def parse_prometheus(text):
+    """
+    解析 Prometheus 文本中的样本
+
+    Returns:
+        dict: {(名称, 排序后的标签元组): 值}
+    """
+    samples = {}
+    for line in text.splitlines():
+        match = re.match(r'^(\w+)(?:\{(.*)\})? (\S+)$', line)
+        if not match:
+            continue
+        labels = tuple(sorted(re.findall(r'(\w+)="([^"]*)"', match.group(2) or '')))
+        samples[(match.group(1), labels)] = float(match.group(3))
+    return samples
+
+
+def scrape_metrics(base_url, admin_key):
+    response = requests.get(f'{base_url}/metrics', headers={'X-Admin-Key': admin_key}, timeout=30)
+    response.raise_for_status()
+    return parse_prometheus(response.text)
+
+
+def server_metrics(before, after):
+    """
+    按接口计算压测期间服务端的请求数、平均耗时、SQL 语句数和执行时间
+
+    Returns:
+        dict: {"METHOD route": {...}}
+    """
+    def delta(name, labels):
+        return after.get((name, labels), 0.0) - before.get((name, labels), 0.0)
+
+    result = {}
+    for name, labels in after:
+        if name != 'http_request_duration_seconds_count':
+            continue
+        count = delta(name, labels)
+        if count <= 0:
+            continue
+        label_map = dict(labels)
+        result[f"{label_map['method']} {label_map['route']}"] = {
+            'serverRequests': int(count),
+            'serverMeanMs': delta('http_request_duration_seconds_sum', labels) / count * 1000,
+            'dbQueriesPerRequest': delta('db_statements_per_request_sum', labels) / count,
+            'dbMsPerRequest': delta('db_statement_seconds_total', labels) / count * 1000
+        }
+    return result
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(latency * 1000 for _, latency, _ in samples)
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for _, _, ok in samples if not ok),
+        'rps': len(samples) / elapsed if elapsed else 0.0,
+        'p50Ms': percentile(latencies, 0.5),
+        'p95Ms': percentile(latencies, 0.95),
+        'p99Ms': percentile(latencies, 0.99),
+        'meanMs': sum(latencies) / len(latencies) if latencies else 0.0
+    }
+
+
+def _round(value):
+    if isinstance(value, float):
+        return round(value, 2)
+    if isinstance(value, dict):
+        return {key: _round(item) for key, item in value.items()}
+    return value
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], cwd=BACKEND_DIR, capture_output=True, text=True
+        ).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, dirty
+
+
+def build_report(args, data, vus, elapsed, server):
+    samples = [sample for vu in vus for sample in vu.samples]
+    by_endpoint = {}
+    for sample in samples:
+        by_endpoint.setdefault(sample[0], []).append(sample)
+
+    endpoints = {}
+    for key, endpoint_samples in by_endpoint.items():
+        endpoints[key] = summarize(endpoint_samples, elapsed)
+        endpoints[key].update(server.get(key, {}))
+
+    total_queries = sum(
+        entry.get('dbQueriesPerRequest', 0.0) * entry.get('serverRequests', 0) for entry in endpoints.values()
+    )
+    total_server = sum(entry.get('serverRequests', 0) for entry in endpoints.values())
+    summary = summarize(samples, elapsed)
+    summary['durationSeconds'] = elapsed
+    summary['dbQueriesPerRequest'] = total_queries / total_server if total_server else 0.0
+
+    journeys = dict.fromkeys(JOURNEYS, 0)
+    for vu in vus:
+        for name, count in vu.journeys.items():
+            journeys[name] += count
+
+    commit, dirty = git_revision()
+    return _round({
+        'meta': {
+            'gitCommit': commit,
+            'gitDirty': dirty,
+            'startedAt': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'database': data,
+            'config': {
+                'concurrency': args.concurrency,
+                'iterations': None if args.duration else args.iterations,
+                'duration': args.duration or None,
+                'mix': args.mix,
+                'seed': args.seed,
+                'workers': args.workers,
+                'workerClass': args.worker_class,
+                'wechatLatencyMs': args.wechat_latency_ms
+            }
+        },
+        'summary': summary,
+        'journeys': journeys,
+        'endpoints': endpoints
+    })
+
+
+def _change(old, new):
+    if not old:
+        return '     -'
+    return f'{(new - old) / old * 100:+6.1f}%'
+
+
+def print_report(report, baseline=None):
+    summary = report['summary']
+    print(
+        f"总计 {summary['requests']} 个请求，错误 {summary['errors']}，{summary['rps']:.1f} rps，"
+        f"p50 {summary['p50Ms']:.1f} ms，p95 {summary['p95Ms']:.1f} ms，p99 {summary['p99Ms']:.1f} ms，"
+        f"每个请求 {summary['dbQueriesPerRequest']:.2f} 条 SQL"
+    )
+    print()
+    header = f"{'接口':<42} {'请求数':>7} {'错误':>5} {'RPS':>8} {'p50(ms)':>8} {'p95(ms)':>8} {'p99(ms)':>8} {'SQL/请求':>9}"
+    if baseline:
+        header += f" {'p95变化':>8} {'SQL变化':>8}"
+    print(header)
+    for key in sorted(report['endpoints']):
+        entry = report['endpoints'][key]
+        queries = entry.get('dbQueriesPerRequest')
+        line = (
+            f"{key:<42} {entry['requests']:>7} {entry['errors']:>5} {entry['rps']:>8.1f} "
+            f"{entry['p50Ms']:>8.1f} {entry['p95Ms']:>8.1f} {entry['p99Ms']:>8.1f} "
+            f"{f'{queries:.2f}' if queries is not None else '-':>9}"
+        )
+        if baseline:
+            old = baseline['endpoints'].get(key, {})
+            line += f" {_change(old.get('p95Ms'), entry['p95Ms']):>8}"
+            line += f" {_change(old.get('dbQueriesPerRequest'), queries or 0.0):>8}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='小程序用户旅程压测')
+    parser.add_argument('--users', type=int, default=200, help='写入的用户数 (默认: 200)')
+    parser.add_argument('--topics', type=int, default=2000, help='写入的题目数 (默认: 2000)')
+    parser.add_argument('--history', type=int, default=50, help='每个用户已完成的题目数 (默认: 50)')
+    parser.add_argument('--database-url', help='数据库URL (默认: 临时 SQLite 文件)')
+    parser.add_argument('--reuse-data', action='store_true', help='数据库中已有数据时直接使用，不再写入')
+    parser.add_argument('--concurrency', type=int, default=16, help='虚拟用户数 (默认: 16)')
+    parser.add_argument('--iterations', type=int, default=20, help='每个虚拟用户执行的旅程数 (默认: 20)')
+    parser.add_argument('--duration', type=float, default=0, help='按时长压测，秒，设置后忽略 --iterations')
+    parser.add_argument('--warmup', type=int, default=2, help='正式计时前每个虚拟用户执行的旅程数 (默认: 2)')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'旅程权重 (默认: {DEFAULT_MIX})')
+    parser.add_argument('--seed', type=int, default=1, help='随机种子 (默认: 1)')
+    parser.add_argument('--workers', type=int, default=4, help='worker 进程数 (默认: 4)')
+    parser.add_argument('--worker-class', default='gthread', help='worker 类型 (默认: gthread)')
+    parser.add_argument('--port', type=int, default=5200, help='后端监听端口 (默认: 5200)')
+    parser.add_argument('--wechat-latency-ms', type=float, default=50, help='模拟微信接口延迟，毫秒 (默认: 50)')
+    parser.add_argument('-o', '--output', help='JSON 报告路径')
+    parser.add_argument('--compare', help='对比的基准报告路径')
+
+    args = parser.parse_args()
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    work_dir = tempfile.mkdtemp(prefix='load_test_')
+    database_url = args.database_url or f"sqlite:///{os.path.join(work_dir, 'load_test.db')}"
+    print(f"准备数据 ({args.users} 个用户, {args.topics} 道题目)...")
+    data = seed_database(database_url, args.users, args.topics, args.history, args.seed, args.reuse_data)
+    print(f"  {data}")
+
+    wechat = create_server(port=0, latency_ms=args.wechat_latency_ms, jitter_ms=args.wechat_latency_ms / 4)
+    threading.Thread(target=wechat.serve_forever, daemon=True).start()
+    admin_key = os.environ.get('ADMIN_KEY', 'default_admin_key')
+    flush_interval = 1
+    os.environ.update({
+        'ADMIN_KEY': admin_key,
+        'METRICS_ENABLED': 'true',
+        'METRICS_MULTIPROC_DIR': os.path.join(work_dir, 'metrics'),
+        'METRICS_FLUSH_INTERVAL': str(flush_interval)
+    })
+    base_url = f'http://127.0.0.1:{args.port}'
+
+    print(f"启动后端 ({args.worker_class}, {args.workers} workers)，日志目录: {work_dir}")
+    process = start_backend(args.worker_class, args, f'http://127.0.0.1:{wechat.server_address[1]}', work_dir)
+    try:
+        users = data['users'] or args.users
+        vus = [VirtualUser(base_url, index, users, mix, args.seed) for index in range(args.concurrency)]
+        # 登录和预热不计入结果
+        for vu in vus:
+            vu.record = False
+            if not vu.login():
+                raise RuntimeError('虚拟用户登录失败')
+        if args.warmup:
+            run_phase(vus, iterations=args.warmup)
+        for vu in vus:
+            vu.record = True
+
+        before = scrape_metrics(base_url, admin_key)
+        print(f"压测中 ({args.concurrency} 个虚拟用户)...")
+        if args.duration:
+            elapsed = run_phase(vus, duration=args.duration)
+        else:
+            elapsed = run_phase(vus, iterations=args.iterations)
+        # 等待所有 worker 的后台线程写出指标快照
+        time.sleep(flush_interval * 2 + 0.5)
+        after = scrape_metrics(base_url, admin_key)
+    finally:
+        stop_backend(process)
+        wechat.shutdown()
+
+    report = build_report(args, data, vus, elapsed, server_metrics(before, after))
+    print()
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\n报告已写入 {args.output}")
+    return 1 if report['summary']['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
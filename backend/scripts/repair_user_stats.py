@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+用户统计修复脚本
+
+为已有数据库创建 user_stat 表，并按用户ID分批由错题、收藏、完成进度明细重新计算统计，
+修复与明细不一致的统计行（例如删除题目时级联删除了错题、写操作与首次构建统计并发等情况）。
+尚未生成统计行的用户默认跳过（首次读取统计时自动构建），--create-missing 时一并创建。
+
+每批在一个事务中先锁定已有的统计行，再读取明细并写回，可以在线执行：
+并发的写操作会等待锁释放后在修复后的值上继续累加。
+
+用法:
+    python repair_user_stats.py                    # 建表并修复不一致的统计
+    python repair_user_stats.py --dry-run          # 只输出不一致的用户，不写入
+    python repair_user_stats.py --create-missing   # 同时为所有用户创建统计行
+    python repair_user_stats.py --batch-size 200   # 指定每批处理的用户数
+"""
+
+import os
+import sys
+import argparse
+
+# 添加父目录到路径以便导入后端模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+from sqlalchemy import inspect, text
+
+from mysql.pool import get_engine
+from services.user_stats import compute_user_stats, insert_user_stats, read_user_stats, stats_equal, user_stat_table
+
+# 加载环境变量
+load_dotenv()
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS user_stat (
+  user_id BIGINT NOT NULL,
+  mistake_count INT NOT NULL DEFAULT 0,
+  favorite_count INT NOT NULL DEFAULT 0,
+  done_count INT NOT NULL DEFAULT 0,
+  mistakes_by_type VARCHAR(512) NOT NULL DEFAULT '{}',
+  mistakes_by_month VARCHAR(512) NOT NULL DEFAULT '{}',
+  registered_at DATETIME DEFAULT NULL,
+  updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (user_id),
+  FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE
+)
+"""
+
+
+def ensure_table(engine):
+    """user_stat 表不存在时创建"""
+    if inspect(engine).has_table('user_stat'):
+        return False
+    with engine.begin() as conn:
+        conn.execute(text(CREATE_TABLE_SQL))
+    return True
+
+
+def repair(engine, batch_size=500, dry_run=False, create_missing=False):
+    """
+    按用户ID顺序分批修复统计
+
+    Args:
+        engine: 数据库引擎
+        batch_size: 每批处理的用户数
+        dry_run: 只统计不一致的用户，不写入
+        create_missing: 为没有统计行的用户创建统计行
+
+    Returns:
+        tuple: (检查的用户数, 修复的用户ID列表, 新建统计行的用户数)
+    """
+    select_users = text("SELECT id FROM user WHERE id > :last_id ORDER BY id LIMIT :limit")
+    target = user_stat_table()
+
+    checked = 0
+    repaired = []
+    created = 0
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            user_ids = [row.id for row in conn.execute(select_users, {'last_id': last_id, 'limit': batch_size})]
+            if not user_ids:
+                break
+            last_id = user_ids[-1]
+
+            # 先锁定已有的统计行，再读取明细
+            stored = read_user_stats(conn, target, user_ids, for_update=not dry_run)
+
+            writes = []
+            for user_id, stat in compute_user_stats(conn, user_ids).items():
+                current = stored.get(user_id)
+                if current is None:
+                    if create_missing:
+                        writes.append(stat)
+                        created += 1
+                elif not stats_equal(current, stat):
+                    # 注册时间沿用已保存的值
+                    stat['registered_at'] = current['registered_at'] or stat['registered_at']
+                    writes.append(stat)
+                    repaired.append(user_id)
+
+            if writes and not dry_run:
+                insert_user_stats(conn, target, writes, replace=True)
+            checked += len(user_ids)
+        print(f"  已处理到用户ID {last_id}，累计检查 {checked} 个用户，不一致 {len(repaired)} 个")
+
+    return checked, repaired, created
+
+
+def main():
+    parser = argparse.ArgumentParser(description='用户统计修复工具')
+    parser.add_argument('--batch-size', type=int, default=500, help='每批处理的用户数 (默认: 500)')
+    parser.add_argument('--dry-run', action='store_true', help='只输出不一致的用户，不写入')
+    parser.add_argument('--create-missing', action='store_true', help='为没有统计行的用户创建统计行')
+
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("用户统计修复工具")
+    print("=" * 60)
+
+    engine = get_engine()
+    if not args.dry_run and ensure_table(engine):
+        print("✓ 已创建 user_stat 表")
+
+    checked, repaired, created = repair(engine, args.batch_size, args.dry_run, args.create_missing)
+    action = '发现' if args.dry_run else '修复'
+    print(f"✓ 检查 {checked} 个用户，{action} {len(repaired)} 个不一致的统计，新建 {created} 个")
+    if repaired:
+        print(f"  用户ID: {', '.join(str(user_id) for user_id in repaired[:50])}"
+              + (f" ... 其余 {len(repaired) - 50} 个省略" if len(repaired) > 50 else ''))
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+用户已答题目集合模块
+每个用户的已答题目ID保存为按 16 位分块的压缩位图，
+从 user_topic_progress 懒加载，记录完成进度时同步更新。
+题目列表排除已答题目时在内存中按目录顺序扫描，不再执行 NOT IN 子查询
+"""
+
+import bisect
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+# 单个分块内使用有序数组保存的最大元素数，超过后转换为位图（8KB）
+ARRAY_CONTAINER_LIMIT = 4096
+BITMAP_CONTAINER_BYTES = 1 << 13
+
+
+class TopicBitmap(object):
+    """
+    题目ID压缩位图
+
+    ID 按高 16 位分块：元素较少的分块保存为有序的 16 位整数数组，
+    元素较多的分块保存为 8KB 位图。题目ID基本连续，普通用户的已答题目只占少量内存
+    """
+
+    def __init__(self, values=()):
+        self._containers = {}
+        self._size = 0
+        for value in values:
+            self.add(value)
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, value):
+        container = self._containers.get(value >> 16)
+        if container is None:
+            return False
+        low = value & 0xFFFF
+        if isinstance(container, bytearray):
+            return bool(container[low >> 3] & (1 << (low & 7)))
+        index = bisect.bisect_left(container, low)
+        return index < len(container) and container[index] == low
+
+    def __iter__(self):
+        for key in sorted(self._containers):
+            high = key << 16
+            container = self._containers[key]
+            if isinstance(container, bytearray):
+                for index, byte in enumerate(container):
+                    if not byte:
+                        continue
+                    for bit in range(8):
+                        if byte & (1 << bit):
+                            yield high | (index << 3) | bit
+            else:
+                for low in container:
+                    yield high | low
+
+    def add(self, value):
+        """
+        添加题目ID
+
+        Args:
+            value: 非负整数题目ID
+
+        Returns:
+            bool: 是否为新增元素
+        """
+        key = value >> 16
+        low = value & 0xFFFF
+        container = self._containers.get(key)
+        if container is None:
+            container = self._containers[key] = array('H')
+
+        if isinstance(container, bytearray):
+            mask = 1 << (low & 7)
+            if container[low >> 3] & mask:
+                return False
+            container[low >> 3] |= mask
+        else:
+            index = bisect.bisect_left(container, low)
+            if index < len(container) and container[index] == low:
+                return False
+            container.insert(index, low)
+            if len(container) > ARRAY_CONTAINER_LIMIT:
+                self._containers[key] = self._to_bitmap(container)
+
+        self._size += 1
+        return True
+
+    @staticmethod
+    def _to_bitmap(container):
+        bitmap = bytearray(BITMAP_CONTAINER_BYTES)
+        for low in container:
+            bitmap[low >> 3] |= 1 << (low & 7)
+        return bitmap
+
+
+class AnsweredSetCache(object):
+    """
+    按用户缓存已答题目位图
+
+    使用 LRU 限制缓存的用户数，条目超过 ttl 后重新加载，
+    以便感知其他 worker 写入的进度
+    """
+
+    def __init__(self, loader, max_users=1024, ttl=60):
+        """
+        Args:
+            loader: 接收 user_id、返回该用户已答题目ID可迭代对象的函数，需要在应用上下文中调用
+            max_users: 最多缓存的用户数
+            ttl: 单个用户位图的有效期（秒）
+        """
+        self._loader = loader
+        self._max_users = max_users
+        self._ttl = ttl
+        self._entries = OrderedDict()
+        # 正在加载的用户，加载期间写入的题目ID暂存在这里，加载完成后合并
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        """
+        获取用户的已答题目位图，缓存未命中或过期时从数据库加载
+
+        Args:
+            user_id: 用户ID
+
+        Returns:
+            TopicBitmap: 已答题目位图，调用方不能修改
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and time.monotonic() - entry[0] < self._ttl:
+                self._entries.move_to_end(user_id)
+                return entry[1]
+            pending = self._loading.setdefault(user_id, set())
+
+        # 查询数据库时不持有锁，避免阻塞其他用户的请求
+        try:
+            bitmap = TopicBitmap(self._loader(user_id))
+        except Exception:
+            with self._lock:
+                self._loading.pop(user_id, None)
+            raise
+
+        with self._lock:
+            for topic_id in pending:
+                bitmap.add(topic_id)
+            if self._loading.get(user_id) is pending:
+                del self._loading[user_id]
+            self._entries[user_id] = (time.monotonic(), bitmap)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self._max_users:
+                self._entries.popitem(last=False)
+        return bitmap
+
+    def add(self, user_id, topic_ids):
+        """
+        记录用户新完成的题目，只更新已缓存或正在加载的用户
+
+        Args:
+            user_id: 用户ID
+            topic_ids: 题目ID可迭代对象
+        """
+        topic_ids = list(topic_ids)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                for topic_id in topic_ids:
+                    entry[1].add(topic_id)
+            pending = self._loading.get(user_id)
+            if pending is not None:
+                pending.update(topic_ids)
+
+    def invalidate(self, user_id=None):
+        """
+        移除缓存，下一次读取时重新加载
+
+        Args:
+            user_id: 用户ID，为空时清空全部用户
+        """
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
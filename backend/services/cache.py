@@ -0,0 +1,100 @@
+"""
+进程内缓存工具
+提供按时间自动过期、可手动失效、可随版本号刷新的缓存值，供题目相关的只读数据复用
+"""
+
+import threading
+import time
+
+
+class VersionTracker(object):
+    """
+    版本号跟踪器
+
+    多个 gunicorn worker 通过数据库中的版本号感知题库变更，
+    为避免每次请求都查询数据库，版本号在 check_interval 秒内只读取一次；loader 抛出异常时保留上次的版本号
+    """
+
+    def __init__(self, loader, check_interval=5):
+        """
+        Args:
+            loader: 读取当前版本号的函数
+            check_interval: 两次读取之间的最小间隔（秒）
+        """
+        self._loader = loader
+        self._check_interval = check_interval
+        self._version = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        """获取当前版本号，距离上次读取超过 check_interval 时重新读取"""
+        checked_at = self._checked_at
+        if checked_at is not None and time.monotonic() - checked_at < self._check_interval:
+            return self._version
+
+        with self._lock:
+            checked_at = self._checked_at
+            if checked_at is None or time.monotonic() - checked_at >= self._check_interval:
+                try:
+                    self._version = self._loader()
+                except Exception:
+                    # 读取失败时保留上次的版本号，缓存不会因为版本号变化而整体重新加载；
+                    # 同样间隔 check_interval 后再重试
+                    pass
+                self._checked_at = time.monotonic()
+            return self._version
+
+    def invalidate(self):
+        """下一次读取时立即重新获取版本号"""
+        self._checked_at = None
+
+
+class CachedValue(object):
+    """
+    定期刷新的缓存值
+
+    首次读取、过期或版本号变化后调用 loader 重新加载，
+    同一时刻只有一个线程执行加载，其他线程复用加载结果
+    """
+
+    def __init__(self, loader, ttl=300, version=None):
+        """
+        Args:
+            loader: 无参加载函数，返回需要缓存的值
+            ttl: 缓存有效期（秒）
+            version: 可选，返回当前版本号的函数；版本号变化时缓存失效
+        """
+        self._loader = loader
+        self._ttl = ttl
+        self._version = version
+        self._value = None
+        self._loaded_at = None
+        self._loaded_version = None
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, version):
+        loaded_at = self._loaded_at
+        return (
+            loaded_at is not None
+            and time.monotonic() - loaded_at < self._ttl
+            and version == self._loaded_version
+        )
+
+    def get(self):
+        """获取缓存值，过期或版本变化时重新加载"""
+        version = self._version() if self._version is not None else None
+        if self._is_fresh(version):
+            return self._value
+
+        with self._lock:
+            # 其他线程可能已经完成刷新
+            if not self._is_fresh(version):
+                self._value = self._loader()
+                self._loaded_at = time.monotonic()
+                self._loaded_version = version
+            return self._value
+
+    def invalidate(self):
+        """标记缓存失效，下一次读取时重新加载"""
+        self._loaded_at = None
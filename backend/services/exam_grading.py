@@ -0,0 +1,76 @@
+"""
+考试判分模块
+根据题目目录中缓存的标准答案在服务端判分，不再信任客户端提交的 score、correctCount 和 isCorrect
+"""
+
+import string
+
+
+def normalize_answer(value):
+    """
+    规范化答案：提取选项字母，大写、去重并排序
+
+    客户端可能提交 "AB"、"a,b"、["A", "B"] 或 {"A": true, "B": false}（选项到是否选中的映射，只取选中的选项）
+
+    Args:
+        value: 用户答案或标准答案
+
+    Returns:
+        str: 规范化后的答案，例如 "AB"，无有效选项时返回空字符串
+    """
+    if value is None:
+        return ''
+    if isinstance(value, dict):
+        value = ''.join(str(key) for key, selected in value.items() if selected)
+    elif isinstance(value, (list, tuple)):
+        value = ''.join(str(item) for item in value)
+    letters = {char for char in str(value).upper() if char in string.ascii_uppercase}
+    return ''.join(sorted(letters))
+
+
+def calculate_score(correct_count, total_questions):
+    """按百分制计算得分，四舍五入（与小程序端的计算方式一致）"""
+    if total_questions <= 0:
+        return 0
+    return int(correct_count * 100 / total_questions + 0.5)
+
+
+def grade_exam(details, records):
+    """
+    对答题详情判分
+
+    同一道题提交多次时以最后一次为准；题目不存在的详情被忽略
+
+    Args:
+        details: 客户端提交的答题详情列表，元素包含 topicId、userAnswer
+        records: 题目ID到题目记录（TopicRecord）的映射
+
+    Returns:
+        tuple: (判分结果列表, 忽略的详情数)；判分结果元素为
+            {'topicId', 'month', 'userAnswer', 'isCorrect', 'answer'}，按题目首次出现的顺序排列
+    """
+    graded = {}
+    ignored = 0
+    for detail in details:
+        try:
+            topic_id = int(detail.get('topicId'))
+        except (AttributeError, ValueError, TypeError):
+            ignored += 1
+            continue
+        record = records.get(topic_id)
+        if record is None:
+            ignored += 1
+            continue
+        if topic_id in graded:
+            ignored += 1
+        user_answer = normalize_answer(detail.get('userAnswer'))
+        answer = normalize_answer(record.answer)
+        graded[topic_id] = {
+            'topicId': topic_id,
+            'month': record.month,
+            'userAnswer': user_answer,
+            # 题目没有标准答案时判为错误（空答案由调用方拒绝）
+            'isCorrect': bool(user_answer) and user_answer == answer,
+            'answer': record.answer
+        }
+    return list(graded.values()), ignored
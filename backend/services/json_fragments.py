@@ -0,0 +1,144 @@
+"""
+预序列化 JSON 响应模块
+题目等只读数据在缓存中保存已序列化的 JSON 片段（RawJSON），生成响应时直接拼接到输出中，
+不再对每道题目重复编码。FragmentJSONProvider 通过 app.json 替换 Flask 默认的 JSON provider，
+输出与 jsonify 逐字节一致（键排序、紧凑分隔符、非 ASCII 字符转义）
+"""
+
+import json
+from json.encoder import encode_basestring_ascii
+
+from flask.json.provider import DefaultJSONProvider
+
+COMPACT_SEPARATORS = (',', ':')
+
+
+class RawJSON(object):
+    """已序列化的 JSON 文本，编码时原样输出"""
+
+    __slots__ = ('text',)
+
+    def __init__(self, text):
+        self.text = text
+
+    def __repr__(self):
+        return f'RawJSON({self.text!r})'
+
+
+def dumps_value(value):
+    """按 jsonify 的格式序列化单个值（用于预先生成片段）"""
+    return json.dumps(value, ensure_ascii=True, sort_keys=True, separators=COMPACT_SEPARATORS)
+
+
+def build_object(members):
+    """
+    由已序列化的成员拼接 JSON 对象
+
+    Args:
+        members: (键, 已序列化的值) 的可迭代对象
+
+    Returns:
+        RawJSON: 按键排序的 JSON 对象
+    """
+    return RawJSON('{' + ','.join(
+        encode_basestring_ascii(key) + ':' + text for key, text in sorted(members)
+    ) + '}')
+
+
+def _float_repr(value):
+    # 与 json 模块的处理一致
+    if value != value:
+        return 'NaN'
+    if value == float('inf'):
+        return 'Infinity'
+    if value == -float('inf'):
+        return '-Infinity'
+    return float.__repr__(value)
+
+
+def encode_compact(obj, fallback):
+    """
+    紧凑格式序列化，遇到 RawJSON 时直接拼接
+
+    容器在 Python 中遍历，字符串使用 json 模块的 C 实现转义；
+    其他类型（日期、非字符串键的字典等）交给 fallback 处理
+
+    Args:
+        obj: 要序列化的对象
+        fallback: 接收单个值、返回其 JSON 文本的函数
+
+    Returns:
+        str: JSON 文本
+    """
+    parts = []
+    append = parts.append
+
+    def encode(value):
+        value_type = type(value)
+        if value_type is RawJSON:
+            append(value.text)
+        elif value_type is str:
+            append(encode_basestring_ascii(value))
+        elif value is None:
+            append('null')
+        elif value is True:
+            append('true')
+        elif value is False:
+            append('false')
+        elif value_type is int:
+            append(int.__repr__(value))
+        elif value_type is float:
+            append(_float_repr(value))
+        elif value_type is dict:
+            if not all(type(key) is str for key in value):
+                append(fallback(value))
+                return
+            append('{')
+            first = True
+            for key in sorted(value):
+                if first:
+                    first = False
+                else:
+                    append(',')
+                append(encode_basestring_ascii(key))
+                append(':')
+                encode(value[key])
+            append('}')
+        elif value_type is list or value_type is tuple:
+            append('[')
+            first = True
+            for item in value:
+                if first:
+                    first = False
+                else:
+                    append(',')
+                encode(item)
+            append(']')
+        else:
+            append(fallback(value))
+
+    encode(obj)
+    return ''.join(parts)
+
+
+class FragmentJSONProvider(DefaultJSONProvider):
+    """
+    支持 RawJSON 片段的 JSON provider
+
+    紧凑格式（生产环境的 jsonify）使用 encode_compact 拼接片段；
+    其他格式（调试模式缩进输出、自定义参数）回退到标准库，片段先解析再重新编码
+    """
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, RawJSON):
+            return json.loads(o.text)
+        return DefaultJSONProvider.default(o)
+
+    def _fallback(self, value):
+        return super().dumps(value, separators=COMPACT_SEPARATORS)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs == {'separators': COMPACT_SEPARATORS} and self.ensure_ascii and self.sort_keys:
+            return encode_compact(obj, self._fallback)
+        return super().dumps(obj, **kwargs)
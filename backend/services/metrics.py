@@ -0,0 +1,323 @@
+"""
+指标汇总模块
+按名称和标签累计计数器与直方图，以 Prometheus 文本格式输出，不依赖 Flask
+
+gunicorn 的每个 worker 进程各自累计指标，采集请求只会落到其中一个 worker。
+设置共享目录后，每个进程定期把自己的指标快照写入目录下的独立文件，输出时合并所有文件：
+- 计数器和直方图求和，已退出的 worker 的文件保留，合并后的计数不会因 worker 重启而减少
+- 仪表盘（例如已取出的数据库连接数）只合并存活的 worker，worker 退出时由 mark_process_dead 删除
+- 文件名包含进程号和启动时间，进程号被复用时不会覆盖已退出 worker 的计数
+- start_background_flush 启动后台线程按间隔写入，空闲的 worker 和正常退出的 worker 也会写出最后的指标
+"""
+
+import atexit
+import json
+import math
+import os
+import threading
+import time
+
+COUNTER = 'counter'
+GAUGE = 'gauge'
+HISTOGRAM = 'histogram'
+
+FILE_SUFFIX = '.json'
+
+
+def _label_key(labels):
+    return tuple(sorted((str(key), str(value)) for key, value in labels.items()))
+
+
+class MetricsRegistry(object):
+    """
+    进程内的指标注册表
+
+    计数器和直方图由请求钩子在处理过程中累计；连接池、缓存等已有统计通过 add_collector 注册的函数
+    在写快照时读取，收集函数返回 (名称, 类型, 说明, 标签字典, 值) 元组的列表
+    """
+
+    def __init__(self, directory=None, flush_interval=5):
+        """
+        Args:
+            directory: 多进程共享目录，为空时只输出当前进程的指标
+            flush_interval: 两次写入快照文件的最小间隔（秒）
+        """
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._meta = {}
+        self._collectors = []
+        self._background = False
+        self._reset()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # fork 出的子进程从空的指标开始，不重复计算父进程的数据
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._pid = os.getpid()
+        self._file_name = f'{self._pid}-{int(time.time() * 1000)}{FILE_SUFFIX}'
+        self._last_flush = 0.0
+
+    def _after_fork(self):
+        self._reset()
+        # 子进程中没有父进程的后台线程
+        if self._background:
+            self._start_flush_thread()
+
+    def start_background_flush(self):
+        """启动后台线程每隔 flush_interval 秒写入快照，并在进程退出时再写入一次"""
+        if not self.directory or self._background:
+            return
+        self._background = True
+        self._start_flush_thread()
+        atexit.register(self._flush_quietly)
+
+    def _start_flush_thread(self):
+        threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True).start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(max(self.flush_interval, 0.1))
+            try:
+                self._flush_quietly()
+            except Exception:
+                # 收集函数出错时跳过本次写入，线程继续运行
+                continue
+
+    def _flush_quietly(self):
+        try:
+            self.flush(force=True)
+        except OSError:
+            # 共享目录被删除等情况下不影响请求处理
+            pass
+
+    def describe(self, name, kind, help_text, buckets=None):
+        """
+        登记指标的类型和说明
+
+        Args:
+            name: 指标名称
+            kind: counter / gauge / histogram
+            help_text: 说明
+            buckets: 直方图的桶上界（递增，不含 +Inf）
+        """
+        self._meta[name] = [kind, help_text, list(buckets) if buckets else None]
+
+    def add_collector(self, collector):
+        """注册写快照时调用的收集函数"""
+        self._collectors.append(collector)
+
+    def inc(self, name, labels, value=1):
+        """计数器累加"""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        """直方图记录一个观测值"""
+        buckets = self._meta[name][2]
+        key = (name, _label_key(labels))
+        # 桶按上界顺序查找，最后一个为 +Inf
+        index = len(buckets)
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            entry = self._histograms.get(key)
+            if entry is None:
+                entry = self._histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def snapshot(self):
+        """
+        当前进程的指标快照
+
+        Returns:
+            dict: meta 为指标类型和说明，counters/gauges 为 [名称, 标签, 值]，
+            histograms 为 [名称, 标签, 各桶计数, 总和, 次数]
+        """
+        with self._lock:
+            counters = [[name, labels, value] for (name, labels), value in self._counters.items()]
+            histograms = [
+                [name, labels, list(buckets), total, count]
+                for (name, labels), (buckets, total, count) in self._histograms.items()
+            ]
+        meta = dict(self._meta)
+        gauges = []
+        for collector in self._collectors:
+            for name, kind, help_text, labels, value in collector():
+                meta.setdefault(name, [kind, help_text, None])
+                samples = gauges if kind == GAUGE else counters
+                samples.append([name, _label_key(labels), value])
+        return {
+            'pid': self._pid,
+            'meta': meta,
+            'counters': counters,
+            'gauges': gauges,
+            'histograms': histograms
+        }
+
+    def flush(self, force=False):
+        """
+        写入当前进程的快照文件（先写临时文件再替换，读取方不会读到写了一半的文件）
+
+        Args:
+            force: 忽略最小间隔立即写入
+        """
+        if not self.directory:
+            return False
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return False
+        self._last_flush = now
+        # 先生成快照再打开文件，收集函数出错时不留下空的临时文件
+        content = json.dumps(self.snapshot(), separators=(',', ':'))
+        path = os.path.join(self.directory, self._file_name)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        return True
+
+    def collect(self):
+        """合并所有进程的快照；未设置共享目录时返回当前进程的快照"""
+        if not self.directory:
+            return merge_snapshots([self.snapshot()])
+        self.flush(force=True)
+        return merge_snapshots(read_snapshots(self.directory))
+
+    def render(self):
+        """输出 Prometheus 文本格式"""
+        return render_prometheus(self.collect())
+
+
+def read_snapshots(directory):
+    """读取目录下所有进程的快照文件，跳过无法解析的文件"""
+    snapshots = []
+    for file_name in sorted(os.listdir(directory)):
+        if not file_name.endswith(FILE_SUFFIX):
+            continue
+        try:
+            with open(os.path.join(directory, file_name)) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def merge_snapshots(snapshots):
+    """
+    合并多个进程的快照：同名同标签的计数器、仪表盘、直方图求和
+
+    Returns:
+        dict: {'meta': ..., 'samples': {名称: {标签元组: 值或 [各桶计数, 总和, 次数]}}}
+    """
+    meta = {}
+    samples = {}
+    for snapshot in snapshots:
+        meta.update(snapshot['meta'])
+        for name, labels, value in snapshot['counters'] + snapshot['gauges']:
+            series = samples.setdefault(name, {})
+            key = tuple(tuple(pair) for pair in labels)
+            series[key] = series.get(key, 0) + value
+        for name, labels, buckets, total, count in snapshot['histograms']:
+            series = samples.setdefault(name, {})
+            key = tuple(tuple(pair) for pair in labels)
+            entry = series.get(key)
+            if entry is None or len(entry[0]) != len(buckets):
+                series[key] = [list(buckets), total, count]
+            else:
+                entry[0] = [a + b for a, b in zip(entry[0], buckets)]
+                entry[1] += total
+                entry[2] += count
+    return {'meta': meta, 'samples': samples}
+
+
+def mark_process_dead(directory, pid):
+    """
+    worker 退出后删除其快照中的仪表盘，计数器和直方图保留（gunicorn child_exit 钩子调用）
+    """
+    prefix = f'{pid}-'
+    for file_name in os.listdir(directory):
+        if not (file_name.startswith(prefix) and file_name.endswith(FILE_SUFFIX)):
+            continue
+        path = os.path.join(directory, file_name)
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        snapshot['gauges'] = []
+        tmp_path = f'{path}.dead.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+
+def clear_directory(directory):
+    """删除上次运行留下的快照文件（gunicorn 主进程启动时调用）"""
+    os.makedirs(directory, exist_ok=True)
+    for file_name in os.listdir(directory):
+        if file_name.endswith(FILE_SUFFIX) or file_name.endswith('.tmp'):
+            os.remove(os.path.join(directory, file_name))
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        if value.is_integer():
+            return str(int(value))
+        return repr(value)
+    return str(value)
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+def render_prometheus(merged):
+    """
+    按 Prometheus 文本格式（version 0.0.4）输出合并后的指标
+
+    Args:
+        merged: merge_snapshots 的返回值
+
+    Returns:
+        str: 文本
+    """
+    lines = []
+    for name in sorted(merged['samples']):
+        kind, help_text, buckets = merged['meta'].get(name, (GAUGE, '', None))
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        series = merged['samples'][name]
+        for labels in sorted(series):
+            value = series[labels]
+            if kind != HISTOGRAM:
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + [float('inf')], counts):
+                cumulative += bucket_count
+                le = (('le', _format_value(float(bound))),)
+                lines.append(f'{name}_bucket{_format_labels(labels, le)} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(float(total))}')
+            lines.append(f'{name}_count{_format_labels(labels)} {count}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,92 @@
+"""
+错题次数统计模块
+user_mistake_stat 表按 (用户, 题目) 保存答错次数和最近答错时间，
+考试提交和添加错题时增量更新，错题本按错误次数排序时走 (user_id, wrong_count, topic_id) 索引，
+无需每次请求聚合 exam_detail
+"""
+
+from sqlalchemy import column, func, table
+from sqlalchemy.dialects import mysql, sqlite
+
+STAT_COLUMNS = ('user_id', 'topic_id', 'wrong_count', 'last_wrong_at')
+
+
+def mistake_stat_table(name='user_mistake_stat'):
+    """构建轻量表对象，供不依赖 app.py 模型的脚本使用"""
+    return table(name, *[column(name) for name in STAT_COLUMNS])
+
+
+def _dialect_name(conn):
+    return conn.get_bind().dialect.name if hasattr(conn, 'get_bind') else conn.dialect.name
+
+
+def _upsert_statement(conn, target, rows, merge):
+    """
+    构建 INSERT ... ON DUPLICATE KEY UPDATE（SQLite 为 ON CONFLICT DO UPDATE）
+
+    merge(current, incoming) 返回 (wrong_count, last_wrong_at) 的更新表达式
+    """
+    dialect = _dialect_name(conn)
+    if dialect == 'mysql':
+        stmt = mysql.insert(target).values(rows)
+        wrong_count, last_wrong_at = merge(target.c, stmt.inserted, func.greatest)
+        return stmt.on_duplicate_key_update(wrong_count=wrong_count, last_wrong_at=last_wrong_at)
+    if dialect == 'sqlite':
+        stmt = sqlite.insert(target).values(rows)
+        wrong_count, last_wrong_at = merge(target.c, stmt.excluded, func.max)
+        return stmt.on_conflict_do_update(
+            index_elements=['user_id', 'topic_id'],
+            set_={'wrong_count': wrong_count, 'last_wrong_at': last_wrong_at}
+        )
+    raise ValueError(f'不支持的数据库类型: {dialect}')
+
+
+def _latest(current, incoming, greatest):
+    # 任一时间为空时取另一个
+    return greatest(
+        func.coalesce(current.last_wrong_at, incoming.last_wrong_at),
+        func.coalesce(incoming.last_wrong_at, current.last_wrong_at)
+    )
+
+
+def increment_mistake_stats(conn, target, user_id, topic_ids, wrong_at):
+    """
+    答错次数加一并更新最近答错时间，一条多行 upsert 语句。调用方负责提交事务
+
+    Args:
+        conn: SQLAlchemy Connection 或 Session
+        target: user_mistake_stat 表对象
+        user_id: 用户ID
+        topic_ids: 答错的题目ID序列（同一题目只能出现一次）
+        wrong_at: 答错时间
+    """
+    rows = [
+        {'user_id': user_id, 'topic_id': topic_id, 'wrong_count': 1, 'last_wrong_at': wrong_at}
+        for topic_id in topic_ids
+    ]
+    if not rows:
+        return
+
+    def merge(current, incoming, greatest):
+        return current.wrong_count + incoming.wrong_count, _latest(current, incoming, greatest)
+
+    conn.execute(_upsert_statement(conn, target, rows, merge))
+
+
+def merge_mistake_stats(conn, target, rows):
+    """
+    写入回填计算出的统计值，已存在的记录取较大值（可重复执行，不会覆盖上线后的增量更新）。
+    调用方负责提交事务
+
+    Args:
+        conn: SQLAlchemy Connection 或 Session
+        target: user_mistake_stat 表对象
+        rows: 字典列表，键为 STAT_COLUMNS
+    """
+    if not rows:
+        return
+
+    def merge(current, incoming, greatest):
+        return greatest(current.wrong_count, incoming.wrong_count), _latest(current, incoming, greatest)
+
+    conn.execute(_upsert_statement(conn, target, rows, merge))
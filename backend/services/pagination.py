@@ -0,0 +1,87 @@
+"""
+游标分页工具
+游标为不透明的 URL 安全字符串，内部保存上一页最后一条记录的排序键，
+下一页通过 WHERE 排序键 < 游标值 定位，查询代价与翻页深度无关
+"""
+
+import base64
+import binascii
+import datetime
+import json
+
+# 游标分页单页最大条数
+MAX_CURSOR_PAGE_SIZE = 100
+
+
+def encode_cursor(values):
+    """
+    将排序键编码为游标
+
+    Args:
+        values: 排序键列表，元素为整数、字符串或 datetime
+
+    Returns:
+        str: URL 安全的游标字符串
+    """
+    payload = [value.isoformat() if isinstance(value, datetime.datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, length):
+    """
+    解析游标
+
+    Args:
+        cursor: encode_cursor 生成的游标字符串
+        length: 排序键数量
+
+    Returns:
+        list: 排序键列表
+
+    Raises:
+        ValueError: 游标格式错误
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError, UnicodeError, binascii.Error):
+        raise ValueError('无效的分页游标')
+    if not isinstance(values, list) or len(values) != length:
+        raise ValueError('无效的分页游标')
+    return values
+
+
+def parse_cursor_time(value):
+    """解析游标中的时间排序键"""
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except (ValueError, TypeError):
+        raise ValueError('无效的分页游标')
+
+
+def parse_cursor_id(value):
+    """解析游标中的ID排序键"""
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise ValueError('无效的分页游标')
+    return value
+
+
+def clamp_page_size(size):
+    """限制游标分页的单页条数"""
+    return max(1, min(size, MAX_CURSOR_PAGE_SIZE))
+
+
+def fetch_keyset_page(query, size):
+    """
+    查询一页数据，多取一条用于判断是否还有下一页
+
+    Args:
+        query: 已按排序键排序并附加游标条件的查询
+        size: 单页条数
+
+    Returns:
+        tuple: (当前页的行列表, 是否还有下一页)
+    """
+    rows = query.limit(size + 1).all()
+    return rows[:size], len(rows) > size
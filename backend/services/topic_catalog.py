@@ -0,0 +1,201 @@
+"""
+题目目录缓存模块
+题库数据量小、读多写少，只会通过批量导入接口或 extractPDF.py 变更。
+每个 worker 在内存中保存全部题目的不可变记录，options 预先解析，
+公共响应字段预先序列化，接口按ID直接查找，无需每次请求查询、解码并重新编码题目
+"""
+
+import bisect
+import json
+from array import array
+
+from services.cache import CachedValue
+from services.json_fragments import build_object, dumps_value
+
+# 题目在接口响应中的公共字段
+ITEM_FIELDS = ('id', 'content', 'type', 'options', 'answer', 'analysis', 'month', 'region')
+
+
+def decode_options(options):
+    """解析数据库中 JSON 格式存储的选项"""
+    if not options:
+        return []
+    return json.loads(options)
+
+
+class TopicRecord(object):
+    """
+    不可变的题目记录
+
+    item 为接口响应使用的公共字段字典，encoded 为每个字段值的序列化结果
+    （与 jsonify 输出格式一致：键排序、紧凑分隔符、ASCII 转义），
+    fragment() 由 encoded 拼接出响应中的题目片段，相同字段组合的片段只生成一次。
+    options 与 item 由所有请求共享，调用方不能修改
+    """
+
+    __slots__ = (
+        'id', 'content', 'type_id', 'options', 'answer', 'analysis',
+        'category_id', 'region', 'month', 'created_at', 'item', 'encoded', 'fragments'
+    )
+
+    def __init__(self, id, content, type_id, options, answer, analysis,
+                 category_id=None, region=None, month=None, created_at=None):
+        options = decode_options(options)
+        item = {
+            'id': id,
+            'content': content,
+            'type': type_id,
+            'options': options,
+            'answer': answer,
+            'analysis': analysis,
+            'month': month,
+            'region': region
+        }
+        values = (
+            ('id', id), ('content', content), ('type_id', type_id), ('options', options),
+            ('answer', answer), ('analysis', analysis), ('category_id', category_id),
+            ('region', region), ('month', month), ('created_at', created_at), ('item', item),
+            ('encoded', {field: dumps_value(value) for field, value in item.items()}),
+            # 按字段组合缓存的片段，接口使用的字段组合是固定的几种
+            ('fragments', {})
+        )
+        for name, value in values:
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('TopicRecord is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('TopicRecord is immutable')
+
+    def pick(self, fields):
+        """
+        按字段名构建新的响应字典
+
+        Args:
+            fields: ITEM_FIELDS 中的字段名序列
+
+        Returns:
+            dict: 新的字典，可以继续添加接口特有的字段
+        """
+        item = self.item
+        return {field: item[field] for field in fields}
+
+    def fragment(self, fields, extra=None):
+        """
+        获取题目的预序列化片段，结果与 jsonify(record.pick(fields) + extra) 的输出一致
+
+        Args:
+            fields: ITEM_FIELDS 中的字段名元组
+            extra: 可选，接口特有的附加字段字典（例如 createdAt），附加字段的片段不缓存
+
+        Returns:
+            RawJSON: 题目对象的 JSON 片段
+        """
+        encoded = self.encoded
+        if extra is None:
+            fragment = self.fragments.get(fields)
+            if fragment is None:
+                fragment = self.fragments[fields] = build_object((field, encoded[field]) for field in fields)
+            return fragment
+        members = [(field, encoded[field]) for field in fields]
+        members.extend((key, dumps_value(value)) for key, value in extra.items())
+        return build_object(members)
+
+
+class TopicCatalog(object):
+    """
+    进程内题目目录
+
+    loader 返回题目行的可迭代对象，每行字段顺序与 TopicRecord 构造参数一致。
+    传入 version 时，题库版本号变化后自动重新加载
+    """
+
+    def __init__(self, loader, ttl=300, version=None):
+        """
+        Args:
+            loader: 加载全部题目的函数，需要在应用上下文中调用
+            ttl: 缓存有效期（秒）
+            version: 可选，返回题库版本号的函数
+        """
+        self._loader = loader
+        self._cache = CachedValue(self._load, ttl=ttl, version=version)
+
+    def _load(self):
+        records = {}
+        # 按 (题型, 月份, 地区) 统计题目数量，用于不查询数据库直接得到筛选后的总数
+        facets = {}
+        for row in self._loader():
+            record = TopicRecord(*row)
+            records[record.id] = record
+            key = (record.type_id, record.month, record.region)
+            facets[key] = facets.get(key, 0) + 1
+        # 升序排列的题目ID，用于按ID倒序扫描
+        ordered_ids = array('l', sorted(records))
+        return records, facets, ordered_ids
+
+    def invalidate(self):
+        """标记缓存失效，下一次读取时重新加载"""
+        self._cache.invalidate()
+
+    def get(self, topic_id):
+        """按ID获取题目记录，不存在时返回 None"""
+        records = self._cache.get()[0]
+        return records.get(topic_id)
+
+    def get_many(self, topic_ids):
+        """
+        批量获取题目记录
+
+        Args:
+            topic_ids: 题目ID序列
+
+        Returns:
+            dict: 题目ID到记录的映射，只包含目录中存在的题目
+        """
+        records = self._cache.get()[0]
+        return {topic_id: records[topic_id] for topic_id in topic_ids if topic_id in records}
+
+    def records(self):
+        """返回全部题目记录"""
+        records = self._cache.get()[0]
+        return records.values()
+
+    def count(self, type_id=None, month=None, region=None):
+        """
+        统计符合筛选条件的题目数量，条件为空时不参与筛选
+
+        Args:
+            type_id: 题型
+            month: 月份
+            region: 地区
+
+        Returns:
+            int: 题目数量
+        """
+        facets = self._cache.get()[1]
+        total = 0
+        for (facet_type, facet_month, facet_region), count in facets.items():
+            if type_id and facet_type != type_id:
+                continue
+            if month and facet_month != month:
+                continue
+            if region and facet_region != region:
+                continue
+            total += count
+        return total
+
+    def iter_desc(self, before_id=None):
+        """
+        按ID倒序遍历题目记录，与题目列表接口的排序一致
+
+        Args:
+            before_id: 可选，只遍历ID小于该值的题目（游标分页）
+
+        Returns:
+            generator: 题目记录
+        """
+        records, _, ordered_ids = self._cache.get()
+        index = len(ordered_ids) if before_id is None else bisect.bisect_left(ordered_ids, before_id)
+        for position in range(index - 1, -1, -1):
+            yield records[ordered_ids[position]]
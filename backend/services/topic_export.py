@@ -0,0 +1,109 @@
+"""
+题目流式导出模块
+通过服务端游标分批读取题目，逐块生成 NDJSON 或 JSON 响应体，可选 gzip 压缩，
+导出过程中内存占用与题目总数无关
+"""
+
+import json
+import zlib
+
+from services.topic_catalog import decode_options
+
+# 导出的题目列，顺序与 export_item 的参数一致
+EXPORT_FIELDS = (
+    'id', 'content', 'type_id', 'options', 'answer', 'analysis',
+    'category_id', 'region', 'month', 'created_at'
+)
+
+
+def export_item(row):
+    """
+    将题目行转换为备份格式的字典
+
+    Args:
+        row: 按 EXPORT_FIELDS 顺序包含题目字段的行
+
+    Returns:
+        dict: 备份数据，options 已解析，created_at 格式化为字符串
+    """
+    item = dict(zip(EXPORT_FIELDS, row))
+    item['options'] = decode_options(item['options'])
+    created_at = item['created_at']
+    item['created_at'] = created_at.strftime('%Y-%m-%d %H:%M:%S') if created_at else None
+    return item
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def iter_ndjson(rows, chunk_size=500):
+    """
+    生成 NDJSON 响应体，每行一道题目
+
+    Args:
+        rows: 题目行的可迭代对象
+        chunk_size: 每次输出合并的行数
+
+    Returns:
+        generator: UTF-8 编码的数据块
+    """
+    lines = []
+    for row in rows:
+        lines.append(_dumps(export_item(row)))
+        if len(lines) >= chunk_size:
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+            lines = []
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def iter_json(rows, filename, chunk_size=500):
+    """
+    生成与原备份接口结构相同的 JSON 响应体，题目数组分块输出，总数在数组之后输出
+
+    Args:
+        rows: 题目行的可迭代对象
+        filename: 备份文件名
+        chunk_size: 每次输出合并的题目数
+
+    Returns:
+        generator: UTF-8 编码的数据块
+    """
+    yield ('{"code":0,"message":"备份成功","data":{"filename":%s,"topics":[' % _dumps(filename)).encode('utf-8')
+    total = 0
+    items = []
+    for row in rows:
+        items.append(_dumps(export_item(row)))
+        total += 1
+        if len(items) >= chunk_size:
+            # 第一块之后的数据块需要以逗号衔接
+            prefix = ',' if total > len(items) else ''
+            yield (prefix + ','.join(items)).encode('utf-8')
+            items = []
+    if items:
+        prefix = ',' if total > len(items) else ''
+        yield (prefix + ','.join(items)).encode('utf-8')
+    yield ('],"total":%d}}' % total).encode('utf-8')
+
+
+def gzip_chunks(chunks, level=6):
+    """
+    对数据块进行 gzip 流式压缩
+
+    每个输入块结束时执行 Z_SYNC_FLUSH，客户端可以边下载边解压，
+    中途断开时已收到的数据仍然可以解压
+
+    Args:
+        chunks: 字节串的可迭代对象
+        level: 压缩级别（1-9）
+
+    Returns:
+        generator: gzip 格式的数据块
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,118 @@
+"""
+题目批量导入模块
+题目按规范化内容的哈希去重：topic 表的 content_hash 列与 month 组成唯一索引 uk_content_month。
+导入时每批先按哈希查询已存在的题目，再用一条多行 INSERT ... ON DUPLICATE KEY UPDATE 写入新题目，
+代替逐条 WHERE content = ? 的全表扫描。后端批量导入接口和 questions/extractPDF.py 共用
+"""
+
+import hashlib
+
+from sqlalchemy import column, select, table
+from sqlalchemy.dialects import mysql, sqlite
+
+# 每条 INSERT 语句写入的最大题目数
+UPSERT_CHUNK_SIZE = 500
+
+# 导入写入的列
+TOPIC_IMPORT_COLUMNS = (
+    'content', 'content_hash', 'type_id', 'options', 'answer', 'analysis', 'category_id', 'region', 'month'
+)
+
+
+def normalize_content(content):
+    """规范化题干：合并连续空白，去除首尾空白"""
+    return ' '.join((content or '').split())
+
+
+def content_hash(content):
+    """
+    计算题干的去重哈希
+
+    Args:
+        content: 题干
+
+    Returns:
+        str: 规范化题干的 SHA-256 十六进制字符串（64 位）
+    """
+    return hashlib.sha256(normalize_content(content).encode('utf-8')).hexdigest()
+
+
+def topic_table(name='topic'):
+    """构建导入使用的轻量表对象，不依赖 app.py 的模型"""
+    return table(name, column('id'), *[column(name) for name in TOPIC_IMPORT_COLUMNS])
+
+
+def _insert_statement(conn, target, rows):
+    dialect = conn.get_bind().dialect.name if hasattr(conn, 'get_bind') else conn.dialect.name
+    if dialect == 'mysql':
+        stmt = mysql.insert(target).values(rows)
+        # 并发导入时被其他进程抢先写入的题目保持不变
+        return stmt.on_duplicate_key_update(id=target.c.id)
+    if dialect == 'sqlite':
+        return sqlite.insert(target).values(rows).on_conflict_do_nothing()
+    return target.insert().values(rows)
+
+
+def upsert_topics(conn, rows, table_name='topic', chunk_size=UPSERT_CHUNK_SIZE):
+    """
+    分批写入题目，已存在的题目（content_hash 与 month 相同）跳过
+
+    每批执行一条按哈希查询已存在题目的 SELECT 和一条多行 INSERT（在 SAVEPOINT 中执行）；
+    INSERT 失败时（例如某条数据超长）只回滚该批，再逐条重试，只跳过出错的题目。
+    调用方负责提交事务
+
+    Args:
+        conn: SQLAlchemy Connection 或 Session
+        rows: 题目字典列表，键为 TOPIC_IMPORT_COLUMNS 中除 content_hash 以外的列
+        table_name: 表名
+        chunk_size: 每批题目数
+
+    Returns:
+        dict: inserted（新增数）、duplicates（重复数）、failed（[(行下标, 错误信息)]）
+    """
+    target = topic_table(table_name)
+    inserted = 0
+    duplicates = 0
+    failed = []
+
+    for start in range(0, len(rows), chunk_size):
+        chunk = []
+        seen = set()
+        for offset, row in enumerate(rows[start:start + chunk_size]):
+            values = {name: row.get(name) for name in TOPIC_IMPORT_COLUMNS}
+            values['content_hash'] = content_hash(values['content'])
+            chunk.append((start + offset, values))
+
+        # 按哈希查询已存在的题目（month 为空的题目同样按 NULL 比较，与原有的去重规则一致）
+        hashes = list({values['content_hash'] for _, values in chunk})
+        existing = set(conn.execute(
+            select(target.c.content_hash, target.c.month).where(target.c.content_hash.in_(hashes))
+        ).all())
+
+        new_rows = []
+        for index, values in chunk:
+            key = (values['content_hash'], values['month'])
+            if key in existing or key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            new_rows.append((index, values))
+        if not new_rows:
+            continue
+
+        try:
+            # 每批在保存点中写入：失败时只回滚这一批，之前的批次和调用方事务中的其他写入保留
+            with conn.begin_nested():
+                conn.execute(_insert_statement(conn, target, [values for _, values in new_rows]))
+            inserted += len(new_rows)
+        except Exception:
+            # 逐条重试定位出错的题目，每条同样使用保存点
+            for index, values in new_rows:
+                try:
+                    with conn.begin_nested():
+                        conn.execute(_insert_statement(conn, target, [values]))
+                    inserted += 1
+                except Exception as e:
+                    failed.append((index, str(e)))
+
+    return {'inserted': inserted, 'duplicates': duplicates, 'failed': failed}
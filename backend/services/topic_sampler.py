@@ -0,0 +1,135 @@
+"""
+题目随机抽样模块
+在进程内缓存按 (月份, 题型) 分组的题目ID数组，并定期刷新。
+抽样时只在内存中选出题目ID，再按主键查询被选中的题目，
+避免 ORDER BY RAND() 对整张 topic 表进行扫描和排序
+"""
+
+import bisect
+import random
+from array import array
+
+from services.cache import CachedValue
+
+
+def build_month_predicate(months=None, start_month=None, end_month=None):
+    """
+    根据月份参数构建月份过滤函数，规则与 /api/topics/random 原有的 SQL 过滤一致
+
+    Args:
+        months: 月份列表，例如 [8, 10, 11]，优先级最高
+        start_month: 起始月份
+        end_month: 结束月份，小于起始月份时视为跨年范围（例如11月到2月）
+
+    Returns:
+        callable: 接收月份返回是否命中的函数；不需要过滤时返回 None
+    """
+    if months:
+        month_set = frozenset(months)
+        return lambda month: month in month_set
+    if start_month and end_month:
+        if start_month <= end_month:
+            return lambda month: month is not None and start_month <= month <= end_month
+        # 跨年情况
+        return lambda month: month is not None and (month >= start_month or month <= end_month)
+    if start_month:
+        return lambda month: month is not None and month >= start_month
+    if end_month:
+        return lambda month: month is not None and month <= end_month
+    return None
+
+
+class TopicSampler(object):
+    """
+    题目ID抽样器
+
+    loader 返回 (id, month, type_id) 三元组的可迭代对象，
+    抽样器按 (month, type_id) 分桶保存为紧凑的整数数组
+    """
+
+    def __init__(self, loader, refresh_interval=300, version=None):
+        """
+        Args:
+            loader: 加载题目ID的函数，需要在应用上下文中调用
+            refresh_interval: 自动刷新间隔（秒）
+            version: 可选，返回题库版本号的函数，版本变化时重新加载
+        """
+        self._loader = loader
+        self._cache = CachedValue(self._load, ttl=refresh_interval, version=version)
+
+    def invalidate(self):
+        """标记缓存失效，下一次抽样时重新加载"""
+        self._cache.invalidate()
+
+    def _load(self):
+        """加载题目ID并按 (month, type_id) 分桶"""
+        buckets = {}
+        for topic_id, month, type_id in self._loader():
+            bucket = buckets.get((month, type_id))
+            if bucket is None:
+                bucket = buckets[(month, type_id)] = array('l')
+            bucket.append(topic_id)
+
+        topic_ids = frozenset(topic_id for ids in buckets.values() for topic_id in ids)
+        return buckets, topic_ids
+
+    def known_ids(self, topic_ids):
+        """
+        返回缓存中存在的题目ID集合
+
+        Args:
+            topic_ids: 待检查的题目ID列表
+
+        Returns:
+            set: 缓存中存在的题目ID
+        """
+        _, known = self._cache.get()
+        return set(known.intersection(topic_ids))
+
+    def _select_pools(self, month_predicate=None, type_id=None):
+        """筛选符合条件的ID数组"""
+        pools = []
+        buckets, _ = self._cache.get()
+        for (month, bucket_type), ids in buckets.items():
+            if type_id is not None and bucket_type != type_id:
+                continue
+            if month_predicate is not None and not month_predicate(month):
+                continue
+            if ids:
+                pools.append(ids)
+        return pools
+
+    def count(self, month_predicate=None, type_id=None):
+        """统计符合条件的题目数量"""
+        return sum(len(ids) for ids in self._select_pools(month_predicate, type_id))
+
+    def sample(self, count, month_predicate=None, type_id=None):
+        """
+        随机抽取不重复的题目ID
+
+        Args:
+            count: 抽取数量
+            month_predicate: 月份过滤函数，见 build_month_predicate
+            type_id: 题型过滤
+
+        Returns:
+            list: 题目ID列表，数量不超过符合条件的题目总数
+        """
+        pools = self._select_pools(month_predicate, type_id)
+
+        # 将多个数组视为一个连续区间，offsets[i] 为第 i 个数组的起始下标
+        offsets = []
+        total = 0
+        for ids in pools:
+            offsets.append(total)
+            total += len(ids)
+
+        count = min(count, total)
+        if count <= 0:
+            return []
+
+        result = []
+        for index in random.sample(range(total), count):
+            pool_index = bisect.bisect_right(offsets, index) - 1
+            result.append(pools[pool_index][index - offsets[pool_index]])
+        return result
@@ -0,0 +1,245 @@
+"""
+用户统计汇总模块
+user_stat 表为每个用户保存错题数、收藏数、完成题目数以及错题按题型、按月份的分布，
+个人中心和错题统计接口只需要一次主键查询，不再每次执行 COUNT 和 GROUP BY 联表查询。
+
+- 收藏、完成进度只更新计数，一条 UPDATE col = col + n 语句
+- 错题增删需要同时更新分布，事务内先锁定统计行（SELECT ... FOR UPDATE），再修改错题并写回统计行；
+  同一用户的错题写操作因此串行执行，锁的顺序始终是统计行在前
+- 统计行不存在时写操作跳过更新；首次读取统计时先插入全部为零的统计行并锁定，再在锁内由明细表计算并保存，
+  与之并发的写操作要么在计算之前提交，要么等待行锁释放后更新统计行
+- scripts/repair_user_stats.py 按用户分批重新计算并修复不一致的统计（例如删除题目级联删除了错题）
+"""
+
+import json
+
+from sqlalchemy import DateTime, bindparam, column, select, table, text, update
+from sqlalchemy.dialects import mysql, sqlite
+
+STAT_COLUMNS = (
+    'user_id', 'mistake_count', 'favorite_count', 'done_count',
+    'mistakes_by_type', 'mistakes_by_month', 'registered_at'
+)
+# 分布字段在数据库中保存为 JSON 文本
+HISTOGRAM_COLUMNS = ('mistakes_by_type', 'mistakes_by_month')
+
+
+def user_stat_table(name='user_stat'):
+    """构建轻量表对象，供不依赖 app.py 模型的脚本使用"""
+    return table(name, *[column(name) for name in STAT_COLUMNS])
+
+
+def empty_stat(user_id, registered_at=None):
+    """新建全部为零的统计"""
+    return {
+        'user_id': user_id,
+        'mistake_count': 0,
+        'favorite_count': 0,
+        'done_count': 0,
+        'mistakes_by_type': {},
+        'mistakes_by_month': {},
+        'registered_at': registered_at
+    }
+
+
+def _dump_histogram(histogram):
+    # 键排序、去掉计数为零的项，相同分布的文本一致
+    return json.dumps(
+        {key: count for key, count in sorted(histogram.items()) if count > 0}, separators=(',', ':')
+    )
+
+
+def _to_row(stat):
+    row = dict(stat)
+    for name in HISTOGRAM_COLUMNS:
+        row[name] = _dump_histogram(stat[name])
+    return row
+
+
+def _from_row(row):
+    stat = {name: row[name] for name in STAT_COLUMNS}
+    for name in HISTOGRAM_COLUMNS:
+        stat[name] = json.loads(stat[name]) if stat[name] else {}
+    return stat
+
+
+def read_user_stat(conn, target, user_id, for_update=False):
+    """
+    按主键读取用户统计
+
+    Args:
+        conn: SQLAlchemy Connection 或 Session
+        target: user_stat 表对象
+        user_id: 用户ID
+        for_update: 是否加行锁（错题写操作在修改错题之前调用）
+
+    Returns:
+        dict: 统计数据，分布字段已解析为字典；统计行不存在时返回 None
+    """
+    stmt = select(*[target.c[name] for name in STAT_COLUMNS]).where(target.c.user_id == user_id)
+    if for_update:
+        stmt = stmt.with_for_update()
+    row = conn.execute(stmt).mappings().first()
+    return _from_row(row) if row is not None else None
+
+
+def read_user_stats(conn, target, user_ids, for_update=False):
+    """
+    批量读取用户统计（修复任务使用）
+
+    Returns:
+        dict: 用户ID到统计数据的映射，不包含没有统计行的用户
+    """
+    stmt = select(*[target.c[name] for name in STAT_COLUMNS]).where(target.c.user_id.in_(user_ids))
+    if for_update:
+        stmt = stmt.with_for_update()
+    return {row['user_id']: _from_row(row) for row in conn.execute(stmt).mappings()}
+
+
+def adjust_counters(conn, target, user_id, **deltas):
+    """
+    计数加减，一条 UPDATE 语句；统计行不存在时不做任何修改
+
+    Args:
+        conn: SQLAlchemy Connection 或 Session
+        target: user_stat 表对象
+        user_id: 用户ID
+        deltas: 计数列名到增量的映射，例如 favorite_count=1
+    """
+    values = {name: target.c[name] + delta for name, delta in deltas.items() if delta}
+    if values:
+        conn.execute(update(target).where(target.c.user_id == user_id).values(values))
+
+
+def reset_counters(conn, target, user_id, *names):
+    """将计数置零（清空收藏等操作），统计行不存在时不做任何修改"""
+    conn.execute(update(target).where(target.c.user_id == user_id).values({name: 0 for name in names}))
+
+
+def apply_mistake_changes(stat, added=(), removed=()):
+    """
+    按新增、删除的错题修改统计中的错题数和分布
+
+    Args:
+        stat: read_user_stat 返回的统计数据，原地修改
+        added: 新加入错题本的题目记录（需要 type_id、month 属性）
+        removed: 移出错题本的题目记录
+    """
+    for records, sign in ((added, 1), (removed, -1)):
+        for record in records:
+            stat['mistake_count'] = max(stat['mistake_count'] + sign, 0)
+            by_type = stat['mistakes_by_type']
+            key = str(record.type_id)
+            by_type[key] = by_type.get(key, 0) + sign
+            # 没有月份的题目不计入月份分布
+            if record.month:
+                by_month = stat['mistakes_by_month']
+                key = str(record.month)
+                by_month[key] = by_month.get(key, 0) + sign
+
+
+def save_user_stat(conn, target, stat):
+    """写回修改后的统计行（调用方已通过 read_user_stat(for_update=True) 锁定）"""
+    row = _to_row(stat)
+    values = {name: row[name] for name in STAT_COLUMNS if name not in ('user_id', 'registered_at')}
+    conn.execute(update(target).where(target.c.user_id == stat['user_id']).values(values))
+
+
+def insert_user_stats(conn, target, stats, replace=False):
+    """
+    写入统计行
+
+    Args:
+        conn: SQLAlchemy Connection 或 Session
+        target: user_stat 表对象
+        stats: 统计数据列表
+        replace: 为 True 时覆盖已存在的统计行（修复任务），否则跳过（首次读取时构建）
+    """
+    if not stats:
+        return
+    rows = [_to_row(stat) for stat in stats]
+    columns = [name for name in STAT_COLUMNS if name != 'user_id']
+    dialect = conn.get_bind().dialect.name if hasattr(conn, 'get_bind') else conn.dialect.name
+    if dialect == 'mysql':
+        stmt = mysql.insert(target).values(rows)
+        if replace:
+            stmt = stmt.on_duplicate_key_update({name: stmt.inserted[name] for name in columns})
+        else:
+            stmt = stmt.prefix_with('IGNORE')
+    elif dialect == 'sqlite':
+        stmt = sqlite.insert(target).values(rows)
+        if replace:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['user_id'], set_={name: stmt.excluded[name] for name in columns}
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing()
+    else:
+        raise ValueError(f'不支持的数据库类型: {dialect}')
+    conn.execute(stmt)
+
+
+def _grouped(conn, sql, user_ids, columns=()):
+    stmt = text(sql).bindparams(bindparam('user_ids', expanding=True))
+    if columns:
+        stmt = stmt.columns(*columns)
+    return conn.execute(stmt, {'user_ids': user_ids})
+
+
+def compute_user_stats(conn, user_ids):
+    """
+    由明细表计算一批用户的统计
+
+    Args:
+        conn: SQLAlchemy Connection 或 Session
+        user_ids: 用户ID列表
+
+    Returns:
+        dict: 用户ID到统计数据的映射，只包含存在的用户
+    """
+    stats = {
+        row.id: empty_stat(row.id, row.created_at)
+        for row in _grouped(
+            conn, "SELECT id, created_at FROM user WHERE id IN :user_ids", user_ids,
+            # SQLite 的文本查询不会自动转换时间类型
+            (column('id'), column('created_at', DateTime))
+        )
+    }
+    counters = (
+        ('favorite_count', 'user_favorite'),
+        ('done_count', 'user_topic_progress')
+    )
+    for name, table_name in counters:
+        rows = _grouped(
+            conn, f"SELECT user_id, COUNT(*) AS count FROM {table_name} WHERE user_id IN :user_ids GROUP BY user_id",
+            user_ids
+        )
+        for row in rows:
+            if row.user_id in stats:
+                stats[row.user_id][name] = row.count
+
+    # 错题数和分布由同一个 GROUP BY 得到
+    rows = _grouped(
+        conn,
+        "SELECT m.user_id, t.type_id, t.month, COUNT(*) AS count "
+        "FROM user_mistake m JOIN topic t ON t.id = m.topic_id "
+        "WHERE m.user_id IN :user_ids GROUP BY m.user_id, t.type_id, t.month",
+        user_ids
+    )
+    for row in rows:
+        stat = stats.get(row.user_id)
+        if stat is None:
+            continue
+        stat['mistake_count'] += row.count
+        by_type = stat['mistakes_by_type']
+        by_type[str(row.type_id)] = by_type.get(str(row.type_id), 0) + row.count
+        if row.month:
+            by_month = stat['mistakes_by_month']
+            by_month[str(row.month)] = by_month.get(str(row.month), 0) + row.count
+    return stats
+
+
+def stats_equal(left, right):
+    """比较两个统计的计数和分布是否一致（分布中计数为零的项不参与比较）"""
+    left, right = _to_row(left), _to_row(right)
+    return all(left[name] == right[name] for name in STAT_COLUMNS if name != 'registered_at')
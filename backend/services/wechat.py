@@ -0,0 +1,188 @@
+"""
+微信小程序接口客户端
+登录时调用 jscode2session 换取 openid。客户端复用带连接池的 requests.Session，
+设置连接和读取超时，失败时按带随机抖动的指数退避有限次重试，并限制同时进行的请求数，
+微信接口变慢时登录请求快速失败，不会长时间占用 gunicorn worker
+
+环境变量：
+    WECHAT_APPID / WECHAT_SECRET   小程序 AppID 和 AppSecret
+    WECHAT_API_BASE                接口地址（默认 https://api.weixin.qq.com，压测时可指向 scripts/fake_wechat_server.py）
+    WECHAT_CONNECT_TIMEOUT         建立连接超时，秒（默认 2）
+    WECHAT_READ_TIMEOUT            读取响应超时，秒（默认 5）
+    WECHAT_MAX_RETRIES             最多重试次数（默认 2）
+    WECHAT_RETRY_BACKOFF           重试退避基数，秒（默认 0.2）
+    WECHAT_MAX_CONCURRENCY         每个 worker 同时进行的最大请求数（默认 8）
+    WECHAT_ACQUIRE_TIMEOUT         等待并发名额的最长时间，秒（默认 1）
+    WECHAT_POOL_SIZE               连接池保持的最大连接数（默认 8）
+"""
+
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_API_BASE = 'https://api.weixin.qq.com'
+
+# 微信接口返回“系统繁忙”时的错误码，可以重试
+ERRCODE_BUSY = -1
+
+
+class WeChatError(Exception):
+    """微信接口返回错误（例如 code 无效），对应 errcode/errmsg"""
+
+    def __init__(self, errcode, errmsg):
+        super().__init__(f'{errcode}: {errmsg}')
+        self.errcode = errcode
+        self.errmsg = errmsg
+
+
+class WeChatUnavailable(Exception):
+    """微信接口暂时不可用：超时、连接失败、5xx 或并发已满，客户端可以稍后重试"""
+
+
+class WeChatClient(object):
+    """
+    微信 jscode2session 客户端，多线程共享
+
+    只在请求确定没有到达微信服务器（连接失败）或微信明确要求重试（5xx、系统繁忙）时重试；
+    读取超时不重试，因为 code 只能使用一次，请求可能已被微信处理
+    """
+
+    def __init__(self, appid, secret, api_base=DEFAULT_API_BASE, connect_timeout=2, read_timeout=5,
+                 max_retries=2, retry_backoff=0.2, max_concurrency=8, acquire_timeout=1, pool_size=8):
+        """
+        Args:
+            appid: 小程序 AppID
+            secret: 小程序 AppSecret
+            api_base: 接口地址
+            connect_timeout: 建立连接超时（秒）
+            read_timeout: 读取响应超时（秒）
+            max_retries: 最多重试次数
+            retry_backoff: 重试退避基数（秒），第 n 次重试前随机等待 0 到 retry_backoff * 2^n 秒
+            max_concurrency: 同时进行的最大请求数
+            acquire_timeout: 等待并发名额的最长时间（秒）
+            pool_size: 连接池保持的最大连接数
+        """
+        self.appid = appid
+        self.secret = secret
+        self._url = api_base.rstrip('/') + '/sns/jscode2session'
+        self._timeout = (connect_timeout, read_timeout)
+        self._max_retries = max_retries
+        self._retry_backoff = retry_backoff
+        self._acquire_timeout = acquire_timeout
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+
+        self._stats_lock = threading.Lock()
+        self._stats = {'requests': 0, 'retries': 0, 'failures': 0, 'rejected': 0}
+
+    @classmethod
+    def from_env(cls, env=None):
+        """根据环境变量创建客户端"""
+        env = os.environ if env is None else env
+        return cls(
+            env.get('WECHAT_APPID'),
+            env.get('WECHAT_SECRET'),
+            api_base=env.get('WECHAT_API_BASE', DEFAULT_API_BASE),
+            connect_timeout=float(env.get('WECHAT_CONNECT_TIMEOUT', 2)),
+            read_timeout=float(env.get('WECHAT_READ_TIMEOUT', 5)),
+            max_retries=int(env.get('WECHAT_MAX_RETRIES', 2)),
+            retry_backoff=float(env.get('WECHAT_RETRY_BACKOFF', 0.2)),
+            max_concurrency=int(env.get('WECHAT_MAX_CONCURRENCY', 8)),
+            acquire_timeout=float(env.get('WECHAT_ACQUIRE_TIMEOUT', 1)),
+            pool_size=int(env.get('WECHAT_POOL_SIZE', 8))
+        )
+
+    @property
+    def configured(self):
+        return bool(self.appid and self.secret)
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        """返回请求、重试、失败和因并发已满被拒绝的次数"""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _sleep_before_retry(self, attempt):
+        # 全抖动退避，避免大量请求同时重试
+        time.sleep(random.uniform(0, self._retry_backoff * (2 ** attempt)))
+
+    def code2session(self, code):
+        """
+        使用登录凭证换取 openid 和 session_key
+
+        Args:
+            code: 小程序 wx.login 返回的 code
+
+        Returns:
+            dict: 微信接口返回的数据，包含 openid、session_key（可能包含 unionid）
+
+        Raises:
+            WeChatError: 微信接口返回错误码
+            WeChatUnavailable: 超时、连接失败、5xx、非 JSON 响应、多次系统繁忙或并发已满
+        """
+        if not self._semaphore.acquire(timeout=self._acquire_timeout):
+            self._count('rejected')
+            raise WeChatUnavailable('微信登录请求过多')
+        try:
+            return self._request(code)
+        finally:
+            self._semaphore.release()
+
+    def _request(self, code):
+        params = {
+            'appid': self.appid,
+            'secret': self.secret,
+            'js_code': code,
+            'grant_type': 'authorization_code'
+        }
+        attempt = 0
+        while True:
+            self._count('requests')
+            try:
+                response = self._session.get(self._url, params=params, timeout=self._timeout)
+            except requests.exceptions.ConnectionError as e:
+                # ConnectTimeout 是 ConnectionError 的子类，请求没有发送成功，可以重试
+                reason = f'连接微信接口失败: {e.__class__.__name__}'
+            except requests.exceptions.Timeout as e:
+                self._count('failures')
+                raise WeChatUnavailable(f'微信接口响应超时: {e.__class__.__name__}')
+            except requests.RequestException as e:
+                # 其他请求异常（例如读取响应体时连接中断），请求可能已经发送，不重试
+                self._count('failures')
+                raise WeChatUnavailable(f'微信接口请求失败: {e.__class__.__name__}')
+            else:
+                if response.status_code >= 500:
+                    reason = f'微信接口返回 HTTP {response.status_code}'
+                else:
+                    try:
+                        data = response.json()
+                    except ValueError:
+                        data = None
+                    if not isinstance(data, dict):
+                        # 非 JSON 响应，例如代理返回的 HTML 错误页
+                        self._count('failures')
+                        raise WeChatUnavailable(f'微信接口返回无法解析的响应: HTTP {response.status_code}')
+                    errcode = data.get('errcode')
+                    if not errcode:
+                        return data
+                    if errcode != ERRCODE_BUSY:
+                        raise WeChatError(errcode, data.get('errmsg'))
+                    reason = '微信接口系统繁忙'
+
+            if attempt >= self._max_retries:
+                self._count('failures')
+                raise WeChatUnavailable(reason)
+            attempt += 1
+            self._count('retries')
+            self._sleep_before_retry(attempt - 1)
@@ -65,6 +65,7 @@ if [ "${DEBUG_MODE}" = "True" ]; then
     echo "Running in DEBUG mode"
     python app.py
 else
-    echo "Running in PRODUCTION mode with gunicorn"
-    gunicorn --bind 0.0.0.0:5000 --workers 4 --timeout 120 --access-logfile logs/access.log --error-logfile logs/error.log app:app
+    echo "Running in PRODUCTION mode with gunicorn (${GUNICORN_WORKER_CLASS:-gthread} workers)"
+    # worker 类型、数量、线程数及对应的连接池大小见 gunicorn.conf.py
+    gunicorn -c gunicorn.conf.py app:app
 fi
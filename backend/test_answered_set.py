@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""
+已答题目位图测试
+验证压缩位图的基本操作，以及题目列表 excludeAnswered 的内存实现与 SQL 子查询结果一致
+
+使用内存 SQLite 运行：python -m pytest test_answered_set.py
+"""
+
+import json
+
+import pytest
+
+import app as app_module
+from app import app, Topic, User, UserTopicProgress
+from services.answered_set import ARRAY_CONTAINER_LIMIT, TopicBitmap
+
+USER_ID = 2
+TOPIC_COUNT = 40
+
+
+def test_topic_bitmap():
+    values = [3, 70000, 1, 65535, 65536, 3]
+    bitmap = TopicBitmap(values)
+    assert len(bitmap) == 5
+    assert list(bitmap) == sorted(set(values))
+    assert 70000 in bitmap and 2 not in bitmap and 131072 not in bitmap
+    assert not bitmap.add(1)
+
+    # 超过数组上限后转换为位图分块，结果不变
+    dense = TopicBitmap(range(0, (ARRAY_CONTAINER_LIMIT + 10) * 2, 2))
+    assert len(dense) == ARRAY_CONTAINER_LIMIT + 10
+    assert 4 in dense and 5 not in dense
+    assert list(dense) == list(range(0, (ARRAY_CONTAINER_LIMIT + 10) * 2, 2))
+
+
+@pytest.fixture(scope='module')
+def client(database):
+    database.session.add(User(id=USER_ID, openid='answered_openid', nickname='测试用户'))
+    for i in range(1, TOPIC_COUNT + 1):
+        database.session.add(Topic(
+            id=i,
+            content=f'测试题目{i}',
+            type_id=(i % 2) + 1,
+            options=json.dumps([{'key': 'A', 'content': '选项A'}], ensure_ascii=False),
+            answer='A',
+            analysis='解析',
+            month=(i % 3) + 1,
+            region='广东'
+        ))
+    for topic_id in range(1, TOPIC_COUNT + 1, 3):
+        database.session.add(UserTopicProgress(user_id=USER_ID, topic_id=topic_id, month=(topic_id % 3) + 1))
+    database.session.commit()
+    return app.test_client()
+
+
+def fetch_topics(client, query, use_answered_set):
+    app_module.ANSWERED_SET_ENABLED = use_answered_set
+    try:
+        response = client.get(f'/api/topics?userId={USER_ID}&excludeAnswered=1&{query}')
+    finally:
+        app_module.ANSWERED_SET_ENABLED = True
+    assert response.status_code == 200
+    return response.get_json()['data']
+
+
+def walk_cursor(client, query, use_answered_set):
+    ids = []
+    cursor = ''
+    while True:
+        data = fetch_topics(client, f'{query}&cursor={cursor}&withTotal=1', use_answered_set)
+        ids.extend(item['id'] for item in data['list'])
+        if not data['hasMore']:
+            return ids, data['total']
+        cursor = data['nextCursor']
+
+
+@pytest.mark.parametrize('filters', ['', 'type=1', 'month=2', 'type=2&month=3'])
+def test_exclude_answered_matches_sql(client, filters):
+    for page in (1, 2, 4):
+        expected = fetch_topics(client, f'{filters}&page={page}&size=5', False)
+        actual = fetch_topics(client, f'{filters}&page={page}&size=5', True)
+        assert actual == expected
+
+    assert walk_cursor(client, f'{filters}&size=4', True) == walk_cursor(client, f'{filters}&size=4', False)
+
+
+def test_finish_topic_updates_answered_set(client, auth_headers):
+    data = fetch_topics(client, 'size=50', True)
+    topic_id = data['list'][0]['id']
+
+    response = client.post('/api/progress/finish-topic', headers=auth_headers(USER_ID),
+                           json={'topicId': topic_id, 'month': 1})
+    assert response.get_json()['code'] == 0
+
+    data = fetch_topics(client, 'size=50', True)
+    assert topic_id not in [item['id'] for item in data['list']]
+    assert data == fetch_topics(client, 'size=50', False)
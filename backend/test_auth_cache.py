@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+"""
+认证中间件token缓存测试
+验证缓存命中、过期时间不晚于 token 的 exp、LRU 淘汰，以及无效token不会被缓存
+
+运行：python -m pytest test_auth_cache.py
+"""
+
+import os
+import time
+
+import jwt
+import pytest
+from flask import Flask, jsonify, request
+
+from middleware.auth import TokenCache, init_auth, optional_token, token_required
+
+SECRET_KEY = 'auth_cache_test_secret'
+
+
+@pytest.fixture
+def verifier():
+    verifier = init_auth(secret_key=SECRET_KEY, cache_size=2, cache_ttl=300)
+    yield verifier
+    # 恢复按环境变量创建的验证器，避免影响其他测试模块
+    init_auth()
+
+
+@pytest.fixture
+def client(verifier):
+    test_app = Flask(__name__)
+
+    @test_app.route('/me')
+    @token_required
+    def me():
+        return jsonify({'userId': request.user_id, 'openid': request.openid})
+
+    @test_app.route('/maybe')
+    @optional_token
+    def maybe():
+        return jsonify({'userId': request.user_id})
+
+    return test_app.test_client()
+
+
+def make_token(user_id, exp_seconds=3600, secret_key=SECRET_KEY):
+    return jwt.encode({
+        'user_id': user_id,
+        'openid': f'openid_{user_id}',
+        'exp': int(time.time()) + exp_seconds
+    }, secret_key, algorithm='HS256')
+
+
+def test_cache_hit_and_counters(client, verifier):
+    headers = {'Authorization': f'Bearer {make_token(1)}'}
+    for _ in range(3):
+        response = client.get('/me', headers=headers)
+        assert response.status_code == 200
+        assert response.get_json() == {'userId': 1, 'openid': 'openid_1'}
+
+    stats = verifier.cache.stats()
+    assert (stats['hits'], stats['misses'], stats['size']) == (2, 1, 1)
+
+
+def test_invalid_tokens_are_not_cached(client, verifier):
+    forged = make_token(1, secret_key='other_secret')
+    for _ in range(2):
+        response = client.get('/me', headers={'Authorization': forged})
+        assert response.status_code == 401
+        assert response.get_json()['message'] == '无效的token'
+    assert verifier.cache.stats()['size'] == 0
+
+    expired = make_token(1, exp_seconds=-10)
+    response = client.get('/me', headers={'Authorization': expired})
+    assert response.get_json()['message'] == 'Token已过期'
+
+    assert client.get('/maybe', headers={'Authorization': forged}).get_json() == {'userId': None}
+    assert client.get('/me').get_json()['message'] == '缺少认证token'
+
+
+def test_entry_expires_with_token(client, verifier):
+    # token 剩余有效期短于缓存时间时，缓存条目随 token 一起过期
+    token = make_token(1, exp_seconds=1)
+    assert client.get('/me', headers={'Authorization': token}).status_code == 200
+    assert client.get('/me', headers={'Authorization': token}).status_code == 200
+    time.sleep(1.5)
+    response = client.get('/me', headers={'Authorization': token})
+    assert response.status_code == 401
+    assert response.get_json()['message'] == 'Token已过期'
+
+
+def test_lru_eviction():
+    cache = TokenCache(max_size=2, ttl=300)
+    digests = [TokenCache.digest(f'token{i}') for i in range(3)]
+    cache.put(digests[0], {'user_id': 0})
+    cache.put(digests[1], {'user_id': 1})
+    assert cache.get(digests[0]) == {'user_id': 0}
+    cache.put(digests[2], {'user_id': 2})
+
+    # 最久未使用的 token1 被淘汰
+    assert cache.get(digests[1]) is None
+    assert cache.get(digests[0]) == {'user_id': 0}
+    assert cache.stats()['evictions'] == 1
+
+
+def test_admin_auth_cache_endpoint():
+    from app import app
+
+    response = app.test_client().get('/api/admin/auth/cache', headers={
+        'X-Admin-Key': os.environ.get('ADMIN_KEY', 'default_admin_key')
+    })
+    data = response.get_json()['data']
+    assert data['enabled'] is True
+    assert {'hits', 'misses', 'size', 'pid'} <= set(data)
+    assert app.test_client().get('/api/admin/auth/cache').status_code == 403
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""
+响应压缩测试
+验证 Accept-Encoding 协商、最小体积阈值、流式备份压缩、带编码后缀的 ETag 条件请求
+以及题库类接口预压缩结果的缓存命中
+
+使用内存 SQLite 运行：python -m pytest test_compression.py
+"""
+
+import gzip
+import json
+import os
+import threading
+import zlib
+
+import pytest
+
+from app import app, compressor, Topic
+from middleware.compression import brotli, compress_chunks
+
+ADMIN_HEADERS = {'X-Admin-Key': os.environ.get('ADMIN_KEY', 'default_admin_key')}
+TOPICS_URL = '/api/topics?size=20'
+
+
+@pytest.fixture(scope='module')
+def client(database):
+    for i in range(1, 31):
+        database.session.add(Topic(
+            id=i,
+            content=f'关于全面深化改革若干重大问题的决定（第{i}题）',
+            type_id=1,
+            options=json.dumps([{'key': key, 'content': f'选项{key}：中国特色社会主义'} for key in 'ABCD'], ensure_ascii=False),
+            answer='A',
+            analysis='解析：坚持和发展中国特色社会主义，推进国家治理体系和治理能力现代化',
+            month=(i % 12) + 1,
+            region='广东'
+        ))
+    database.session.commit()
+    return app.test_client()
+
+
+def test_identity_without_accept_encoding(client):
+    response = client.get(TOPICS_URL)
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+
+def test_gzip_matches_identity(client):
+    plain = client.get(TOPICS_URL)
+    response = client.get(TOPICS_URL, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert int(response.headers['Content-Length']) == len(response.data) < len(plain.data)
+    assert gzip.decompress(response.data) == plain.data
+    assert response.headers['ETag'] == plain.headers['ETag'][:-1] + '-gzip"'
+
+
+@pytest.mark.skipif(brotli is None, reason='brotli 未安装')
+def test_brotli_preferred(client):
+    plain = client.get(TOPICS_URL)
+    response = client.get(TOPICS_URL, headers={'Accept-Encoding': 'gzip, deflate, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.data) == plain.data
+
+    # q=0 表示不接受该编码
+    response = client.get(TOPICS_URL, headers={'Accept-Encoding': 'br;q=0, gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+
+
+def test_small_response_not_compressed(client):
+    response = client.get('/api/topics/count-by-month?months=1', headers={'Accept-Encoding': 'gzip'})
+    assert len(response.data) < compressor.min_size
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_precompressed_cache_and_not_modified(client):
+    headers = {'Accept-Encoding': 'gzip'}
+    first = client.get(TOPICS_URL, headers=headers)
+    hits = compressor.cache.hits
+    second = client.get(TOPICS_URL, headers=headers)
+    assert compressor.cache.hits == hits + 1
+    assert second.data == first.data
+
+    # 客户端缓存的是压缩表示，携带带后缀的 ETag 仍然返回 304
+    etag = first.headers['ETag']
+    cached = client.get(TOPICS_URL, headers=dict(headers, **{'If-None-Match': etag}))
+    assert cached.status_code == 304
+    assert cached.headers['ETag'] == etag
+
+
+def test_stats_counted_across_threads(client):
+    before = compressor.stats()
+    errors = []
+
+    def worker():
+        thread_client = app.test_client()
+        for _ in range(25):
+            if thread_client.get(TOPICS_URL, headers={'Accept-Encoding': 'gzip'}).status_code != 200:
+                errors.append('status')
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    after = compressor.stats()
+    assert not errors
+    assert after['compressed'] - before['compressed'] == 200
+    cache_requests = after['cache']['hits'] + after['cache']['misses']
+    assert cache_requests - before['cache']['hits'] - before['cache']['misses'] == 200
+
+
+def test_streamed_backup_compressed(client):
+    plain = client.get('/api/admin/topics/backup?format=ndjson', headers=ADMIN_HEADERS)
+    response = client.get(
+        '/api/admin/topics/backup?format=ndjson', headers=dict(ADMIN_HEADERS, **{'Accept-Encoding': 'gzip'})
+    )
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    lines = gzip.decompress(response.data).decode('utf-8').splitlines()
+    assert len(lines) == 30
+    assert lines == plain.get_data(as_text=True).splitlines()
+
+    # 已经是 gzip 文件的备份不再压缩
+    archive = client.get(
+        '/api/admin/topics/backup?format=ndjson&gzip=1', headers=dict(ADMIN_HEADERS, **{'Accept-Encoding': 'gzip'})
+    )
+    assert 'Content-Encoding' not in archive.headers
+
+
+def test_compress_chunks_flushes_and_closes():
+    closed = []
+
+    def chunks():
+        try:
+            yield b'{"a":1}\n' * 50
+            yield b'{"b":2}\n' * 50
+        finally:
+            closed.append(True)
+
+    stream = compress_chunks(chunks(), 'gzip')
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # 第一块压缩数据即可解压出第一块原文
+    assert decompressor.decompress(next(stream)) == b'{"a":1}\n' * 50
+    stream.close()
+    assert closed == [True]
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""
+题库类接口条件请求测试
+验证题目列表、每月题目数量接口的 ETag / Cache-Control，If-None-Match 命中时返回 304 且不执行 SQL，
+以及题库版本号递增后 ETag 随之变化、版本检查失败不影响请求会话
+
+使用内存 SQLite 运行：python -m pytest test_conditional_get.py
+"""
+
+import json
+
+import pytest
+from sqlalchemy import event, select
+
+from app import (
+    app, db, bump_topic_bank_version, load_topic_bank_version, topic_bank_version, Topic, TopicBankVersion, User
+)
+
+USER_ID = 5
+
+
+@pytest.fixture(scope='module')
+def client(database):
+    database.session.add(User(id=USER_ID, openid='conditional_openid', nickname='测试用户'))
+    for i in range(1, 11):
+        database.session.add(Topic(
+            id=i,
+            content=f'测试题目{i}',
+            type_id=1,
+            options=json.dumps([{'key': 'A', 'content': '选项A'}], ensure_ascii=False),
+            answer='A',
+            month=(i % 12) + 1,
+            region='广东'
+        ))
+    database.session.commit()
+    # 版本号跟随本模块的数据，不受其他测试模块缓存的影响
+    bump_topic_bank_version()
+    return app.test_client()
+
+
+@pytest.mark.parametrize('url', ['/api/topics?size=5&type=1', '/api/topics/count-by-month?months=1,2,3'])
+def test_not_modified_without_sql(client, count_queries, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert etag.startswith('"') and not etag.startswith('W/')
+    assert 'max-age=' in response.headers['Cache-Control']
+
+    with count_queries() as statements:
+        cached = client.get(url, headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.data == b''
+    assert cached.headers['ETag'] == etag
+    assert statements == []
+
+    # 不匹配的 ETag 返回完整响应
+    assert client.get(url, headers={'If-None-Match': '"other"'}).status_code == 200
+
+
+def test_etag_depends_on_query(client):
+    etag = client.get('/api/topics?size=5&type=1').headers['ETag']
+    # 参数顺序不影响 ETag
+    assert client.get('/api/topics?type=1&size=5').headers['ETag'] == etag
+    assert client.get('/api/topics?size=5&type=2').headers['ETag'] != etag
+
+
+def test_etag_changes_after_import(client):
+    url = '/api/topics?size=5'
+    etag = client.get(url).headers['ETag']
+
+    with app.app_context():
+        bump_topic_bank_version()
+
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_user_filtered_topics_not_cached(client):
+    response = client.get(f'/api/topics?size=5&userId={USER_ID}&excludeAnswered=1')
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
+
+
+def test_version_check_uses_session_connection(client):
+    checkouts = []
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        checkouts.append(connection_record)
+
+    with app.app_context():
+        version = topic_bank_version.current()
+        # 请求会话已经持有连接：版本检查在该连接上执行，不从连接池另取连接（gthread 模式下连接池没有空闲连接）
+        db.session.execute(select(Topic.id).limit(1))
+        event.listen(db.engine.pool, 'checkout', on_checkout)
+        try:
+            assert load_topic_bank_version() == version
+        finally:
+            event.remove(db.engine.pool, 'checkout', on_checkout)
+        assert checkouts == []
+        db.session.commit()
+
+
+def test_version_check_keeps_session_work(client):
+    with app.app_context():
+        version = topic_bank_version.current()
+        assert version >= 1
+        # 未执行迁移的库没有版本表：版本检查失败，但不回滚请求会话中尚未提交的写入
+        TopicBankVersion.__table__.drop(db.engine)
+        try:
+            db.session.add(User(id=USER_ID + 1, openid='pending_openid', nickname='未提交'))
+            db.session.flush()
+            with pytest.raises(Exception):
+                load_topic_bank_version()
+            # 读取失败时保留上次的版本号，题目缓存不会重新加载
+            topic_bank_version.invalidate()
+            assert topic_bank_version.current() == version
+            db.session.commit()
+            assert db.session.get(User, USER_ID + 1) is not None
+        finally:
+            TopicBankVersion.__table__.create(db.engine)
+            bump_topic_bank_version()
+        assert load_topic_bank_version() == 1
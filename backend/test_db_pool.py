@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""
+数据库连接池模块测试
+验证环境变量到引擎参数的转换，以及连接池指标（使用临时 SQLite 文件代替 MySQL）
+
+运行：python -m pytest test_db_pool.py
+"""
+
+import os
+import runpy
+import sys
+import threading
+
+# 添加backend目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import StaticPool
+
+from mysql.pool import (
+    InstrumentedQueuePool, build_database_url, build_engine_options, dispose_engines, get_engine, pool_metrics
+)
+
+
+def test_mysql_engine_options():
+    env = {
+        'MYSQL_USER': 'exam',
+        'MYSQL_PASSWORD': 'p@ss:word',
+        'MYSQL_HOST': 'db',
+        'MYSQL_DATABASE': 'sz_exam',
+        'DB_POOL_SIZE': '8',
+        'DB_POOL_RECYCLE': '600',
+        'DB_STATEMENT_TIMEOUT_MS': '3000'
+    }
+    url = build_database_url(env)
+    # 密码中的特殊字符需要转义
+    assert url == 'mysql+pymysql://exam:p%40ss%3Aword@db:3306/sz_exam'
+
+    options = build_engine_options(url, env)
+    assert options['poolclass'] is InstrumentedQueuePool
+    assert options['pool_size'] == 8
+    assert options['max_overflow'] == 10
+    assert options['pool_recycle'] == 600
+    assert options['pool_pre_ping'] is True
+    assert options['connect_args']['read_timeout'] == 30
+    assert options['connect_args']['init_command'] == 'SET SESSION max_execution_time = 3000'
+
+    assert build_database_url({'DATABASE_URL': 'sqlite://'}) == 'sqlite://'
+    assert build_engine_options('sqlite://', {})['poolclass'] is StaticPool
+
+
+def test_pool_metrics(tmp_path, monkeypatch):
+    monkeypatch.setenv('DB_POOL_SIZE', '1')
+    monkeypatch.setenv('DB_MAX_OVERFLOW', '0')
+    monkeypatch.setenv('DB_POOL_TIMEOUT', '1')
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    engine = get_engine(url)
+    assert get_engine(url) is engine
+
+    try:
+        with engine.connect() as conn:
+            assert conn.execute(text('SELECT 1')).scalar() == 1
+            metrics = pool_metrics(engine)
+            assert metrics['checkedOut'] == 1
+            assert metrics['connects'] == 1
+
+            # 唯一的连接被占用时，其他线程等待超时
+            errors = []
+
+            def checkout():
+                try:
+                    engine.connect()
+                except PoolTimeoutError as e:
+                    errors.append(e)
+
+            thread = threading.Thread(target=checkout)
+            thread.start()
+            thread.join()
+            assert len(errors) == 1
+
+        with engine.connect() as conn:
+            conn.execute(text('SELECT 1'))
+
+        metrics = pool_metrics(engine)
+        assert metrics['checkedOut'] == 0
+        assert metrics['checkouts'] == 2
+        assert metrics['timeouts'] == 1
+        assert metrics['connects'] == 1
+        assert metrics['waitMsMax'] >= 900
+    finally:
+        dispose_engines()
+
+
+@pytest.mark.parametrize('worker_class, expected', [
+    ('sync', ('1', '1')),
+    ('gthread', ('8', '2')),
+    ('gevent', ('10', '10'))
+])
+def test_gunicorn_pool_defaults(monkeypatch, worker_class, expected):
+    # gunicorn.conf.py 按每个 worker 的并发数设置连接池默认值
+    for name in ('DB_POOL_SIZE', 'DB_MAX_OVERFLOW', 'WECHAT_MAX_CONCURRENCY', 'WECHAT_POOL_SIZE', 'GUNICORN_THREADS'):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv('GUNICORN_WORKER_CLASS', worker_class)
+
+    config = runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.conf.py'))
+    assert config['worker_class'] == worker_class
+    assert (os.environ['DB_POOL_SIZE'], os.environ['DB_MAX_OVERFLOW']) == expected
+
+    # 已设置的环境变量不会被覆盖
+    monkeypatch.setenv('DB_POOL_SIZE', '3')
+    runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.conf.py'))
+    assert os.environ['DB_POOL_SIZE'] == '3'
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+"""
+考试提交测试
+验证服务端判分（忽略客户端提交的得分和 isCorrect，拒绝空答案）、答题详情多行写入、
+错题本和做题进度在同一次提交中写入且重复提交不产生重复记录，以及 SQL 语句数量不随题目数增长
+
+使用内存 SQLite 运行：python -m pytest test_exam_submit.py
+"""
+
+import json
+
+import pytest
+
+from app import (
+    app, db, Topic, User, UserMistake, UserTopicProgress, ExamRecord, ExamDetail
+)
+from services.exam_grading import calculate_score, normalize_answer
+
+USER_ID = 7
+OPTIONS = json.dumps([{'key': key, 'content': f'选项{key}'} for key in 'ABCD'], ensure_ascii=False)
+
+
+@pytest.fixture(scope='module')
+def client(database):
+    database.session.add(User(id=USER_ID, openid='exam_openid', nickname='测试用户'))
+    for i in range(1, 41):
+        database.session.add(Topic(
+            id=i,
+            content=f'测试题目{i}',
+            # 偶数题为多选题，答案 AC
+            type_id=2 if i % 2 == 0 else 1,
+            options=OPTIONS,
+            answer='AC' if i % 2 == 0 else 'B',
+            month=(i % 12) + 1,
+            region='广东'
+        ))
+    database.session.commit()
+    return app.test_client()
+
+
+def test_normalize_answer():
+    assert normalize_answer('ca') == 'AC'
+    assert normalize_answer('A, C') == 'AC'
+    assert normalize_answer(['C', 'A', 'A']) == 'AC'
+    # 选项映射只取选中的选项
+    assert normalize_answer({'C': True, 'A': True}) == 'AC'
+    assert normalize_answer({'A': True, 'B': False}) == 'A'
+    assert normalize_answer({'A': False}) == ''
+    assert normalize_answer(None) == ''
+    assert calculate_score(17, 20) == 85
+    assert calculate_score(1, 8) == 13
+    assert calculate_score(0, 0) == 0
+
+
+def test_submit_graded_on_server(client, auth_headers):
+    details = [
+        {'topicId': 1, 'userAnswer': 'B', 'isCorrect': False},
+        {'topicId': 2, 'userAnswer': 'CA', 'isCorrect': False},
+        {'topicId': 3, 'userAnswer': 'A', 'isCorrect': True},
+        {'topicId': 4, 'userAnswer': 'A', 'isCorrect': True},
+        # 不存在的题目被忽略
+        {'topicId': 9999, 'userAnswer': 'A', 'isCorrect': True}
+    ]
+    response = client.post('/api/exam/submit', headers=auth_headers(USER_ID), json={
+        'score': 100, 'totalQuestions': 5, 'correctCount': 5, 'wrongCount': 0, 'usedTime': 60, 'details': details
+    })
+    data = response.get_json()['data']
+    assert data['correctCount'] == 2
+    assert data['wrongCount'] == 2
+    assert data['totalQuestions'] == 5
+    assert data['score'] == 40
+    assert data['ignored'] == 1
+    assert data['mistakesAdded'] == 2
+    assert [result['isCorrect'] for result in data['results']] == [True, True, False, False]
+
+    with app.app_context():
+        record = db.session.get(ExamRecord, data['recordId'])
+        assert (record.score, record.correct_count, record.wrong_count) == (40, 2, 2)
+        rows = db.session.query(ExamDetail.topic_id, ExamDetail.user_answer, ExamDetail.is_correct) \
+            .filter_by(exam_record_id=record.id).order_by(ExamDetail.topic_id).all()
+        assert [tuple(row) for row in rows] == [(1, 'B', True), (2, 'AC', True), (3, 'A', False), (4, 'A', False)]
+        mistakes = {row[0] for row in db.session.query(UserMistake.topic_id).filter_by(user_id=USER_ID)}
+        assert mistakes == {3, 4}
+        progress = {tuple(row) for row in db.session.query(UserTopicProgress.topic_id, UserTopicProgress.month)}
+        assert progress == {(1, 2), (2, 3), (3, 4), (4, 5)}
+
+    # 再次提交：错题和进度已存在，不产生重复记录
+    response = client.post('/api/exam/submit', headers=auth_headers(USER_ID), json={'totalQuestions': 4, 'details': details[:4]})
+    assert response.get_json()['data']['mistakesAdded'] == 0
+    with app.app_context():
+        assert db.session.query(UserMistake).filter_by(user_id=USER_ID).count() == 2
+        assert db.session.query(UserTopicProgress).filter_by(user_id=USER_ID).count() == 4
+
+
+def test_submit_query_count_constant(client, auth_headers, count_queries):
+    # 预热题目目录缓存，并生成用户统计汇总（提交时同时更新）
+    client.post('/api/exam/submit', headers=auth_headers(USER_ID), json={'details': [{'topicId': 1, 'userAnswer': 'B'}]})
+    client.get('/api/user/statistics', headers=auth_headers(USER_ID))
+    counts = []
+    for question_count in (2, 30):
+        details = [{'topicId': i, 'userAnswer': 'B'} for i in range(5, 5 + question_count)]
+        with count_queries() as statements:
+            response = client.post('/api/exam/submit', headers=auth_headers(USER_ID), json={
+                'totalQuestions': question_count, 'usedTime': 60, 'details': details
+            })
+        assert response.get_json()['code'] == 0
+        counts.append(len(statements))
+    # 考试记录 + 锁定用户统计 + 答题详情 + 已有错题 + 错题 + 错题统计 + 进度 + 更新用户统计
+    assert counts[0] == counts[1] <= 8
+
+
+def test_submit_correct_answer_from_client(client, auth_headers):
+    # 小程序提交的是选中选项字母拼接的字符串
+    selected_options = {'C': {'key': 'C'}, 'A': {'key': 'A'}}
+    user_answer = ''.join(sorted(key for key in selected_options if selected_options[key]))
+    with app.app_context():
+        mistakes_before = db.session.query(UserMistake).filter_by(user_id=USER_ID, topic_id=36).count()
+    response = client.post('/api/exam/submit', headers=auth_headers(USER_ID), json={
+        'totalQuestions': 1, 'usedTime': 30, 'details': [{'topicId': 36, 'userAnswer': user_answer}]
+    })
+    data = response.get_json()['data']
+    assert data['correctCount'] == 1
+    assert data['score'] == 100
+    assert data['mistakesAdded'] == 0
+    assert data['results'] == [{'topicId': 36, 'isCorrect': True, 'answer': 'AC'}]
+    with app.app_context():
+        assert db.session.query(UserMistake).filter_by(user_id=USER_ID, topic_id=36).count() == mistakes_before
+
+
+def test_submit_rejects_invalid_details(client, auth_headers):
+    response = client.post('/api/exam/submit', headers=auth_headers(USER_ID), json={'details': 'A'})
+    assert response.get_json()['code'] == 1
+
+
+def test_submit_rejects_missing_answer(client, auth_headers):
+    with app.app_context():
+        records_before = db.session.query(ExamRecord).count()
+        mistakes_before = db.session.query(UserMistake).filter_by(user_id=USER_ID).count()
+    for user_answer in (None, '', ',', {'A': False}):
+        details = [{'topicId': 37, 'userAnswer': 'B'}, {'topicId': 39, 'userAnswer': user_answer}]
+        response = client.post('/api/exam/submit', headers=auth_headers(USER_ID), json={'totalQuestions': 2, 'details': details})
+        assert response.status_code == 200
+        assert response.get_json()['code'] == 1
+    response = client.post('/api/exam/submit', headers=auth_headers(USER_ID), json={'details': [{'topicId': 37}]})
+    assert response.get_json() == {'code': 1, 'message': '答题详情缺少 userAnswer'}
+
+    # 被拒绝的提交不写入考试记录和错题
+    with app.app_context():
+        assert db.session.query(ExamRecord).count() == records_before
+        assert db.session.query(UserMistake).filter_by(user_id=USER_ID).count() == mistakes_before
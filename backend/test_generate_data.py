@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+测试数据生成脚本测试
+在临时 SQLite 文件上小规模运行 scripts/generate_data.py，验证各表行数、唯一键、统计汇总与明细一致，
+以及已有数据时需要 --truncate
+
+运行：python -m pytest test_generate_data.py
+"""
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app import db
+from generate_data import generate, openid_for
+from services.user_stats import compute_user_stats, read_user_stats, stats_equal, user_stat_table
+
+SCALE = {
+    'users': 30, 'topics': 200, 'progress_per_user': 20, 'mistakes_per_user': 6, 'favorites_per_user': 3,
+    'exams_per_user': 2, 'questions_per_exam': 5, 'payments_per_user': 1
+}
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'generated.db'}")
+    db.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def scalar(engine, sql):
+    with engine.connect() as conn:
+        return conn.execute(text(sql)).scalar()
+
+
+def test_generate_counts_and_consistency(engine):
+    counts = generate(engine, seed=7, batch_size=50, log=None, **SCALE)
+
+    assert counts == {
+        'user': 30, 'topic': 200, 'topic_bank_version': 1, 'user_topic_progress': 600, 'user_mistake': 180,
+        'user_mistake_stat': 180, 'user_favorite': 90, 'exam_record': 60, 'exam_detail': 300, 'user_stat': 30
+    }
+    for name, count in counts.items():
+        assert scalar(engine, f'SELECT COUNT(*) FROM {name}') == count
+    # SQLite 上没有 payment 表，跳过
+    assert 'payment' not in counts
+
+    # 生成的用户可以通过 fake_wechat_server 登录
+    assert scalar(engine, 'SELECT openid FROM user WHERE id = 1') == openid_for(0)
+    # 错题都在完成的题目中，进度的月份与题目一致，收藏与错题不重叠
+    assert scalar(engine, (
+        'SELECT COUNT(*) FROM user_mistake m LEFT JOIN user_topic_progress p '
+        'ON p.user_id = m.user_id AND p.topic_id = m.topic_id WHERE p.id IS NULL'
+    )) == 0
+    assert scalar(engine, (
+        'SELECT COUNT(*) FROM user_topic_progress p JOIN topic t ON t.id = p.topic_id WHERE p.month != t.month'
+    )) == 0
+    assert scalar(engine, (
+        'SELECT COUNT(*) FROM user_favorite f JOIN user_mistake m ON m.user_id = f.user_id AND m.topic_id = f.topic_id'
+    )) == 0
+    assert scalar(engine, 'SELECT SUM(correct_count + wrong_count) FROM exam_record') == 300
+
+    with engine.connect() as conn:
+        user_ids = list(range(1, 31))
+        stored = read_user_stats(conn, user_stat_table(), user_ids)
+        computed = compute_user_stats(conn, user_ids)
+        assert all(stats_equal(stored[user_id], computed[user_id]) for user_id in user_ids)
+
+
+def test_generate_requires_truncate(engine):
+    generate(engine, seed=1, log=None, **dict(SCALE, users=5, topics=20))
+    with pytest.raises(RuntimeError, match='--truncate'):
+        generate(engine, seed=1, log=None, **dict(SCALE, users=5, topics=20))
+
+    counts = generate(engine, seed=2, truncate=True, log=None, **dict(SCALE, users=8, topics=20))
+    assert counts['user'] == 8
+    assert scalar(engine, 'SELECT COUNT(*) FROM user') == 8
+    assert scalar(engine, 'SELECT version FROM topic_bank_version WHERE id = 1') == 1
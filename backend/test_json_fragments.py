@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+预序列化 JSON 响应测试
+验证 FragmentJSONProvider 的输出与 Flask 默认 provider 逐字节一致，
+以及题目列表接口拼接题目片段后的响应与 jsonify 结果一致
+
+使用内存 SQLite 运行：python -m pytest test_json_fragments.py
+"""
+
+import datetime
+import json
+
+import pytest
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from app import app, Topic, User, UserMistake
+from services.json_fragments import FragmentJSONProvider, RawJSON
+from services.topic_catalog import ITEM_FIELDS, TopicRecord
+
+USER_ID = 3
+COMPACT = {'separators': (',', ':')}
+
+OPTIONS = json.dumps([{'key': 'A', 'content': '选项A "引号"'}, {'key': 'B', 'content': '😀\n换行'}], ensure_ascii=False)
+
+
+def test_encode_matches_default_provider():
+    test_app = Flask(__name__)
+    default = DefaultJSONProvider(test_app)
+    fragment = FragmentJSONProvider(test_app)
+    value = {
+        'code': 0,
+        'message': '获取成功',
+        'data': {
+            'list': [{'b': 1, 'a': [1.5, -0.0, 1e300, float('inf'), float('nan')]}, (True, False, None)],
+            'text': '中文   \x00 "\\ 😀',
+            'big': 2 ** 70,
+            # 非字符串键和日期交给标准库处理
+            'ids': {1: 'a', 2: 'b'},
+            'time': datetime.datetime(2025, 3, 1, 8, 30)
+        }
+    }
+    assert fragment.dumps(value, **COMPACT) == default.dumps(value, **COMPACT)
+    assert fragment.dumps(value) == default.dumps(value)
+
+
+def test_topic_fragment_matches_pick():
+    test_app = Flask(__name__)
+    default = DefaultJSONProvider(test_app)
+    fragment = FragmentJSONProvider(test_app)
+    record = TopicRecord(7, '题干 "测试"', 2, OPTIONS, 'AB', None, month=3, region='广东')
+
+    for fields in (ITEM_FIELDS, ('id', 'content', 'type', 'options', 'answer')):
+        assert record.fragment(fields).text == default.dumps(record.pick(fields), **COMPACT)
+        # 相同字段组合的片段只生成一次
+        assert record.fragment(fields) is record.fragment(fields)
+
+    extra = {'createdAt': '2025-03-01 08:30:00'}
+    expected = dict(record.pick(ITEM_FIELDS), **extra)
+    assert record.fragment(ITEM_FIELDS, extra).text == default.dumps(expected, **COMPACT)
+
+    # 缩进输出（调试模式）时片段先解析再重新编码
+    page = {'list': [record.fragment(ITEM_FIELDS)]}
+    assert fragment.dumps(page, indent=2) == default.dumps({'list': [record.pick(ITEM_FIELDS)]}, indent=2)
+    assert isinstance(page['list'][0], RawJSON)
+
+
+@pytest.fixture(scope='module')
+def client(database):
+    database.session.add(User(id=USER_ID, openid='fragment_openid', nickname='测试用户'))
+    for i in range(1, 11):
+        database.session.add(Topic(
+            id=i,
+            content=f'测试题目{i} "引号" 😀',
+            type_id=(i % 2) + 1,
+            options=OPTIONS,
+            answer='A',
+            analysis=None if i % 3 else '解析',
+            month=(i % 12) + 1,
+            region='广东'
+        ))
+        database.session.add(UserMistake(user_id=USER_ID, topic_id=i))
+    database.session.commit()
+    return app.test_client()
+
+
+@pytest.mark.parametrize('url', [
+    '/api/topics?size=5',
+    '/api/topics?cursor=&size=5&withTotal=1',
+    '/api/topics/random?count=5',
+    '/api/exam/random?count=5',
+    '/api/mistake/list?size=5',
+    '/api/mistake/list?cursor=&size=5'
+])
+def test_list_responses_match_jsonify(client, auth_headers, url):
+    response = client.get(url, headers=auth_headers(USER_ID))
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['code'] == 0 and data['data']
+    expected = DefaultJSONProvider(app).dumps(data, **COMPACT) + '\n'
+    assert response.get_data(as_text=True) == expected
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+"""
+请求指标测试
+验证 /metrics 需要管理密钥、按路由统计请求数和 SQL 语句数，
+以及多个 worker 进程的指标快照按文件合并（计数器求和，已退出 worker 的仪表盘不再计入）
+
+使用内存 SQLite 运行：python -m pytest test_metrics.py
+"""
+
+import json
+import multiprocessing
+import os
+import re
+import time
+
+import pytest
+
+from app import app, Topic
+from services.metrics import COUNTER, GAUGE, HISTOGRAM, MetricsRegistry, mark_process_dead, read_snapshots
+
+ADMIN_HEADERS = {'X-Admin-Key': os.environ.get('ADMIN_KEY', 'default_admin_key')}
+
+
+@pytest.fixture(scope='module')
+def client(database):
+    for i in range(1, 6):
+        database.session.add(Topic(
+            id=i,
+            content=f'测试题目{i}',
+            type_id=1,
+            options=json.dumps([{'key': 'A', 'content': '选项A'}], ensure_ascii=False),
+            answer='A',
+            month=i,
+            region='广东'
+        ))
+    database.session.commit()
+    return app.test_client()
+
+
+def sample_value(text, name, **labels):
+    """从 Prometheus 文本中取出指定名称和标签的样本值"""
+    for line in text.splitlines():
+        match = re.match(r'^(\w+)(?:\{(.*)\})? (\S+)$', line)
+        if not match or match.group(1) != name:
+            continue
+        line_labels = dict(re.findall(r'(\w+)="([^"]*)"', match.group(2) or ''))
+        if line_labels == {key: str(value) for key, value in labels.items()}:
+            return float(match.group(3))
+    return None
+
+
+def test_metrics_requires_admin_key(client):
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', headers={'X-Admin-Key': 'wrong'}).status_code == 403
+    response = client.get('/metrics', headers={'Authorization': f"Bearer {ADMIN_HEADERS['X-Admin-Key']}"})
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+
+
+def test_route_metrics(client, count_queries):
+    before = client.get('/metrics', headers=ADMIN_HEADERS).get_data(as_text=True)
+    route = {'method': 'GET', 'route': '/api/topics/count-by-month'}
+    requests_before = sample_value(before, 'http_requests_total', status=200, **route) or 0
+    statements_before = sample_value(before, 'db_statements_per_request_sum', **route) or 0
+
+    with count_queries() as statements:
+        for _ in range(3):
+            assert client.get('/api/topics/count-by-month?userId=1').status_code == 200
+    client.get('/no/such/path/123')
+
+    text = client.get('/metrics', headers=ADMIN_HEADERS).get_data(as_text=True)
+    assert sample_value(text, 'http_requests_total', status=200, **route) == requests_before + 3
+    assert sample_value(text, 'db_statements_per_request_sum', **route) == statements_before + len(statements)
+    assert sample_value(text, 'http_request_duration_seconds_bucket', le='+Inf', **route) >= 3
+    if statements:
+        assert sample_value(text, 'db_statement_seconds_total', **route) > 0
+    # 未匹配的路径统一记为 unmatched
+    assert sample_value(text, 'http_requests_total', method='GET', route='unmatched', status=404) >= 1
+    assert '/no/such/path' not in text
+    # 进程级统计
+    assert sample_value(text, 'wechat_requests_total') is not None
+
+
+def _child_work(registry):
+    # fork 后的子进程从空的指标开始
+    registry.inc('jobs_total', {'queue': 'a'}, 5)
+    registry.observe('job_seconds', {}, 0.3)
+    registry.flush(force=True)
+
+
+def test_multiprocess_merge(tmp_path):
+    directory = str(tmp_path)
+    registry = MetricsRegistry(directory=directory)
+    registry.describe('jobs_total', COUNTER, '任务数')
+    registry.describe('job_seconds', HISTOGRAM, '任务耗时', (0.1, 1))
+    registry.add_collector(lambda: [('workers_busy', GAUGE, '忙碌的 worker 数', {}, 1)])
+    registry.inc('jobs_total', {'queue': 'a'}, 2)
+    registry.observe('job_seconds', {}, 0.05)
+
+    child = multiprocessing.get_context('fork').Process(target=_child_work, args=(registry,))
+    child.start()
+    child.join()
+    assert child.exitcode == 0
+
+    text = registry.render()
+    assert sample_value(text, 'jobs_total', queue='a') == 7
+    assert sample_value(text, 'job_seconds_bucket', le='0.1') == 1
+    assert sample_value(text, 'job_seconds_bucket', le='1') == 2
+    assert sample_value(text, 'job_seconds_count') == 2
+    assert sample_value(text, 'workers_busy') == 2
+    assert '# TYPE job_seconds histogram' in text
+
+    # 子进程退出后计数保留，仪表盘只计入存活的进程
+    mark_process_dead(directory, child.pid)
+    text = registry.render()
+    assert sample_value(text, 'jobs_total', queue='a') == 7
+    assert sample_value(text, 'workers_busy') == 1
+
+
+
+def test_background_flush(tmp_path):
+    directory = str(tmp_path)
+    registry = MetricsRegistry(directory=directory, flush_interval=0.1)
+    registry.describe('jobs_total', COUNTER, '任务数')
+    # 收集函数出错时后台线程继续运行
+    failures = []
+
+    def flaky_collector():
+        if not failures:
+            failures.append(1)
+            raise RuntimeError('collector failed')
+        return []
+
+    registry.add_collector(flaky_collector)
+    registry.inc('jobs_total', {}, 3)
+    registry.start_background_flush()
+
+    deadline = time.monotonic() + 5
+    snapshots = []
+    while time.monotonic() < deadline and not snapshots:
+        time.sleep(0.05)
+        snapshots = read_snapshots(directory)
+    assert failures and snapshots
+    assert not [name for name in os.listdir(directory) if name.endswith('.tmp')]
+    assert snapshots[0]['counters'] == [['jobs_total', [], 3]]
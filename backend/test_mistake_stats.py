@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+错题次数统计测试
+验证添加错题、考试提交时答错次数的增量更新，错题本按错误次数排序（页码分页和游标分页），
+以及由 exam_detail 回填统计的脚本可以重复执行
+
+使用内存 SQLite 运行：python -m pytest test_mistake_stats.py
+"""
+
+import datetime
+import json
+
+import pytest
+
+from app import app, db, Topic, User, UserMistake, UserMistakeStat, ExamRecord, ExamDetail
+from backfill_mistake_stats import backfill
+
+USER_ID = 9
+OTHER_USER_ID = 10
+
+
+@pytest.fixture(scope='module')
+def client(database):
+    database.session.add(User(id=USER_ID, openid='stat_openid', nickname='测试用户'))
+    database.session.add(User(id=OTHER_USER_ID, openid='stat_other_openid', nickname='其他用户'))
+    for i in range(1, 11):
+        database.session.add(Topic(
+            id=i,
+            content=f'测试题目{i}',
+            type_id=1,
+            options=json.dumps([{'key': 'A', 'content': '选项A'}, {'key': 'B', 'content': '选项B'}], ensure_ascii=False),
+            answer='A',
+            month=(i % 12) + 1,
+            region='广东'
+        ))
+    database.session.commit()
+    return app.test_client()
+
+
+def wrong_counts(user_id=USER_ID):
+    with app.app_context():
+        rows = db.session.query(UserMistakeStat.topic_id, UserMistakeStat.wrong_count).filter_by(user_id=user_id)
+        return dict(rows.all())
+
+
+def test_counters_and_frequency_sort(client, auth_headers):
+    headers = auth_headers(USER_ID)
+    # 题目 1 在练习中答错 3 次，题目 2 答错 1 次
+    for topic_id in (1, 1, 1, 2):
+        assert client.post('/api/mistake/add', headers=headers, json={'topicId': topic_id}).get_json()['code'] == 0
+    # 考试中题目 2、3 答错，题目 4 答对
+    client.post('/api/exam/submit', headers=headers, json={'totalQuestions': 3, 'details': [
+        {'topicId': 2, 'userAnswer': 'B'}, {'topicId': 3, 'userAnswer': 'B'}, {'topicId': 4, 'userAnswer': 'A'}
+    ]})
+    assert wrong_counts() == {1: 3, 2: 2, 3: 1}
+
+    data = client.get('/api/mistake/list?sortBy=frequency&size=10', headers=headers).get_json()['data']
+    assert data['total'] == 3
+    assert [(item['id'], item['wrongCount']) for item in data['list']] == [(1, 3), (2, 2), (3, 1)]
+    assert data['list'][0]['lastWrongAt']
+
+    # 游标分页与页码分页顺序一致
+    ids = []
+    url = '/api/mistake/list?sortBy=frequency&size=2&cursor='
+    while url:
+        page = client.get(url, headers=headers).get_json()['data']
+        ids.extend(item['id'] for item in page['list'])
+        url = page['nextCursor'] and f"/api/mistake/list?sortBy=frequency&size=2&cursor={page['nextCursor']}"
+    assert ids == [1, 2, 3]
+
+    # 移出错题本的题目不再出现，统计保留
+    client.post('/api/mistake/delete', headers=headers, json={'topicId': 1})
+    data = client.get('/api/mistake/list?sortBy=frequency', headers=headers).get_json()['data']
+    assert [item['id'] for item in data['list']] == [2, 3]
+    assert wrong_counts()[1] == 3
+
+
+def test_backfill_from_exam_details(client):
+    now = datetime.datetime.now()
+    with app.app_context():
+        record = ExamRecord(
+            user_id=OTHER_USER_ID, score=0, total_questions=3, correct_count=1, wrong_count=2, used_time=60
+        )
+        db.session.add(record)
+        db.session.flush()
+        for topic_id, is_correct in ((5, False), (6, False), (7, True)):
+            db.session.add(ExamDetail(
+                exam_record_id=record.id, topic_id=topic_id, user_answer='B', is_correct=is_correct, created_at=now
+            ))
+        record = ExamRecord(
+            user_id=OTHER_USER_ID, score=0, total_questions=1, correct_count=0, wrong_count=1, used_time=60
+        )
+        db.session.add(record)
+        db.session.flush()
+        db.session.add(ExamDetail(exam_record_id=record.id, topic_id=5, user_answer='B', is_correct=False, created_at=now))
+        # 只在练习中答错的旧错题
+        db.session.add(UserMistake(user_id=OTHER_USER_ID, topic_id=8))
+        db.session.commit()
+
+        backfill(db.engine, batch_size=1)
+    assert wrong_counts(OTHER_USER_ID) == {5: 2, 6: 1, 8: 1}
+
+    # 重复执行结果不变，已有的更大计数（上线后的增量）保留
+    with app.app_context():
+        db.session.query(UserMistakeStat).filter_by(user_id=OTHER_USER_ID, topic_id=6).update({'wrong_count': 4})
+        db.session.commit()
+        backfill(db.engine)
+    assert wrong_counts(OTHER_USER_ID) == {5: 2, 6: 4, 8: 1}
+    # 已有用户的增量统计不受影响
+    assert wrong_counts()[1] == 3
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+月份统计测试
+验证 /api/user/month-dashboard 按月份返回题目总数和当前用户的完成数（没有题目的月份为 0、不统计其他用户），
+并与 /api/topics/count-by-month、/api/user/month-progress 的结果一致
+
+使用内存 SQLite 运行：python -m pytest test_month_dashboard.py
+"""
+
+import json
+
+import pytest
+
+from app import app, bump_topic_bank_version, Topic, User, UserTopicProgress
+
+USER_ID = 31
+OTHER_USER_ID = 32
+# 月份 -> 各题型的题目数；其余月份没有题目，另有 1 道没有月份的题目
+TOPICS_BY_MONTH = {1: {1: 2, 2: 1}, 2: {1: 1, 3: 1}, 5: {1: 1, 2: 2, 3: 1}, 12: {3: 1}}
+# 用户完成的题目：(月份, 该月第几道题)
+COMPLETED = {USER_ID: [(1, 0), (1, 2), (5, 1), (5, 3)], OTHER_USER_ID: [(2, 0), (2, 1), (12, 0)]}
+
+
+@pytest.fixture(scope='module')
+def client(database):
+    database.session.add(User(id=USER_ID, openid='dashboard_openid', nickname='测试用户'))
+    database.session.add(User(id=OTHER_USER_ID, openid='dashboard_other_openid', nickname='其他用户'))
+    topic_ids = {}
+    topic_id = 0
+    for month, types in TOPICS_BY_MONTH.items():
+        for type_id, count in types.items():
+            for _ in range(count):
+                topic_id += 1
+                topic_ids.setdefault(month, []).append(topic_id)
+                database.session.add(Topic(
+                    id=topic_id, content=f'测试题目{topic_id}', type_id=type_id,
+                    options=json.dumps([{'key': 'A', 'content': '选项A'}], ensure_ascii=False),
+                    answer='A', month=month, region='广东'
+                ))
+    database.session.add(Topic(id=topic_id + 1, content='没有月份的题目', type_id=1, options='[]', answer='A'))
+    for user_id, completed in COMPLETED.items():
+        for month, index in completed:
+            database.session.add(UserTopicProgress(user_id=user_id, topic_id=topic_ids[month][index], month=month))
+    database.session.commit()
+    # 月份题目总数缓存跟随本模块的数据
+    bump_topic_bank_version()
+    return app.test_client()
+
+
+def expected_dashboard(user_id, months):
+    completed = [month for month, _ in COMPLETED[user_id]]
+    return [
+        {'month': month, 'count': sum(TOPICS_BY_MONTH.get(month, {}).values()), 'completedCount': completed.count(month)}
+        for month in months
+    ]
+
+
+def test_month_dashboard_totals_and_progress(client, auth_headers):
+    response = client.get('/api/user/month-dashboard?months=1,2,3,5,12', headers=auth_headers(USER_ID))
+    data = response.get_json()['data']
+    assert data == [
+        {'month': 1, 'count': 3, 'completedCount': 2},
+        {'month': 2, 'count': 2, 'completedCount': 0},
+        {'month': 3, 'count': 0, 'completedCount': 0},
+        {'month': 5, 'count': 4, 'completedCount': 2},
+        {'month': 12, 'count': 1, 'completedCount': 0}
+    ]
+    assert data == expected_dashboard(USER_ID, [1, 2, 3, 5, 12])
+
+    # 未指定月份时返回全部 12 个月，没有题目的月份为 0
+    data = client.get('/api/user/month-dashboard', headers=auth_headers(OTHER_USER_ID)).get_json()['data']
+    assert data == expected_dashboard(OTHER_USER_ID, range(1, 13))
+    assert [item['month'] for item in data if item['count'] == 0] == [3, 4, 6, 7, 8, 9, 10, 11]
+    assert sum(item['completedCount'] for item in data) == 3
+
+
+def test_month_dashboard_matches_separate_endpoints(client, auth_headers):
+    dashboard = client.get('/api/user/month-dashboard', headers=auth_headers(USER_ID)).get_json()['data']
+    counts = client.get('/api/topics/count-by-month').get_json()['data']
+    progress = client.get('/api/user/month-progress', headers=auth_headers(USER_ID)).get_json()['data']
+    assert dashboard == [
+        dict(count_item, completedCount=progress_item['completedCount'])
+        for count_item, progress_item in zip(counts, progress)
+    ]
+
+
+def test_month_dashboard_requires_token(client):
+    assert client.get('/api/user/month-dashboard').status_code == 401
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+"""
+错题、收藏列表游标分页测试
+验证 (created_at, id) 游标在 created_at 重复时逐页遍历不重复、不遗漏，顺序与页码分页一致，
+以及空游标返回首页、格式错误的游标返回 400
+
+使用内存 SQLite 运行：python -m pytest test_pagination.py
+"""
+
+import datetime
+import json
+
+import pytest
+
+from app import app, Topic, User, UserFavorite, UserMistake
+from services.pagination import decode_cursor, encode_cursor
+
+USER_ID = 13
+OTHER_USER_ID = 14
+TOPIC_COUNT = 23
+BASE_TIME = datetime.datetime(2025, 3, 1, 8, 0)
+
+
+def created_at(topic_id):
+    # 只有 4 个不同的时间，同一时间的记录按 id 区分先后；插入顺序与时间无关
+    return BASE_TIME + datetime.timedelta(minutes=(topic_id * 7) % 4)
+
+
+@pytest.fixture(scope='module')
+def client(database):
+    database.session.add(User(id=USER_ID, openid='pagination_openid', nickname='测试用户'))
+    database.session.add(User(id=OTHER_USER_ID, openid='pagination_other_openid', nickname='其他用户'))
+    for i in range(1, TOPIC_COUNT + 1):
+        database.session.add(Topic(
+            id=i,
+            content=f'测试题目{i}',
+            type_id=(i % 3) + 1,
+            options=json.dumps([{'key': 'A', 'content': '选项A'}], ensure_ascii=False),
+            answer='A',
+            month=(i % 2) + 1,
+            region='广东'
+        ))
+    database.session.flush()
+    for topic_id in list(range(2, TOPIC_COUNT + 1, 2)) + list(range(1, TOPIC_COUNT + 1, 2)):
+        database.session.add(UserMistake(user_id=USER_ID, topic_id=topic_id, created_at=created_at(topic_id)))
+        database.session.add(UserFavorite(user_id=USER_ID, topic_id=topic_id, created_at=created_at(topic_id)))
+    # 其他用户的记录不出现在列表中
+    database.session.add(UserMistake(user_id=OTHER_USER_ID, topic_id=1, created_at=BASE_TIME))
+    database.session.add(UserFavorite(user_id=OTHER_USER_ID, topic_id=1, created_at=BASE_TIME))
+    database.session.commit()
+    return app.test_client()
+
+
+def offset_ids(client, headers, url, size):
+    """按页码分页逐页取出全部记录的题目ID"""
+    ids = []
+    page = 1
+    while True:
+        data = client.get(f'{url}&page={page}&size={size}', headers=headers).get_json()['data']
+        ids.extend(item['id'] for item in data['list'])
+        if page * size >= data['total']:
+            return ids, data['total']
+        page += 1
+
+
+def cursor_ids(client, headers, url, size):
+    """从空游标开始逐页取出全部记录的题目ID"""
+    ids = []
+    cursor = ''
+    while True:
+        data = client.get(f'{url}&cursor={cursor}&size={size}&withTotal=1', headers=headers).get_json()['data']
+        assert len(data['list']) <= size
+        ids.extend(item['id'] for item in data['list'])
+        if not data['hasMore']:
+            assert data['nextCursor'] is None
+            return ids, data['total']
+        assert len(data['list']) == size
+        cursor = data['nextCursor']
+
+
+@pytest.mark.parametrize('url', ['/api/mistake/list?sortBy=time', '/api/mistake/list?month=2', '/api/favorite/list?'])
+@pytest.mark.parametrize('size', [1, 3, 4, 50])
+def test_cursor_walk_matches_offset(client, auth_headers, url, size):
+    headers = auth_headers(USER_ID)
+    expected, expected_total = offset_ids(client, headers, url, size)
+    actual, total = cursor_ids(client, headers, url, size)
+
+    assert actual == expected
+    assert len(actual) == len(set(actual)) == total == expected_total
+    if 'month' in url:
+        assert set(actual) == {i for i in range(1, TOPIC_COUNT + 1) if i % 2 == 1}
+    else:
+        assert set(actual) == set(range(1, TOPIC_COUNT + 1))
+    # (created_at, id) 倒序：同一时间的记录多于一页时同样按 id 接续
+    times = [created_at(topic_id) for topic_id in actual]
+    assert times == sorted(times, reverse=True)
+
+
+def test_cursor_encodes_time_and_id():
+    cursor = encode_cursor([BASE_TIME, 42])
+    assert '=' not in cursor
+    assert decode_cursor(cursor, 2) == [BASE_TIME.isoformat(), 42]
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 3)
+
+
+@pytest.mark.parametrize('url', ['/api/mistake/list', '/api/favorite/list'])
+def test_empty_and_invalid_cursor(client, auth_headers, url):
+    headers = auth_headers(USER_ID)
+    # 空游标返回首页，与页码分页的第一页相同
+    first = client.get(f'{url}?cursor=&size=5', headers=headers).get_json()['data']
+    page_one = client.get(f'{url}?page=1&size=5', headers=headers).get_json()['data']
+    assert first['list'] == page_one['list']
+    assert first['hasMore'] is True
+    assert 'total' not in first
+
+    invalid_cursors = [
+        'not-a-cursor!',
+        encode_cursor([42]),                                  # 排序键数量不对
+        encode_cursor(['yesterday', 1]),                      # 时间格式错误
+        encode_cursor([BASE_TIME.isoformat(), '1']),          # id 不是整数
+        encode_cursor([BASE_TIME.isoformat(), True])
+    ]
+    for cursor in invalid_cursors:
+        response = client.get(f'{url}?cursor={cursor}&size=5', headers=headers)
+        assert response.status_code == 400
+        assert response.get_json()['message'] == '无效的分页游标'
+
+    # 最后一条记录之后没有数据
+    last = encode_cursor([BASE_TIME - datetime.timedelta(days=1), 1])
+    data = client.get(f'{url}?cursor={last}&size=5', headers=headers).get_json()['data']
+    assert data['list'] == [] and data['hasMore'] is False and data['nextCursor'] is None
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+PDF并行解析测试
+验证跨页（跨文本块）的题目能正确拼接，以及并行解析与单进程解析结果一致
+
+运行：python -m pytest test_pdf_pipeline.py
+"""
+
+import glob
+import os
+import sys
+
+# 添加backend目录到路径
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+import pytest
+
+from questions.extractPDF import extract_data_from_pdf, parse_blocks
+from questions.topic_parser import parse_questions
+
+
+def test_parse_blocks_across_pages():
+    # 第一页末尾只有题干和前两个选项，其余部分在下一页
+    page_one = ['2025年3月时事政治题库', '1.2025年3月5日，十四届全国人大三次会议在北京开幕，会议\n听取了政府工作报告', 'A.国务院\nB.全国人大']
+    page_two = ['C.全国政协\nD.最高法\n【正确答案】A', '2.下列说法正确的是（多选）\nA.甲\nB.乙\nC.丙\nD.丁\n【正确答案】AB']
+
+    topics = list(parse_blocks(page_one + page_two))
+    assert len(topics) == 2
+    assert topics[0]['content'] == '2025年3月5日，十四届全国人大三次会议在北京开幕，会议 听取了政府工作报告'
+    assert [option['key'] for option in topics[0]['options']] == ['A', 'B', 'C', 'D']
+    assert topics[0]['answer'] == 'A'
+    assert topics[0]['month'] == 3
+    assert topics[1]['type_id'] == 2
+    assert topics[1]['answer'] == 'AB'
+
+
+def test_parse_questions_line_priority():
+    blocks = [
+        '忽略月份标题之前的内容\n1.不会被解析',
+        '2025年4月时事政治题库',
+        '3.题干\nB.乙\nA.甲\n续行追加到字母最大的选项\nD.丁 【正确答案】C\nC.丙\n2024.年度数字开头的行是新题目'
+    ]
+
+    questions = list(parse_questions(blocks))
+    assert [question['num'] for question in questions] == ['3', '2024']
+    # 题号之后优先识别正确答案，以 D. 开头但包含答案的行不作为选项
+    assert questions[0]['answer'] == 'C'
+    assert questions[0]['options'] == {'B': '乙 续行追加到字母最大的选项', 'A': '甲', 'C': '丙'}
+    assert questions[0]['month'] == '4'
+    assert questions[1]['answer'] is None
+
+
+PDF_FILES = sorted(glob.glob(os.path.join(BACKEND_DIR, 'questions', '*.pdf')))
+
+
+@pytest.mark.skipif(not PDF_FILES, reason='没有可用的PDF文件')
+def test_parallel_extraction_matches_serial():
+    pdf_path = min(PDF_FILES, key=os.path.getsize)
+    serial = extract_data_from_pdf(pdf_path)
+    assert serial
+    assert extract_data_from_pdf(pdf_path, workers=2) == serial
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
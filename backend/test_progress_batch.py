@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""
+批量记录完成进度测试
+验证 /api/progress/finish-topics 逐条返回处理结果（ok / invalid / not_found / duplicate）、
+写入数量，以及重复提交不产生重复记录
+
+使用内存 SQLite 运行：python -m pytest test_progress_batch.py
+"""
+
+import json
+
+import pytest
+
+from app import app, db, MAX_PROGRESS_BATCH, Topic, User, UserTopicProgress
+
+USER_ID = 21
+
+
+@pytest.fixture(scope='module')
+def client(database):
+    database.session.add(User(id=USER_ID, openid='progress_batch_openid', nickname='测试用户'))
+    for i in range(1, 6):
+        database.session.add(Topic(
+            id=i,
+            content=f'测试题目{i}',
+            type_id=1,
+            options=json.dumps([{'key': 'A', 'content': '选项A'}], ensure_ascii=False),
+            answer='A',
+            month=i,
+            region='广东'
+        ))
+    database.session.commit()
+    return app.test_client()
+
+
+def progress_rows():
+    with app.app_context():
+        return sorted(
+            tuple(row) for row in db.session.query(UserTopicProgress.topic_id, UserTopicProgress.month)
+            .filter_by(user_id=USER_ID)
+        )
+
+
+def test_finish_topics_per_item_results(client, auth_headers):
+    items = [
+        {'topicId': 1, 'month': 1},
+        {'topicId': 'x', 'month': 1},       # 类型错误
+        {'topicId': 2},                     # 缺少月份
+        'not-an-object',
+        {'topicId': 9999, 'month': 3},      # 题目不存在
+        {'topicId': 1, 'month': 1},         # 同一请求内重复
+        {'topicId': 1, 'month': 2},         # 同一题目的不同月份
+        {'topicId': '3', 'month': '3'},     # 字符串数字可以转换
+    ]
+    response = client.post('/api/progress/finish-topics', headers=auth_headers(USER_ID), json={'items': items})
+    data = response.get_json()
+    assert data['code'] == 0
+    assert [result['status'] for result in data['data']['results']] == [
+        'ok', 'invalid', 'invalid', 'invalid', 'not_found', 'duplicate', 'ok', 'ok'
+    ]
+    assert data['data']['results'][7] == {'topicId': 3, 'month': 3, 'status': 'ok'}
+    assert data['data']['results'][1] == {'topicId': None, 'month': None, 'status': 'invalid'}
+    assert data['data']['accepted'] == 3
+    assert data['data']['inserted'] == 3
+    assert progress_rows() == [(1, 1), (1, 2), (3, 3)]
+
+    # 再次提交：已存在的记录被唯一键忽略，不写入新记录
+    response = client.post('/api/progress/finish-topics', headers=auth_headers(USER_ID), json={'items': items})
+    data = response.get_json()['data']
+    assert data['accepted'] == 3
+    assert data['inserted'] == 0
+    assert [result['status'] for result in data['results']] == [
+        'ok', 'invalid', 'invalid', 'invalid', 'not_found', 'duplicate', 'ok', 'ok'
+    ]
+    assert progress_rows() == [(1, 1), (1, 2), (3, 3)]
+
+
+def test_finish_topics_rejects_bad_batches(client, auth_headers):
+    oversized = {'items': [{'topicId': 1, 'month': 1}] * (MAX_PROGRESS_BATCH + 1)}
+    for body in ({}, {'items': []}, {'items': 'abc'}, oversized):
+        assert client.post('/api/progress/finish-topics', headers=auth_headers(USER_ID), json=body).get_json()['code'] == 1
+    assert progress_rows() == [(1, 1), (1, 2), (3, 3)]
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+SQL 语句数量回归测试
+验证错题、收藏、考试详情列表接口的 SQL 语句数量不随返回条数增长（防止 N+1 查询）
+
+使用内存 SQLite 运行：python -m pytest test_query_counts.py
+"""
+
+import json
+
+import pytest
+
+from app import app, db, Topic, User, UserMistake, UserFavorite, ExamRecord, ExamDetail
+
+USER_ID = 1
+TOPIC_COUNT = 30
+
+
+@pytest.fixture(scope='module')
+def client(database):
+    database.session.add(User(id=USER_ID, openid='test_openid', nickname='测试用户'))
+    for i in range(1, TOPIC_COUNT + 1):
+        database.session.add(Topic(
+            id=i,
+            content=f'测试题目{i}',
+            type_id=1,
+            options=json.dumps([{'key': 'A', 'content': '选项A'}, {'key': 'B', 'content': '选项B'}], ensure_ascii=False),
+            answer='A',
+            analysis='解析',
+            month=(i % 12) + 1,
+            region='广东'
+        ))
+    database.session.commit()
+    return app.test_client()
+
+
+@pytest.fixture
+def request_query_count(client, auth_headers, count_queries):
+    """返回请求接口的函数，函数返回 (SQL 语句数量, 响应数据)"""
+    def fetch(url):
+        # 先请求一次，预热进程内的题目缓存
+        client.get(url, headers=auth_headers(USER_ID))
+        with count_queries() as statements:
+            response = client.get(url, headers=auth_headers(USER_ID))
+        assert response.status_code == 200
+        return len(statements), response.get_json()['data']
+    return fetch
+
+
+def test_mistake_list_query_count(request_query_count):
+    for topic_id in (1, 2):
+        db.session.add(UserMistake(user_id=USER_ID, topic_id=topic_id))
+    db.session.commit()
+    small_count, data = request_query_count('/api/mistake/list?size=50')
+    assert len(data['list']) == 2
+
+    for topic_id in range(3, 21):
+        db.session.add(UserMistake(user_id=USER_ID, topic_id=topic_id))
+    db.session.commit()
+    large_count, data = request_query_count('/api/mistake/list?size=50')
+    assert len(data['list']) == 20
+    assert data['list'][0]['content'].startswith('测试题目')
+
+    # COUNT + 分页查询，与返回条数无关
+    assert large_count == small_count <= 2
+
+
+def test_favorite_list_query_count(request_query_count):
+    for topic_id in (1, 2):
+        db.session.add(UserFavorite(user_id=USER_ID, topic_id=topic_id))
+    db.session.commit()
+    small_count, data = request_query_count('/api/favorite/list?size=50')
+    assert len(data['list']) == 2
+
+    for topic_id in range(3, 21):
+        db.session.add(UserFavorite(user_id=USER_ID, topic_id=topic_id))
+    db.session.commit()
+    large_count, data = request_query_count('/api/favorite/list?size=50')
+    assert len(data['list']) == 20
+
+    assert large_count == small_count <= 2
+
+
+def test_exam_detail_query_count(request_query_count):
+    counts = []
+    for question_count in (2, 20):
+        record = ExamRecord(
+            user_id=USER_ID, score=100, total_questions=question_count,
+            correct_count=question_count, wrong_count=0, used_time=60
+        )
+        db.session.add(record)
+        db.session.flush()
+        for topic_id in range(1, question_count + 1):
+            db.session.add(ExamDetail(exam_record_id=record.id, topic_id=topic_id, user_answer='A', is_correct=True))
+        db.session.commit()
+
+        query_count, data = request_query_count(f'/api/exam/detail/{record.id}')
+        assert len(data['details']) == question_count
+        counts.append(query_count)
+
+    # 考试记录 + 答题详情
+    assert counts[0] == counts[1] <= 2
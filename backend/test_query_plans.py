@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+"""
+查询计划回归测试
+在 scripts/generate_data.py 生成的大规模 MySQL 数据上依次请求各接口，记录接口执行的每条 SELECT / UPDATE / DELETE
+并执行 EXPLAIN，在大表（行数达到 EXPLAIN_LARGE_TABLE_ROWS，默认 100000）上出现以下情况时失败：
+- 不使用索引的全表扫描（type 为 ALL）或全索引扫描（type 为 index）
+- Using filesort / Using temporary
+
+需要 MySQL：未设置 EXPLAIN_DATABASE_URL 时跳过。app 在一个进程中只连接一个数据库，需要单独运行：
+    python scripts/generate_data.py --database-url mysql+pymysql://root:pw@127.0.0.1/sz_exam_perf
+    EXPLAIN_DATABASE_URL=mysql+pymysql://root:pw@127.0.0.1/sz_exam_perf python -m pytest test_query_plans.py
+
+写接口会修改用户 1 和用户 2 的数据，请使用专门生成的库。判定规则（check_plan）的测试不需要 MySQL。
+"""
+
+import datetime
+import os
+import re
+import sys
+
+# 添加backend目录到路径，并在导入 app 之前切换到待检查的数据库
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+EXPLAIN_DATABASE_URL = os.environ.get('EXPLAIN_DATABASE_URL')
+os.environ['DATABASE_URL'] = EXPLAIN_DATABASE_URL or 'sqlite://'
+os.environ['TOPIC_VERSION_CHECK_INTERVAL'] = '3600'
+
+import jwt
+import pytest
+from sqlalchemy import event, text
+
+from app import app, db
+
+LARGE_TABLE_ROWS = int(os.environ.get('EXPLAIN_LARGE_TABLE_ROWS', 100000))
+USER_ID = 1
+# 清空错题本和收藏夹的接口使用另一个用户，不影响其他接口的数据
+OTHER_USER_ID = 2
+TOPIC_ID = 1
+
+FULL_SCAN_TYPES = ('ALL', 'index')
+BAD_EXTRAS = ('Using filesort', 'Using temporary')
+EXPLAINED_STATEMENTS = ('SELECT', 'UPDATE', 'DELETE')
+# 表名后面可能出现的关键字，不是别名（JOIN 之后的表名需要再次匹配）
+ALIAS_KEYWORDS = {
+    'WHERE', 'ON', 'USING', 'INNER', 'LEFT', 'RIGHT', 'CROSS', 'JOIN', 'ORDER', 'GROUP', 'LIMIT',
+    'SET', 'FOR', 'HAVING', 'UNION', 'VALUES', 'FORCE', 'USE', 'IGNORE', 'STRAIGHT_JOIN'
+}
+TABLE_PATTERN = re.compile(
+    r'\b(?:FROM|JOIN|UPDATE|INTO)\s+`?(\w+)`?(?:\s+(?:AS\s+)?(?!(?:%s)\b)`?(\w+)`?)?' % '|'.join(ALIAS_KEYWORDS),
+    re.IGNORECASE
+)
+
+# (名称, 方法, URL, 请求体, 用户)，URL 中的 {record_id} 等由 context 填充
+SCENARIOS = [
+    ('login', 'POST', '/api/login', {'code': 'explain'}, None),
+    ('topics_page', 'GET', '/api/topics?page=3&size=10', None, None),
+    ('topics_filtered', 'GET', '/api/topics?page=2&size=10&type=1&month=3&region=全国', None, None),
+    ('topics_cursor', 'GET', '/api/topics?cursor=&size=10&withTotal=1&month=5', None, None),
+    ('topics_unanswered', 'GET', '/api/topics?excludeAnswered=1&userId={user_id}&page=2&size=10', None, None),
+    ('topics_unanswered_cursor', 'GET', '/api/topics?excludeAnswered=1&userId={user_id}&cursor=&size=10&withTotal=1',
+     None, None),
+    ('topics_random', 'GET', '/api/topics/random?months=1,2,3&count=10', None, None),
+    ('topics_random_range', 'GET', '/api/topics/random?startMonth=11&endMonth=2&count=10', None, None),
+    ('exam_random', 'GET', '/api/exam/random?count=20', None, None),
+    ('exam_detail', 'GET', '/api/exam/detail/{record_id}', None, USER_ID),
+    ('mistake_list', 'GET', '/api/mistake/list?page=2&size=10', None, USER_ID),
+    ('mistake_list_filtered', 'GET', '/api/mistake/list?page=1&size=10&month=3&type=1', None, USER_ID),
+    ('mistake_list_cursor', 'GET', '/api/mistake/list?cursor=&size=10&withTotal=1', None, USER_ID),
+    ('mistake_list_frequency', 'GET', '/api/mistake/list?sortBy=frequency&page=2&size=10', None, USER_ID),
+    ('mistake_list_frequency_cursor', 'GET', '/api/mistake/list?sortBy=frequency&cursor=&size=10&withTotal=1',
+     None, USER_ID),
+    ('mistake_statistics', 'GET', '/api/mistake/statistics', None, USER_ID),
+    ('favorite_list', 'GET', '/api/favorite/list?page=1&size=10', None, USER_ID),
+    ('favorite_list_cursor', 'GET', '/api/favorite/list?cursor=&size=10&withTotal=1', None, USER_ID),
+    ('user_statistics', 'GET', '/api/user/statistics', None, USER_ID),
+    ('count_by_month', 'GET', '/api/topics/count-by-month', None, None),
+    ('month_progress', 'GET', '/api/user/month-progress?months=1,2,3,4,5,6,7,8,9,10,11,12', None, USER_ID),
+    ('month_dashboard', 'GET', '/api/user/month-dashboard?months=1,2,3,4,5,6,7,8,9,10,11,12', None, USER_ID),
+    ('admin_topic_statistics', 'GET', '/api/admin/topics/statistics', None, 'admin'),
+    ('mistake_add', 'POST', '/api/mistake/add', {'topicId': TOPIC_ID}, USER_ID),
+    ('mistake_delete', 'POST', '/api/mistake/delete', {'topicId': TOPIC_ID}, USER_ID),
+    ('favorite_add', 'POST', '/api/favorite/add', {'topicId': TOPIC_ID}, USER_ID),
+    ('favorite_delete', 'POST', '/api/favorite/delete', {'topicId': TOPIC_ID}, USER_ID),
+    ('finish_topic', 'POST', '/api/progress/finish-topic', {'topicId': TOPIC_ID, 'month': 1}, USER_ID),
+    ('finish_topics', 'POST', '/api/progress/finish-topics',
+     {'items': [{'topicId': topic_id, 'month': (topic_id - 1) % 12 + 1} for topic_id in range(1, 11)]}, USER_ID),
+    ('exam_submit', 'POST', '/api/exam/submit', {
+        'totalQuestions': 20, 'usedTime': 600,
+        'details': [{'topicId': topic_id, 'userAnswer': 'A'} for topic_id in range(1, 21)]
+    }, USER_ID),
+    ('mistake_clear', 'POST', '/api/mistake/clear', {}, OTHER_USER_ID),
+    ('favorite_clear', 'POST', '/api/favorite/clear', {}, OTHER_USER_ID),
+]
+
+
+def table_aliases(statement):
+    """
+    从 SQL 中解析表别名
+
+    Returns:
+        dict: 别名（以及表名本身）到表名的映射
+    """
+    aliases = {}
+    for name, alias in TABLE_PATTERN.findall(statement):
+        aliases[name] = name
+        if alias:
+            aliases[alias] = name
+    return aliases
+
+
+def check_plan(plan, table_sizes, aliases, large_rows=LARGE_TABLE_ROWS):
+    """
+    检查 EXPLAIN 结果
+
+    Args:
+        plan: EXPLAIN 的结果行（字典，键为 table、type、key、rows、Extra 等）
+        table_sizes: 表名到行数的映射
+        aliases: table_aliases 的返回值
+        large_rows: 行数达到该值的表视为大表
+
+    Returns:
+        list: 问题描述，为空表示通过
+    """
+    problems = []
+    for row in plan:
+        name = aliases.get(row.get('table'), row.get('table'))
+        # 派生表、无表查询（SELECT 1）和小表不检查
+        if not name or table_sizes.get(name, 0) < large_rows:
+            continue
+        detail = f"type={row.get('type')}, key={row.get('key')}, rows={row.get('rows')}, Extra={row.get('Extra')}"
+        if row.get('type') in FULL_SCAN_TYPES:
+            problems.append(f'{name}: 未使用索引定位 ({detail})')
+        for extra in BAD_EXTRAS:
+            if extra in (row.get('Extra') or ''):
+                problems.append(f'{name}: {extra} ({detail})')
+    return problems
+
+
+def test_table_aliases():
+    statement = (
+        'SELECT m.user_id, t.type_id FROM user_mistake m JOIN topic AS t ON t.id = m.topic_id '
+        'WHERE m.user_id IN (1) GROUP BY m.user_id'
+    )
+    assert table_aliases(statement) == {'user_mistake': 'user_mistake', 'm': 'user_mistake', 'topic': 'topic', 't': 'topic'}
+    assert table_aliases('SELECT count(*) FROM user_topic_progress WHERE user_id = %s') == {
+        'user_topic_progress': 'user_topic_progress'
+    }
+    assert table_aliases('DELETE FROM user_mistake WHERE user_mistake.user_id = %s') == {'user_mistake': 'user_mistake'}
+    assert table_aliases(
+        'SELECT count(*) FROM (SELECT user_mistake.id FROM user_mistake JOIN topic ON topic.id = user_mistake.topic_id '
+        'WHERE user_mistake.user_id = %s) AS anon_1'
+    ) == {'user_mistake': 'user_mistake', 'topic': 'topic'}
+
+
+def test_check_plan():
+    sizes = {'user_mistake': 600000, 'topic': 10000}
+    aliases = {'user_mistake': 'user_mistake', 'm': 'user_mistake', 'topic': 'topic'}
+    good = [
+        {'table': 'm', 'type': 'ref', 'key': 'idx_user_created', 'rows': 30, 'Extra': 'Backward index scan'},
+        {'table': 'topic', 'type': 'eq_ref', 'key': 'PRIMARY', 'rows': 1, 'Extra': None},
+        # 小表和无表查询不检查
+        {'table': 'topic', 'type': 'ALL', 'key': None, 'rows': 10000, 'Extra': 'Using temporary; Using filesort'},
+        {'table': None, 'type': None, 'key': None, 'rows': None, 'Extra': 'No tables used'}
+    ]
+    assert check_plan(good, sizes, aliases) == []
+
+    scan = [{'table': 'm', 'type': 'ALL', 'key': None, 'rows': 598000, 'Extra': 'Using where'}]
+    assert check_plan(scan, sizes, aliases) == [
+        'user_mistake: 未使用索引定位 (type=ALL, key=None, rows=598000, Extra=Using where)'
+    ]
+    sort = [{'table': 'user_mistake', 'type': 'ref', 'key': 'idx_user_id', 'rows': 30,
+             'Extra': 'Using where; Using temporary; Using filesort'}]
+    assert [problem.split(' (')[0] for problem in check_plan(sort, sizes, aliases)] == [
+        'user_mistake: Using filesort', 'user_mistake: Using temporary'
+    ]
+    # 阈值以上才视为大表
+    assert check_plan(scan, sizes, aliases, large_rows=1000000) == []
+
+
+@pytest.fixture(scope='module')
+def context():
+    """检查数据库为生成的 MySQL 数据，返回各表行数和场景需要的数据"""
+    if not EXPLAIN_DATABASE_URL:
+        pytest.skip('未设置 EXPLAIN_DATABASE_URL')
+    with app.app_context():
+        if db.engine.dialect.name != 'mysql':
+            pytest.skip('app 已连接其他数据库（与其他测试一起运行时），请单独运行 test_query_plans.py')
+        # InnoDB 的 table_rows 为估算值，生成数据后已 ANALYZE TABLE
+        table_sizes = {
+            name: rows or 0 for name, rows in db.session.execute(text(
+                "SELECT table_name, table_rows FROM information_schema.tables WHERE table_schema = DATABASE()"
+            ))
+        }
+        openids = dict(db.session.execute(
+            text('SELECT id, openid FROM user WHERE id IN (:user_id, :other_user_id)'),
+            {'user_id': USER_ID, 'other_user_id': OTHER_USER_ID}
+        ).all())
+        record_id = db.session.execute(
+            text('SELECT MAX(id) FROM exam_record WHERE user_id = :user_id'), {'user_id': USER_ID}
+        ).scalar()
+        db.session.remove()
+    if len(openids) < 2 or record_id is None:
+        pytest.skip('数据库中没有生成的数据，先运行 scripts/generate_data.py')
+    if max(table_sizes.values()) < LARGE_TABLE_ROWS:
+        pytest.skip(f'没有行数达到 {LARGE_TABLE_ROWS} 的表，用默认规模运行 scripts/generate_data.py')
+    return {
+        'table_sizes': table_sizes,
+        'openids': openids,
+        'format': {'user_id': USER_ID, 'record_id': record_id}
+    }
+
+
+def headers_for(user, openids):
+    if user == 'admin':
+        return {'X-Admin-Key': os.environ.get('ADMIN_KEY', 'default_admin_key')}
+    if user is None:
+        return {}
+    token = jwt.encode({
+        'user_id': user,
+        'openid': openids[user],
+        'exp': datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=1)
+    }, os.environ.get('SECRET_KEY', 'fallback_secret_key_for_development'), algorithm='HS256')
+    return {'Authorization': f'Bearer {token}'}
+
+
+def explain(statement, parameters):
+    """在原始连接上执行 EXPLAIN，参数与接口执行时相同"""
+    connection = db.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute('EXPLAIN ' + statement, parameters)
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    finally:
+        connection.close()
+
+
+@pytest.mark.parametrize('name,method,url,body,user', SCENARIOS, ids=[scenario[0] for scenario in SCENARIOS])
+def test_query_plan(context, monkeypatch, name, method, url, body, user):
+    if name == 'login':
+        # 调试模式下登录使用固定的 openid，不调用微信接口
+        monkeypatch.setenv('DEBUG_MODE', 'true')
+        monkeypatch.setenv('DEBUG_OPENID', context['openids'][USER_ID])
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, execution_context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(EXPLAINED_STATEMENTS):
+            statements.append((statement, parameters))
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            response = app.test_client().open(
+                url.format(**context['format']), method=method, json=body,
+                headers=headers_for(user, context['openids'])
+            )
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        assert response.status_code < 500, response.get_data(as_text=True)
+
+        problems = []
+        for statement, parameters in statements:
+            plan = explain(statement, parameters)
+            for problem in check_plan(plan, context['table_sizes'], table_aliases(statement)):
+                problems.append(f"{problem}\n    {' '.join(statement.split())[:500]}")
+        db.session.remove()
+    assert not problems, f'{name} 的查询计划退化:\n' + '\n'.join(problems)
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+题目流式备份接口测试
+验证 JSON / NDJSON 输出、gzip 压缩和断点续传参数
+
+使用内存 SQLite 运行：python -m pytest test_topic_backup.py
+"""
+
+import datetime
+import gzip
+import json
+import os
+
+import pytest
+
+import app as app_module
+from app import app, Topic
+
+TOPIC_COUNT = 1203
+ADMIN_HEADERS = {'X-Admin-Key': os.environ.get('ADMIN_KEY', 'default_admin_key')}
+
+
+@pytest.fixture(scope='module')
+def client(database):
+    for i in range(1, TOPIC_COUNT + 1):
+        database.session.add(Topic(
+            id=i,
+            content=f'测试题目{i}',
+            type_id=1,
+            options=json.dumps([{'key': 'A', 'content': '选项A'}], ensure_ascii=False),
+            answer='A',
+            month=(i % 12) + 1,
+            created_at=datetime.datetime(2024, 1, 1) + datetime.timedelta(hours=i)
+        ))
+    database.session.commit()
+    return app.test_client()
+
+
+def test_backup_json(client, monkeypatch):
+    # 使用较小的批次，覆盖多个数据块的拼接
+    monkeypatch.setattr(app_module, 'BACKUP_FETCH_SIZE', 100)
+    response = client.get('/api/admin/topics/backup', headers=ADMIN_HEADERS)
+    assert response.status_code == 200
+    assert response.is_streamed
+
+    data = json.loads(response.get_data())['data']
+    assert data['total'] == TOPIC_COUNT
+    assert [topic['id'] for topic in data['topics']] == list(range(1, TOPIC_COUNT + 1))
+    assert data['topics'][0]['options'] == [{'key': 'A', 'content': '选项A'}]
+    assert data['topics'][0]['created_at'] == '2024-01-01 01:00:00'
+
+
+def test_backup_ndjson_gzip_resume(client):
+    response = client.get('/api/admin/topics/backup?format=ndjson&gzip=1&sinceId=1000', headers=ADMIN_HEADERS)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/gzip'
+    assert response.headers['Content-Disposition'].endswith('.ndjson.gz')
+
+    lines = gzip.decompress(response.get_data()).decode('utf-8').splitlines()
+    assert [json.loads(line)['id'] for line in lines] == list(range(1001, TOPIC_COUNT + 1))
+
+    response = client.get('/api/admin/topics/backup?format=ndjson&sinceCreatedAt=2024-02-20 00:00:00',
+                          headers=ADMIN_HEADERS)
+    ids = [json.loads(line)['id'] for line in response.get_data(as_text=True).splitlines()]
+    assert ids == list(range(1200, TOPIC_COUNT + 1))
+
+
+def test_backup_rejects_bad_params(client):
+    assert client.get('/api/admin/topics/backup').status_code == 403
+    response = client.get('/api/admin/topics/backup?format=csv', headers=ADMIN_HEADERS)
+    assert response.status_code == 400
+    response = client.get('/api/admin/topics/backup?sinceCreatedAt=yesterday', headers=ADMIN_HEADERS)
+    assert response.get_json()['code'] == 400
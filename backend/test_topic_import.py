@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+题目批量导入测试
+验证按内容哈希去重、导入的 SQL 语句数量不随题目数增长，以及某一批写入失败时只回滚该批
+
+使用内存 SQLite 运行：python -m pytest test_topic_import.py
+"""
+
+import os
+
+import pytest
+
+from app import app, db, Topic
+from services.topic_import import content_hash, upsert_topics
+
+ADMIN_HEADERS = {'X-Admin-Key': os.environ.get('ADMIN_KEY', 'default_admin_key')}
+OPTIONS = [{'key': 'A', 'content': '选项A'}, {'key': 'B', 'content': '选项B'}]
+
+
+@pytest.fixture(scope='module')
+def client(database):
+    # ORM 新增的题目由模型默认值计算哈希
+    database.session.add(Topic(content='已有  题目', type_id=1, options='[]', answer='A', month=3))
+    database.session.add(Topic(content='没有月份的题目', type_id=1, options='[]', answer='A'))
+    database.session.commit()
+    return app.test_client()
+
+
+def make_topic(content, month=5):
+    return {'content': content, 'type_id': 1, 'options': OPTIONS, 'answer': 'A', 'month': month}
+
+
+def test_content_hash_normalizes_whitespace(client):
+    assert content_hash('已有 题目') == content_hash(' 已有\n 题目 ')
+    assert content_hash('已有题目') != content_hash('已有 题目')
+    assert Topic.query.filter_by(month=3).one().content_hash == content_hash('已有 题目')
+
+
+def test_import_skips_duplicates(client):
+    topics = [
+        make_topic('已有 题目', month=3),   # 与数据库中的题目重复（空白不同）
+        make_topic('已有 题目', month=4),   # 月份不同，不重复
+        make_topic('没有月份的题目', month=None),
+        make_topic('新题目'),
+        make_topic('新题目'),               # 同一请求内重复
+        {'content': '缺少答案', 'type_id': 1, 'options': OPTIONS},
+    ]
+    response = client.post('/api/admin/topics/import', headers=ADMIN_HEADERS, json={'topics': topics})
+    data = response.get_json()['data']
+    assert data['inserted'] == 2
+    assert data['skipped'] == 4
+    assert data['errors'] == ['题目6缺少字段: answer']
+    assert Topic.query.count() == 4
+
+
+def test_import_statement_count(client, count_queries):
+    topics = [make_topic(f'批量题目{i}', month=(i % 12) + 1) for i in range(1200)]
+    with count_queries() as statements:
+        response = client.post('/api/admin/topics/import', headers=ADMIN_HEADERS, json={'topics': topics})
+    statements = [
+        statement for statement in statements
+        if 'topic' in statement and 'topic_bank_version' not in statement
+    ]
+
+    assert response.get_json()['data']['inserted'] == 1200
+    # 每 500 道题一次哈希查询和一条多行 INSERT
+    assert len(statements) == 6
+
+
+def test_failed_batch_keeps_earlier_batches(client):
+    topics = [make_topic(f'分批题目{i}', month=6) for i in range(5)]
+    # 第二批中的第 4 道题缺少题型（NOT NULL），该批回滚后逐条重试
+    topics[3]['type_id'] = None
+    rows = [dict(topic, options='[]') for topic in topics]
+    before = Topic.query.count()
+
+    with app.app_context():
+        result = upsert_topics(db.session, rows, chunk_size=2)
+        db.session.commit()
+        assert result['inserted'] == 4
+        assert result['duplicates'] == 0
+        assert [index for index, _ in result['failed']] == [3]
+        stored = {row[0] for row in db.session.query(Topic.content).filter(Topic.content.like('分批题目%'))}
+        assert stored == {'分批题目0', '分批题目1', '分批题目2', '分批题目4'}
+        assert Topic.query.count() == before + result['inserted']
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+题目随机抽样测试
+验证月份过滤规则（跨年范围、months 优先于月份范围）、题型桶中题目不足时不重复抽取，
+以及题库版本号递增后抽样缓存重新加载
+
+使用内存 SQLite 运行：python -m pytest test_topic_sampler.py
+"""
+
+import json
+
+import pytest
+
+from app import app, bump_topic_bank_version, topic_sampler, Topic
+from services.topic_sampler import TopicSampler, build_month_predicate
+
+# (id, month, type_id)：每个月 3 道单选、1 道多选，判断题只有 2 道
+ROWS = [(month * 10 + i, month, 1) for month in range(1, 13) for i in range(3)] + \
+    [(month * 10 + 5, month, 2) for month in range(1, 13)] + \
+    [(201, 4, 3), (202, 9, 3)]
+
+
+def make_sampler(rows=ROWS):
+    return TopicSampler(lambda: iter(rows), refresh_interval=3600)
+
+
+def test_month_range_wraps_year():
+    predicate = build_month_predicate(start_month=11, end_month=2)
+    assert [month for month in range(1, 13) if predicate(month)] == [1, 2, 11, 12]
+    assert not predicate(None)
+
+    predicate = build_month_predicate(start_month=3, end_month=5)
+    assert [month for month in range(1, 13) if predicate(month)] == [3, 4, 5]
+    assert [month for month in range(1, 13) if build_month_predicate(start_month=10)(month)] == [10, 11, 12]
+    assert [month for month in range(1, 13) if build_month_predicate(end_month=2)(month)] == [1, 2]
+    assert build_month_predicate() is None
+
+    sampler = make_sampler()
+    topic_ids = sampler.sample(100, month_predicate=build_month_predicate(start_month=11, end_month=2))
+    assert sorted(topic_ids) == sorted(row[0] for row in ROWS if row[1] in (11, 12, 1, 2))
+
+
+def test_months_list_takes_precedence():
+    predicate = build_month_predicate(months=[8, 10], start_month=1, end_month=12)
+    assert [month for month in range(1, 13) if predicate(month)] == [8, 10]
+
+    # 空列表视为未提供，使用月份范围
+    predicate = build_month_predicate(months=[], start_month=11, end_month=1)
+    assert [month for month in range(1, 13) if predicate(month)] == [1, 11, 12]
+
+
+def test_sample_small_bucket_without_duplicates():
+    sampler = make_sampler()
+    # 判断题只有 2 道：请求 10 道只返回这 2 道，不重复
+    for _ in range(20):
+        assert sorted(sampler.sample(10, type_id=3)) == [201, 202]
+    # 同时按月份和题型过滤，桶中只有 1 道
+    assert sampler.sample(5, month_predicate=build_month_predicate(months=[4]), type_id=3) == [201]
+    assert sampler.sample(5, month_predicate=build_month_predicate(months=[5]), type_id=3) == []
+    assert sampler.count(type_id=3) == 2
+
+    # 跨多个桶抽样同样不重复，且都符合条件
+    for _ in range(20):
+        topic_ids = sampler.sample(10, month_predicate=build_month_predicate(months=[1, 2, 3]), type_id=1)
+        assert len(topic_ids) == len(set(topic_ids)) == 9
+        assert all(topic_id // 10 in (1, 2, 3) and topic_id % 10 < 3 for topic_id in topic_ids)
+    assert sampler.sample(0) == []
+    assert sampler.known_ids([201, 999]) == {201}
+
+
+@pytest.fixture(scope='module')
+def client(database):
+    for topic_id, month, type_id in ROWS:
+        database.session.add(Topic(
+            id=topic_id,
+            content=f'测试题目{topic_id}',
+            type_id=type_id,
+            options=json.dumps([{'key': 'A', 'content': '选项A'}], ensure_ascii=False),
+            answer='A',
+            month=month,
+            region='全国'
+        ))
+    database.session.commit()
+    # 抽样缓存跟随本模块的数据，不受其他测试模块缓存的影响
+    bump_topic_bank_version()
+    return app.test_client()
+
+
+def random_ids(client, query):
+    response = client.get(f'/api/topics/random?{query}')
+    return sorted(topic['id'] for topic in response.get_json()['data'])
+
+
+def test_random_endpoint_month_params(client):
+    assert random_ids(client, 'startMonth=12&endMonth=1&count=100') == sorted(
+        row[0] for row in ROWS if row[1] in (12, 1)
+    )
+    # months 优先于 startMonth / endMonth
+    assert random_ids(client, 'months=4&startMonth=1&endMonth=12&count=100') == [40, 41, 42, 45, 201]
+    assert random_ids(client, 'type=3&count=10') == [201, 202]
+
+
+def test_sampler_reloads_after_version_bump(client, database):
+    assert random_ids(client, 'type=3&count=10') == [201, 202]
+    with app.app_context():
+        database.session.add(Topic(id=203, content='新导入的判断题', type_id=3, options='[]', answer='A', month=4))
+        database.session.commit()
+        # 版本号未变化时使用缓存，看不到新题目
+        assert 203 not in topic_sampler.sample(10, type_id=3)
+
+        bump_topic_bank_version()
+        assert sorted(topic_sampler.sample(10, type_id=3)) == [201, 202, 203]
+    assert random_ids(client, 'type=3&months=4&count=10') == [201, 203]
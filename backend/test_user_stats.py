@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+"""
+用户统计汇总测试
+验证错题、收藏、完成进度、考试提交后统计与明细表计算结果一致，统计接口只执行一次主键查询，
+首次读取时先插入统计行再计算，以及修复脚本可以修正与明细不一致的统计
+
+使用内存 SQLite 运行：python -m pytest test_user_stats.py
+"""
+
+import json
+
+import pytest
+
+from app import app, db, Topic, User, UserMistake, UserStat
+from repair_user_stats import repair
+from services.user_stats import compute_user_stats, stats_equal
+
+USER_ID = 11
+OTHER_USER_ID = 12
+
+
+@pytest.fixture(scope='module')
+def client(database):
+    database.session.add(User(id=USER_ID, openid='user_stat_openid', nickname='测试用户'))
+    database.session.add(User(id=OTHER_USER_ID, openid='user_stat_other_openid', nickname='其他用户'))
+    for i in range(1, 21):
+        database.session.add(Topic(
+            id=i,
+            content=f'测试题目{i}',
+            type_id=2 if i % 2 == 0 else 1,
+            options=json.dumps([{'key': 'A', 'content': '选项A'}, {'key': 'B', 'content': '选项B'}], ensure_ascii=False),
+            answer='A',
+            month=(i % 12) + 1,
+            region='广东'
+        ))
+    database.session.commit()
+    return app.test_client()
+
+
+def assert_stat_consistent(client, headers, user_id=USER_ID):
+    """接口返回的统计与明细表重新计算的结果一致"""
+    with app.app_context():
+        expected = compute_user_stats(db.session, [user_id])[user_id]
+    user_data = client.get('/api/user/statistics', headers=headers).get_json()['data']
+    mistake_data = client.get('/api/mistake/statistics', headers=headers).get_json()['data']
+    assert user_data['mistakeCount'] == expected['mistake_count']
+    assert user_data['favoriteCount'] == expected['favorite_count']
+    assert user_data['doneCount'] == expected['done_count']
+    assert user_data['daysCount'] == 1
+    assert mistake_data == {
+        'totalCount': expected['mistake_count'],
+        'byType': expected['mistakes_by_type'],
+        'byMonth': expected['mistakes_by_month']
+    }
+    return expected
+
+
+def test_write_paths_keep_stat_in_sync(client, auth_headers):
+    headers = auth_headers(USER_ID)
+    # 首次读取时由明细表构建统计行
+    assert assert_stat_consistent(client, headers)['mistake_count'] == 0
+    with app.app_context():
+        assert db.session.get(UserStat, USER_ID) is not None
+
+    for topic_id in (1, 2, 3, 3):
+        client.post('/api/mistake/add', headers=headers, json={'topicId': topic_id})
+    for topic_id in (4, 5, 5):
+        client.post('/api/favorite/add', headers=headers, json={'topicId': topic_id})
+    client.post('/api/progress/finish-topic', headers=headers, json={'topicId': 1, 'month': 2})
+    client.post('/api/progress/finish-topics', headers=headers, json={'items': [
+        {'topicId': 1, 'month': 2}, {'topicId': 6, 'month': 7}, {'topicId': 7, 'month': 8}
+    ]})
+    expected = assert_stat_consistent(client, headers)
+    assert (expected['mistake_count'], expected['favorite_count'], expected['done_count']) == (3, 2, 3)
+
+    # 考试中答错的题目加入错题本（题目 3 已在错题本中）
+    client.post('/api/exam/submit', headers=headers, json={'totalQuestions': 3, 'details': [
+        {'topicId': 3, 'userAnswer': 'B'}, {'topicId': 8, 'userAnswer': 'B'}, {'topicId': 9, 'userAnswer': 'A'}
+    ]})
+    expected = assert_stat_consistent(client, headers)
+    assert (expected['mistake_count'], expected['done_count']) == (4, 6)
+
+    client.post('/api/mistake/delete', headers=headers, json={'topicId': 2})
+    client.post('/api/mistake/delete', headers=headers, json={'topicId': 2})
+    client.post('/api/favorite/delete', headers=headers, json={'topicId': 4})
+    assert assert_stat_consistent(client, headers)['mistake_count'] == 3
+
+    client.post('/api/mistake/clear', headers=headers)
+    client.post('/api/favorite/clear', headers=headers)
+    expected = assert_stat_consistent(client, headers)
+    assert (expected['mistake_count'], expected['favorite_count']) == (0, 0)
+
+
+def test_statistics_single_select(client, auth_headers, count_queries):
+    headers = auth_headers(USER_ID)
+    client.get('/api/user/statistics', headers=headers)
+    for url in ('/api/user/statistics', '/api/mistake/statistics'):
+        with count_queries() as statements:
+            assert client.get(url, headers=headers).get_json()['code'] == 0
+        assert len(statements) == 1
+        assert 'user_stat' in statements[0]
+
+
+def test_first_read_creates_row_before_computing(client, auth_headers, count_queries):
+    headers = auth_headers(USER_ID)
+    # 统计行先插入并锁定，再由明细表计算：与之并发的写操作能找到统计行（MySQL 上等待行锁）而不是跳过更新
+    with app.app_context():
+        db.session.query(UserStat).filter_by(user_id=USER_ID).delete()
+        db.session.commit()
+    with count_queries() as statements:
+        assert client.get('/api/user/statistics', headers=headers).get_json()['code'] == 0
+    first_insert = next(i for i, statement in enumerate(statements) if 'INSERT' in statement and 'user_stat' in statement)
+    first_compute = next(i for i, statement in enumerate(statements) if 'user_topic_progress' in statement)
+    assert first_insert < first_compute
+    assert_stat_consistent(client, headers)
+
+
+def test_repair_fixes_drift(client, auth_headers):
+    headers = auth_headers(OTHER_USER_ID)
+    client.post('/api/mistake/add', headers=headers, json={'topicId': 10})
+    client.post('/api/favorite/add', headers=headers, json={'topicId': 10})
+    # 统计行尚未构建前写入的明细，首次读取时计入
+    assert assert_stat_consistent(client, headers, OTHER_USER_ID)['mistake_count'] == 1
+
+    # 绕过接口直接修改明细（例如删除题目时级联删除错题），统计与明细不一致
+    with app.app_context():
+        db.session.add(UserMistake(user_id=OTHER_USER_ID, topic_id=11))
+        db.session.query(UserStat).filter_by(user_id=OTHER_USER_ID).update({'favorite_count': 5})
+        db.session.commit()
+
+        checked, repaired, created = repair(db.engine, batch_size=1, dry_run=True)
+        assert (checked, repaired, created) == (2, [OTHER_USER_ID], 0)
+        assert db.session.get(UserStat, OTHER_USER_ID).favorite_count == 5
+
+        repair(db.engine, batch_size=1)
+        db.session.expire_all()
+        stored = db.session.get(UserStat, OTHER_USER_ID)
+        expected = compute_user_stats(db.session, [OTHER_USER_ID])[OTHER_USER_ID]
+        assert (stored.mistake_count, stored.favorite_count) == (2, 1)
+        assert stats_equal({
+            'user_id': OTHER_USER_ID,
+            'mistake_count': stored.mistake_count,
+            'favorite_count': stored.favorite_count,
+            'done_count': stored.done_count,
+            'mistakes_by_type': json.loads(stored.mistakes_by_type),
+            'mistakes_by_month': json.loads(stored.mistakes_by_month),
+            'registered_at': stored.registered_at
+        }, expected)
+
+        # 修复后再次执行没有不一致
+        assert repair(db.engine)[1] == []
+    assert_stat_consistent(client, headers, OTHER_USER_ID)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+微信接口客户端测试
+使用 scripts/fake_wechat_server.py 在本地模拟 jscode2session，验证正常登录、错误码、
+系统繁忙重试、非 JSON 响应和读取超时不重试以及并发上限，并验证登录接口的响应
+
+运行：python -m pytest test_wechat_client.py
+"""
+
+import hashlib
+import threading
+
+import pytest
+
+from fake_wechat_server import create_server
+from services.wechat import WeChatClient, WeChatError, WeChatUnavailable
+
+
+@pytest.fixture(scope='module')
+def fake_server():
+    server = create_server(port=0, slow_ms=1000)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(server, **kwargs):
+    options = dict(read_timeout=0.5, retry_backoff=0.01)
+    options.update(kwargs)
+    return WeChatClient('appid', 'secret', api_base=f'http://127.0.0.1:{server.server_address[1]}', **options)
+
+
+def test_code2session(fake_server):
+    client = make_client(fake_server)
+    first = client.code2session('code_1')
+    assert first['openid'].startswith('fake_') and first['session_key']
+    assert client.code2session('code_1')['openid'] == first['openid']
+
+    with pytest.raises(WeChatError) as error:
+        client.code2session('invalid_code')
+    assert error.value.errcode == 40029
+
+
+def test_busy_is_retried(fake_server):
+    client = make_client(fake_server, max_retries=2)
+    before = fake_server.request_count
+    with pytest.raises(WeChatUnavailable):
+        client.code2session('busy_code')
+    assert fake_server.request_count - before == 3
+    assert client.stats() == {'requests': 3, 'retries': 2, 'failures': 1, 'rejected': 0}
+
+
+def test_non_json_response_is_unavailable(fake_server):
+    client = make_client(fake_server, max_retries=2)
+    with pytest.raises(WeChatUnavailable):
+        client.code2session('html_code')
+    assert client.stats() == {'requests': 1, 'retries': 0, 'failures': 1, 'rejected': 0}
+
+
+def test_read_timeout_is_not_retried(fake_server):
+    # code 只能使用一次，读取超时后不能重试
+    client = make_client(fake_server, read_timeout=0.2, max_retries=2)
+    with pytest.raises(WeChatUnavailable):
+        client.code2session('slow_code')
+    assert client.stats()['requests'] == 1
+
+
+def test_concurrency_limit(fake_server):
+    client = make_client(fake_server, read_timeout=2, max_concurrency=1, acquire_timeout=0.05)
+    thread = threading.Thread(target=client.code2session, args=('slow_hold',))
+    thread.start()
+    try:
+        # 等待第一个请求占用唯一的名额
+        for _ in range(100):
+            if client.stats()['requests']:
+                break
+            threading.Event().wait(0.01)
+        with pytest.raises(WeChatUnavailable):
+            client.code2session('code_2')
+        assert client.stats()['rejected'] == 1
+    finally:
+        thread.join()
+
+
+def test_login_endpoint(fake_server, monkeypatch, database):
+    import app as app_module
+    from app import app, User
+
+    monkeypatch.setenv('DEBUG_MODE', 'false')
+    monkeypatch.setattr(app_module, 'wechat_client', make_client(fake_server))
+    # SQLite 的 BIGINT 主键不会自增，预先创建模拟接口返回的 openid 对应的用户
+    openid = 'fake_' + hashlib.sha256(b'login_code').hexdigest()[:24]
+    database.session.add(User(id=1, openid=openid, nickname='用户'))
+    database.session.commit()
+    client = app.test_client()
+
+    response = client.post('/api/login', json={'code': 'login_code', 'userInfo': {'nickName': '测试'}})
+    assert response.status_code == 200
+    assert response.get_json()['data']['userId'] == 1
+    assert response.get_json()['data']['nickname'] == '测试'
+
+    response = client.post('/api/login', json={'code': 'invalid_login'})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'invalid code'
+
+    response = client.post('/api/login', json={'code': 'busy_login'})
+    assert response.status_code == 503
+
+    # 代理返回的 HTML 错误页同样返回 503，而不是 500
+    response = client.post('/api/login', json={'code': 'html_login'})
+    assert response.status_code == 503